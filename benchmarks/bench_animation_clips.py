@@ -0,0 +1,59 @@
+"""Compare baked keyframe clips with raw per-frame control weights.
+
+Run with ``python -m benchmarks.bench_animation_clips``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from services.avatar_pipeline.models.animation import decode_clip, encode_clip
+from services.avatar_pipeline.rigging.arkit import ARKIT_BLENDSHAPES, control_name
+from services.avatar_pipeline.rigging.clip_baker import CLIP_GENERATORS, bake_clip
+
+
+def best_of(action, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fps", type=float, default=60.0)
+    parser.add_argument("--tolerance", type=float, default=0.005)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    channels = [control_name(name) for name in ARKIT_BLENDSHAPES]
+    print(f"{len(channels)} channels at {args.fps:g} fps, tolerance {args.tolerance}")
+    print(
+        f"{'clip':>6} {'frames':>7} {'keys':>6} {'raw KB':>7} {'json KB':>8} {'clip KB':>8} {'smaller':>8} "
+        f"{'bake ms':>8} {'json load ms':>13} {'clip load ms':>13} {'max err':>8}"
+    )
+    for name, (generator, loop) in CLIP_GENERATORS.items():
+        samples = generator(channels, args.fps)
+        raw_json = json.dumps(samples.tolist())
+        baked = best_of(lambda: bake_clip(name, channels, samples, args.fps, args.tolerance, loop), args.repeats)
+        clip = bake_clip(name, channels, samples, args.fps, args.tolerance, loop)
+        encoded = b"".join(bytes(buffer) for buffer in encode_clip(clip))
+        # Client-side cost to turn the shipped asset into per-frame weights.
+        json_load = best_of(lambda: np.asarray(json.loads(raw_json), dtype=np.float32), args.repeats)
+        clip_load = best_of(lambda: decode_clip(encoded).sample(), args.repeats)
+        error = float(np.abs(clip.sample() - samples).max())
+        print(
+            f"{name:>6} {len(samples):>7} {clip.key_count:>6} {samples.nbytes / 1024:>7.1f} "
+            f"{len(raw_json) / 1024:>8.1f} {len(encoded) / 1024:>8.1f} {samples.nbytes / len(encoded):>7.1f}x "
+            f"{baked * 1e3:>8.2f} {json_load * 1e3:>13.2f} {clip_load * 1e3:>13.2f} {error:>8.4f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
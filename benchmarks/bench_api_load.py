@@ -0,0 +1,254 @@
+"""Load-test the avatar API with N simulated clients doing submit -> poll -> list assets.
+
+By default the router is mounted in a FastAPI app and driven in-process
+through ``httpx.ASGITransport``, against a temporary SQLite database and
+workspace. ``--url`` points the clients at a running server (e.g. ``uvicorn``)
+instead. Each client submits a job, polls ``GET /avatar/jobs/{id}`` until it
+finishes, lists its assets, then thinks for an exponentially distributed
+time before the next cycle.
+
+``--executor pipeline`` (default) runs the real pipeline on the in-process
+``TaskQueue``, warmed with the benchmark's settings through ``start_worker``,
+so the API competes with the workers for CPU like a single-pod deployment.
+``--executor instant`` completes every job at submission with one
+placeholder asset, which isolates the cost of the API and its database
+access (the sizing case for API-only pods).
+
+Reports requests, error rate and p50/p95/p99 latency per endpoint, plus
+end-to-end job latency; ``--output`` also writes them as JSON. Exits with
+status 1 if any job fails or does not finish within ``--job-timeout``.
+
+Run with ``python -m benchmarks.bench_api_load``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+
+SUBMIT = "POST /avatar/jobs"
+POLL = "GET /avatar/jobs/{id}"
+ASSETS = "GET /avatar/jobs/{id}/assets"
+FINISHED = {"SUCCESS", "FAILED"}
+
+
+class LoadStats:
+    """Latencies and outcomes per endpoint, plus submit-to-finished job latency."""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+        self.job_latencies: List[float] = []
+        self.failed_jobs = 0
+        self.timed_out_jobs = 0
+
+    async def request(
+        self, http: httpx.AsyncClient, endpoint: str, method: str, url: str, **kwargs
+    ) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await http.request(method, url, **kwargs)
+        except httpx.HTTPError as exc:
+            self.latencies[endpoint].append(time.perf_counter() - started)
+            self.statuses[endpoint][type(exc).__name__] += 1
+            return None
+        self.latencies[endpoint].append(time.perf_counter() - started)
+        self.statuses[endpoint][str(response.status_code)] += 1
+        return response
+
+    def summary(self, elapsed: float) -> Dict[str, object]:
+        endpoints = {}
+        for endpoint in (SUBMIT, POLL, ASSETS):
+            latencies = self.latencies.get(endpoint, [])
+            statuses = self.statuses.get(endpoint, Counter())
+            errors = sum(count for status, count in statuses.items() if not status.startswith(("2", "3")))
+            endpoints[endpoint] = {
+                "requests": len(latencies),
+                "requests_per_second": len(latencies) / elapsed,
+                "error_rate": errors / len(latencies) if latencies else 0.0,
+                "statuses": dict(statuses),
+                **{f"p{q}_ms": float(np.percentile(latencies, q)) * 1e3 if latencies else 0.0 for q in (50, 95, 99)},
+            }
+        jobs = self.job_latencies
+        return {
+            "seconds": elapsed,
+            "endpoints": endpoints,
+            "jobs": {
+                "completed": len(jobs),
+                "failed": self.failed_jobs,
+                "timed_out": self.timed_out_jobs,
+                "jobs_per_second": len(jobs) / elapsed,
+                **{f"p{q}_s": float(np.percentile(jobs, q)) if jobs else 0.0 for q in (50, 95, 99)},
+            },
+        }
+
+
+def _think(rng: random.Random, mean_ms: float) -> float:
+    return rng.expovariate(1e3 / mean_ms) if mean_ms > 0 else 0.0
+
+
+async def run_client(
+    index: int,
+    http: httpx.AsyncClient,
+    stats: LoadStats,
+    args: argparse.Namespace,
+    deadline: float,
+) -> None:
+    rng = random.Random(args.seed + index)
+    payload = {
+        "user_id": f"load-user-{index % args.users}",
+        "photos": [
+            {"url": f"https://example.com/load_{index}_{photo}.jpg", "width": 512, "height": 512}
+            for photo in range(args.photos)
+        ],
+        "options": {},
+    }
+    cycles = 0
+    while time.perf_counter() < deadline and (args.iterations is None or cycles < args.iterations):
+        cycles += 1
+        submitted = time.perf_counter()
+        response = await stats.request(http, SUBMIT, "POST", "/avatar/jobs", json=payload)
+        if response is None or response.status_code != 201:
+            await asyncio.sleep(_think(rng, args.think_ms))
+            continue
+        job_id = response.json()["id"]
+        state = response.json()["status"]
+        while state not in FINISHED and time.perf_counter() - submitted < args.job_timeout:
+            await asyncio.sleep(args.poll_ms / 1e3)
+            response = await stats.request(http, POLL, "GET", f"/avatar/jobs/{job_id}")
+            if response is not None and response.status_code == 200:
+                state = response.json()["status"]
+        if state == "SUCCESS":
+            stats.job_latencies.append(time.perf_counter() - submitted)
+        elif state in FINISHED:
+            stats.failed_jobs += 1
+        else:
+            stats.timed_out_jobs += 1
+        await stats.request(http, ASSETS, "GET", f"/avatar/jobs/{job_id}/assets")
+        await asyncio.sleep(_think(rng, args.think_ms))
+
+
+def build_in_process_app(root: Path, executor: str, rate_limit: bool) -> FastAPI:
+    """Point the avatar router at a scratch database and workspace and mount it in an app."""
+
+    from services.avatar_pipeline.api.routes import avatar_generation
+    from services.avatar_pipeline.config.settings import Settings
+    from services.avatar_pipeline.persistence.database import Database
+    from services.avatar_pipeline.persistence.models import Base
+
+    settings = Settings(
+        database_url=f"sqlite:///{root}/avatar.db",
+        temp_storage_path=root / "tmp",
+        output_path=root / "output",
+        asset_base_url="http://assets.load",
+        model_allow_synthetic=True,
+        rate_limit_enabled=rate_limit,
+    )
+    avatar_generation.settings = settings
+    avatar_generation.database = Database(settings)
+    avatar_generation.database.create_schema(Base.metadata)
+    avatar_generation.rate_limiter = avatar_generation.TokenBucketLimiter.from_settings(settings)
+
+    if executor == "instant":
+
+        def complete_immediately(job_id: str, settings: Optional[Settings] = settings) -> None:
+            repository = avatar_generation.get_repository()
+            with repository.session_scope() as session:
+                job = repository.get_job_for_update(session, job_id)
+                uri = f"{settings.asset_base_url}/{job_id}.glb"
+                repository.add_asset(session, job, "GLB", uri, {"placeholder": True})
+                repository.mark_success(session, job, output_payload={"assets": {"GLB": {"uri": uri}}})
+
+        avatar_generation.submit_avatar_job = complete_immediately
+    else:
+        from services.avatar_pipeline.jobs.avatar_pipeline_tasks import start_worker
+
+        # Create the process-wide model registry from these settings (synthetic weights allowed)
+        # and spawn the workers before the clients start, as a deployment's startup hook would.
+        start_worker(settings)
+
+    app = FastAPI()
+    app.include_router(avatar_generation.router)
+    return app
+
+
+async def run_load(args: argparse.Namespace, root: Path) -> Dict[str, object]:
+    if args.url:
+        http = httpx.AsyncClient(base_url=args.url, timeout=args.request_timeout)
+    else:
+        app = build_in_process_app(root, args.executor, args.rate_limit)
+        transport = httpx.ASGITransport(app=app)
+        http = httpx.AsyncClient(transport=transport, base_url="http://load.test", timeout=args.request_timeout)
+    stats = LoadStats()
+    async with http:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(run_client(index, http, stats, args, deadline) for index in range(args.clients)))
+        elapsed = time.perf_counter() - started
+    return stats.summary(elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per client count")
+    parser.add_argument("--iterations", type=int, default=None, help="Stop each client after this many cycles")
+    parser.add_argument("--think-ms", type=float, default=500.0, help="Mean think time between cycles")
+    parser.add_argument("--poll-ms", type=float, default=250.0, help="Interval between status polls")
+    parser.add_argument("--photos", type=int, default=1)
+    parser.add_argument("--users", type=int, default=1000, help="Distinct user ids the clients rotate through")
+    parser.add_argument("--executor", choices=("pipeline", "instant"), default="pipeline")
+    parser.add_argument("--rate-limit", action="store_true", help="Keep per-user rate limiting on")
+    parser.add_argument("--job-timeout", type=float, default=120.0)
+    parser.add_argument("--request-timeout", type=float, default=30.0)
+    parser.add_argument("--url", help="Drive a running server instead of the in-process app")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    unfinished = 0
+    print(
+        f"{'clients':>7} {'endpoint':<28} {'requests':>8} {'req/s':>7} {'errors':>7} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    for clients in args.clients:
+        with tempfile.TemporaryDirectory() as tmp:
+            summary = asyncio.run(run_load(argparse.Namespace(**{**vars(args), "clients": clients}), Path(tmp)))
+        results.append({"clients": clients, **summary})
+        for endpoint, entry in summary["endpoints"].items():
+            print(
+                f"{clients:>7} {endpoint:<28} {entry['requests']:>8} {entry['requests_per_second']:>7.1f} "
+                f"{entry['error_rate']:>7.1%} {entry['p50_ms']:>8.1f} {entry['p95_ms']:>8.1f} {entry['p99_ms']:>8.1f}"
+            )
+        jobs = summary["jobs"]
+        unfinished += jobs["failed"] + jobs["timed_out"]
+        print(
+            f"{clients:>7} {'jobs (submit -> finished)':<28} {jobs['completed']:>8} {jobs['jobs_per_second']:>7.2f} "
+            f"{jobs['failed'] + jobs['timed_out']:>7} {jobs['p50_s'] * 1e3:>8.0f} {jobs['p95_s'] * 1e3:>8.0f} "
+            f"{jobs['p99_s'] * 1e3:>8.0f}"
+        )
+
+    if args.output:
+        config = {key: value for key, value in vars(args).items() if key != "output"}
+        args.output.write_text(json.dumps({"config": config, "results": results}, indent=2, default=str))
+        print(f"Results written to {args.output}")
+    if unfinished:
+        print(f"{unfinished} job(s) failed or timed out.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
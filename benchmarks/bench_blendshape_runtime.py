@@ -0,0 +1,88 @@
+"""Measure stream-time blendshape evaluation throughput for one avatar on one core.
+
+Compares a per-frame dense reference (every shape's full delta array
+accumulated in turn) with the runtime's batched product and its
+incremental mode, where a few controls change each frame.
+
+Run with ``python -m benchmarks.bench_blendshape_runtime``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from services.avatar_pipeline.models.blendshapes import BlendshapeSet
+from services.avatar_pipeline.models.mesh import Mesh
+from services.avatar_pipeline.reconstruction.model_registry import synthesize_deca_weights
+from services.avatar_pipeline.rigging.arkit import ARKIT_BLENDSHAPES, arkit_deltas
+from services.avatar_pipeline.rigging.blendshape_runtime import BlendshapeRuntime
+
+
+def timed(label: str, frames: int, action) -> None:
+    started = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - started
+    print(f"{label:>28} {elapsed / frames * 1e3:>9.3f} {frames / elapsed:>10.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vertices", type=int, nargs="+", default=[9_216, 50_000])
+    parser.add_argument("--frames", type=int, default=1024)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--changed", type=int, default=4, help="controls changed per frame in incremental mode")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    for vertices in args.vertices:
+        side = int(np.ceil(np.sqrt(vertices)))
+        weights = synthesize_deca_weights("bench", grid=(side, side), n_shape=1, n_expression=1, feature_size=1)
+        mesh = Mesh(weights["template_vertices"], weights["faces"], uvs=weights["uvs"])
+        shapes = BlendshapeSet.from_dense(ARKIT_BLENDSHAPES, arkit_deltas(mesh))
+        runtime = BlendshapeRuntime(mesh.vertices, shapes, max_frames=args.batch)
+        frames = rng.random((args.frames, shapes.shape_count), dtype=np.float32)
+        dense = shapes.to_dense()
+
+        print(
+            f"{mesh.vertex_count} vertices, {shapes.shape_count} shapes, "
+            f"{len(runtime.active) / mesh.vertex_count:.0%} of vertices driven by shapes"
+        )
+        print(f"{'mode':>28} {'ms/frame':>9} {'frames/s':>10}")
+
+        def reference() -> None:
+            for frame in frames[: args.frames // 8]:
+                positions = mesh.vertices.copy()
+                for shape, weight in enumerate(frame):
+                    positions += weight * dense[shape]
+
+        def single() -> None:
+            for frame in frames:
+                runtime.evaluate(frame)
+
+        def batched() -> None:
+            for start in range(0, args.frames, args.batch):
+                runtime.evaluate(frames[start : start + args.batch])
+
+        live = np.repeat(frames[:1], args.frames, axis=0)
+        for index in range(1, args.frames):
+            live[index] = live[index - 1]
+            changed = rng.choice(shapes.shape_count, args.changed, replace=False)
+            live[index, changed] = rng.random(args.changed, dtype=np.float32)
+
+        def incremental() -> None:
+            runtime.reset(live[0])
+            for frame in live[1:]:
+                runtime.update(frame)
+
+        timed("dense per-shape reference", args.frames // 8, reference)
+        timed("evaluate, 1 frame", args.frames, single)
+        timed(f"evaluate, {args.batch}-frame batches", args.frames, batched)
+        timed(f"update, {args.changed} controls changed", args.frames - 1, incremental)
+        print()
+
+
+if __name__ == "__main__":
+    main()
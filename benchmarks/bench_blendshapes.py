@@ -0,0 +1,77 @@
+"""Compare sparse quantized blendshape storage against dense deltas for 52 ARKit shapes.
+
+Run with ``python -m benchmarks.bench_blendshapes``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from services.avatar_pipeline.models.blendshapes import BlendshapeSet, read_blendshapes
+from services.avatar_pipeline.models.mesh import Mesh
+from services.avatar_pipeline.reconstruction.model_registry import synthesize_deca_weights
+from services.avatar_pipeline.rigging.arkit import ARKIT_BLENDSHAPES, arkit_deltas
+
+
+def best_of(action: Callable[[], object], repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vertices", type=int, default=50_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    side = int(np.ceil(np.sqrt(args.vertices)))
+    weights = synthesize_deca_weights("bench", grid=(side, side), n_shape=1, n_expression=1, feature_size=1)
+    mesh = Mesh(weights["template_vertices"], weights["faces"], uvs=weights["uvs"])
+    deltas = arkit_deltas(mesh)
+    shapes = BlendshapeSet.from_dense(ARKIT_BLENDSHAPES, deltas)
+    error = float(np.abs(shapes.to_dense() - deltas).max())
+    print(
+        f"{shapes.shape_count} shapes on {mesh.vertex_count} vertices; "
+        f"{shapes.entry_count / (shapes.shape_count * mesh.vertex_count):.1%} of vertex slots stored, "
+        f"max error {error:.2e} (delta range {np.abs(deltas).max():.2e})"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        json_path, npy_path, ablend_path = root / "shapes.json", root / "shapes.npy", root / "shapes.ablend"
+        dense = {name: deltas[index].tolist() for index, name in enumerate(ARKIT_BLENDSHAPES)}
+        cases = [
+            (
+                "dense json",
+                json_path,
+                lambda: json_path.write_text(json.dumps(dense)),
+                lambda: json.loads(json_path.read_text()),
+            ),
+            ("dense npy", npy_path, lambda: np.save(npy_path, deltas), lambda: np.load(npy_path)),
+            ("sparse ablend", ablend_path, lambda: shapes.save(ablend_path), lambda: read_blendshapes(ablend_path)),
+        ]
+        # "smaller" is relative to the dense float32 deltas in memory.
+        print(f"{'format':>14} {'size KB':>9} {'write ms':>9} {'read ms':>8} {'smaller':>8}")
+        for label, path, write, read in cases:
+            written = best_of(write, args.repeats)
+            loaded = best_of(read, args.repeats)
+            size = path.stat().st_size
+            print(
+                f"{label:>14} {size / 1024:>9.0f} {written * 1e3:>9.2f} {loaded * 1e3:>8.2f} "
+                f"{shapes.dense_nbytes / size:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
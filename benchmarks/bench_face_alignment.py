@@ -0,0 +1,56 @@
+"""Measure batched face alignment time for jobs of different sizes.
+
+Run with ``python -m benchmarks.bench_face_alignment``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from services.avatar_pipeline.artifacts.store import InMemoryArtifactStore
+from services.avatar_pipeline.models.pipeline import Photo
+from services.avatar_pipeline.preprocess.face_alignment import FaceAlignmentPreprocessor, synthesize_face
+
+
+def make_photos(directory: Path, count: int, size: int) -> list:
+    photos = []
+    for index in range(count):
+        photo = Photo(url=f"https://bench.local/{index}.jpg", width=size, height=size)
+        path = directory / f"{index}.jpg"
+        Image.fromarray(synthesize_face(photo, size)).save(path, quality=90)
+        photo.local_path = path
+        photos.append(photo)
+    return photos
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 5, 20, 100])
+    parser.add_argument("--photo-size", type=int, default=1024)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    preprocessor = FaceAlignmentPreprocessor()
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        photos = make_photos(root, max(args.counts), args.photo_size)
+        preprocessor.align(photos[:1], InMemoryArtifactStore(root / "warmup"))
+        baseline = None
+        print(f"{'photos':>6} {'total ms':>10} {'ms/photo':>10} {'vs linear':>10}")
+        for count in args.counts:
+            best = float("inf")
+            for repeat in range(args.repeats):
+                started = time.perf_counter()
+                preprocessor.align(photos[:count], InMemoryArtifactStore(root / f"run_{count}_{repeat}"))
+                best = min(best, time.perf_counter() - started)
+            baseline = baseline or best / count
+            print(f"{count:>6} {best * 1000:>10.1f} {best * 1000 / count:>10.2f} {best / (baseline * count):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
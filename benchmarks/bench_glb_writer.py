@@ -0,0 +1,84 @@
+"""Compare GLB writing against a plain disk copy of a file of the same size.
+
+Run with ``python -m benchmarks.bench_glb_writer``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from services.avatar_pipeline.models.mesh import Mesh, read_mesh
+from services.avatar_pipeline.writers.gltf_binary import encode_glb, write_buffers
+
+
+def grid_mesh(side: int) -> Mesh:
+    u, v = np.meshgrid(np.linspace(0, 1, side, dtype=np.float32), np.linspace(0, 1, side, dtype=np.float32))
+    vertices = np.stack([u, v, 0.1 * np.sin(6 * u) * np.cos(6 * v)], axis=-1).reshape(-1, 3)
+    corner = (np.arange(side - 1)[:, None] * side + np.arange(side - 1)[None, :]).reshape(-1)
+    faces = np.concatenate(
+        [
+            np.stack([corner, corner + 1, corner + side], axis=1),
+            np.stack([corner + 1, corner + side + 1, corner + side], axis=1),
+        ]
+    )
+    return Mesh(vertices, faces, uvs=np.stack([u, v], axis=-1).reshape(-1, 2))
+
+
+def measure(action: Callable[[], object], repeats: int) -> tuple:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    action()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vertices", type=int, default=2_000_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    side = int(np.ceil(np.sqrt(args.vertices)))
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        grid_mesh(side).save(root / "source.amesh")
+        mesh = read_mesh(root / "source.amesh")
+        print(f"{mesh.vertex_count} vertices, {mesh.face_count} faces, {mesh.nbytes / 2**20:.1f} MiB of arrays")
+        print(f"{'case':>16} {'MiB':>8} {'ms':>8} {'MiB/s':>8} {'peak alloc MiB':>15}")
+
+        def copy() -> None:
+            shutil.copyfile(root / "plain.glb", root / "copy.glb")
+
+        def concatenated() -> None:
+            (root / "joined.glb").write_bytes(b"".join(bytes(buffer) for buffer in encode_glb(mesh)))
+
+        cases = [
+            ("glb writev", "plain", lambda: write_buffers(root / "plain.glb", encode_glb(mesh))),
+            ("glb quantized", "quantized", lambda: write_buffers(root / "quantized.glb", encode_glb(mesh, quantize=True))),
+            ("glb concatenated", "joined", concatenated),
+            ("disk copy", "copy", copy),
+        ]
+        for name, output, action in cases:
+            elapsed, peak = measure(action, args.repeats)
+            size = (root / f"{output}.glb").stat().st_size
+            print(
+                f"{name:>16} {size / 2**20:>8.1f} {elapsed * 1e3:>8.1f} {size / 2**20 / elapsed:>8.0f} "
+                f"{peak / 2**20:>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
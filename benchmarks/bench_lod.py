@@ -0,0 +1,57 @@
+"""Time quadric-error LOD generation and report how much of each level survives.
+
+Run with ``python -m benchmarks.bench_lod``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from services.avatar_pipeline.lod.lod_generator import LodGenerator
+from services.avatar_pipeline.models.blendshapes import BlendshapeSet, read_blendshapes
+from services.avatar_pipeline.models.mesh import Mesh, read_mesh
+from services.avatar_pipeline.reconstruction.model_registry import synthesize_deca_weights
+from services.avatar_pipeline.rigging.arkit import ARKIT_BLENDSHAPES, arkit_deltas
+
+
+def surface_area(mesh: Mesh) -> float:
+    corners = mesh.vertices[mesh.indices]
+    return float(np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]), axis=1).sum() / 2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vertices", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--ratios", type=float, nargs="+", default=[0.5, 0.25, 0.125])
+    args = parser.parse_args()
+
+    generator = LodGenerator(args.ratios)
+    print(f"{'source':>8} {'lod':>4} {'faces':>8} {'vertices':>9} {'area %':>7} {'shape KB':>9}")
+    for target in args.vertices:
+        side = int(np.ceil(np.sqrt(target)))
+        weights = synthesize_deca_weights("bench", grid=(side, side), n_shape=1, n_expression=1, feature_size=1)
+        mesh = Mesh(weights["template_vertices"], weights["faces"], uvs=weights["uvs"])
+        shapes = BlendshapeSet.from_dense(ARKIT_BLENDSHAPES, arkit_deltas(mesh))
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            started = time.perf_counter()
+            levels = generator.generate("bench", mesh, root, shapes)
+            elapsed = time.perf_counter() - started
+            area = surface_area(mesh)
+            for level in levels:
+                lod = read_mesh(level.mesh_path)
+                lod_shapes = read_blendshapes(level.blendshape_path)
+                print(
+                    f"{mesh.vertex_count:>8} {level.level:>4} {lod.face_count:>8} {lod.vertex_count:>9} "
+                    f"{surface_area(lod) / area:>7.1%} {lod_shapes.nbytes / 1024:>9.1f}"
+                )
+            print(f"{'':>8} generated {len(levels) - 1} levels in {elapsed * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
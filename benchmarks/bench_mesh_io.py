@@ -0,0 +1,103 @@
+"""Compare the binary mesh format against text OBJ for a 50k-vertex mesh.
+
+Run with ``python -m benchmarks.bench_mesh_io``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+import numpy as np
+
+from services.avatar_pipeline.models.mesh import Mesh, read_mesh, write_mesh
+from services.avatar_pipeline.reconstruction.model_registry import synthesize_deca_weights
+
+
+def make_mesh(vertices: int) -> Mesh:
+    side = int(np.ceil(np.sqrt(vertices)))
+    weights = synthesize_deca_weights("bench", grid=(side, side), n_shape=1, n_expression=1, feature_size=1)
+    return Mesh(weights["template_vertices"], weights["faces"], uvs=weights["uvs"], name="bench")
+
+
+def write_obj(path: Path, mesh: Mesh) -> None:
+    with path.open("w") as handle:
+        for x, y, z in mesh.vertices.tolist():
+            handle.write(f"v {x:.6f} {y:.6f} {z:.6f}\n")
+        for x, y, z in mesh.normals.tolist():
+            handle.write(f"vn {x:.6f} {y:.6f} {z:.6f}\n")
+        for u, v in mesh.uvs.tolist():
+            handle.write(f"vt {u:.6f} {v:.6f}\n")
+        for a, b, c in (mesh.indices + 1).tolist():
+            handle.write(f"f {a}/{a}/{a} {b}/{b}/{b} {c}/{c}/{c}\n")
+
+
+def read_obj(path: Path) -> Tuple[List[List[float]], List[List[float]], List[List[float]], List[List[int]]]:
+    vertices, normals, uvs, faces = [], [], [], []
+    with path.open() as handle:
+        for line in handle:
+            tag, *values = line.split()
+            if tag == "v":
+                vertices.append([float(value) for value in values])
+            elif tag == "vn":
+                normals.append([float(value) for value in values])
+            elif tag == "vt":
+                uvs.append([float(value) for value in values])
+            elif tag == "f":
+                faces.append([int(value.split("/")[0]) - 1 for value in values])
+    return vertices, normals, uvs, faces
+
+
+def measure(action: Callable[[], object], repeats: int) -> Tuple[float, int]:
+    """Best wall time over ``repeats`` runs and peak traced allocation of one run."""
+
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    result = action()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vertices", type=int, default=50_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    mesh = make_mesh(args.vertices)
+    print(f"mesh: {mesh.vertex_count} vertices, {mesh.face_count} faces, {mesh.nbytes / 1e6:.2f} MB of arrays")
+    with tempfile.TemporaryDirectory() as tmp:
+        obj_path = Path(tmp) / "mesh.obj"
+        binary_path = Path(tmp) / "mesh.amesh"
+
+        def touch(loaded: Mesh) -> Mesh:
+            # Reading every vertex forces the mapped pages in, as a consumer would.
+            loaded.vertices.sum()
+            return loaded
+
+        rows = [
+            ("text OBJ", measure(lambda: write_obj(obj_path, mesh), args.repeats),
+             measure(lambda: read_obj(obj_path), args.repeats), obj_path),
+            ("binary", measure(lambda: write_mesh(binary_path, mesh), args.repeats),
+             measure(lambda: touch(read_mesh(binary_path)), args.repeats), binary_path),
+        ]
+        print(f"{'format':>9} {'bytes':>11} {'write ms':>9} {'read ms':>9} {'read peak MB':>13}")
+        for name, (write_s, _), (read_s, read_peak), path in rows:
+            print(
+                f"{name:>9} {path.stat().st_size:>11} {write_s * 1000:>9.2f} "
+                f"{read_s * 1000:>9.2f} {read_peak / 1e6:>13.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Compare bytes (and time) to first render of the progressive mesh stream against a full GLB download.
+
+A GLB viewer has to download the whole file before drawing, while a
+stream viewer draws after the header and base chunk. Both sides carry
+geometry only (no texture or morph targets), so the comparison is about
+the mesh encoding. Times assume the given link speed plus measured decode
+time.
+
+Run with ``python -m benchmarks.bench_mesh_stream``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+
+from services.avatar_pipeline.models.mesh import Mesh
+from services.avatar_pipeline.reconstruction.model_registry import synthesize_deca_weights
+from services.avatar_pipeline.writers.gltf_binary import encode_glb, read_glb
+from services.avatar_pipeline.writers.mesh_stream import MeshStreamDecoder, encode_mesh_stream
+
+
+def _joined(buffers) -> bytes:
+    return b"".join(bytes(memoryview(buffer).cast("B")) for buffer in buffers)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--vertices", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--mbit-per-second", type=float, default=4.0, help="Viewer downlink")
+    args = parser.parse_args()
+    bytes_per_second = args.mbit_per_second * 1e6 / 8
+
+    print(
+        f"{'vertices':>8} {'format':>14} {'bytes':>10} {'first render':>13} {'encode ms':>10} "
+        f"{'decode ms':>10} {'first frame ms':>15}"
+    )
+    for target in args.vertices:
+        side = int(np.ceil(np.sqrt(target)))
+        weights = synthesize_deca_weights("bench", grid=(side, side), n_shape=1, n_expression=1, feature_size=1)
+        mesh = Mesh(weights["template_vertices"], weights["faces"], uvs=weights["uvs"])
+
+        for label, quantize in (("glb", False), ("glb quantized", True)):
+            started = time.perf_counter()
+            data = _joined(encode_glb(mesh, None, None, quantize))
+            encode = time.perf_counter() - started
+            started = time.perf_counter()
+            read_glb(data)
+            decode = time.perf_counter() - started
+            first = len(data) / bytes_per_second + decode
+            print(
+                f"{mesh.vertex_count:>8} {label:>14} {len(data):>10} {len(data):>13} {encode * 1e3:>10.1f} "
+                f"{decode * 1e3:>10.2f} {first * 1e3:>15.1f}"
+            )
+
+        started = time.perf_counter()
+        stream = encode_mesh_stream(mesh)
+        encode = time.perf_counter() - started
+        data = _joined(stream.buffers)
+        decoder = MeshStreamDecoder()
+        started = time.perf_counter()
+        decoder.feed(data[: stream.first_render_bytes])
+        decoder.mesh()
+        base_decode = time.perf_counter() - started
+        started = time.perf_counter()
+        decoder.feed(data[stream.first_render_bytes :])
+        decoder.mesh()
+        rest_decode = time.perf_counter() - started
+        first = stream.first_render_bytes / bytes_per_second + base_decode
+        print(
+            f"{mesh.vertex_count:>8} {'pmesh':>14} {len(data):>10} {stream.first_render_bytes:>13} "
+            f"{encode * 1e3:>10.1f} {(base_decode + rest_decode) * 1e3:>10.2f} {first * 1e3:>15.1f}"
+        )
+        for level in stream.levels:
+            arrival = level["stream_bytes"] / bytes_per_second
+            print(
+                f"{'':>8} {'  level ' + str(level['level']):>14} {level['face_count']:>10} faces at "
+                f"{level['stream_bytes']:>9} bytes ({arrival * 1e3:.0f} ms)"
+            )
+
+
+if __name__ == "__main__":
+    main()
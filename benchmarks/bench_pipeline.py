@@ -0,0 +1,268 @@
+"""End-to-end pipeline throughput: jobs/sec, job latency, per-stage latency, DB statements and bytes per job.
+
+Each configuration (worker count x photos per job) gets a fresh SQLite
+database and file workspace. Jobs are created up front, then submitted
+together to a ``TaskQueue`` whose workers run the same task body as
+``run_avatar_pipeline`` (``build_default_service(settings).run``). Job latency
+runs from submission to completion, so it includes the queue wait. One
+warm-up job per configuration loads the model weights and is not counted.
+
+Results are printed and written as JSON (``--output``). When a baseline
+exists (``--baseline``, default ``benchmarks/baselines/bench_pipeline.json``),
+the machine-independent metrics (SQL statements and bytes written per job)
+are compared with it and the run exits with status 1 if any got worse by
+more than ``--tolerance``. Throughput and latency depend on the host, so
+they are only compared with ``--compare-timings`` and only when the
+baseline was recorded in the same environment (Python, NumPy, platform
+and CPU count). ``--update-baseline`` stores this run as the new baseline.
+
+Run with ``python -m benchmarks.bench_pipeline``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services.avatar_pipeline.config.settings import Settings
+from services.avatar_pipeline.jobs.avatar_pipeline_tasks import TaskQueue, run_avatar_pipeline
+from services.avatar_pipeline.persistence.database import Database
+from services.avatar_pipeline.persistence.models import Base, JobStatus
+from services.avatar_pipeline.persistence.repository import AvatarJobRepository
+
+DEFAULT_BASELINE = Path(__file__).with_name("baselines") / "bench_pipeline.json"
+# Metric name -> +1 if larger is worse, -1 if smaller is worse.
+DIRECTIONS = {
+    "db_statements_per_job": 1,
+    "bytes_written_per_job": 1,
+}
+TIMING_DIRECTIONS = {
+    "latency_p50_s": 1,
+    "latency_p95_s": 1,
+    "latency_p99_s": 1,
+    "jobs_per_second": -1,
+}
+
+
+class StatementCounter:
+    """Counts SQL statements sent by every engine in the process."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "StatementCounter":
+        event.listen(Engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        event.remove(Engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args) -> None:
+        with self._lock:
+            self.count += 1
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def _bytes_under(*roots: Path) -> int:
+    """Bytes of the distinct files under ``roots``; hardlinks into the content store count once."""
+
+    sizes = {}
+    for root in roots:
+        if not root.exists():
+            continue
+        for path in root.rglob("*"):
+            if path.is_file():
+                stat = path.stat()
+                sizes[(stat.st_dev, stat.st_ino)] = stat.st_size
+    return sum(sizes.values())
+
+
+def _environment() -> Dict[str, object]:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def _photos(count: int) -> List[Dict[str, object]]:
+    return [{"url": f"https://example.com/photo_{index}.jpg", "width": 512, "height": 512} for index in range(count)]
+
+
+def run_configuration(root: Path, workers: int, photos: int, jobs: int) -> Dict[str, object]:
+    settings = Settings(
+        database_url=f"sqlite:///{root}/avatar.db",
+        temp_storage_path=root / "tmp",
+        output_path=root / "output",
+        asset_base_url="http://assets.bench",
+        model_allow_synthetic=True,
+    )
+    Database(settings).create_schema(Base.metadata)
+    repository = AvatarJobRepository(Database(settings).SessionLocal)
+    queue = TaskQueue(max_workers=workers)
+
+    @queue.task("avatar_pipeline.run")
+    def run(job_id: str) -> None:
+        run_avatar_pipeline(job_id, settings=settings)
+
+    run.delay(job_id=repository.create_job("warmup", {"photos": _photos(photos)}).id).result()
+    job_ids = [repository.create_job(f"user-{index}", {"photos": _photos(photos)}).id for index in range(jobs)]
+    workspace_before = _bytes_under(settings.temp_storage_path, settings.output_path)
+    finished: Dict[str, float] = {}
+
+    with StatementCounter() as statements:
+        started = time.perf_counter()
+        handles = []
+        for job_id in job_ids:
+            submitted = time.perf_counter()
+            handle = run.delay(job_id=job_id)
+            handle.future.add_done_callback(
+                lambda _future, job_id=job_id, submitted=submitted: finished.__setitem__(
+                    job_id, time.perf_counter() - submitted
+                )
+            )
+            handles.append(handle)
+        for handle in handles:
+            handle.result()
+        elapsed = time.perf_counter() - started
+    queue.shutdown()
+
+    failed = [job_id for job_id in job_ids if repository.get_job(job_id).status is not JobStatus.SUCCESS]
+    latencies = [finished[job_id] for job_id in job_ids]
+    stage_seconds: Dict[str, List[float]] = {}
+    for job_id in job_ids:
+        for stage_run in repository.list_stage_runs(job_id):
+            stage_seconds.setdefault(stage_run.stage, []).append(stage_run.duration_seconds)
+    return {
+        "workers": workers,
+        "photos": photos,
+        "jobs": jobs,
+        "failed_jobs": len(failed),
+        "seconds": elapsed,
+        "jobs_per_second": jobs / elapsed,
+        "latency_p50_s": _percentile(latencies, 50),
+        "latency_p95_s": _percentile(latencies, 95),
+        "latency_p99_s": _percentile(latencies, 99),
+        "db_statements_per_job": statements.count / jobs,
+        "bytes_written_per_job": (_bytes_under(settings.temp_storage_path, settings.output_path) - workspace_before)
+        / jobs,
+        "stages": {
+            stage: {"p50_s": _percentile(values, 50), "p95_s": _percentile(values, 95)}
+            for stage, values in stage_seconds.items()
+        },
+    }
+
+
+def compare(
+    results: List[Dict[str, object]],
+    baseline: Dict[str, object],
+    tolerance: float,
+    timings: bool = False,
+) -> List[str]:
+    """Describe every metric that got worse than the baseline by more than ``tolerance``.
+
+    Timing metrics are only included with ``timings``.
+    """
+
+    directions = {**DIRECTIONS, **TIMING_DIRECTIONS} if timings else DIRECTIONS
+    previous = {(entry["workers"], entry["photos"]): entry for entry in baseline.get("results", [])}
+    regressions = []
+    for entry in results:
+        reference = previous.get((entry["workers"], entry["photos"]))
+        if reference is None:
+            continue
+        for metric, direction in directions.items():
+            old, new = reference.get(metric), entry[metric]
+            if not old:
+                continue
+            change = (new - old) / old
+            if change * direction > tolerance:
+                regressions.append(
+                    f"workers={entry['workers']} photos={entry['photos']} {metric}: {old:.4g} -> {new:.4g} "
+                    f"({change:+.0%})"
+                )
+        if entry["failed_jobs"]:
+            regressions.append(f"workers={entry['workers']} photos={entry['photos']}: {entry['failed_jobs']} jobs failed")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--photos", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--jobs", type=int, default=6, help="Measured jobs per configuration")
+    parser.add_argument("--output", type=Path, default=Path("bench_pipeline_results.json"))
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression per metric")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument(
+        "--compare-timings",
+        action="store_true",
+        help="Also compare throughput and latency when the baseline was recorded in this environment",
+    )
+    args = parser.parse_args()
+
+    results = []
+    print(
+        f"{'workers':>7} {'photos':>6} {'jobs/s':>7} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7} "
+        f"{'stmts/job':>9} {'KiB/job':>9}"
+    )
+    for workers in args.workers:
+        for photos in args.photos:
+            with tempfile.TemporaryDirectory() as tmp:
+                entry = run_configuration(Path(tmp), workers, photos, args.jobs)
+            results.append(entry)
+            print(
+                f"{workers:>7} {photos:>6} {entry['jobs_per_second']:>7.2f} {entry['latency_p50_s']:>7.2f} "
+                f"{entry['latency_p95_s']:>7.2f} {entry['latency_p99_s']:>7.2f} "
+                f"{entry['db_statements_per_job']:>9.1f} {entry['bytes_written_per_job'] / 1024:>9.0f}"
+            )
+            for stage, timing in entry["stages"].items():
+                print(f"{'':>15} {stage:<22} p50 {timing['p50_s'] * 1e3:>8.1f} ms  p95 {timing['p95_s'] * 1e3:>8.1f} ms")
+
+    report = {
+        "environment": _environment(),
+        "config": {"jobs": args.jobs},
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f"Baseline updated at {args.baseline}")
+    elif args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        timings = args.compare_timings
+        if timings and baseline.get("environment") != report["environment"]:
+            print(f"Skipping timing comparison: {args.baseline} was recorded in {baseline.get('environment')}.")
+            timings = False
+        regressions = compare(results, baseline, args.tolerance, timings)
+        if regressions:
+            print(f"Regressions against {args.baseline}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Measure token-bucket check throughput.
+
+Run with ``python -m benchmarks.bench_rate_limiter``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from services.avatar_pipeline.api.rate_limit import (
+    InMemoryRateLimitBackend,
+    InMemorySharedStore,
+    SharedRateLimitBackend,
+    TokenBucketLimiter,
+)
+
+TARGET_CHECKS_PER_SECOND = 50_000
+
+
+def measure(limiter: TokenBucketLimiter, checks: int, users: int) -> float:
+    keys = [f"user-{index}" for index in range(users)]
+    started = time.perf_counter()
+    for index in range(checks):
+        limiter.check(keys[index % users])
+    return checks / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--checks", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    args = parser.parse_args()
+
+    backends = {
+        "in-memory": InMemoryRateLimitBackend(),
+        "shared (local stand-in)": SharedRateLimitBackend(InMemorySharedStore()),
+    }
+    for name, backend in backends.items():
+        limiter = TokenBucketLimiter(burst=10, refill_per_second=0.5, backend=backend)
+        rate = measure(limiter, args.checks, args.users)
+        verdict = "ok" if rate >= TARGET_CHECKS_PER_SECOND else "BELOW TARGET"
+        print(f"{name:<24} {rate:>12,.0f} checks/sec  {1e6 / rate:6.2f} us/check  [{verdict}]")
+
+
+if __name__ == "__main__":
+    main()
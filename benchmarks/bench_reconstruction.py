@@ -0,0 +1,65 @@
+"""Measure how batched DECA reconstruction scales with image count on the CPU.
+
+Run with ``python -m benchmarks.bench_reconstruction``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from services.avatar_pipeline.reconstruction.deca_runner import DecaRunner, pool_features
+from services.avatar_pipeline.reconstruction.model_registry import ModelRegistry
+
+
+def per_image_reference(runner: DecaRunner, images: np.ndarray) -> None:
+    """Unbatched equivalent: encode and regress one image at a time."""
+
+    model = runner.load_model()
+    n_shape = model["shape_basis"].shape[0]
+    shapes, expressions = [], []
+    for image in images:
+        code = np.tanh(pool_features(image[None], 32) @ model["encoder"] + model["encoder_bias"])[0]
+        shapes.append(code[:n_shape])
+        expressions.append(code[n_shape:])
+    template = model["template_vertices"]
+    neutral = template + (np.mean(shapes, axis=0) @ model["shape_basis"]).reshape(template.shape)
+    neutral + (np.mean(expressions, axis=0) @ model["expression_basis"]).reshape(template.shape)
+
+
+def best_of(repeats: int, func, *args) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 5, 20, 100, 400])
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--image-size", type=int, default=256)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    runner = DecaRunner(Path("./models/deca"), registry=ModelRegistry(allow_synthetic=True), batch_size=args.batch_size)
+    runner.load_model()
+    rng = np.random.default_rng(0)
+    images = rng.integers(0, 256, size=(max(args.counts), args.image_size, args.image_size, 3), dtype=np.uint8)
+
+    print(f"batch size {args.batch_size}, {args.image_size}px crops")
+    print(f"{'images':>6} {'batched ms':>11} {'ms/image':>9} {'per-image ms':>13}")
+    for count in args.counts:
+        subset = images[:count]
+        batched = best_of(args.repeats, runner.reconstruct_batch, subset)
+        looped = best_of(args.repeats, per_image_reference, runner, subset)
+        print(f"{count:>6} {batched * 1000:>11.2f} {batched * 1000 / count:>9.3f} {looped * 1000:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
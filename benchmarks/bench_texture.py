@@ -0,0 +1,62 @@
+"""Measure texture baking throughput and memory for several texture resolutions.
+
+Run with ``python -m benchmarks.bench_texture``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import resource
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from services.avatar_pipeline.artifacts.store import InMemoryArtifactStore
+from services.avatar_pipeline.models.mesh import Mesh
+from services.avatar_pipeline.models.pipeline import Photo
+from services.avatar_pipeline.preprocess.face_alignment import FaceAlignmentPreprocessor
+from services.avatar_pipeline.reconstruction.model_registry import synthesize_deca_weights
+from services.avatar_pipeline.textures.texture_engine import TextureEngine
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resolutions", type=int, nargs="+", default=[1024, 2048, 4096])
+    parser.add_argument("--views", type=int, default=5)
+    parser.add_argument("--tile-size", type=int, default=256)
+    args = parser.parse_args()
+
+    weights = synthesize_deca_weights("bench")
+    mesh = Mesh(weights["template_vertices"], weights["faces"], uvs=weights["uvs"])
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        photos = [Photo(url=f"https://bench.local/{index}.jpg", width=1024, height=1024) for index in range(args.views)]
+        aligned = FaceAlignmentPreprocessor().align(photos, InMemoryArtifactStore(root))
+        images = [image.pixels for image in aligned]
+        landmarks = [image.landmarks for image in aligned]
+
+        print(f"{args.views} views, {mesh.vertex_count} vertices, {args.tile_size}px tiles")
+        print(f"{'texels':>7} {'bake s':>8} {'Mtexel/s':>9} {'png s':>7} {'traced MB':>10} {'max RSS MB':>11}")
+        for resolution in args.resolutions:
+            engine = TextureEngine(resolution=resolution, tile_size=args.tile_size)
+            engine.uv_raster(mesh)
+            tracemalloc.start()
+            started = time.perf_counter()
+            pyramid = engine.bake(images, landmarks, mesh, spill_dir=root / f"mips_{resolution}")
+            baked = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            started = time.perf_counter()
+            pyramid.save(root / f"albedo_{resolution}.png")
+            encoded = time.perf_counter() - started
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            print(
+                f"{resolution:>7} {baked:>8.2f} {resolution * resolution / baked / 1e6:>9.2f} "
+                f"{encoded:>7.2f} {peak / 1e6:>10.1f} {max_rss:>11.1f}"
+            )
+            del pyramid
+
+
+if __name__ == "__main__":
+    main()
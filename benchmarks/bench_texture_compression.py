@@ -0,0 +1,108 @@
+"""Compare packaged PNG albedo textures with block-compressed KTX2 output.
+
+Load time is what a client pays before the texture is GPU-ready: PNG is
+decoded and its mip chain rebuilt, KTX2 levels are read and inflated.
+GPU MB is the resident size of the full mip chain (RGBA8 for PNG).
+
+Run with ``python -m benchmarks.bench_texture_compression``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from services.avatar_pipeline.artifacts.store import InMemoryArtifactStore
+from services.avatar_pipeline.models.mesh import Mesh
+from services.avatar_pipeline.models.pipeline import Photo
+from services.avatar_pipeline.preprocess.face_alignment import FaceAlignmentPreprocessor
+from services.avatar_pipeline.reconstruction.model_registry import synthesize_deca_weights
+from services.avatar_pipeline.textures.block_compression import DECODERS
+from services.avatar_pipeline.textures.ktx2 import read_ktx2
+from services.avatar_pipeline.textures.pyramid import TexturePyramid
+from services.avatar_pipeline.textures.texture_compressor import TextureCompressor
+from services.avatar_pipeline.textures.texture_engine import TextureEngine
+
+
+def _best_of(repeats: int, func) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def _psnr(reference: np.ndarray, decoded: np.ndarray) -> float:
+    error = np.mean((reference.astype(np.float64) - decoded[..., :3]) ** 2)
+    return float("inf") if error == 0 else 10 * np.log10(255.0**2 / error)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--resolutions", type=int, nargs="+", default=[1024, 2048])
+    parser.add_argument("--formats", nargs="+", default=["bc1", "bc3", "bc7"])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    weights = synthesize_deca_weights("bench")
+    mesh = Mesh(weights["template_vertices"], weights["faces"], uvs=weights["uvs"])
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        photos = [Photo(url=f"https://bench.local/{index}.jpg", width=1024, height=1024) for index in range(5)]
+        aligned = FaceAlignmentPreprocessor().align(photos, InMemoryArtifactStore(root))
+        images = [image.pixels for image in aligned]
+        landmarks = [image.landmarks for image in aligned]
+
+        print(
+            f"{'texels':>7} {'format':>6} {'size KB':>9} {'encode s':>9} {'load ms':>8} {'GPU MB':>7} "
+            f"{'PSNR dB':>8} {'smaller':>8} {'faster':>7}"
+        )
+        for resolution in args.resolutions:
+            pyramid = TextureEngine(resolution=resolution).bake(images, landmarks, mesh, spill_dir=root / "mips")
+            png_path = root / f"albedo_{resolution}.png"
+            pyramid.save(png_path)
+            png_bytes = png_path.stat().st_size
+
+            def load_png() -> None:
+                with Image.open(io.BytesIO(png_path.read_bytes())) as image:
+                    TexturePyramid.build(np.asarray(image.convert("RGB")))
+
+            png_load = _best_of(args.repeats, load_png)
+            # RGBA8 upload of the same mip chain the PNG path has to rebuild.
+            rgba_bytes = pyramid.nbytes * 4 / 3
+            print(
+                f"{resolution:>7} {'png':>6} {png_bytes / 1024:>9.0f} {'':>9} {png_load * 1e3:>8.1f} "
+                f"{rgba_bytes / 1e6:>7.2f}"
+            )
+            for fmt in args.formats:
+                started = time.perf_counter()
+                path = TextureCompressor([fmt]).compress(pyramid, root, f"albedo_{resolution}")[fmt]
+                encoded = time.perf_counter() - started
+                size = path.stat().st_size
+
+                def load_ktx2() -> None:
+                    texture = read_ktx2(path)
+                    for index in range(len(texture.levels)):
+                        texture.level_blocks(index)
+
+                ktx2_load = _best_of(args.repeats, load_ktx2)
+                texture = read_ktx2(path)
+                gpu_bytes = sum(texture.level_blocks(index).nbytes for index in range(len(texture.levels)))
+                decoded = DECODERS[fmt](texture.level_blocks(0), resolution, resolution)
+                print(
+                    f"{resolution:>7} {fmt:>6} {size / 1024:>9.0f} {encoded:>9.2f} {ktx2_load * 1e3:>8.1f} "
+                    f"{gpu_bytes / 1e6:>7.2f} "
+                    f"{_psnr(np.asarray(pyramid.levels[0]), decoded):>8.1f} {png_bytes / size:>7.1f}x "
+                    f"{png_load / ktx2_load:>6.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
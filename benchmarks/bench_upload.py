@@ -0,0 +1,79 @@
+"""Measure how multipart upload time scales with the number of parallel part uploads.
+
+The bucket is a ``FileObjectStore`` behind a simulated link that adds a
+fixed round-trip latency and a per-connection bandwidth cap to every
+request, the way a single TCP stream to an object store behaves.
+
+Run with ``python -m benchmarks.bench_upload``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from services.avatar_pipeline.upload.multipart_uploader import MultipartUploader
+from services.avatar_pipeline.upload.object_store import FileObjectStore
+
+
+class SimulatedLinkStore(FileObjectStore):
+    def __init__(self, root: Path, latency: float, bytes_per_second: float) -> None:
+        super().__init__(root)
+        self.latency = latency
+        self.bytes_per_second = bytes_per_second
+
+    def _transfer(self, size: int) -> None:
+        time.sleep(self.latency + size / self.bytes_per_second)
+
+    def put_object(self, key, data, metadata, checksum):
+        self._transfer(len(data))
+        return super().put_object(key, data, metadata, checksum)
+
+    def upload_part(self, key, upload_id, part_number, data, checksum):
+        self._transfer(len(data))
+        return super().upload_part(key, upload_id, part_number, data, checksum)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--file-mib", type=float, default=64.0)
+    parser.add_argument("--small-files", type=int, default=8, help="Additional 256 KiB files (metadata, LODs, KTX2)")
+    parser.add_argument("--part-mib", type=float, default=4.0)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--stream-mib-per-second", type=float, default=64.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        source = root / "source"
+        source.mkdir()
+        files = {"job/avatar.glb": source / "avatar.glb"}
+        files["job/avatar.glb"].write_bytes(os.urandom(int(args.file_mib * 2**20)))
+        for index in range(args.small_files):
+            path = source / f"extra_{index}.bin"
+            path.write_bytes(os.urandom(256 * 1024))
+            files[f"job/{path.name}"] = path
+        total = sum(path.stat().st_size for path in files.values())
+
+        print(f"{'workers':>8} {'seconds':>8} {'MiB/s':>8} {'speedup':>8}")
+        baseline = None
+        for workers in args.workers:
+            store = SimulatedLinkStore(
+                root / f"bucket-{workers}", args.latency_ms / 1e3, args.stream_mib_per_second * 2**20
+            )
+            uploader = MultipartUploader(
+                store, root / f"journal-{workers}", part_size=int(args.part_mib * 2**20), max_workers=workers
+            )
+            started = time.perf_counter()
+            uploader.upload(files)
+            elapsed = time.perf_counter() - started
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>8.2f} {total / 2**20 / elapsed:>8.1f} {baseline / elapsed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
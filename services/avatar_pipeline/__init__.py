@@ -4,23 +4,36 @@ from __future__ import annotations
 
 from typing import Optional
 
+from services.avatar_pipeline.artifacts.content_store import ContentStore
 from services.avatar_pipeline.config.settings import Settings, get_settings
+from services.avatar_pipeline.fetch.content_cache import ContentCache
+from services.avatar_pipeline.fetch.photo_fetcher import PhotoFetcher
+from services.avatar_pipeline.lod.lod_generator import LodGenerator
+from services.avatar_pipeline.observability.tracing import configure_tracing
+from services.avatar_pipeline.orchestrators.fetch_orchestrator import FetchOrchestrator
 from services.avatar_pipeline.orchestrators.ingestion_orchestrator import IngestionOrchestrator
 from services.avatar_pipeline.orchestrators.packaging_orchestrator import PackagingOrchestrator
 from services.avatar_pipeline.orchestrators.preprocessing_orchestrator import PreprocessingOrchestrator
 from services.avatar_pipeline.orchestrators.reconstruction_orchestrator import ReconstructionOrchestrator
 from services.avatar_pipeline.orchestrators.rigging_orchestrator import RiggingOrchestrator
+from services.avatar_pipeline.orchestrators.upload_orchestrator import UploadOrchestrator
 from services.avatar_pipeline.persistence.database import create_session_factory
 from services.avatar_pipeline.persistence.repository import AvatarJobRepository
 from services.avatar_pipeline.preprocess.face_alignment import FaceAlignmentPreprocessor
 from services.avatar_pipeline.reconstruction.deca_runner import DecaRunner
+from services.avatar_pipeline.reconstruction.model_registry import get_model_registry
 from services.avatar_pipeline.rigging.blendshape_exporter import BlendshapeExporter
+from services.avatar_pipeline.rigging.clip_baker import ClipBaker
 from services.avatar_pipeline.rigging.rigging_engine import RiggingEngine
 from services.avatar_pipeline.service import AvatarPipelineService
+from services.avatar_pipeline.textures.texture_compressor import TextureCompressor
 from services.avatar_pipeline.textures.texture_generator import TextureGenerator
+from services.avatar_pipeline.upload.multipart_uploader import MultipartUploader
+from services.avatar_pipeline.upload.object_store import create_object_store
 from services.avatar_pipeline.validators.photo_validator import PhotoValidator
 from services.avatar_pipeline.writers.fbx_writer import FBXWriter
 from services.avatar_pipeline.writers.glb_writer import GLBWriter
+from services.avatar_pipeline.writers.progressive_mesh_writer import ProgressiveMeshWriter
 
 
 __all__ = ["build_default_service", "AvatarPipelineService"]
@@ -30,15 +43,61 @@ def build_default_service(settings: Optional[Settings] = None) -> AvatarPipeline
     """Instantiate the pipeline service with production defaults."""
 
     settings = settings or get_settings()
+    configure_tracing(settings.tracing_exporter, settings.trace_export_path)
     session_factory = create_session_factory(settings)
     repository = AvatarJobRepository(session_factory)
-    ingestion = IngestionOrchestrator(PhotoValidator())
+    validator = PhotoValidator()
+    ingestion = IngestionOrchestrator(validator)
     preprocessing = PreprocessingOrchestrator(FaceAlignmentPreprocessor())
     reconstruction = ReconstructionOrchestrator(
-        DecaRunner(settings.deca_model_path, settings.gpu_enabled),
-        TextureGenerator(),
+        DecaRunner(
+            settings.deca_model_path,
+            settings.gpu_enabled,
+            model_version=settings.deca_model_version,
+            registry=get_model_registry(
+                settings.model_cache_bytes, settings.model_mmap, settings.model_allow_synthetic
+            ),
+            batch_size=settings.reconstruction_batch_size,
+        ),
+        TextureGenerator(settings.texture_resolution, settings.texture_tile_size),
+    )
+    clip_baker = None
+    if settings.animation_clips:
+        clip_baker = ClipBaker(settings.animation_clips, settings.animation_fps, settings.animation_tolerance)
+    rigging = RiggingOrchestrator(RiggingEngine(), BlendshapeExporter(), clip_baker)
+    compressor = None
+    if settings.texture_compression_formats:
+        compressor = TextureCompressor(settings.texture_compression_formats, settings.texture_supercompression)
+    lod_generator = LodGenerator(settings.lod_ratios) if settings.lod_ratios else None
+    checksums = settings.asset_checksums
+    writers = [FBXWriter(checksums=checksums), GLBWriter(checksums=checksums, quantize=settings.glb_quantize)]
+    if settings.mesh_stream_enabled:
+        writers.append(ProgressiveMeshWriter(checksums=checksums))
+    content_store = ContentStore(settings.output_path) if settings.content_addressed_outputs else None
+    packaging = PackagingOrchestrator(
+        writers,
+        settings.asset_base_url,
+        compressor,
+        lod_generator,
+        max_workers=settings.packaging_workers,
+        content_store=content_store,
     )
-    rigging = RiggingOrchestrator(RiggingEngine(), BlendshapeExporter())
-    packaging = PackagingOrchestrator([FBXWriter(), GLBWriter()], settings.asset_base_url)
     stages = [ingestion, preprocessing, reconstruction, rigging, packaging]
+    if settings.upload_enabled:
+        uploader = MultipartUploader(
+            create_object_store(settings.output_bucket_url, max_connections=settings.upload_concurrency),
+            settings.upload_journal_path,
+            part_size=settings.upload_part_bytes,
+            max_workers=settings.upload_concurrency,
+        )
+        stages.append(UploadOrchestrator(uploader))
+    if settings.photo_fetch_enabled:
+        fetcher = PhotoFetcher(
+            ContentCache(settings.photo_cache_path),
+            max_concurrency=settings.fetch_concurrency,
+            timeout=settings.fetch_timeout_seconds,
+            max_bytes=settings.max_photo_bytes,
+            min_resolution=validator.min_resolution,
+        )
+        stages.insert(1, FetchOrchestrator(fetcher))
     return AvatarPipelineService(repository, stages, settings)
@@ -0,0 +1,198 @@
+"""Token-bucket rate limiting for the avatar submission API."""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Protocol, Tuple
+
+from services.avatar_pipeline.config.settings import Settings
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    """Result of checking a bucket, including the values needed for response headers."""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float
+    reset_after: float
+
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+def _refill(tokens: float, updated_at: float, now: float, capacity: float, rate: float) -> float:
+    return min(capacity, tokens + max(0.0, now - updated_at) * rate)
+
+
+class RateLimitBackend(ABC):
+    """Stores bucket state and atomically takes tokens from it."""
+
+    @abstractmethod
+    def take(self, key: str, capacity: float, rate: float, cost: float) -> Tuple[bool, float]:
+        """Take ``cost`` tokens if available and return ``(allowed, tokens_left)``."""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Process-local bucket state guarded by a single lock.
+
+    At most ``max_keys`` buckets are kept; past that the least recently used
+    one is dropped, which at worst hands that key a fresh, full bucket.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, max_keys: int = 100_000) -> None:
+        if max_keys < 1:
+            raise ValueError("max_keys must be at least 1")
+        self._clock = clock
+        self._max_keys = max_keys
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, rate: float, cost: float) -> Tuple[bool, float]:
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                while len(self._buckets) >= self._max_keys:
+                    self._buckets.popitem(last=False)
+                bucket = self._buckets[key] = [capacity, now]
+            else:
+                self._buckets.move_to_end(key)
+            tokens = _refill(bucket[0], bucket[1], now, capacity, rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            bucket[0] = tokens
+            bucket[1] = now
+            return allowed, tokens
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SharedStateStore(Protocol):
+    """Minimal key/value contract offered by shared stores such as Redis."""
+
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    def compare_and_set(self, key: str, expected: Optional[str], value: str, ttl: float) -> bool:
+        ...
+
+
+class InMemorySharedStore:
+    """Local stand-in for a shared store, emulating compare-and-set with expiry."""
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self._clock = clock
+        self._values: Dict[str, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._live_value(key)
+
+    def compare_and_set(self, key: str, expected: Optional[str], value: str, ttl: float) -> bool:
+        with self._lock:
+            if self._live_value(key) != expected:
+                return False
+            self._values[key] = (value, self._clock() + ttl)
+            return True
+
+    def _live_value(self, key: str) -> Optional[str]:
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= self._clock():
+            del self._values[key]
+            return None
+        return entry[0]
+
+
+class SharedRateLimitBackend(RateLimitBackend):
+    """Bucket state kept in a store shared by every API pod.
+
+    Wall-clock time is used so that pods agree on refill; each update is an
+    optimistic compare-and-set retried on contention.
+    """
+
+    def __init__(
+        self,
+        store: SharedStateStore,
+        prefix: str = "avatar:ratelimit:",
+        clock: Callable[[], float] = time.time,
+        max_attempts: int = 8,
+    ) -> None:
+        self._store = store
+        self._prefix = prefix
+        self._clock = clock
+        self._max_attempts = max_attempts
+
+    def take(self, key: str, capacity: float, rate: float, cost: float) -> Tuple[bool, float]:
+        store_key = self._prefix + key
+        ttl = capacity / rate if rate > 0 else 86400.0
+        for _ in range(self._max_attempts):
+            now = self._clock()
+            current = self._store.get(store_key)
+            if current is None:
+                tokens = capacity
+            else:
+                stored_tokens, updated_at = (float(part) for part in current.split(":"))
+                tokens = _refill(stored_tokens, updated_at, now, capacity, rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            if self._store.compare_and_set(store_key, current, f"{tokens!r}:{now!r}", ttl):
+                return allowed, tokens
+        # Fail closed under sustained contention rather than letting a flood through.
+        return False, 0.0
+
+
+class TokenBucketLimiter:
+    """Per-key token bucket with a configurable burst size and refill rate."""
+
+    def __init__(
+        self,
+        burst: int,
+        refill_per_second: float,
+        backend: Optional[RateLimitBackend] = None,
+    ) -> None:
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        if refill_per_second <= 0:
+            raise ValueError("refill_per_second must be positive")
+        self.burst = burst
+        self.refill_per_second = refill_per_second
+        self._backend = backend if backend is not None else InMemoryRateLimitBackend()
+
+    @classmethod
+    def from_settings(
+        cls,
+        settings: Settings,
+        backend: Optional[RateLimitBackend] = None,
+    ) -> "TokenBucketLimiter":
+        return cls(settings.rate_limit_burst, settings.rate_limit_refill_per_second, backend)
+
+    def check(self, key: str, cost: float = 1.0) -> RateLimitDecision:
+        allowed, tokens = self._backend.take(key, float(self.burst), self.refill_per_second, cost)
+        rate = self.refill_per_second
+        return RateLimitDecision(
+            allowed=allowed,
+            limit=self.burst,
+            remaining=int(tokens),
+            retry_after=0.0 if allowed else (cost - tokens) / rate,
+            reset_after=(self.burst - tokens) / rate,
+        )
@@ -2,26 +2,36 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
-
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel, Field, field_serializer
+import json
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field, field_serializer, field_validator
 from sqlalchemy.orm import Session
 
+from services.avatar_pipeline.api.rate_limit import TokenBucketLimiter
+from services.avatar_pipeline.api.tracing import TracedRoute
 from services.avatar_pipeline.config.settings import Settings, get_settings
-from services.avatar_pipeline.jobs.avatar_pipeline_tasks import submit_avatar_job, task_queue
+from services.avatar_pipeline.jobs.avatar_pipeline_tasks import submit_avatar_job, submit_repackage_job, task_queue
+from services.avatar_pipeline.observability.profiling import PROFILE_SUMMARY, profile_dir
+from services.avatar_pipeline.observability.tracing import configure_tracing
 from services.avatar_pipeline.persistence.database import Database
 from services.avatar_pipeline.persistence.models import Base, JobStatus
 from services.avatar_pipeline.persistence.repository import AvatarJobRepository
 from services.avatar_pipeline.validators.photo_validator import PhotoValidator
 
-router = APIRouter(prefix="/avatar", tags=["avatar-generation"])
+router = APIRouter(prefix="/avatar", tags=["avatar-generation"], route_class=TracedRoute)
 
 
 settings = get_settings()
 database = Database(settings)
 database.create_schema(Base.metadata)
 photo_validator = PhotoValidator()
+rate_limiter = TokenBucketLimiter.from_settings(settings)
+configure_tracing(settings.tracing_exporter, settings.trace_export_path)
 
 
 def get_db_session() -> Session:
@@ -50,6 +60,19 @@ class CreateAvatarJobRequest(BaseModel):
     options: Dict[str, Any] = Field(default_factory=dict)
 
 
+class RepackageRequest(BaseModel):
+    unity_version: Optional[str] = None
+    scale: Optional[float] = Field(default=None, gt=0)
+    formats: Optional[List[Literal["FBX", "GLB", "PMESH"]]] = Field(default=None, min_length=1)
+
+    @field_validator("formats", mode="before")
+    @classmethod
+    def normalize_formats(cls, value: Any) -> Any:
+        if isinstance(value, list):
+            return [item.upper() if isinstance(item, str) else item for item in value]
+        return value
+
+
 class JobResponse(BaseModel):
     id: str
     status: JobStatus
@@ -72,16 +95,28 @@ class AssetResponse(BaseModel):
 @router.post("/jobs", response_model=JobResponse, status_code=status.HTTP_201_CREATED)
 def create_avatar_job(
     request: CreateAvatarJobRequest,
+    response: Response,
     repository: AvatarJobRepository = Depends(get_repository),
     settings: Settings = Depends(get_settings_dependency),
 ) -> JobResponse:
     try:
-        photo_validator.validate([photo.model_dump() for photo in request.photos])
+        photos = photo_validator.validate([photo.model_dump() for photo in request.photos])
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
 
+    # Checked after validation so malformed payloads do not use up the user's bucket.
+    if settings.rate_limit_enabled:
+        decision = rate_limiter.check(request.user_id)
+        if not decision.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many avatar jobs submitted; retry later.",
+                headers=decision.headers(),
+            )
+        response.headers.update(decision.headers())
+
     payload = {
-        "photos": [photo.model_dump() for photo in request.photos],
+        "photos": [asdict(photo) for photo in photos],
         "options": request.options,
     }
     job = repository.create_job(request.user_id, payload)
@@ -112,6 +147,38 @@ def get_job_status(
     )
 
 
+@router.post("/jobs/{job_id}/repackage", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def repackage_avatar_job(
+    job_id: str,
+    request: RepackageRequest,
+    repository: AvatarJobRepository = Depends(get_repository),
+    settings: Settings = Depends(get_settings_dependency),
+) -> JobResponse:
+    job = repository.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    if job.status in (JobStatus.PENDING, JobStatus.RUNNING) or not (job.output_payload or {}).get("retained_inputs"):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Only finished jobs with retained intermediates can be repackaged.",
+        )
+    submit_repackage_job(
+        job.id,
+        unity_version=request.unity_version,
+        scale=request.scale,
+        formats=request.formats,
+        settings=settings,
+    )
+    job = repository.get_job(job_id)
+    return JobResponse(
+        id=job.id,
+        status=job.status,
+        progress=job.progress,
+        error_message=job.error_message,
+        queue_state=task_queue.status(job.id),
+    )
+
+
 @router.get("/jobs/{job_id}/assets", response_model=List[AssetResponse])
 def list_job_assets(
     job_id: str,
@@ -130,3 +197,50 @@ def list_job_assets(
         )
         for asset in assets
     ]
+
+
+def require_profile_debug(settings: Settings = Depends(get_settings_dependency)) -> None:
+    """Hide the profile endpoints unless ``profile_debug_enabled`` is set."""
+
+    if not settings.profile_debug_enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+
+def _job_profile_dir(job_id: str, repository: AvatarJobRepository, settings: Settings) -> Path:
+    if not repository.get_job(job_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    directory = profile_dir(Path(settings.temp_storage_path) / job_id)
+    if not (directory / PROFILE_SUMMARY).is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job was not profiled")
+    return directory
+
+
+@router.get("/jobs/{job_id}/debug/profile", include_in_schema=False, dependencies=[Depends(require_profile_debug)])
+def get_job_profile(
+    job_id: str,
+    repository: AvatarJobRepository = Depends(get_repository),
+    settings: Settings = Depends(get_settings_dependency),
+) -> Dict[str, Any]:
+    directory = _job_profile_dir(job_id, repository, settings)
+    summary = json.loads((directory / PROFILE_SUMMARY).read_text())
+    summary["files"] = sorted(path.name for path in directory.iterdir() if path.is_file())
+    return summary
+
+
+@router.get(
+    "/jobs/{job_id}/debug/profile/{file_name}",
+    include_in_schema=False,
+    dependencies=[Depends(require_profile_debug)],
+)
+def download_job_profile_file(
+    job_id: str,
+    file_name: str,
+    repository: AvatarJobRepository = Depends(get_repository),
+    settings: Settings = Depends(get_settings_dependency),
+) -> FileResponse:
+    directory = _job_profile_dir(job_id, repository, settings)
+    # Only names listed in the directory are served, so no path can escape it.
+    files = {path.name: path for path in directory.iterdir() if path.is_file()}
+    if file_name not in files:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile file not found")
+    return FileResponse(files[file_name], filename=file_name, media_type="application/octet-stream")
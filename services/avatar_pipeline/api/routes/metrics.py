@@ -0,0 +1,14 @@
+"""Prometheus scrape endpoint for the pipeline's timing histograms."""
+
+from __future__ import annotations
+
+from fastapi import APIRouter, Response
+
+from services.avatar_pipeline.observability.metrics import CONTENT_TYPE, registry
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics() -> Response:
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,34 @@
+"""Route class that opens a server span per request and continues an incoming ``traceparent``."""
+
+from __future__ import annotations
+
+from typing import Callable, Coroutine
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from services.avatar_pipeline.observability.tracing import SPAN_KIND_SERVER, TRACEPARENT, tracer
+
+
+class TracedRoute(APIRoute):
+    """Wraps the endpoint in a ``<METHOD> <route>`` span; the endpoint (and the jobs it queues) run inside it.
+
+    The response carries the span's ``traceparent`` so clients can look the
+    request up in the trace backend.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[None, None, Response]]:
+        handler = super().get_route_handler()
+        name = f"{','.join(sorted(self.methods))} {self.path_format}"
+
+        async def traced_handler(request: Request) -> Response:
+            if not tracer.recording:
+                return await handler(request)
+            attributes = {"http.method": request.method, "http.route": self.path_format}
+            with tracer.start_span(name, attributes, tracer.extract(request.headers), SPAN_KIND_SERVER) as span:
+                response = await handler(request)
+                span.set_attribute("http.status_code", response.status_code)
+                response.headers[TRACEPARENT] = span.context.traceparent()
+                return response
+
+        return traced_handler
@@ -0,0 +1,215 @@
+"""Content-addressed, deduplicated storage for packaged job outputs."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Optional
+
+try:  # reflinks are a Linux ioctl; elsewhere we fall back to copies.
+    import fcntl
+except ImportError:  # pragma: no cover - depends on the platform
+    fcntl = None
+
+# FICLONE from linux/fs.h: share the extents of one file with another (btrfs, XFS, ...).
+_FICLONE = 0x40049409
+_CHUNK_BYTES = 1 << 20
+METADATA_SUFFIX = ".metadata.json"
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file, read in 1 MiB chunks."""
+
+    digest = hashlib.sha256()
+    with Path(path).open("rb") as handle:
+        while chunk := handle.read(_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reflink(source: Path, target: Path) -> None:
+    if fcntl is None:
+        raise OSError("reflinks are not supported on this platform")
+    with source.open("rb") as src, target.open("wb") as dst:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+
+
+@dataclass
+class StoredFile:
+    """One job file backed by a blob."""
+
+    name: str
+    digest: str
+    size: int
+    link: str
+    blob_path: Path
+    reused: bool
+
+    def manifest_entry(self) -> Dict[str, object]:
+        return {"digest": self.digest, "size": self.size, "link": self.link}
+
+
+class ContentStore:
+    """Keep each distinct packaged file once, under ``root/blobs``, keyed by its SHA-256.
+
+    Job directories (``root/<job_id>``) hold hardlinks to the blobs, falling
+    back to reflinks and then copies when hardlinks are not possible, and
+    ``root/manifests/<job_id>.json`` records which blobs each job uses. Blob
+    reference counts are derived from the manifests, so releasing a job and
+    collecting garbage frees every blob no remaining job refers to.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self.blob_root = self.root / "blobs"
+        self.manifest_root = self.root / "manifests"
+        self._lock = threading.Lock()
+
+    def blob_path(self, digest: str, suffix: str = "") -> Path:
+        return self.blob_root / digest[:2] / f"{digest}{suffix}"
+
+    def manifest_path(self, job_id: str) -> Path:
+        return self.manifest_root / f"{job_id}.json"
+
+    def manifest(self, job_id: str) -> Dict[str, Dict[str, object]]:
+        path = self.manifest_path(job_id)
+        if not path.exists():
+            return {}
+        return json.loads(path.read_text())["files"]
+
+    def ingest(
+        self,
+        job_id: str,
+        job_dir: Path,
+        digests: Optional[Mapping[str, str]] = None,
+    ) -> Dict[str, StoredFile]:
+        """Move every file of ``job_dir`` (except writer metadata) into the blob store and link it back.
+
+        ``digests`` maps file names to SHA-256 digests that are already
+        known (writers hash while writing), which skips re-reading them.
+        """
+
+        digests = digests or {}
+        stored: Dict[str, StoredFile] = {}
+        for path in sorted(Path(job_dir).iterdir()):
+            if not path.is_file() or path.name.endswith(METADATA_SUFFIX) or path.name.endswith(".tmp"):
+                continue
+            digest = digests.get(path.name) or file_digest(path)
+            stored[path.name] = self._store(path, digest)
+        self._write_manifest(job_id, stored)
+        return stored
+
+    def detach(self, job_id: str, job_dir: Path, keep: Iterable[str] = ()) -> None:
+        """Unlink the job's blob-backed files so rewriting them cannot modify shared blobs.
+
+        Files named in ``keep`` stay linked; callers pass the ones they will not rewrite.
+        """
+
+        keep = set(keep)
+        for name in self.manifest(job_id):
+            if name in keep:
+                continue
+            path = Path(job_dir) / name
+            if path.exists():
+                path.unlink()
+
+    def release(self, job_id: str, job_dir: Optional[Path] = None) -> None:
+        """Forget a job: drop its manifest (and job directory, if given)."""
+
+        self.manifest_path(job_id).unlink(missing_ok=True)
+        if job_dir is not None:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    def reference_counts(self) -> Counter:
+        """Number of job files referring to each blob digest."""
+
+        counts: Counter = Counter()
+        if self.manifest_root.exists():
+            for path in self.manifest_root.glob("*.json"):
+                counts.update(entry["digest"] for entry in json.loads(path.read_text())["files"].values())
+        return counts
+
+    def collect_garbage(self, grace_seconds: float = 3600.0) -> int:
+        """Delete blobs no manifest references and return the bytes freed.
+
+        Blobs touched within ``grace_seconds`` are kept: a job that is being
+        ingested right now has stored its blobs but not yet written its
+        manifest.
+        """
+
+        if not self.blob_root.exists():
+            return 0
+        with self._lock:
+            referenced = self.reference_counts()
+            cutoff = time.time() - grace_seconds
+            freed = 0
+            for blob in self.blob_root.glob("*/*"):
+                digest = blob.name.split(".", 1)[0]
+                stat = blob.stat()
+                if referenced[digest] == 0 and stat.st_mtime <= cutoff:
+                    blob.unlink()
+                    freed += stat.st_size
+            return freed
+
+    def _store(self, path: Path, digest: str) -> StoredFile:
+        blob = self.blob_path(digest, "".join(path.suffixes))
+        size = path.stat().st_size
+        with self._lock:
+            reused = blob.exists()
+            if reused:
+                # Refresh the mtime so a concurrent garbage collection keeps the blob.
+                os.utime(blob)
+                path.unlink()
+            else:
+                blob.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.replace(path, blob)
+                except OSError:
+                    shutil.copyfile(path, blob)
+                    path.unlink()
+                blob.chmod(0o444)
+        link = self._link(blob, path)
+        return StoredFile(path.name, digest, size, link, blob, reused)
+
+    @staticmethod
+    def _link(blob: Path, path: Path) -> str:
+        try:
+            os.link(blob, path)
+            return "hardlink"
+        except OSError:
+            pass
+        try:
+            _reflink(blob, path)
+            return "reflink"
+        except OSError:
+            path.unlink(missing_ok=True)
+        shutil.copyfile(blob, path)
+        return "copy"
+
+    def _write_manifest(self, job_id: str, stored: Mapping[str, StoredFile]) -> None:
+        self.manifest_root.mkdir(parents=True, exist_ok=True)
+        path = self.manifest_path(job_id)
+        temporary = path.with_name(f"{path.name}.tmp")
+        payload = {"job_id": job_id, "files": {name: item.manifest_entry() for name, item in stored.items()}}
+        temporary.write_text(json.dumps(payload))
+        os.replace(temporary, path)
+
+    def blob_uri(self, base_url: str, stored: StoredFile) -> str:
+        return f"{base_url.rstrip('/')}/{stored.blob_path.relative_to(self.root).as_posix()}"
+
+    def disk_usage(self) -> Dict[str, int]:
+        """Bytes held by blobs versus bytes the jobs' files would take as separate copies."""
+
+        logical = 0
+        if self.manifest_root.exists():
+            for path in self.manifest_root.glob("*.json"):
+                logical += sum(entry["size"] for entry in json.loads(path.read_text())["files"].values())
+        stored = sum(blob.stat().st_size for blob in self.blob_root.glob("*/*")) if self.blob_root.exists() else 0
+        return {"stored_bytes": stored, "logical_bytes": logical}
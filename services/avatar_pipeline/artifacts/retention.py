@@ -0,0 +1,105 @@
+"""Record the intermediates a finished job was packaged from, so it can be re-packaged later."""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from services.avatar_pipeline.artifacts.store import DiskArtifactStore
+from services.avatar_pipeline.models.blendshapes import BlendshapeSet
+from services.avatar_pipeline.models.pipeline import MeshResult, PipelineContext, RiggingResult
+
+
+@dataclass
+class RetainedInputs:
+    """Artifact keys, file paths and rig fields that ``PackagingOrchestrator`` reads.
+
+    The files are the ones packaging materialized into the job's temp
+    directory, so retaining them costs no extra writes; restoring them maps
+    the files back into a disk artifact store without re-running
+    reconstruction or rigging.
+    """
+
+    files: Dict[str, str]
+    mesh_key: str
+    texture_key: str
+    skeleton_key: str
+    blendshape_key: str
+    neutral_mesh_key: Optional[str] = None
+    manifest_key: Optional[str] = None
+    clip_keys: Dict[str, str] = field(default_factory=dict)
+    shape_names: List[str] = field(default_factory=list)
+    controls: Dict[str, float] = field(default_factory=dict)
+    expression_coefficients: Dict[str, float] = field(default_factory=dict)
+
+    @staticmethod
+    def available(context: PipelineContext) -> bool:
+        return context.mesh_result is not None and context.rigging_result is not None and bool(context.texture_key)
+
+    @classmethod
+    def from_context(cls, context: PipelineContext) -> "RetainedInputs":
+        mesh = context.mesh_result
+        rigging = context.rigging_result
+        keys = [mesh.mesh_key, context.texture_key, rigging.skeleton_key, rigging.blendshape_key]
+        keys += [key for key in (mesh.neutral_mesh_key, rigging.manifest_key) if key]
+        keys += list(rigging.clip_keys.values())
+        files = {key: str(path) for key, path in context.artifacts.checkpoint(keys).items()}
+        return cls(
+            files=files,
+            mesh_key=mesh.mesh_key,
+            texture_key=context.texture_key,
+            skeleton_key=rigging.skeleton_key,
+            blendshape_key=rigging.blendshape_key,
+            neutral_mesh_key=mesh.neutral_mesh_key,
+            manifest_key=rigging.manifest_key,
+            clip_keys=dict(rigging.clip_keys),
+            shape_names=list(rigging.shape_names),
+            controls={name: float(value) for name, value in rigging.controls.items()},
+            expression_coefficients={name: float(value) for name, value in mesh.expression_coefficients.items()},
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "RetainedInputs":
+        return cls(**payload)
+
+    def missing_files(self) -> List[str]:
+        return [path for path in self.files.values() if not Path(path).exists()]
+
+    def restore(self, job_id: str, user_id: str, temp_dir: Path, output_dir: Path) -> PipelineContext:
+        """Rebuild a context that is ready for packaging from the retained files."""
+
+        missing = self.missing_files()
+        if missing:
+            raise ValueError(f"Retained artifacts are missing: {', '.join(missing)}.")
+        store = DiskArtifactStore.from_files(temp_dir, {key: Path(path) for key, path in self.files.items()})
+        blendshapes = store.get(self.blendshape_key)
+        rigging = RiggingResult(
+            blendshapes=blendshapes if isinstance(blendshapes, BlendshapeSet) else None,
+            shape_names=list(self.shape_names),
+            controls=dict(self.controls),
+            skeleton_key=self.skeleton_key,
+            blendshape_key=self.blendshape_key,
+            manifest_key=self.manifest_key,
+            clips={name: store.get(key) for name, key in self.clip_keys.items()},
+            clip_keys=dict(self.clip_keys),
+        )
+        mesh = MeshResult(
+            mesh=store.get(self.mesh_key),
+            expression_coefficients=dict(self.expression_coefficients),
+            mesh_key=self.mesh_key,
+            neutral_mesh_key=self.neutral_mesh_key,
+        )
+        return PipelineContext(
+            job_id=job_id,
+            user_id=user_id,
+            mesh_result=mesh,
+            texture_key=self.texture_key,
+            rigging_result=rigging,
+            temp_dir=temp_dir,
+            output_dir=output_dir,
+            artifacts=store,
+        )
@@ -0,0 +1,337 @@
+"""Artifact stores holding intermediate stage outputs for a single job."""
+
+from __future__ import annotations
+
+import json
+import os
+import pickle
+import tempfile
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from services.avatar_pipeline.models.animation import CLIP_SUFFIX, read_clip
+from services.avatar_pipeline.models.blendshapes import (
+    BLENDSHAPE_SUFFIX,
+    BlendshapeSet,
+    decode_blendshapes,
+    encode_blendshapes,
+    read_blendshapes,
+)
+from services.avatar_pipeline.models.mesh import MESH_SUFFIX, Mesh, decode_mesh, encode_mesh, read_mesh
+from services.avatar_pipeline.observability.tracing import tracer
+
+ARTIFACT_BACKENDS = ("memory", "shared_memory", "disk")
+
+
+def artifact_filename(key: str, value: Any) -> str:
+    """Relative file name used when ``value`` stored under ``key`` is written to disk."""
+
+    if Path(key).suffix:
+        return key
+    if isinstance(value, np.ndarray):
+        return f"{key}.npy"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"{key}.bin"
+    if isinstance(value, (dict, list)):
+        return f"{key}.json"
+    suffix = getattr(value, "file_suffix", None)
+    return f"{key}{suffix}" if suffix else f"{key}.pkl"
+
+
+def write_artifact(path: Path, value: Any) -> int:
+    """Serialize ``value`` to ``path`` and return the number of bytes written."""
+
+    with tracer.start_span("file.write", {"file.path": str(path)}) as span:
+        size = _write_value(path, value)
+        span.set_attribute("file.size", size)
+    return size
+
+
+def _write_value(path: Path, value: Any) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(value, np.ndarray):
+        with path.open("wb") as handle:
+            np.save(handle, value, allow_pickle=False)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        path.write_bytes(value)
+    elif isinstance(value, (dict, list)) or path.suffix == ".json":
+        path.write_text(json.dumps(value, default=_json_default))
+    elif hasattr(value, "save"):
+        value.save(path)
+    else:
+        with path.open("wb") as handle:
+            pickle.dump(value, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    return path.stat().st_size
+
+
+def read_artifact(path: Path, mmap: bool = True) -> Any:
+    if path.suffix == MESH_SUFFIX:
+        return read_mesh(path, mmap=mmap)
+    if path.suffix == BLENDSHAPE_SUFFIX:
+        return read_blendshapes(path, mmap=mmap)
+    if path.suffix == CLIP_SUFFIX:
+        return read_clip(path, mmap=mmap)
+    if path.suffix == ".npy":
+        return np.load(path, mmap_mode="r" if mmap else None, allow_pickle=False)
+    if path.suffix == ".json":
+        return json.loads(path.read_text())
+    if path.suffix == ".pkl":
+        with path.open("rb") as handle:
+            return pickle.load(handle)
+    return path.read_bytes()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (np.integer, np.floating)):
+        return value.item()
+    if isinstance(value, Path):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class ArtifactStore(ABC):
+    """Keyed storage for the data stages hand to each other within one job.
+
+    Stages ``put`` typed values (arrays, buffers, dicts, domain objects) and
+    later stages ``get`` them back. Nothing touches the disk until a caller
+    asks for a file via :meth:`materialize` or :meth:`checkpoint`, except in
+    the disk backend which persists every value on ``put``.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self.bytes_written = 0
+        self._materialized: Dict[str, Path] = {}
+        self._close_callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def put(self, key: str, value: Any) -> Any:
+        """Store ``value`` under ``key`` and return the stored representation."""
+
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        """Return the value stored under ``key``; raises ``KeyError`` if missing."""
+
+    @abstractmethod
+    def keys(self) -> List[str]:
+        """List the keys currently held by the store."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Drop ``key`` from the store."""
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.keys()
+
+    def materialize(self, key: str) -> Path:
+        """Write the artifact under ``root`` (once) and return its path."""
+
+        with self._lock:
+            path = self._materialized.get(key)
+            if path is not None and path.exists():
+                return path
+        value = self.get(key)
+        path = self.root / artifact_filename(key, value)
+        written = write_artifact(path, value)
+        with self._lock:
+            self.bytes_written += written
+            self._materialized[key] = path
+        return path
+
+    def checkpoint(self, keys: Optional[Iterable[str]] = None) -> Dict[str, Path]:
+        """Materialize ``keys`` (default: everything) and return their paths."""
+
+        return {key: self.materialize(key) for key in (keys if keys is not None else self.keys())}
+
+    def on_close(self, callback: Callable[[], None]) -> None:
+        """Run ``callback`` on :meth:`close`, e.g. to delete scratch files backing a stored value."""
+
+        with self._lock:
+            self._close_callbacks.append(callback)
+
+    def close(self) -> None:
+        """Release resources held by the store and run its close callbacks. Materialized files are kept."""
+
+        with self._lock:
+            callbacks, self._close_callbacks = self._close_callbacks, []
+        for callback in callbacks:
+            callback()
+
+
+class InMemoryArtifactStore(ArtifactStore):
+    """Keeps values as live Python objects; ``put`` stores a reference."""
+
+    def __init__(self, root: Path) -> None:
+        super().__init__(root)
+        self._values: Dict[str, Any] = {}
+
+    def put(self, key: str, value: Any) -> Any:
+        self._values[key] = value
+        self._materialized.pop(key, None)
+        return value
+
+    def get(self, key: str) -> Any:
+        return self._values[key]
+
+    def keys(self) -> List[str]:
+        return list(self._values)
+
+    def delete(self, key: str) -> None:
+        self._values.pop(key, None)
+        self._materialized.pop(key, None)
+
+    def close(self) -> None:
+        self._values.clear()
+        super().close()
+
+
+@dataclass(frozen=True)
+class SharedArrayHandle:
+    """Everything another process needs to map a shared array."""
+
+    path: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+    def attach(self) -> np.ndarray:
+        return np.memmap(self.path, dtype=np.dtype(self.dtype), mode="r+", shape=self.shape)
+
+
+def _default_shared_dir() -> Path:
+    shm = Path("/dev/shm")
+    return shm if shm.is_dir() and os.access(shm, os.W_OK) else Path(tempfile.gettempdir())
+
+
+class SharedMemoryArtifactStore(ArtifactStore):
+    """Places arrays, buffers, meshes and blendshapes in shared memory so worker processes can map them.
+
+    Segments are memory-mapped files on a tmpfs (``/dev/shm`` when available).
+    They are unlinked on :meth:`close`; arrays handed out earlier stay valid
+    until the last reference to them is dropped. Other objects stay in the
+    process heap.
+    """
+
+    def __init__(self, root: Path, shared_dir: Optional[Path] = None) -> None:
+        super().__init__(root)
+        self._shared_dir = Path(shared_dir or _default_shared_dir())
+        self._prefix = f"avatar-artifacts-{uuid.uuid4().hex[:12]}-"
+        self._values: Dict[str, Any] = {}
+        self._handles: Dict[str, SharedArrayHandle] = {}
+
+    def put(self, key: str, value: Any) -> Any:
+        self.delete(key)
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            value = np.frombuffer(value, dtype=np.uint8)
+            shared = self._share(key, value)
+            stored: Any = memoryview(shared)
+        elif isinstance(value, np.ndarray) and value.dtype != object and value.size:
+            stored = shared = self._share(key, value)
+        elif isinstance(value, Mesh):
+            # One segment in the binary mesh layout; other processes decode it from the handle.
+            encoded = np.frombuffer(b"".join(encode_mesh(value)), dtype=np.uint8)
+            stored = decode_mesh(self._share(key, encoded))
+        elif isinstance(value, BlendshapeSet):
+            encoded = np.frombuffer(b"".join(encode_blendshapes(value)), dtype=np.uint8)
+            stored = decode_blendshapes(self._share(key, encoded))
+        else:
+            stored = value
+        self._values[key] = stored
+        return stored
+
+    def get(self, key: str) -> Any:
+        return self._values[key]
+
+    def handle(self, key: str) -> SharedArrayHandle:
+        return self._handles[key]
+
+    def keys(self) -> List[str]:
+        return list(self._values)
+
+    def delete(self, key: str) -> None:
+        self._values.pop(key, None)
+        self._materialized.pop(key, None)
+        handle = self._handles.pop(key, None)
+        if handle is not None:
+            _unlink_quietly(handle.path)
+
+    def close(self) -> None:
+        for key in list(self._handles):
+            self.delete(key)
+        self._values.clear()
+        super().close()
+
+    def _share(self, key: str, value: np.ndarray) -> np.ndarray:
+        path = self._shared_dir / (self._prefix + key.replace("/", "__"))
+        shared = np.memmap(path, dtype=value.dtype, mode="w+", shape=value.shape)
+        shared[...] = value
+        self._handles[key] = SharedArrayHandle(str(path), tuple(value.shape), value.dtype.str)
+        return shared
+
+
+def _unlink_quietly(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class DiskArtifactStore(ArtifactStore):
+    """Persists every value on ``put``; ``get`` reads it back (arrays memory-mapped)."""
+
+    def __init__(self, root: Path) -> None:
+        super().__init__(root)
+        self._paths: Dict[str, Path] = {}
+
+    @classmethod
+    def from_files(cls, root: Path, paths: Mapping[str, Path]) -> "DiskArtifactStore":
+        """Reopen artifacts persisted by an earlier run, e.g. through :meth:`ArtifactStore.checkpoint`."""
+
+        store = cls(root)
+        for key, path in paths.items():
+            store._paths[key] = store._materialized[key] = Path(path)
+        return store
+
+    def put(self, key: str, value: Any) -> Any:
+        path = self.root / artifact_filename(key, value)
+        written = write_artifact(path, value)
+        with self._lock:
+            self.bytes_written += written
+            self._paths[key] = path
+            self._materialized[key] = path
+        return value
+
+    def get(self, key: str) -> Any:
+        return read_artifact(self._paths[key])
+
+    def keys(self) -> List[str]:
+        return list(self._paths)
+
+    def delete(self, key: str) -> None:
+        path = self._paths.pop(key, None)
+        self._materialized.pop(key, None)
+        if path is not None:
+            _unlink_quietly(str(path))
+
+    def materialize(self, key: str) -> Path:
+        return self._paths[key]
+
+
+def create_artifact_store(backend: str, root: Path) -> ArtifactStore:
+    """Build the artifact store configured by ``Settings.artifact_backend``."""
+
+    if backend == "memory":
+        return InMemoryArtifactStore(root)
+    if backend == "shared_memory":
+        return SharedMemoryArtifactStore(root)
+    if backend == "disk":
+        return DiskArtifactStore(root)
+    raise ValueError(f"Unknown artifact backend {backend!r}; expected one of {', '.join(ARTIFACT_BACKENDS)}.")
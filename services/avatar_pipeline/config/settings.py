@@ -5,7 +5,7 @@ from __future__ import annotations
 import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
 
 def _bool(value: str) -> bool:
@@ -21,11 +21,48 @@ class Settings:
     celery_backend_url: str = "memory://"
     model_base_path: Path = Path("./models")
     deca_model_path: Path = Path("./models/deca")
+    deca_model_version: str = "deca-v2"
+    model_cache_bytes: int = 2 * 1024**3
+    model_mmap: bool = True
+    model_preload: bool = True
+    model_allow_synthetic: bool = False
+    reconstruction_batch_size: int = 16
+    texture_resolution: int = 1024
+    texture_tile_size: int = 256
+    texture_compression_formats: Tuple[str, ...] = ("bc7", "bc1")
+    texture_supercompression: bool = True
+    animation_clips: Tuple[str, ...] = ("idle", "smile")
+    animation_fps: float = 30.0
+    animation_tolerance: float = 0.005
+    lod_ratios: Tuple[float, ...] = (0.5, 0.25, 0.125)
+    glb_quantize: bool = False
+    mesh_stream_enabled: bool = True
+    packaging_workers: int = 4
+    asset_checksums: Tuple[str, ...] = ("sha256",)
+    content_addressed_outputs: bool = True
+    upload_enabled: bool = False
+    upload_part_bytes: int = 8 * 1024 * 1024
+    upload_concurrency: int = 8
+    upload_journal_path: Path = Path("./tmp/upload_journal")
+    profile_sample_every: int = 0
+    profile_top_entries: int = 25
+    profile_debug_enabled: bool = False
+    tracing_exporter: str = "none"
+    trace_export_path: Path = Path("./tmp/traces.jsonl")
     gpu_enabled: bool = False
     temp_storage_path: Path = Path("./tmp/avatar_pipeline")
     output_path: Path = Path("./var/avatars")
     output_bucket_url: str = "file://./var/avatars"
     asset_base_url: str = "http://localhost:8000/assets"
+    rate_limit_enabled: bool = False
+    rate_limit_burst: int = 10
+    rate_limit_refill_per_second: float = 0.5
+    photo_fetch_enabled: bool = False
+    photo_cache_path: Path = Path("./tmp/photo_cache")
+    fetch_concurrency: int = 8
+    fetch_timeout_seconds: float = 10.0
+    max_photo_bytes: int = 20 * 1024 * 1024
+    artifact_backend: str = "memory"
 
     @classmethod
     def from_env(cls) -> "Settings":
@@ -42,6 +79,70 @@ class Settings:
             data["model_base_path"] = Path(model_base)
         if deca_path := os.getenv("AVATAR_PIPELINE_DECA_PATH"):
             data["deca_model_path"] = Path(deca_path)
+        if deca_version := os.getenv("AVATAR_PIPELINE_DECA_VERSION"):
+            data["deca_model_version"] = deca_version
+        if model_cache := os.getenv("AVATAR_PIPELINE_MODEL_CACHE_BYTES"):
+            data["model_cache_bytes"] = int(model_cache)
+        if model_mmap := os.getenv("AVATAR_PIPELINE_MODEL_MMAP"):
+            data["model_mmap"] = _bool(model_mmap)
+        if model_preload := os.getenv("AVATAR_PIPELINE_MODEL_PRELOAD"):
+            data["model_preload"] = _bool(model_preload)
+        if allow_synthetic := os.getenv("AVATAR_PIPELINE_MODEL_ALLOW_SYNTHETIC"):
+            data["model_allow_synthetic"] = _bool(allow_synthetic)
+        if recon_batch := os.getenv("AVATAR_PIPELINE_RECONSTRUCTION_BATCH_SIZE"):
+            data["reconstruction_batch_size"] = int(recon_batch)
+        if texture_resolution := os.getenv("AVATAR_PIPELINE_TEXTURE_RESOLUTION"):
+            data["texture_resolution"] = int(texture_resolution)
+        if texture_tile := os.getenv("AVATAR_PIPELINE_TEXTURE_TILE_SIZE"):
+            data["texture_tile_size"] = int(texture_tile)
+        if texture_formats := os.getenv("AVATAR_PIPELINE_TEXTURE_FORMATS"):
+            data["texture_compression_formats"] = tuple(
+                fmt.strip().lower() for fmt in texture_formats.split(",") if fmt.strip().lower() not in {"", "none"}
+            )
+        if supercompression := os.getenv("AVATAR_PIPELINE_TEXTURE_SUPERCOMPRESSION"):
+            data["texture_supercompression"] = _bool(supercompression)
+        if animation_clips := os.getenv("AVATAR_PIPELINE_ANIMATION_CLIPS"):
+            data["animation_clips"] = tuple(
+                name.strip() for name in animation_clips.split(",") if name.strip().lower() not in {"", "none"}
+            )
+        if animation_fps := os.getenv("AVATAR_PIPELINE_ANIMATION_FPS"):
+            data["animation_fps"] = float(animation_fps)
+        if animation_tolerance := os.getenv("AVATAR_PIPELINE_ANIMATION_TOLERANCE"):
+            data["animation_tolerance"] = float(animation_tolerance)
+        if lod_ratios := os.getenv("AVATAR_PIPELINE_LOD_RATIOS"):
+            data["lod_ratios"] = tuple(
+                float(ratio) for ratio in lod_ratios.split(",") if ratio.strip().lower() not in {"", "none"}
+            )
+        if glb_quantize := os.getenv("AVATAR_PIPELINE_GLB_QUANTIZE"):
+            data["glb_quantize"] = _bool(glb_quantize)
+        if mesh_stream := os.getenv("AVATAR_PIPELINE_MESH_STREAM"):
+            data["mesh_stream_enabled"] = _bool(mesh_stream)
+        if packaging_workers := os.getenv("AVATAR_PIPELINE_PACKAGING_WORKERS"):
+            data["packaging_workers"] = int(packaging_workers)
+        if asset_checksums := os.getenv("AVATAR_PIPELINE_ASSET_CHECKSUMS"):
+            data["asset_checksums"] = tuple(
+                name.strip().lower() for name in asset_checksums.split(",") if name.strip().lower() not in {"", "none"}
+            )
+        if content_store := os.getenv("AVATAR_PIPELINE_CONTENT_STORE"):
+            data["content_addressed_outputs"] = _bool(content_store)
+        if upload_enabled := os.getenv("AVATAR_PIPELINE_UPLOAD_ENABLED"):
+            data["upload_enabled"] = _bool(upload_enabled)
+        if upload_part_bytes := os.getenv("AVATAR_PIPELINE_UPLOAD_PART_BYTES"):
+            data["upload_part_bytes"] = int(upload_part_bytes)
+        if upload_concurrency := os.getenv("AVATAR_PIPELINE_UPLOAD_CONCURRENCY"):
+            data["upload_concurrency"] = int(upload_concurrency)
+        if upload_journal := os.getenv("AVATAR_PIPELINE_UPLOAD_JOURNAL_PATH"):
+            data["upload_journal_path"] = Path(upload_journal)
+        if profile_every := os.getenv("AVATAR_PIPELINE_PROFILE_SAMPLE_EVERY"):
+            data["profile_sample_every"] = int(profile_every)
+        if profile_top := os.getenv("AVATAR_PIPELINE_PROFILE_TOP"):
+            data["profile_top_entries"] = int(profile_top)
+        if profile_debug := os.getenv("AVATAR_PIPELINE_PROFILE_DEBUG"):
+            data["profile_debug_enabled"] = _bool(profile_debug)
+        if tracing_exporter := os.getenv("AVATAR_PIPELINE_TRACING_EXPORTER"):
+            data["tracing_exporter"] = tracing_exporter
+        if trace_path := os.getenv("AVATAR_PIPELINE_TRACE_EXPORT_PATH"):
+            data["trace_export_path"] = Path(trace_path)
         if gpu := os.getenv("AVATAR_PIPELINE_GPU_ENABLED"):
             data["gpu_enabled"] = _bool(gpu)
         if temp_storage := os.getenv("AVATAR_PIPELINE_TEMP_PATH"):
@@ -52,6 +153,24 @@ class Settings:
             data["output_bucket_url"] = bucket
         if asset_base := os.getenv("AVATAR_PIPELINE_ASSET_BASE_URL"):
             data["asset_base_url"] = asset_base
+        if rate_limit_enabled := os.getenv("AVATAR_PIPELINE_RATE_LIMIT_ENABLED"):
+            data["rate_limit_enabled"] = _bool(rate_limit_enabled)
+        if rate_limit_burst := os.getenv("AVATAR_PIPELINE_RATE_LIMIT_BURST"):
+            data["rate_limit_burst"] = int(rate_limit_burst)
+        if rate_limit_refill := os.getenv("AVATAR_PIPELINE_RATE_LIMIT_REFILL"):
+            data["rate_limit_refill_per_second"] = float(rate_limit_refill)
+        if fetch_enabled := os.getenv("AVATAR_PIPELINE_FETCH_PHOTOS"):
+            data["photo_fetch_enabled"] = _bool(fetch_enabled)
+        if photo_cache := os.getenv("AVATAR_PIPELINE_PHOTO_CACHE_PATH"):
+            data["photo_cache_path"] = Path(photo_cache)
+        if fetch_concurrency := os.getenv("AVATAR_PIPELINE_FETCH_CONCURRENCY"):
+            data["fetch_concurrency"] = int(fetch_concurrency)
+        if fetch_timeout := os.getenv("AVATAR_PIPELINE_FETCH_TIMEOUT"):
+            data["fetch_timeout_seconds"] = float(fetch_timeout)
+        if max_photo_bytes := os.getenv("AVATAR_PIPELINE_MAX_PHOTO_BYTES"):
+            data["max_photo_bytes"] = int(max_photo_bytes)
+        if artifact_backend := os.getenv("AVATAR_PIPELINE_ARTIFACT_BACKEND"):
+            data["artifact_backend"] = artifact_backend
         return cls(**data)
 
     def ensure_directories(self) -> None:
@@ -69,11 +188,48 @@ class Settings:
             "celery_backend_url": self.celery_backend_url,
             "model_base_path": str(self.model_base_path),
             "deca_model_path": str(self.deca_model_path),
+            "deca_model_version": self.deca_model_version,
+            "model_cache_bytes": self.model_cache_bytes,
+            "model_mmap": self.model_mmap,
+            "model_preload": self.model_preload,
+            "model_allow_synthetic": self.model_allow_synthetic,
+            "reconstruction_batch_size": self.reconstruction_batch_size,
+            "texture_resolution": self.texture_resolution,
+            "texture_tile_size": self.texture_tile_size,
+            "texture_compression_formats": list(self.texture_compression_formats),
+            "texture_supercompression": self.texture_supercompression,
+            "animation_clips": list(self.animation_clips),
+            "animation_fps": self.animation_fps,
+            "animation_tolerance": self.animation_tolerance,
+            "lod_ratios": list(self.lod_ratios),
+            "glb_quantize": self.glb_quantize,
+            "mesh_stream_enabled": self.mesh_stream_enabled,
+            "packaging_workers": self.packaging_workers,
+            "asset_checksums": list(self.asset_checksums),
+            "content_addressed_outputs": self.content_addressed_outputs,
+            "upload_enabled": self.upload_enabled,
+            "upload_part_bytes": self.upload_part_bytes,
+            "upload_concurrency": self.upload_concurrency,
+            "upload_journal_path": str(self.upload_journal_path),
+            "profile_sample_every": self.profile_sample_every,
+            "profile_top_entries": self.profile_top_entries,
+            "profile_debug_enabled": self.profile_debug_enabled,
+            "tracing_exporter": self.tracing_exporter,
+            "trace_export_path": str(self.trace_export_path),
             "gpu_enabled": self.gpu_enabled,
             "temp_storage_path": str(self.temp_storage_path),
             "output_path": str(self.output_path),
             "output_bucket_url": self.output_bucket_url,
             "asset_base_url": self.asset_base_url,
+            "rate_limit_enabled": self.rate_limit_enabled,
+            "rate_limit_burst": self.rate_limit_burst,
+            "rate_limit_refill_per_second": self.rate_limit_refill_per_second,
+            "photo_fetch_enabled": self.photo_fetch_enabled,
+            "photo_cache_path": str(self.photo_cache_path),
+            "fetch_concurrency": self.fetch_concurrency,
+            "fetch_timeout_seconds": self.fetch_timeout_seconds,
+            "max_photo_bytes": self.max_photo_bytes,
+            "artifact_backend": self.artifact_backend,
         }
 
 
@@ -0,0 +1,90 @@
+"""Content-addressed on-disk cache for downloaded source photos."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+
+@dataclass
+class CacheEntry:
+    """Index record linking a URL (and its ETag) to a stored blob."""
+
+    url: str
+    etag: Optional[str]
+    digest: str
+    content_type: str
+    size: int
+    width: int
+    height: int
+
+
+class ContentCache:
+    """Stores blobs by SHA-256 digest with a per-URL index used for revalidation."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self._blob_dir = self.root / "blobs"
+        self._index_dir = self.root / "index"
+
+    def blob_path(self, digest: str) -> Path:
+        return self._blob_dir / digest[:2] / digest
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        index_path = self._index_path(url)
+        try:
+            entry = CacheEntry(**json.loads(index_path.read_text()))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+        if entry.url != url or not self.blob_path(entry.digest).exists():
+            return None
+        return entry
+
+    def store(
+        self,
+        url: str,
+        etag: Optional[str],
+        data: bytes,
+        content_type: str,
+        width: int,
+        height: int,
+    ) -> CacheEntry:
+        digest = hashlib.sha256(data).hexdigest()
+        blob_path = self.blob_path(digest)
+        if not blob_path.exists():
+            _atomic_write(blob_path, data)
+        entry = CacheEntry(
+            url=url,
+            etag=etag,
+            digest=digest,
+            content_type=content_type,
+            size=len(data),
+            width=width,
+            height=height,
+        )
+        _atomic_write(self._index_path(url), json.dumps(asdict(entry)).encode("utf-8"))
+        return entry
+
+    def _index_path(self, url: str) -> Path:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self._index_dir / key[:2] / f"{key}.json"
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
@@ -0,0 +1,149 @@
+"""Concurrent download of source photos ahead of preprocessing."""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+
+from services.avatar_pipeline.exceptions import ValidationError
+from services.avatar_pipeline.fetch.content_cache import CacheEntry, ContentCache
+from services.avatar_pipeline.models.pipeline import Photo
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def probe_image(data: bytes) -> Tuple[str, int, int]:
+    """Return ``(content_type, width, height)`` by inspecting the image bytes."""
+
+    if data.startswith(_PNG_SIGNATURE) and len(data) >= 24 and data[12:16] == b"IHDR":
+        width, height = struct.unpack(">II", data[16:24])
+        return "image/png", width, height
+    if data.startswith(b"\xff\xd8"):
+        offset = 2
+        while offset + 4 <= len(data):
+            if data[offset] != 0xFF:
+                offset += 1
+                continue
+            marker = data[offset + 1]
+            if marker == 0xFF:
+                offset += 1
+                continue
+            if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+                offset += 2
+                continue
+            (segment_length,) = struct.unpack(">H", data[offset + 2 : offset + 4])
+            if marker in _JPEG_SOF_MARKERS and offset + 9 <= len(data):
+                height, width = struct.unpack(">HH", data[offset + 5 : offset + 9])
+                return "image/jpeg", width, height
+            offset += 2 + segment_length
+        raise ValidationError("JPEG data does not contain a frame header.")
+    raise ValidationError("Downloaded content is not a supported image type.")
+
+
+class PhotoFetcher:
+    """Download every photo of a job concurrently over one pooled HTTP client."""
+
+    def __init__(
+        self,
+        cache: ContentCache,
+        max_concurrency: int = 8,
+        timeout: float = 10.0,
+        max_bytes: int = 20 * 1024 * 1024,
+        min_resolution: int = 256,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self.cache = cache
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.min_resolution = min_resolution
+        self._transport = transport
+
+    def fetch_all(self, photos: Iterable[Photo]) -> List[Photo]:
+        """Blocking form of :meth:`fetch_all_async`.
+
+        ``asyncio.run`` cannot start inside a running event loop, so when this
+        is called from one the downloads run on a fresh loop in a worker
+        thread instead. The caller's loop is blocked until they finish; async
+        code should await :meth:`fetch_all_async` directly.
+        """
+
+        coroutine = self.fetch_all_async(photos)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(contextvars.copy_context().run, asyncio.run, coroutine).result()
+
+    async def fetch_all_async(self, photos: Iterable[Photo]) -> List[Photo]:
+        photos = list(photos)
+        limits = httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency,
+        )
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with httpx.AsyncClient(
+            limits=limits,
+            timeout=self.timeout,
+            follow_redirects=True,
+            transport=self._transport,
+        ) as client:
+            # Identical URLs within a job are downloaded once.
+            pending: Dict[str, "asyncio.Task[CacheEntry]"] = {}
+            for photo in photos:
+                if photo.url not in pending:
+                    pending[photo.url] = asyncio.ensure_future(self._fetch(client, semaphore, photo.url))
+            try:
+                entries = dict(zip(pending, await asyncio.gather(*pending.values())))
+            except BaseException:
+                for task in pending.values():
+                    task.cancel()
+                raise
+
+        for photo in photos:
+            entry = entries[photo.url]
+            photo.local_path = self.cache.blob_path(entry.digest)
+            photo.content_hash = entry.digest
+            photo.metadata.setdefault("content_type", entry.content_type)
+        return photos
+
+    async def _fetch(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore, url: str) -> CacheEntry:
+        if urlparse(url).scheme not in {"http", "https"}:
+            raise ValidationError(f"Cannot fetch {url}: only http(s) URLs are supported.")
+        cached = self.cache.lookup(url)
+        headers = {"If-None-Match": cached.etag} if cached and cached.etag else {}
+        async with semaphore:
+            async with client.stream("GET", url, headers=headers) as response:
+                if response.status_code == 304 and cached is not None:
+                    return cached
+                response.raise_for_status()
+                declared = response.headers.get("Content-Length")
+                if declared is not None and int(declared) > self.max_bytes:
+                    raise ValidationError(f"Photo {url} exceeds {self.max_bytes} bytes.")
+                chunks: List[bytes] = []
+                received = 0
+                async for chunk in response.aiter_bytes():
+                    received += len(chunk)
+                    if received > self.max_bytes:
+                        raise ValidationError(f"Photo {url} exceeds {self.max_bytes} bytes.")
+                    chunks.append(chunk)
+                etag = response.headers.get("ETag")
+
+        data = b"".join(chunks)
+        try:
+            content_type, width, height = probe_image(data)
+        except ValidationError as exc:
+            raise ValidationError(f"Photo {url}: {exc}") from exc
+        if width < self.min_resolution or height < self.min_resolution:
+            raise ValidationError(
+                f"Photo {url} is {width}x{height}, below the minimum resolution of {self.min_resolution}px."
+            )
+        return await asyncio.to_thread(self.cache.store, url, etag, data, content_type, width, height)
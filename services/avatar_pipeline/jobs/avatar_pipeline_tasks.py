@@ -4,12 +4,16 @@ from __future__ import annotations
 
 import logging
 import threading
+import time
 from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
 
 from services.avatar_pipeline import build_default_service
 from services.avatar_pipeline.config.settings import Settings, get_settings
+from services.avatar_pipeline.observability.metrics import QUEUE_WAIT_SECONDS, TASK_SECONDS, timed
+from services.avatar_pipeline.observability.tracing import SPAN_KIND_CONSUMER, tracer
+from services.avatar_pipeline.reconstruction.model_registry import get_model_registry
 from services.avatar_pipeline.service import AvatarPipelineService
 
 logger = logging.getLogger(__name__)
@@ -35,8 +39,13 @@ class TaskHandle:
 class TaskQueue:
     """A minimal asynchronous execution queue used in place of Celery."""
 
-    def __init__(self, max_workers: int = 4) -> None:
-        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+    def __init__(
+        self,
+        max_workers: int = 4,
+        initializer: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self._max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, initializer=initializer)
         self._tasks: Dict[str, Callable[..., Any]] = {}
         self._inflight: Dict[str, Future] = {}
         self._lock = threading.Lock()
@@ -47,7 +56,9 @@ class TaskQueue:
 
             def apply_async(*args: Any, **kwargs: Any) -> TaskHandle:
                 job_id = kwargs.get("job_id") or (args[0] if args else None)
-                future = self._executor.submit(self._execute, func, job_id, args, kwargs)
+                # Like Celery message headers: the submitter's trace context travels with the task.
+                queued = (time.perf_counter(), time.time_ns(), tracer.inject())
+                future = self._executor.submit(self._execute, name, func, job_id, queued, args, kwargs)
                 if job_id:
                     with self._lock:
                         self._inflight[job_id] = future
@@ -61,18 +72,40 @@ class TaskQueue:
 
     def _execute(
         self,
+        name: str,
         func: Callable[..., Any],
         job_id: Optional[str],
+        queued: Tuple[float, int, Dict[str, str]],
         args: Any,
         kwargs: Dict[str, Any],
     ) -> Any:
+        submitted, submitted_ns, carrier = queued
+        QUEUE_WAIT_SECONDS.observe(time.perf_counter() - submitted, task=name)
+        parent = tracer.extract(carrier)
+        attributes = {"task": name, "job_id": job_id or ""}
+        tracer.record_span(f"queue.wait {name}", submitted_ns, time.time_ns(), parent, attributes, SPAN_KIND_CONSUMER)
         try:
-            return func(*args, **kwargs)
+            with timed(TASK_SECONDS, name, task=name), tracer.start_span(
+                f"task {name}", attributes, parent, SPAN_KIND_CONSUMER
+            ):
+                return func(*args, **kwargs)
         finally:
             if job_id:
                 with self._lock:
                     self._inflight.pop(job_id, None)
 
+    def start(self) -> None:
+        """Spawn every worker now so their initializers run before the first job arrives."""
+
+        barrier = threading.Barrier(self._max_workers, timeout=30)
+        for _ in range(self._max_workers):
+            self._executor.submit(barrier.wait)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting tasks; with ``wait`` block until queued ones finish."""
+
+        self._executor.shutdown(wait=wait)
+
     def status(self, job_id: str) -> str:
         with self._lock:
             future = self._inflight.get(job_id)
@@ -85,7 +118,42 @@ class TaskQueue:
         return "PENDING"
 
 
-task_queue = TaskQueue()
+def preload_models(settings: Optional[Settings] = None) -> None:
+    """Load the configured reconstruction model into the process-wide registry."""
+
+    settings = settings or get_settings()
+    if not settings.model_preload:
+        return
+    try:
+        registry = get_model_registry(settings.model_cache_bytes, settings.model_mmap, settings.model_allow_synthetic)
+        registry.preload(settings.deca_model_path, [settings.deca_model_version])
+    except Exception:  # a failed warm-up must not take the worker down; jobs retry the load
+        logger.exception("Model preload failed for %s", settings.deca_model_version)
+
+
+_worker_settings: Optional[Settings] = None
+
+
+def _preload_worker_models() -> None:
+    # Pool threads also start lazily on the first submit; without start_worker() there are no worker
+    # settings yet, so leave the registry for the first job to create with its own settings.
+    if _worker_settings is not None:
+        preload_models(_worker_settings)
+
+
+task_queue = TaskQueue(initializer=_preload_worker_models)
+
+
+def start_worker(settings: Optional[Settings] = None) -> None:
+    """Warm the in-process worker pool with the worker's settings; call once at process start.
+
+    Pass the same ``settings`` the worker's jobs run with: the preload fixes the registry's cache,
+    mmap and synthetic-weights options for the rest of the process.
+    """
+
+    global _worker_settings
+    _worker_settings = settings or get_settings()
+    task_queue.start()
 
 
 def build_pipeline_service(settings: Optional[Settings] = None) -> AvatarPipelineService:
@@ -111,3 +179,37 @@ def submit_avatar_job(job_id: str, settings: Optional[Settings] = None) -> TaskH
     """Queue a new avatar generation job for asynchronous processing."""
 
     return run_avatar_pipeline.delay(job_id=job_id, settings=settings)
+
+
+@task_queue.task("avatar_pipeline.repackage")
+def repackage_avatar_job(
+    job_id: str,
+    unity_version: Optional[str] = None,
+    scale: Optional[float] = None,
+    formats: Optional[Sequence[str]] = None,
+    settings: Optional[Settings] = None,
+) -> Dict[str, Any]:
+    """Re-run packaging for a finished job from its retained intermediates."""
+
+    settings = settings or get_settings()
+    service = build_pipeline_service(settings=settings)
+    try:
+        context = service.repackage(job_id, unity_version=unity_version, scale=scale, formats=formats)
+        return context.assets
+    except Exception:
+        logger.exception("Avatar repackaging failed for job %s", job_id)
+        raise
+
+
+def submit_repackage_job(
+    job_id: str,
+    unity_version: Optional[str] = None,
+    scale: Optional[float] = None,
+    formats: Optional[Sequence[str]] = None,
+    settings: Optional[Settings] = None,
+) -> TaskHandle:
+    """Queue a re-packaging run with new writer options."""
+
+    return repackage_avatar_job.delay(
+        job_id=job_id, unity_version=unity_version, scale=scale, formats=formats, settings=settings
+    )
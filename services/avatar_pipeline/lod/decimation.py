@@ -0,0 +1,189 @@
+"""Vectorized quadric-error edge-collapse decimation for triangle meshes.
+
+Instead of collapsing one edge at a time from a priority queue, every pass
+scores all edges against the vertex quadrics at once, picks the cheapest
+collapses that do not touch each other's faces, and applies them together.
+Vertices only ever collapse onto a neighbouring vertex, so a decimated mesh
+uses a subset of the original vertices: UVs, normals and blendshape deltas
+carry over unchanged through the returned vertex map.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from services.avatar_pipeline.models.mesh import Mesh
+
+_UNCLAIMED = np.iinfo(np.int64).max
+
+
+def vertex_quadrics(vertices: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """Area-weighted plane quadrics summed per vertex, as ``(V, 10)`` upper-triangle coefficients."""
+
+    corners = vertices[indices]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    doubled_area = np.linalg.norm(normals, axis=1)
+    unit = normals / np.maximum(doubled_area, 1e-30)[:, None]
+    planes = np.concatenate([unit, -np.einsum("fk,fk->f", unit, corners[:, 0])[:, None]], axis=1)
+    rows, cols = np.triu_indices(4)
+    face_terms = planes[:, rows] * planes[:, cols] * (doubled_area / 2)[:, None]
+    flat = indices.reshape(-1)
+    quadrics = np.empty((len(vertices), len(rows)), dtype=np.float64)
+    for term in range(len(rows)):
+        quadrics[:, term] = np.bincount(flat, weights=np.repeat(face_terms[:, term], 3), minlength=len(vertices))
+    return quadrics
+
+
+def quadric_error(quadrics: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Evaluate ``p^T Q p`` for homogeneous ``points`` against ``(N, 10)`` quadrics."""
+
+    x, y, z = points[:, 0], points[:, 1], points[:, 2]
+    a2, ab, ac, ad, b2, bc, bd, c2, cd, d2 = quadrics.T
+    return (
+        a2 * x * x + b2 * y * y + c2 * z * z + d2
+        + 2 * (ab * x * y + ac * x * z + bc * y * z + ad * x + bd * y + cd * z)
+    )
+
+
+def boundary_vertices(indices: np.ndarray, vertex_count: int) -> np.ndarray:
+    """Vertices on open or non-manifold edges; with split-vertex UVs this includes every UV seam."""
+
+    edges = np.sort(np.concatenate([indices[:, [0, 1]], indices[:, [1, 2]], indices[:, [2, 0]]]), axis=1)
+    unique, counts = np.unique(edges, axis=0, return_counts=True)
+    locked = np.zeros(vertex_count, dtype=bool)
+    locked[unique[counts != 2].reshape(-1)] = True
+    return locked
+
+
+def _face_normals(vertices: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    corners = vertices[indices]
+    return np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+
+
+def _select_collapses(
+    faces: np.ndarray,
+    quadrics: np.ndarray,
+    vertices: np.ndarray,
+    locked: np.ndarray,
+    budget: int,
+    rounds: int = 8,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Cheapest outgoing collapse per vertex, filtered so no face has two moving vertices.
+
+    Each round accepts the collapses that are the cheapest among the moving
+    vertices of all their faces, then retires every candidate in the 1-ring
+    of an accepted one; a few rounds approach a maximal independent set.
+    """
+
+    ring = faces[:, [1, 2, 0]]
+    source = np.concatenate([faces.reshape(-1), ring.reshape(-1)])
+    target = np.concatenate([ring.reshape(-1), faces.reshape(-1)])
+    movable = ~locked[source]
+    source, target = source[movable], target[movable]
+    cost = quadric_error(quadrics[source] + quadrics[target], vertices[target])
+
+    order = np.lexsort((cost, source))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = source[order][1:] != source[order][:-1]
+    best = order[first]
+    best = best[np.argsort(cost[best], kind="stable")]
+    moving, onto = source[best], target[best]
+
+    rank = np.full(len(vertices), _UNCLAIMED, dtype=np.int64)
+    rank[moving] = np.arange(len(moving))
+    accepted = np.zeros(len(vertices), dtype=bool)
+    for _ in range(rounds):
+        corner_rank = rank[faces]
+        lowest = corner_rank.min(axis=1, keepdims=True)
+        blocked = np.zeros(len(vertices), dtype=bool)
+        blocked[faces[(corner_rank != _UNCLAIMED) & (corner_rank != lowest)]] = True
+        winners = (rank != _UNCLAIMED) & ~blocked
+        if not winners.any():
+            break
+        accepted |= winners
+        # Retire every candidate sharing a face with a winner, winners included.
+        touched = winners[faces].any(axis=1)
+        rank[faces[touched].reshape(-1)] = _UNCLAIMED
+        if accepted.sum() >= budget:
+            break
+
+    chosen = accepted[moving]
+    return moving[chosen][:budget], onto[chosen][:budget]
+
+
+def decimate(
+    mesh: Mesh,
+    target_faces: int,
+    locked: Optional[np.ndarray] = None,
+    max_passes: int = 64,
+    min_normal_cosine: float = 0.2,
+) -> Tuple[Mesh, np.ndarray]:
+    """Collapse edges of ``mesh`` until it has at most ``target_faces`` triangles (or nothing is left to collapse).
+
+    Boundary and seam vertices (plus any in ``locked``) never move. Returns
+    the decimated mesh and, for each of its vertices, the index of the source
+    vertex it came from.
+    """
+
+    vertices = mesh.vertices.astype(np.float64)
+    faces = mesh.indices.astype(np.int64)
+    quadrics = vertex_quadrics(vertices, faces)
+    pinned = boundary_vertices(faces, len(vertices))
+    if locked is not None:
+        pinned |= locked
+
+    # Vertices whose cheapest collapse folded a face sit out later passes.
+    rejected = np.zeros(len(vertices), dtype=bool)
+    for _ in range(max_passes):
+        if len(faces) <= target_faces:
+            break
+        budget = max(1, (len(faces) - target_faces) // 2)
+        moving, onto = _select_collapses(faces, quadrics, vertices, pinned | rejected, budget)
+        if not len(moving):
+            break
+        mapping = np.arange(len(vertices))
+        mapping[moving] = onto
+        collapsed = mapping[faces]
+        changed = (collapsed != faces).any(axis=1)
+        degenerate = (
+            (collapsed[:, 0] == collapsed[:, 1])
+            | (collapsed[:, 1] == collapsed[:, 2])
+            | (collapsed[:, 2] == collapsed[:, 0])
+        )
+        # Reject collapses that would fold a surviving face over.
+        check = np.flatnonzero(changed & ~degenerate)
+        before = _face_normals(vertices, faces[check])
+        after = _face_normals(vertices, collapsed[check])
+        dots = np.einsum("fk,fk->f", before, after)
+        limit = min_normal_cosine * np.linalg.norm(before, axis=1) * np.linalg.norm(after, axis=1)
+        flipped = check[dots <= limit]
+        if len(flipped):
+            undone = faces[flipped][collapsed[flipped] != faces[flipped]]
+            mapping[undone] = undone
+            rejected[undone] = True
+            keep = mapping[moving] != moving
+            moving, onto = moving[keep], onto[keep]
+            if not len(moving):
+                continue
+            collapsed = mapping[faces]
+            degenerate = (
+                (collapsed[:, 0] == collapsed[:, 1])
+                | (collapsed[:, 1] == collapsed[:, 2])
+                | (collapsed[:, 2] == collapsed[:, 0])
+            )
+        np.add.at(quadrics, onto, quadrics[moving])
+        faces = collapsed[~degenerate]
+
+    used = np.unique(faces)
+    remapped = np.searchsorted(used, faces)
+    lod = Mesh(
+        mesh.vertices[used],
+        remapped,
+        uvs=mesh.uvs[used],
+        name=mesh.name,
+        model_version=mesh.model_version,
+        source_keys=mesh.source_keys,
+    )
+    return lod, used.astype(np.uint32)
@@ -0,0 +1,124 @@
+"""Build a chain of decimated level-of-detail meshes for packaged avatars."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from services.avatar_pipeline.lod.decimation import decimate
+from services.avatar_pipeline.models.blendshapes import BlendshapeSet
+from services.avatar_pipeline.models.mesh import Mesh
+
+
+@dataclass
+class LodLevel:
+    """One level of an avatar's LOD group."""
+
+    level: int
+    mesh_path: Path
+    vertex_count: int
+    face_count: int
+    screen_relative_height: float
+    blendshape_path: Optional[Path] = None
+    # Index of each of this level's vertices in the LOD0 mesh; not persisted in the metadata.
+    source_vertices: Optional[np.ndarray] = None
+
+    def metadata(self) -> dict:
+        return {
+            "level": self.level,
+            "mesh": str(self.mesh_path),
+            "mesh_format": "amesh",
+            "blendshapes": str(self.blendshape_path) if self.blendshape_path is not None else None,
+            "vertex_count": self.vertex_count,
+            "face_count": self.face_count,
+            "screen_relative_height": self.screen_relative_height,
+        }
+
+    @classmethod
+    def from_metadata(cls, metadata: dict) -> "LodLevel":
+        blendshapes = metadata.get("blendshapes")
+        return cls(
+            metadata["level"],
+            Path(metadata["mesh"]),
+            metadata["vertex_count"],
+            metadata["face_count"],
+            metadata["screen_relative_height"],
+            Path(blendshapes) if blendshapes is not None else None,
+        )
+
+
+class LodGenerator:
+    """Decimate the packaged mesh to each configured face ratio of LOD0.
+
+    Every level is decimated from the previous one, so LODn costs roughly as
+    much as its predecessor's face count. Decimated vertices are a subset of
+    the source vertices, which keeps UVs and blendshapes exact: each level's
+    blendshapes are the source shapes restricted to the vertices it kept.
+    """
+
+    def __init__(
+        self,
+        ratios: Iterable[float] = (0.5, 0.25, 0.125),
+        screen_heights: Optional[Iterable[float]] = None,
+    ) -> None:
+        self.ratios = tuple(float(ratio) for ratio in ratios)
+        if any(not 0 < ratio < 1 for ratio in self.ratios) or list(self.ratios) != sorted(self.ratios, reverse=True):
+            raise ValueError("LOD ratios must be decreasing fractions between 0 and 1.")
+        if screen_heights is None:
+            screen_heights = [0.5 * ratio for ratio in (1.0, *self.ratios)]
+        self.screen_heights = tuple(float(height) for height in screen_heights)
+        if len(self.screen_heights) != len(self.ratios) + 1:
+            raise ValueError("LOD screen heights need one entry per level, including LOD0.")
+
+    def generate(
+        self,
+        job_id: str,
+        mesh: Mesh,
+        output_dir: Path,
+        blendshapes: Optional[BlendshapeSet] = None,
+    ) -> List[LodLevel]:
+        """Write ``{job_id}_lod{n}`` meshes (and blendshapes) and describe every level, LOD0 first.
+
+        LOD0 is written to ``output_dir`` too, so every level in the group
+        points at a packaged file rather than the job's temporary inputs.
+        """
+
+        if blendshapes is not None and blendshapes.vertex_count != mesh.vertex_count:
+            raise ValueError("Blendshapes must cover the mesh being decimated.")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        mesh_path = output_dir / f"{job_id}_lod0{Mesh.file_suffix}"
+        mesh.save(mesh_path)
+        blendshape_path = None
+        if blendshapes is not None:
+            blendshape_path = output_dir / f"{job_id}_lod0{BlendshapeSet.file_suffix}"
+            blendshapes.save(blendshape_path)
+        levels = [
+            LodLevel(0, mesh_path, mesh.vertex_count, mesh.face_count, self.screen_heights[0], blendshape_path)
+        ]
+        current = mesh
+        vertex_map = np.arange(mesh.vertex_count)
+        for level, ratio in enumerate(self.ratios, start=1):
+            current, kept = decimate(current, int(mesh.face_count * ratio))
+            vertex_map = vertex_map[kept]
+            current.name = f"{mesh.name}_lod{level}"
+            path = output_dir / f"{job_id}_lod{level}{Mesh.file_suffix}"
+            current.save(path)
+            shapes_path = None
+            if blendshapes is not None:
+                shapes_path = output_dir / f"{job_id}_lod{level}{BlendshapeSet.file_suffix}"
+                blendshapes.subset(vertex_map, name=f"{blendshapes.name}_lod{level}").save(shapes_path)
+            levels.append(
+                LodLevel(
+                    level,
+                    path,
+                    current.vertex_count,
+                    current.face_count,
+                    self.screen_heights[level],
+                    shapes_path,
+                    vertex_map,
+                )
+            )
+        return levels
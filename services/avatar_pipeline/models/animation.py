@@ -0,0 +1,225 @@
+"""Keyframed animation clips over rig controls, with a compact binary format."""
+
+from __future__ import annotations
+
+import json
+import struct
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from services.avatar_pipeline.models.mesh import Buffer
+
+CLIP_MAGIC = b"ACLP"
+CLIP_FORMAT_VERSION = 1
+CLIP_SUFFIX = ".aclip"
+
+# magic, format version, flags (bit 0: loop), channel count, frame count, fps, key count, metadata length
+_HEADER = struct.Struct("<4sHHIIfII")
+_ALIGNMENT = 16
+_LOOP_FLAG = 1
+
+
+class AnimationClip:
+    """Per-channel linear keyframe curves sampled at a fixed frame rate.
+
+    Channel ``c`` owns keys ``offsets[c]:offsets[c + 1]``: ``times`` are
+    ``uint16`` frame numbers and ``values`` ``uint16`` codes mapped to
+    ``minimums[c] + code * scales[c]``. Every channel has a key on the first
+    and last frame, so curves cover the whole clip.
+    """
+
+    __slots__ = ("name", "channels", "fps", "frame_count", "loop", "offsets", "times", "values", "minimums", "scales")
+
+    file_suffix = CLIP_SUFFIX
+
+    def __init__(
+        self,
+        name: str,
+        channels: Sequence[str],
+        fps: float,
+        frame_count: int,
+        offsets: np.ndarray,
+        times: np.ndarray,
+        values: np.ndarray,
+        minimums: np.ndarray,
+        scales: np.ndarray,
+        loop: bool = False,
+    ) -> None:
+        self.name = name
+        self.channels = tuple(channels)
+        self.fps = float(fps)
+        self.frame_count = int(frame_count)
+        self.loop = bool(loop)
+        self.offsets = np.ascontiguousarray(offsets, dtype=np.uint32)
+        self.times = np.ascontiguousarray(times, dtype=np.uint16)
+        self.values = np.ascontiguousarray(values, dtype=np.uint16)
+        self.minimums = np.ascontiguousarray(minimums, dtype=np.float32)
+        self.scales = np.ascontiguousarray(scales, dtype=np.float32)
+        if len(self.offsets) != len(self.channels) + 1 or int(self.offsets[-1]) != len(self.times):
+            raise ValueError("Clip offsets must cover every channel's keys.")
+        if len(self.values) != len(self.times):
+            raise ValueError("Clip keys need one value per time.")
+
+    @property
+    def channel_count(self) -> int:
+        return len(self.channels)
+
+    @property
+    def key_count(self) -> int:
+        return len(self.times)
+
+    @property
+    def duration(self) -> float:
+        return (self.frame_count - 1) / self.fps if self.frame_count > 1 else 0.0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in (self.offsets, self.times, self.values, self.minimums, self.scales))
+
+    def sample(self, frames: Optional[np.ndarray] = None) -> np.ndarray:
+        """Evaluate every channel at (fractional) ``frames``; returns ``(len(frames), channels)``.
+
+        All channels are decoded with one ``searchsorted`` over keys offset by
+        channel, so the cost does not grow with a Python loop over curves.
+        """
+
+        if frames is None:
+            frames = np.arange(self.frame_count, dtype=np.float64)
+        frames = np.clip(np.asarray(frames, dtype=np.float64).reshape(-1), 0, self.frame_count - 1)
+        span = float(self.frame_count)
+        counts = np.diff(self.offsets).astype(np.intp)
+        channel_of_key = np.repeat(np.arange(self.channel_count), counts)
+        # Keys are sorted within a channel; shifting each channel by its index * span sorts them globally.
+        composite = self.times + channel_of_key * span
+        queries = frames[:, None] + np.arange(self.channel_count)[None, :] * span
+        right = np.searchsorted(composite, queries, side="right")
+        right = np.minimum(right, self.offsets[1:].astype(np.intp)[None, :] - 1)
+        left = np.maximum(right - 1, self.offsets[:-1].astype(np.intp)[None, :])
+        values = self.values.astype(np.float32) * self.scales[channel_of_key] + self.minimums[channel_of_key]
+        t0, t1 = composite[left], composite[right]
+        weight = np.divide(queries - t0, t1 - t0, out=np.zeros(queries.shape), where=t1 > t0)
+        return (values[left] + (values[right] - values[left]) * weight).astype(np.float32)
+
+    def sample_time(self, seconds: float) -> np.ndarray:
+        """Channel values at ``seconds``, wrapping around for looping clips."""
+
+        frame = seconds * self.fps
+        if self.loop and self.frame_count > 1:
+            frame %= self.frame_count - 1
+        return self.sample(np.array([frame]))[0]
+
+    def metadata(self) -> dict:
+        return {
+            "name": self.name,
+            "fps": self.fps,
+            "frame_count": self.frame_count,
+            "duration": round(self.duration, 4),
+            "loop": self.loop,
+            "channels": list(self.channels),
+            "key_count": self.key_count,
+        }
+
+    def save(self, path: Path) -> int:
+        return write_clip(path, self)
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "AnimationClip":
+        return read_clip(path, mmap=mmap)
+
+    def __repr__(self) -> str:
+        return f"AnimationClip(name={self.name!r}, frames={self.frame_count}, keys={self.key_count})"
+
+
+def _padding(offset: int) -> int:
+    return -offset % _ALIGNMENT
+
+
+def encode_clip(clip: AnimationClip) -> List[Buffer]:
+    """Return the binary encoding of ``clip`` as buffers for vectored writes, without copying arrays."""
+
+    metadata = json.dumps({"name": clip.name, "channels": list(clip.channels)}, separators=(",", ":")).encode("utf-8")
+    header = _HEADER.pack(
+        CLIP_MAGIC,
+        CLIP_FORMAT_VERSION,
+        _LOOP_FLAG if clip.loop else 0,
+        clip.channel_count,
+        clip.frame_count,
+        clip.fps,
+        clip.key_count,
+        len(metadata),
+    )
+    buffers: List[Buffer] = [header, metadata]
+    offset = len(header) + len(metadata)
+    for array in (clip.offsets, clip.minimums, clip.scales, clip.times, clip.values):
+        pad = _padding(offset)
+        if pad:
+            buffers.append(bytes(pad))
+        buffers.append(memoryview(array).cast("B"))
+        offset += pad + array.nbytes
+    return buffers
+
+
+def decode_clip(buffer: Buffer) -> AnimationClip:
+    """Build an :class:`AnimationClip` whose arrays are views into ``buffer``."""
+
+    data = np.frombuffer(buffer, dtype=np.uint8) if not isinstance(buffer, np.ndarray) else buffer
+    if len(data) < _HEADER.size:
+        raise ValueError("Clip data is truncated.")
+    magic, version, flags, channel_count, frame_count, fps, key_count, metadata_length = _HEADER.unpack(
+        data[: _HEADER.size].tobytes()
+    )
+    if magic != CLIP_MAGIC:
+        raise ValueError("Data is not an avatar animation clip.")
+    if version != CLIP_FORMAT_VERSION:
+        raise ValueError(f"Unsupported clip format version {version}.")
+    offset = _HEADER.size + metadata_length
+    metadata = json.loads(data[_HEADER.size : offset].tobytes())
+
+    def section(dtype: type, count: int) -> np.ndarray:
+        nonlocal offset
+        offset += _padding(offset)
+        size = count * np.dtype(dtype).itemsize
+        if offset + size > len(data):
+            raise ValueError("Clip data is truncated.")
+        view = data[offset : offset + size].view(dtype)
+        offset += size
+        return view
+
+    offsets = section(np.uint32, channel_count + 1)
+    minimums = section(np.float32, channel_count)
+    scales = section(np.float32, channel_count)
+    times = section(np.uint16, key_count)
+    values = section(np.uint16, key_count)
+    return AnimationClip(
+        metadata.get("name", "clip"),
+        metadata["channels"],
+        fps,
+        frame_count,
+        offsets,
+        times,
+        values,
+        minimums,
+        scales,
+        loop=bool(flags & _LOOP_FLAG),
+    )
+
+
+def write_clip(path: Path, clip: AnimationClip) -> int:
+    """Write ``clip`` to ``path`` in the binary clip format and return the file size."""
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as handle:
+        handle.writelines(encode_clip(clip))
+    return path.stat().st_size
+
+
+def read_clip(path: Path, mmap: bool = True) -> AnimationClip:
+    """Read a binary clip; with ``mmap`` the arrays are mapped from the file, not copied."""
+
+    if mmap:
+        return decode_clip(np.memmap(path, dtype=np.uint8, mode="r"))
+    return decode_clip(Path(path).read_bytes())
+
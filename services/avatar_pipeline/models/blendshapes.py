@@ -0,0 +1,245 @@
+"""Sparse, int16-quantized blendshape sets with a memory-mappable binary format."""
+
+from __future__ import annotations
+
+import json
+import struct
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.avatar_pipeline.models.mesh import Buffer
+
+BLENDSHAPE_MAGIC = b"ABLS"
+BLENDSHAPE_FORMAT_VERSION = 1
+BLENDSHAPE_SUFFIX = ".ablend"
+
+# magic, format version, flags, vertex count, shape count, entry count, metadata length
+_HEADER = struct.Struct("<4sHHIIII")
+_ALIGNMENT = 16
+_INT16_MAX = 32767
+
+
+class BlendshapeSet:
+    """Blendshape deltas stored only for the vertices each shape moves.
+
+    Shape ``i`` owns entries ``offsets[i]:offsets[i + 1]`` of ``indices``
+    (``uint32`` vertex ids) and ``deltas`` (``(E, 3)`` ``int16``); multiplying
+    a quantized delta by ``scales[i]`` gives the offset in model units.
+    """
+
+    __slots__ = ("names", "offsets", "scales", "indices", "deltas", "vertex_count", "name")
+
+    file_suffix = BLENDSHAPE_SUFFIX
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        offsets: np.ndarray,
+        scales: np.ndarray,
+        indices: np.ndarray,
+        deltas: np.ndarray,
+        vertex_count: int,
+        name: str = "blendshapes",
+    ) -> None:
+        self.names = tuple(names)
+        self.offsets = np.ascontiguousarray(offsets, dtype=np.uint32)
+        self.scales = np.ascontiguousarray(scales, dtype=np.float32)
+        self.indices = np.ascontiguousarray(indices, dtype=np.uint32)
+        self.deltas = np.ascontiguousarray(deltas, dtype=np.int16).reshape(-1, 3)
+        self.vertex_count = int(vertex_count)
+        self.name = name
+        if len(self.offsets) != len(self.names) + 1 or len(self.scales) != len(self.names):
+            raise ValueError("Blendshape offsets and scales must match the shape names.")
+        if len(self.indices) != len(self.deltas) or int(self.offsets[-1]) != len(self.indices):
+            raise ValueError("Blendshape indices and deltas must have one entry per offset.")
+
+    @classmethod
+    def from_dense(
+        cls,
+        names: Sequence[str],
+        deltas: np.ndarray,
+        tolerance: float = 1e-6,
+        name: str = "blendshapes",
+    ) -> "BlendshapeSet":
+        """Sparsify and quantize ``(S, V, 3)`` dense deltas.
+
+        Vertices whose largest component is within ``tolerance`` are dropped;
+        the rest are rounded to ``int16`` at a scale chosen per shape so its
+        largest delta uses the full range.
+        """
+
+        deltas = np.asarray(deltas, dtype=np.float32)
+        if deltas.ndim != 3 or deltas.shape[0] != len(names) or deltas.shape[2] != 3:
+            raise ValueError("Dense blendshape deltas must be shaped (shapes, vertices, 3).")
+        magnitude = np.abs(deltas).max(axis=2)
+        shape_ids, vertex_ids = np.nonzero(magnitude > tolerance)
+        offsets = np.zeros(len(names) + 1, dtype=np.uint32)
+        np.cumsum(np.bincount(shape_ids, minlength=len(names)), out=offsets[1:])
+        peak = magnitude.max(axis=1, initial=0.0)
+        scales = np.where(peak > 0, peak / _INT16_MAX, 1.0).astype(np.float32)
+        values = deltas[shape_ids, vertex_ids] / scales[shape_ids, None]
+        quantized = np.clip(np.rint(values), -_INT16_MAX, _INT16_MAX).astype(np.int16)
+        return cls(names, offsets, scales, vertex_ids, quantized, deltas.shape[1], name)
+
+    @property
+    def shape_count(self) -> int:
+        return len(self.names)
+
+    @property
+    def entry_count(self) -> int:
+        return len(self.indices)
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.scales.nbytes + self.indices.nbytes + self.deltas.nbytes
+
+    @property
+    def dense_nbytes(self) -> int:
+        """Size of the same shapes as dense ``float32`` deltas."""
+
+        return self.shape_count * self.vertex_count * 3 * 4
+
+    def shape(self, index: int) -> Tuple[np.ndarray, np.ndarray, float]:
+        """Vertex ids, quantized deltas (views) and scale for shape ``index``."""
+
+        start, stop = int(self.offsets[index]), int(self.offsets[index + 1])
+        return self.indices[start:stop], self.deltas[start:stop], float(self.scales[index])
+
+    def dense(self, index: int) -> np.ndarray:
+        indices, deltas, scale = self.shape(index)
+        result = np.zeros((self.vertex_count, 3), dtype=np.float32)
+        result[indices] = deltas * np.float32(scale)
+        return result
+
+    def to_dense(self) -> np.ndarray:
+        result = np.zeros((self.shape_count, self.vertex_count, 3), dtype=np.float32)
+        shape_ids = np.repeat(np.arange(self.shape_count), np.diff(self.offsets))
+        result[shape_ids, self.indices] = self.deltas * self.scales[shape_ids, None]
+        return result
+
+    def subset(self, vertex_map: np.ndarray, name: Optional[str] = None) -> "BlendshapeSet":
+        """Restrict the shapes to a mesh built from ``vertex_map`` (new vertex -> source vertex).
+
+        Quantized deltas and scales carry over unchanged; only the entries of
+        kept vertices remain, renumbered to their position in ``vertex_map``.
+        """
+
+        vertex_map = np.asarray(vertex_map, dtype=np.int64)
+        remap = np.full(self.vertex_count, -1, dtype=np.int64)
+        remap[vertex_map] = np.arange(len(vertex_map))
+        renumbered = remap[self.indices]
+        keep = renumbered >= 0
+        shape_ids = np.repeat(np.arange(self.shape_count), np.diff(self.offsets))
+        offsets = np.zeros(self.shape_count + 1, dtype=np.uint32)
+        np.cumsum(np.bincount(shape_ids[keep], minlength=self.shape_count), out=offsets[1:])
+        return BlendshapeSet(
+            self.names,
+            offsets,
+            self.scales,
+            renumbered[keep],
+            self.deltas[keep],
+            len(vertex_map),
+            name or self.name,
+        )
+
+    def metadata(self) -> dict:
+        return {
+            "name": self.name,
+            "names": list(self.names),
+            "shape_count": self.shape_count,
+            "vertex_count": self.vertex_count,
+            "entry_count": self.entry_count,
+        }
+
+    def save(self, path: Path) -> int:
+        return write_blendshapes(path, self)
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "BlendshapeSet":
+        return read_blendshapes(path, mmap=mmap)
+
+    def __repr__(self) -> str:
+        return f"BlendshapeSet(name={self.name!r}, shapes={self.shape_count}, entries={self.entry_count})"
+
+
+def _padding(offset: int) -> int:
+    return -offset % _ALIGNMENT
+
+
+def encode_blendshapes(shapes: BlendshapeSet) -> List[Buffer]:
+    """Return the binary encoding of ``shapes`` as buffers for vectored writes, without copying arrays."""
+
+    metadata = json.dumps({"name": shapes.name, "names": list(shapes.names)}, separators=(",", ":")).encode("utf-8")
+    header = _HEADER.pack(
+        BLENDSHAPE_MAGIC,
+        BLENDSHAPE_FORMAT_VERSION,
+        0,
+        shapes.vertex_count,
+        shapes.shape_count,
+        shapes.entry_count,
+        len(metadata),
+    )
+    buffers: List[Buffer] = [header, metadata]
+    offset = len(header) + len(metadata)
+    for array in (shapes.offsets, shapes.scales, shapes.indices, shapes.deltas):
+        pad = _padding(offset)
+        if pad:
+            buffers.append(bytes(pad))
+        buffers.append(memoryview(array).cast("B"))
+        offset += pad + array.nbytes
+    return buffers
+
+
+def decode_blendshapes(buffer: Buffer) -> BlendshapeSet:
+    """Build a :class:`BlendshapeSet` whose arrays are views into ``buffer``."""
+
+    data = np.frombuffer(buffer, dtype=np.uint8) if not isinstance(buffer, np.ndarray) else buffer
+    if len(data) < _HEADER.size:
+        raise ValueError("Blendshape data is truncated.")
+    magic, version, _flags, vertex_count, shape_count, entry_count, metadata_length = _HEADER.unpack(
+        data[: _HEADER.size].tobytes()
+    )
+    if magic != BLENDSHAPE_MAGIC:
+        raise ValueError("Data is not an avatar blendshape set.")
+    if version != BLENDSHAPE_FORMAT_VERSION:
+        raise ValueError(f"Unsupported blendshape format version {version}.")
+    offset = _HEADER.size + metadata_length
+    metadata = json.loads(data[_HEADER.size : offset].tobytes())
+
+    def section(dtype: type, shape: Tuple[int, ...]) -> np.ndarray:
+        nonlocal offset
+        offset += _padding(offset)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        if offset + size > len(data):
+            raise ValueError("Blendshape data is truncated.")
+        view = data[offset : offset + size].view(dtype).reshape(shape)
+        offset += size
+        return view
+
+    offsets = section(np.uint32, (shape_count + 1,))
+    scales = section(np.float32, (shape_count,))
+    indices = section(np.uint32, (entry_count,))
+    deltas = section(np.int16, (entry_count, 3))
+    return BlendshapeSet(
+        metadata["names"], offsets, scales, indices, deltas, vertex_count, metadata.get("name", "blendshapes")
+    )
+
+
+def write_blendshapes(path: Path, shapes: BlendshapeSet) -> int:
+    """Write ``shapes`` to ``path`` in the binary blendshape format and return the file size."""
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as handle:
+        handle.writelines(encode_blendshapes(shapes))
+    return path.stat().st_size
+
+
+def read_blendshapes(path: Path, mmap: bool = True) -> BlendshapeSet:
+    """Read a binary blendshape set; with ``mmap`` the arrays are mapped from the file, not copied."""
+
+    if mmap:
+        return decode_blendshapes(np.memmap(path, dtype=np.uint8, mode="r"))
+    return decode_blendshapes(Path(path).read_bytes())
@@ -0,0 +1,207 @@
+"""Compact triangle mesh backed by flat NumPy arrays, with a memory-mappable binary format."""
+
+from __future__ import annotations
+
+import json
+import struct
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+MESH_MAGIC = b"AMSH"
+MESH_FORMAT_VERSION = 1
+MESH_SUFFIX = ".amesh"
+
+# magic, format version, flags, vertex count, face count, metadata length
+_HEADER = struct.Struct("<4sHHIII")
+_ALIGNMENT = 16
+
+Buffer = Union[bytes, bytearray, memoryview, np.ndarray]
+
+
+def compute_vertex_normals(vertices: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """Area-weighted unit vertex normals for a triangle mesh."""
+
+    corners = vertices[indices]
+    face_normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    flat = indices.reshape(-1)
+    normals = np.empty(vertices.shape, dtype=np.float32)
+    for axis in range(3):
+        normals[:, axis] = np.bincount(
+            flat, weights=np.repeat(face_normals[:, axis], 3), minlength=len(vertices)
+        )
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    np.divide(normals, length, out=normals, where=length > 0)
+    return normals
+
+
+class Mesh:
+    """Triangle mesh whose geometry lives in contiguous ``float32``/``int32`` arrays.
+
+    ``vertices`` and ``normals`` are ``(V, 3)``, ``uvs`` is ``(V, 2)`` and
+    ``indices`` is ``(F, 3)``. Arrays are taken as-is when they already have
+    the right dtype and layout, so meshes built from model output or mapped
+    from disk share memory with their source.
+    """
+
+    __slots__ = ("vertices", "indices", "normals", "uvs", "name", "model_version", "source_keys")
+
+    file_suffix = MESH_SUFFIX
+
+    def __init__(
+        self,
+        vertices: np.ndarray,
+        indices: np.ndarray,
+        uvs: Optional[np.ndarray] = None,
+        normals: Optional[np.ndarray] = None,
+        name: str = "mesh",
+        model_version: Optional[str] = None,
+        source_keys: Sequence[str] = (),
+    ) -> None:
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32).reshape(-1, 3)
+        self.indices = np.ascontiguousarray(indices, dtype=np.int32).reshape(-1, 3)
+        if uvs is None:
+            uvs = np.zeros((len(self.vertices), 2), dtype=np.float32)
+        self.uvs = np.ascontiguousarray(uvs, dtype=np.float32).reshape(-1, 2)
+        if normals is None:
+            normals = compute_vertex_normals(self.vertices, self.indices)
+        self.normals = np.ascontiguousarray(normals, dtype=np.float32).reshape(-1, 3)
+        self.name = name
+        self.model_version = model_version
+        self.source_keys = tuple(source_keys)
+        if len(self.uvs) != len(self.vertices) or len(self.normals) != len(self.vertices):
+            raise ValueError("Mesh normals and UVs must have one entry per vertex.")
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.vertices)
+
+    @property
+    def face_count(self) -> int:
+        return len(self.indices)
+
+    @property
+    def nbytes(self) -> int:
+        return self.vertices.nbytes + self.indices.nbytes + self.normals.nbytes + self.uvs.nbytes
+
+    def bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        return self.vertices.min(axis=0), self.vertices.max(axis=0)
+
+    def with_vertices(self, vertices: np.ndarray, name: Optional[str] = None) -> "Mesh":
+        """Return a mesh sharing this mesh's topology and UVs with new positions."""
+
+        return Mesh(
+            vertices,
+            self.indices,
+            uvs=self.uvs,
+            name=name or self.name,
+            model_version=self.model_version,
+            source_keys=self.source_keys,
+        )
+
+    def metadata(self) -> dict:
+        return {
+            "name": self.name,
+            "model_version": self.model_version,
+            "source_keys": list(self.source_keys),
+            "vertex_count": self.vertex_count,
+            "face_count": self.face_count,
+        }
+
+    def save(self, path: Path) -> int:
+        return write_mesh(path, self)
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "Mesh":
+        return read_mesh(path, mmap=mmap)
+
+    def __repr__(self) -> str:
+        return f"Mesh(name={self.name!r}, vertices={self.vertex_count}, faces={self.face_count})"
+
+
+def _padding(offset: int) -> int:
+    return -offset % _ALIGNMENT
+
+
+def encode_mesh(mesh: Mesh) -> List[Buffer]:
+    """Return the binary encoding of ``mesh`` as a list of buffers for vectored writes.
+
+    The array sections are the mesh's own memory; nothing is copied.
+    """
+
+    metadata = json.dumps(
+        {"name": mesh.name, "model_version": mesh.model_version, "source_keys": list(mesh.source_keys)},
+        separators=(",", ":"),
+    ).encode("utf-8")
+    header = _HEADER.pack(
+        MESH_MAGIC, MESH_FORMAT_VERSION, 0, mesh.vertex_count, mesh.face_count, len(metadata)
+    )
+    buffers: List[Buffer] = [header, metadata]
+    offset = len(header) + len(metadata)
+    for array in (mesh.vertices, mesh.normals, mesh.uvs, mesh.indices):
+        pad = _padding(offset)
+        if pad:
+            buffers.append(bytes(pad))
+        buffers.append(memoryview(array).cast("B"))
+        offset += pad + array.nbytes
+    return buffers
+
+
+def decode_mesh(buffer: Buffer) -> Mesh:
+    """Build a :class:`Mesh` whose arrays are views into ``buffer``."""
+
+    data = np.frombuffer(buffer, dtype=np.uint8) if not isinstance(buffer, np.ndarray) else buffer
+    if len(data) < _HEADER.size:
+        raise ValueError("Mesh data is truncated.")
+    magic, version, _flags, vertex_count, face_count, metadata_length = _HEADER.unpack(
+        data[: _HEADER.size].tobytes()
+    )
+    if magic != MESH_MAGIC:
+        raise ValueError("Data is not an avatar mesh.")
+    if version != MESH_FORMAT_VERSION:
+        raise ValueError(f"Unsupported mesh format version {version}.")
+    offset = _HEADER.size + metadata_length
+    metadata = json.loads(data[_HEADER.size : offset].tobytes())
+
+    def section(dtype: type, shape: Tuple[int, int]) -> np.ndarray:
+        nonlocal offset
+        offset += _padding(offset)
+        size = shape[0] * shape[1] * 4
+        if offset + size > len(data):
+            raise ValueError("Mesh data is truncated.")
+        view = data[offset : offset + size].view(dtype).reshape(shape)
+        offset += size
+        return view
+
+    vertices = section(np.float32, (vertex_count, 3))
+    normals = section(np.float32, (vertex_count, 3))
+    uvs = section(np.float32, (vertex_count, 2))
+    indices = section(np.int32, (face_count, 3))
+    return Mesh(
+        vertices,
+        indices,
+        uvs=uvs,
+        normals=normals,
+        name=metadata.get("name", "mesh"),
+        model_version=metadata.get("model_version"),
+        source_keys=metadata.get("source_keys", ()),
+    )
+
+
+def write_mesh(path: Path, mesh: Mesh) -> int:
+    """Write ``mesh`` to ``path`` in the binary mesh format and return the file size."""
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as handle:
+        handle.writelines(encode_mesh(mesh))
+    return path.stat().st_size
+
+
+def read_mesh(path: Path, mmap: bool = True) -> Mesh:
+    """Read a binary mesh; with ``mmap`` the arrays are mapped from the file, not copied."""
+
+    if mmap:
+        return decode_mesh(np.memmap(path, dtype=np.uint8, mode="r"))
+    return decode_mesh(Path(path).read_bytes())
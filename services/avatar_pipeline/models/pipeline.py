@@ -6,6 +6,14 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Dict, List, Optional
 
+import numpy as np
+
+from services.avatar_pipeline.artifacts.store import ArtifactStore
+from services.avatar_pipeline.models.animation import AnimationClip
+from services.avatar_pipeline.models.blendshapes import BlendshapeSet
+from services.avatar_pipeline.models.mesh import Mesh
+from services.avatar_pipeline.observability.metrics import Timing
+
 
 @dataclass
 class Photo:
@@ -15,6 +23,8 @@ class Photo:
     width: int
     height: int
     metadata: Dict[str, str] = field(default_factory=dict)
+    local_path: Optional[Path] = None
+    content_hash: Optional[str] = None
 
 
 @dataclass
@@ -22,26 +32,44 @@ class AlignedImage:
     """Represents a face-aligned image ready for reconstruction."""
 
     source_photo: Photo
-    aligned_path: Path
+    aligned_path: Optional[Path] = None
     landmarks_path: Optional[Path] = None
+    pixels: Optional[np.ndarray] = None
+    landmarks: Optional[np.ndarray] = None
+    transform: Optional[np.ndarray] = None
+    artifact_key: Optional[str] = None
+    landmarks_key: Optional[str] = None
 
 
 @dataclass
 class MeshResult:
     """Meshes produced by the reconstruction stage."""
 
-    mesh_path: Path
+    mesh: Optional[Mesh] = None
+    neutral_mesh: Optional[Mesh] = None
+    mesh_path: Optional[Path] = None
     neutral_mesh_path: Optional[Path] = None
     expression_coefficients: Dict[str, float] = field(default_factory=dict)
+    mesh_key: Optional[str] = None
+    neutral_mesh_key: Optional[str] = None
 
 
 @dataclass
 class RiggingResult:
     """Output from the rigging pipeline."""
 
-    skeleton_path: Path
-    blendshape_path: Path
+    blendshapes: Optional[BlendshapeSet] = None
+    shape_names: List[str] = field(default_factory=list)
+    shape_deltas: Optional[np.ndarray] = None
+    skeleton_path: Optional[Path] = None
+    blendshape_path: Optional[Path] = None
     controls: Dict[str, float] = field(default_factory=dict)
+    skeleton_key: Optional[str] = None
+    blendshape_key: Optional[str] = None
+    manifest_key: Optional[str] = None
+    clips: Dict[str, AnimationClip] = field(default_factory=dict)
+    clip_keys: Dict[str, str] = field(default_factory=dict)
+    clip_paths: Dict[str, Path] = field(default_factory=dict)
 
 
 @dataclass
@@ -54,7 +82,13 @@ class PipelineContext:
     aligned_images: List[AlignedImage] = field(default_factory=list)
     mesh_result: Optional[MeshResult] = None
     texture_path: Optional[Path] = None
+    texture_key: Optional[str] = None
     rigging_result: Optional[RiggingResult] = None
     assets: Dict[str, Dict[str, str]] = field(default_factory=dict)
     temp_dir: Optional[Path] = None
     output_dir: Optional[Path] = None
+    artifacts: Optional[ArtifactStore] = None
+    # Sub-stage timings (e.g. writer calls) that the service persists after the current stage.
+    timings: List[Timing] = field(default_factory=list)
+    # Files of outputs this run no longer produces; deleted once the new assets are committed.
+    superseded_files: List[Path] = field(default_factory=list)
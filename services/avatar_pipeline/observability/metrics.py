@@ -0,0 +1,172 @@
+"""In-process histograms for stage, writer and queue timings, rendered in the Prometheus text format."""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+@dataclass
+class _Series:
+    counts: List[int]
+    total: float = 0.0
+    count: int = 0
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a fixed set of label names."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        bounds = sorted(float(bound) for bound in buckets)
+        if not bounds or bounds != sorted(set(bounds)):
+            raise ValueError("Histogram buckets must be distinct and non-empty.")
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(bounds)
+        self._series: Dict[Tuple[str, ...], _Series] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {list(self.labelnames)}, got {sorted(labels)}.")
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series([0] * len(self.buckets))
+            if index < len(self.buckets):
+                series.counts[index] += 1
+            series.total += value
+            series.count += 1
+
+    def count(self, **labels: str) -> int:
+        """Observations recorded for ``labels`` (all series when no label is given)."""
+
+        with self._lock:
+            return sum(
+                series.count
+                for key, series in self._series.items()
+                if all(dict(zip(self.labelnames, key)).get(name) == str(value) for name, value in labels.items())
+            )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, _Series(list(s.counts), s.total, s.count)) for key, s in self._series.items())
+        for key, values in series:
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, key)]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values.counts + [values.count]):
+                cumulative = values.count if bound == float("inf") else cumulative + count
+                text = ",".join(labels + [f'le="{_format(bound)}"'])
+                lines.append(f"{self.name}_bucket{{{text}}} {cumulative}")
+            suffix = f"{{{','.join(labels)}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {_format(values.total)}")
+            lines.append(f"{self.name}_count{suffix} {values.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the process's histograms and renders them for ``GET /metrics``."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Return the histogram called ``name``, creating it on first use."""
+
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = Histogram(name, documentation, labelnames, buckets)
+            elif metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Histogram {name} is already registered with labels {list(metric.labelnames)}.")
+            return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(f"{line}\n" for metric in metrics for line in metric.render())
+
+    def reset(self) -> None:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "avatar_pipeline_stage_duration_seconds", "Time spent in each pipeline stage.", ("stage", "outcome")
+)
+WRITER_SECONDS = registry.histogram(
+    "avatar_pipeline_writer_duration_seconds", "Time spent in each asset writer.", ("writer", "outcome")
+)
+QUEUE_WAIT_SECONDS = registry.histogram(
+    "avatar_pipeline_queue_wait_seconds", "Time tasks waited in the queue before a worker picked them up.", ("task",)
+)
+TASK_SECONDS = registry.histogram(
+    "avatar_pipeline_task_duration_seconds", "Time spent running queued tasks.", ("task", "outcome")
+)
+
+
+@dataclass
+class Timing:
+    """One timed call: what ran, when it started (UTC wall clock), how long it took and how it ended."""
+
+    name: str
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    duration: float = 0.0
+    outcome: str = "success"
+
+
+@contextmanager
+def timed(histogram: Histogram, name: str, **labels: str) -> Iterator[Timing]:
+    """Time the block with a monotonic clock and observe it in ``histogram`` with an ``outcome`` label."""
+
+    timing = Timing(name)
+    started = time.perf_counter()
+    try:
+        yield timing
+    except BaseException:
+        timing.outcome = "failure"
+        raise
+    finally:
+        timing.duration = time.perf_counter() - started
+        histogram.observe(timing.duration, outcome=timing.outcome, **labels)
@@ -0,0 +1,157 @@
+"""Opt-in per-job profiling: cProfile and tracemalloc around every stage, saved in the job workspace."""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional
+
+PROFILE_DIRNAME = "profile"
+PROFILE_SUMMARY = "profile.json"
+
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+# Whether this module started tracemalloc (and so may stop it), and how many profilers have ever started.
+_tracing_owned = False
+_tracing_starts = 0
+
+
+def should_profile(
+    job_id: str,
+    options: Optional[Mapping[str, Any]],
+    sample_every: int,
+    allow_requested: bool = False,
+) -> bool:
+    """Profile a stable 1-in-``sample_every`` sample of jobs, plus those flagged with ``options["profile"]``.
+
+    The flag is only honoured with ``allow_requested`` (the ``profile_debug_enabled``
+    setting), so clients cannot turn profiling on by themselves.
+    """
+
+    if allow_requested and options and options.get("profile"):
+        return True
+    return sample_every > 0 and zlib.crc32(job_id.encode()) % sample_every == 0
+
+
+def profile_dir(job_workspace: Path) -> Path:
+    return Path(job_workspace) / PROFILE_DIRNAME
+
+
+def _start_tracing() -> None:
+    global _tracing_users, _tracing_owned, _tracing_starts
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_owned = True
+        _tracing_users += 1
+        _tracing_starts += 1
+
+
+def _stop_tracing() -> None:
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+def _sole_tracer() -> Optional[int]:
+    """The start count while exactly one profiler traces and this module owns tracing, else ``None``."""
+
+    with _tracing_lock:
+        return _tracing_starts if _tracing_owned and _tracing_users == 1 else None
+
+
+class JobProfiler:
+    """Profiles each stage of one job and writes ``<stage>.prof`` files plus a ``profile.json`` summary.
+
+    cProfile only sees the thread that runs the stage, so work a stage hands
+    to a pool (packaging writers, uploads) shows up as the time spent
+    waiting for it. tracemalloc is process-wide: allocation sites of jobs
+    running at the same time are mixed in. Its peak is process-wide too, so
+    a stage's ``peak_traced_bytes`` is only reported when no other profiled
+    job overlapped the stage and this module started tracing; otherwise it
+    is ``None`` and the peak is left alone for its other users.
+    """
+
+    def __init__(self, job_id: str, output_dir: Path, top: int = 25) -> None:
+        self.job_id = job_id
+        self.output_dir = Path(output_dir)
+        self.top = top
+        self.stages: List[Dict[str, Any]] = []
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        _start_tracing()
+        self._closed = False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        profile = cProfile.Profile()
+        before = tracemalloc.take_snapshot()
+        sole = _sole_tracer()
+        if sole is not None:
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            seconds = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] if sole is not None and _sole_tracer() == sole else None
+            after = tracemalloc.take_snapshot()
+            self.stages.append(self._report(name, seconds, profile, after.compare_to(before, "lineno"), peak))
+
+    def _report(
+        self,
+        name: str,
+        seconds: float,
+        profile: cProfile.Profile,
+        allocations: List[tracemalloc.StatisticDiff],
+        peak: Optional[int],
+    ) -> Dict[str, Any]:
+        profile_file = f"{name}.prof"
+        profile.dump_stats(str(self.output_dir / profile_file))
+        stats = pstats.Stats(profile)
+        functions = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[: self.top]
+        return {
+            "stage": name,
+            "seconds": seconds,
+            "profile": profile_file,
+            "top_functions": [
+                {
+                    "function": f"{path}:{line}({function})",
+                    "calls": calls,
+                    "total_seconds": total,
+                    "cumulative_seconds": cumulative,
+                }
+                for (path, line, function), (_, calls, total, cumulative, _) in functions
+            ],
+            "peak_traced_bytes": peak,
+            "top_allocations": [
+                {
+                    "site": str(diff.traceback[0]),
+                    "size_bytes": diff.size_diff,
+                    "count": diff.count_diff,
+                }
+                for diff in sorted(allocations, key=lambda diff: diff.size_diff, reverse=True)[: self.top]
+                if diff.size_diff > 0
+            ],
+        }
+
+    def close(self) -> Path:
+        """Stop tracing (once) and write the summary; returns its path."""
+
+        if not self._closed:
+            self._closed = True
+            _stop_tracing()
+        path = self.output_dir / PROFILE_SUMMARY
+        path.write_text(json.dumps({"job_id": self.job_id, "stages": self.stages}, indent=2))
+        return path
@@ -0,0 +1,285 @@
+"""Trace spans from the API through the task queue into stages, writers, DB transactions and file writes.
+
+Spans follow the OpenTelemetry data model (128-bit trace ids, 64-bit span
+ids, parent links, unix-nanosecond timestamps, attributes and status) and
+carry their context across threads and queues as a W3C ``traceparent``
+header. ``OTLPJsonFileExporter`` writes each finished span as one OTLP/JSON
+``resourceSpans`` line, which OpenTelemetry collectors ingest as is.
+With the default ``NoOpSpanExporter`` nothing is recorded and
+``start_span`` returns immediately.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence
+
+TRACEPARENT = "traceparent"
+TRACING_EXPORTERS = ("none", "memory", "otlp_json")
+SERVICE_NAME = "avatar-pipeline"
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_PRODUCER = 4
+SPAN_KIND_CONSUMER = 5
+
+_TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    trace_id: str
+    span_id: str
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    @classmethod
+    def from_traceparent(cls, header: Optional[str]) -> Optional["SpanContext"]:
+        match = _TRACEPARENT_PATTERN.match((header or "").strip().lower())
+        if match is None or set(match.group(1)) == {"0"} or set(match.group(2)) == {"0"}:
+            return None
+        return cls(match.group(1), match.group(2))
+
+
+@dataclass
+class Span:
+    name: str
+    context: SpanContext
+    parent_span_id: Optional[str] = None
+    kind: int = SPAN_KIND_INTERNAL
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    status: str = "UNSET"
+    status_message: str = ""
+
+    @property
+    def duration(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span: Dict[str, Any] = {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": {"UNSET": 0, "OK": 1, "ERROR": 2}[self.status]},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class _NonRecordingSpan:
+    """Stands in for a span while tracing is off; attributes are dropped."""
+
+    context = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+NON_RECORDING_SPAN = _NonRecordingSpan()
+
+
+class SpanExporter(ABC):
+    """Receives spans as they finish."""
+
+    recording = True
+
+    @abstractmethod
+    def export(self, spans: Sequence[Span]) -> None:
+        """Ship finished spans; must be safe to call from any thread."""
+
+    def shutdown(self) -> None:
+        """Flush and release resources."""
+
+
+class NoOpSpanExporter(SpanExporter):
+    recording = False
+
+    def export(self, spans: Sequence[Span]) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keeps finished spans in a list, for tests and ad-hoc inspection."""
+
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[Span]) -> None:
+        with self._lock:
+            self.spans.extend(spans)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+    def trace(self, trace_id: str) -> List[Span]:
+        with self._lock:
+            return sorted((span for span in self.spans if span.context.trace_id == trace_id), key=lambda s: s.start_ns)
+
+
+class OTLPJsonFileExporter(SpanExporter):
+    """Appends one OTLP/JSON ``ExportTraceServiceRequest`` line per finished span."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[Span]) -> None:
+        payload = {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+                    "scopeSpans": [
+                        {"scope": {"name": "services.avatar_pipeline"}, "spans": [span.to_otlp() for span in spans]}
+                    ],
+                }
+            ]
+        }
+        line = json.dumps(payload, separators=(",", ":")) + "\n"
+        with self._lock, self.path.open("a") as handle:
+            handle.write(line)
+
+
+_current: ContextVar[Optional[SpanContext]] = ContextVar("avatar_pipeline_span", default=None)
+
+
+class Tracer:
+    """Starts spans under the context-local current span and hands finished ones to the exporter."""
+
+    def __init__(self, exporter: Optional[SpanExporter] = None) -> None:
+        self.exporter = exporter or NoOpSpanExporter()
+
+    @property
+    def recording(self) -> bool:
+        return self.exporter.recording
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Mapping[str, Any]] = None,
+        parent: Optional[SpanContext] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        start_ns: Optional[int] = None,
+    ) -> Iterator[Any]:
+        """Run the block inside a new span, child of ``parent`` or else of the current span."""
+
+        if not self.exporter.recording:
+            yield NON_RECORDING_SPAN
+            return
+        parent = parent or _current.get()
+        context = SpanContext(parent.trace_id if parent else secrets.token_hex(16), secrets.token_hex(8))
+        span = Span(name, context, parent.span_id if parent else None, kind, attributes=dict(attributes or {}))
+        if start_ns is not None:
+            span.start_ns = start_ns
+        token = _current.set(context)
+        try:
+            yield span
+            span.status = "OK"
+        except BaseException as exc:
+            span.status = "ERROR"
+            span.status_message = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            _current.reset(token)
+            span.end_ns = time.time_ns()
+            self.exporter.export([span])
+
+    def record_span(
+        self,
+        name: str,
+        start_ns: int,
+        end_ns: int,
+        parent: Optional[SpanContext] = None,
+        attributes: Optional[Mapping[str, Any]] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+    ) -> None:
+        """Export a span for an interval that has already passed, e.g. time spent waiting in a queue."""
+
+        if not self.exporter.recording:
+            return
+        parent = parent or _current.get()
+        context = SpanContext(parent.trace_id if parent else secrets.token_hex(16), secrets.token_hex(8))
+        span = Span(name, context, parent.span_id if parent else None, kind, start_ns, end_ns, dict(attributes or {}))
+        span.status = "OK"
+        self.exporter.export([span])
+
+    @staticmethod
+    def current() -> Optional[SpanContext]:
+        return _current.get()
+
+    def inject(self) -> Dict[str, str]:
+        """Carrier headers for the current span, to hand to another thread, queue or process."""
+
+        context = _current.get()
+        return {TRACEPARENT: context.traceparent()} if context is not None and self.recording else {}
+
+    @staticmethod
+    def extract(carrier: Optional[Mapping[str, str]]) -> Optional[SpanContext]:
+        return SpanContext.from_traceparent((carrier or {}).get(TRACEPARENT))
+
+
+tracer = Tracer()
+_configured: Optional[tuple] = None
+_configure_lock = threading.Lock()
+
+
+def create_span_exporter(kind: str, path: Optional[Path] = None) -> SpanExporter:
+    if kind == "none":
+        return NoOpSpanExporter()
+    if kind == "memory":
+        return InMemorySpanExporter()
+    if kind == "otlp_json":
+        if path is None:
+            raise ValueError("The otlp_json span exporter needs a file path.")
+        return OTLPJsonFileExporter(path)
+    raise ValueError(f"Unknown span exporter {kind!r}; expected one of {', '.join(TRACING_EXPORTERS)}.")
+
+
+def configure_tracing(kind: str, path: Optional[Path] = None) -> Tracer:
+    """Point the process tracer at the configured exporter; repeated calls with the same options keep it."""
+
+    global _configured
+    key = (kind, os.fspath(path) if path is not None else None)
+    with _configure_lock:
+        if key != _configured:
+            previous = tracer.exporter
+            tracer.exporter = create_span_exporter(kind, path)
+            previous.shutdown()
+            _configured = key
+    return tracer
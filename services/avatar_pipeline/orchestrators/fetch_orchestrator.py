@@ -0,0 +1,22 @@
+"""Fetch orchestrator downloading source photos before preprocessing."""
+
+from __future__ import annotations
+
+from services.avatar_pipeline.exceptions import StageExecutionError
+from services.avatar_pipeline.fetch.photo_fetcher import PhotoFetcher
+from services.avatar_pipeline.models.pipeline import PipelineContext
+from services.avatar_pipeline.orchestrators.base import PipelineStage
+
+
+class FetchOrchestrator(PipelineStage):
+    name = "fetch"
+
+    def __init__(self, fetcher: PhotoFetcher) -> None:
+        self._fetcher = fetcher
+
+    def run(self, context: PipelineContext) -> PipelineContext:
+        try:
+            context.photos = self._fetcher.fetch_all(context.photos)
+            return context
+        except Exception as exc:
+            raise StageExecutionError(f"Photo download failed: {exc}") from exc
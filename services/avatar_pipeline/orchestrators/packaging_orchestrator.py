@@ -2,42 +2,331 @@
 
 from __future__ import annotations
 
+import contextvars
+import copy
+import hashlib
+import json
+import os
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Dict, Iterable, List, Optional, Sequence
 
+from services.avatar_pipeline.artifacts.content_store import METADATA_SUFFIX, ContentStore, file_digest
 from services.avatar_pipeline.exceptions import StageExecutionError
+from services.avatar_pipeline.lod.lod_generator import LodGenerator, LodLevel
+from services.avatar_pipeline.models.blendshapes import BlendshapeSet
 from services.avatar_pipeline.models.pipeline import PipelineContext
+from services.avatar_pipeline.observability.metrics import WRITER_SECONDS, timed
+from services.avatar_pipeline.observability.tracing import tracer
 from services.avatar_pipeline.orchestrators.base import PipelineStage
-from services.avatar_pipeline.writers.base_writer import AssetWriteResult, AssetWriter
+from services.avatar_pipeline.textures.pyramid import TexturePyramid
+from services.avatar_pipeline.textures.texture_compressor import TextureCompressor
+from services.avatar_pipeline.writers.base_writer import AssetWriteResult, AssetWriter, PackageResources
+
+
+def _hash(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
 
 
 class PackagingOrchestrator(PipelineStage):
+    """Write every configured asset format, plus the LODs and compressed textures they reference.
+
+    Each output is keyed by a hash of the packaging inputs and the options
+    that shape it, kept in ``<job_id>_packaging.metadata.json``. Running again
+    over the same inputs (re-packaging with new writer options) rewrites only
+    the outputs whose hash changed.
+    """
+
     name = "packaging"
 
-    def __init__(self, writers: Iterable[AssetWriter], asset_base_url: str) -> None:
+    def __init__(
+        self,
+        writers: Iterable[AssetWriter],
+        asset_base_url: str,
+        texture_compressor: Optional[TextureCompressor] = None,
+        lod_generator: Optional[LodGenerator] = None,
+        max_workers: int = 4,
+        content_store: Optional[ContentStore] = None,
+    ) -> None:
         self._writers = list(writers)
         self._asset_base_url = asset_base_url.rstrip("/")
+        self._texture_compressor = texture_compressor
+        self._lod_generator = lod_generator
+        self._max_workers = max(1, max_workers)
+        self._content_store = content_store
+
+    def with_writer_options(
+        self,
+        unity_version: Optional[str] = None,
+        scale: Optional[float] = None,
+        formats: Optional[Sequence[str]] = None,
+    ) -> "PackagingOrchestrator":
+        """Copy of this stage whose writers use new options, optionally restricted to some formats."""
+
+        known = [writer.asset_type for writer in self._writers]
+        wanted = None if formats is None else {fmt.upper() for fmt in formats}
+        if wanted is not None and (not wanted or wanted - set(known)):
+            raise ValueError(f"Unknown output formats {sorted(wanted - set(known))}; expected some of {known}.")
+        writers = []
+        for writer in self._writers:
+            if wanted is not None and writer.asset_type not in wanted:
+                continue
+            writer = copy.copy(writer)
+            if unity_version is not None:
+                writer.unity_version = unity_version
+            if scale is not None:
+                writer.scale = float(scale)
+            writers.append(writer)
+        stage = copy.copy(self)
+        stage._writers = writers
+        return stage
 
     def run(self, context: PipelineContext) -> PipelineContext:
-        if context.mesh_result is None or context.rigging_result is None or context.texture_path is None:
+        if context.mesh_result is None or context.rigging_result is None or context.texture_key is None:
             raise StageExecutionError("Packaging requires mesh, rig, and texture data.")
         try:
+            self._materialize_inputs(context)
             output_dir = context.output_dir or context.temp_dir or Path("./output")
             output_dir.mkdir(parents=True, exist_ok=True)
+            state = self._load_state(context.job_id, output_dir)
+            resources_hash = _hash(self._input_digest(context), self._resource_options())
+            resources = self._reusable_resources(state, resources_hash)
+            hashes = {
+                writer.asset_type: _hash(resources_hash, type(writer).__name__, writer.options())
+                for writer in self._writers
+            }
+            reused = {
+                asset_type: entry["asset"]
+                for asset_type, entry in state.get("assets", {}).items()
+                if hashes.get(asset_type) == entry["hash"] and Path(entry["asset"]["file_path"]).exists()
+            }
+            if self._content_store is not None:
+                keep = [Path(asset["file_path"]).name for asset in reused.values()]
+                if resources is not None:
+                    keep += [path.name for path in self._resource_files(resources)]
+                self._content_store.detach(context.job_id, output_dir, keep)
+            # Writers only read the shared inputs and each owns its output files, so they run side by side;
+            # the heavy parts (hashing, writev, numpy) release the GIL.
+            with ThreadPoolExecutor(max_workers=self._max_workers) as pool:
+                if resources is None:
+                    resources = self._package_resources(context, output_dir, pool)
+                # Each task runs in a copy of this thread's context so its spans nest under the stage span.
+                futures = {
+                    writer.asset_type: pool.submit(
+                        contextvars.copy_context().run, self._write, writer, context, output_dir, resources
+                    )
+                    for writer in self._writers
+                    if writer.asset_type not in reused
+                }
+                results: Dict[str, AssetWriteResult] = {
+                    asset_type: future.result() for asset_type, future in futures.items()
+                }
             for writer in self._writers:
-                result: AssetWriteResult = writer.write(
-                    context.job_id,
-                    context.mesh_result,
-                    context.texture_path,
-                    context.rigging_result,
-                    output_dir,
-                )
-                uri = f"{self._asset_base_url}/{result.file_path.name}"
-                context.assets[result.asset_type] = {
-                    "uri": uri,
-                    "file_path": str(result.file_path),
-                    "metadata": result.metadata,
+                asset_type = writer.asset_type
+                if asset_type in reused:
+                    file_path = Path(reused[asset_type]["file_path"])
+                    metadata = copy.deepcopy(reused[asset_type]["metadata"])
+                else:
+                    file_path = results[asset_type].file_path
+                    metadata = results[asset_type].metadata
+                    metadata["input_hash"] = hashes[asset_type]
+                context.assets[asset_type] = {
+                    "uri": f"{self._asset_base_url}/{file_path.name}",
+                    "file_path": str(file_path),
+                    "metadata": metadata,
+                }
+            for level in resources.lods:
+                context.assets[f"LOD{level.level}"] = {
+                    "uri": f"{self._asset_base_url}/{level.mesh_path.name}",
+                    "file_path": str(level.mesh_path),
+                    "metadata": level.metadata(),
                 }
+            dropped = self._dropped_files(state, hashes)
+            context.superseded_files.extend(dropped)
+            written = {
+                asset_type: {"hash": hashes[asset_type], "asset": json.loads(json.dumps(context.assets[asset_type]))}
+                for asset_type in hashes
+            }
+            # Dropped formats stay in the state until their files are gone, so a later run still
+            # removes them if this one fails before the service deletes them.
+            written.update(
+                (asset_type, entry)
+                for asset_type, entry in state.get("assets", {}).items()
+                if asset_type not in hashes and Path(entry["asset"]["file_path"]).exists()
+            )
+            if self._content_store is not None:
+                self._deduplicate(context, output_dir)
+            self._save_state(context.job_id, output_dir, resources_hash, resources, written)
             return context
         except Exception as exc:
             raise StageExecutionError(f"Packaging failed: {exc}") from exc
+
+    def _write(
+        self, writer: AssetWriter, context: PipelineContext, output_dir: Path, resources: PackageResources
+    ) -> AssetWriteResult:
+        with timed(
+            WRITER_SECONDS, f"{self.name}.{writer.asset_type}", writer=writer.asset_type
+        ) as timing, tracer.start_span(f"writer {writer.asset_type}", {"writer": writer.asset_type}):
+            context.timings.append(timing)
+            return writer.write(
+                context.job_id,
+                context.mesh_result,
+                context.texture_path,
+                context.rigging_result,
+                output_dir,
+                resources,
+            )
+
+    @staticmethod
+    def state_path(job_id: str, output_dir: Path) -> Path:
+        return output_dir / f"{job_id}_packaging{METADATA_SUFFIX}"
+
+    def _load_state(self, job_id: str, output_dir: Path) -> Dict[str, Any]:
+        path = self.state_path(job_id, output_dir)
+        if not path.exists():
+            return {}
+        try:
+            return json.loads(path.read_text())
+        except ValueError:
+            return {}
+
+    def _save_state(
+        self,
+        job_id: str,
+        output_dir: Path,
+        resources_hash: str,
+        resources: PackageResources,
+        assets: Dict[str, Dict[str, Any]],
+    ) -> None:
+        payload = {
+            "resources": {
+                "hash": resources_hash,
+                "compressed_textures": {fmt: str(path) for fmt, path in resources.compressed_textures.items()},
+                "lods": [level.metadata() for level in resources.lods],
+            },
+            "assets": assets,
+        }
+        path = self.state_path(job_id, output_dir)
+        temporary = path.with_name(f"{path.name}.tmp")
+        temporary.write_text(json.dumps(payload))
+        os.replace(temporary, path)
+
+    @staticmethod
+    def _input_digest(context: PipelineContext) -> str:
+        """Hash the materialized inputs every packaged output is derived from."""
+
+        mesh = context.mesh_result
+        rigging = context.rigging_result
+        paths = {
+            "mesh": mesh.mesh_path,
+            "neutral_mesh": mesh.neutral_mesh_path,
+            "texture": context.texture_path,
+            "skeleton": rigging.skeleton_path,
+            "blendshapes": rigging.blendshape_path,
+            **{f"clip:{name}": path for name, path in rigging.clip_paths.items()},
+        }
+        digests = {name: file_digest(path) for name, path in paths.items() if path is not None}
+        return _hash(digests, rigging.controls)
+
+    def _resource_options(self) -> Dict[str, Any]:
+        options: Dict[str, Any] = {}
+        if self._texture_compressor is not None:
+            compressor = self._texture_compressor
+            options["textures"] = [compressor.formats, compressor.supercompression, compressor.band_rows]
+        if self._lod_generator is not None:
+            options["lods"] = [self._lod_generator.ratios, self._lod_generator.screen_heights]
+        return options
+
+    def _reusable_resources(self, state: Dict[str, Any], resources_hash: str) -> Optional[PackageResources]:
+        saved = state.get("resources")
+        if not saved or saved["hash"] != resources_hash:
+            return None
+        resources = PackageResources(
+            compressed_textures={fmt: Path(path) for fmt, path in saved["compressed_textures"].items()},
+            lods=[LodLevel.from_metadata(level) for level in saved["lods"]],
+        )
+        if not all(path.exists() for path in self._resource_files(resources)):
+            return None
+        return resources
+
+    @staticmethod
+    def _resource_files(resources: PackageResources) -> List[Path]:
+        files = list(resources.compressed_textures.values())
+        for level in resources.lods:
+            files.append(level.mesh_path)
+            if level.blendshape_path is not None:
+                files.append(level.blendshape_path)
+        return files
+
+    @staticmethod
+    def _dropped_files(state: Dict[str, Any], hashes: Dict[str, str]) -> List[Path]:
+        """Files of formats an earlier run wrote but this one no longer produces.
+
+        They are left in place for the service to delete once the job's new
+        assets are committed, so a failed re-run keeps the old assets valid.
+        """
+
+        files = []
+        for asset_type, entry in state.get("assets", {}).items():
+            if asset_type not in hashes:
+                path = Path(entry["asset"]["file_path"])
+                files += [path, path.with_name(f"{path.name}{METADATA_SUFFIX}")]
+        return files
+
+    def _package_resources(self, context: PipelineContext, output_dir: Path, pool: Executor) -> PackageResources:
+        resources = PackageResources()
+        textures: Optional[Future] = None
+        if self._texture_compressor is not None:
+            pyramid = TexturePyramid.from_value(context.artifacts.get(context.texture_key))
+            textures = pool.submit(
+                contextvars.copy_context().run,
+                self._texture_compressor.compress,
+                pyramid,
+                output_dir,
+                f"{context.job_id}_albedo",
+            )
+        if self._lod_generator is not None:
+            store = context.artifacts
+            mesh = context.mesh_result
+            rigging = context.rigging_result
+            blendshapes = rigging.blendshapes or store.get(rigging.blendshape_key)
+            resources.lods = self._lod_generator.generate(
+                context.job_id,
+                mesh.mesh or store.get(mesh.mesh_key),
+                output_dir,
+                blendshapes if isinstance(blendshapes, BlendshapeSet) else None,
+            )
+        if textures is not None:
+            resources.compressed_textures = textures.result()
+        return resources
+
+    def _deduplicate(self, context: PipelineContext, output_dir: Path) -> None:
+        """Move the job's files into the content store and point asset URIs at their blobs."""
+
+        known = {
+            Path(asset["file_path"]).name: asset["metadata"]["checksums"]["sha256"]
+            for asset in context.assets.values()
+            if "sha256" in asset["metadata"].get("checksums", {})
+        }
+        stored = self._content_store.ingest(context.job_id, output_dir, known)
+        for asset in context.assets.values():
+            item = stored.get(Path(asset["file_path"]).name)
+            if item is not None:
+                asset["uri"] = self._content_store.blob_uri(self._asset_base_url, item)
+                asset["metadata"]["content_digest"] = item.digest
+
+    @staticmethod
+    def _materialize_inputs(context: PipelineContext) -> None:
+        """Write the intermediates referenced by packaged assets out of the artifact store."""
+
+        store = context.artifacts
+        mesh = context.mesh_result
+        rigging = context.rigging_result
+        mesh.mesh_path = store.materialize(mesh.mesh_key)
+        if mesh.neutral_mesh_key:
+            mesh.neutral_mesh_path = store.materialize(mesh.neutral_mesh_key)
+        context.texture_path = store.materialize(context.texture_key)
+        rigging.skeleton_path = store.materialize(rigging.skeleton_key)
+        rigging.blendshape_path = store.materialize(rigging.blendshape_key)
+        for name, key in rigging.clip_keys.items():
+            rigging.clip_paths[name] = store.materialize(key)
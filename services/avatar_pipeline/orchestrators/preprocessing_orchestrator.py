@@ -16,7 +16,7 @@ class PreprocessingOrchestrator(PipelineStage):
 
     def run(self, context: PipelineContext) -> PipelineContext:
         try:
-            context.aligned_images = self._preprocessor.align(context.photos, context.temp_dir)
+            context.aligned_images = self._preprocessor.align(context.photos, context.artifacts)
             return context
         except Exception as exc:
             raise StageExecutionError(f"Face alignment failed: {exc}") from exc
@@ -18,11 +18,11 @@ class ReconstructionOrchestrator(PipelineStage):
 
     def run(self, context: PipelineContext) -> PipelineContext:
         try:
-            context.mesh_result = self._runner.reconstruct(context.aligned_images, context.temp_dir)
-            context.texture_path = self._texture_generator.generate(
+            context.mesh_result = self._runner.reconstruct(context.aligned_images, context.artifacts)
+            context.texture_key = self._texture_generator.generate(
                 context.aligned_images,
                 context.mesh_result,
-                context.temp_dir,
+                context.artifacts,
             )
             return context
         except Exception as exc:
@@ -2,28 +2,39 @@
 
 from __future__ import annotations
 
+from typing import Optional
+
 from services.avatar_pipeline.exceptions import StageExecutionError
 from services.avatar_pipeline.models.pipeline import PipelineContext
 from services.avatar_pipeline.orchestrators.base import PipelineStage
 from services.avatar_pipeline.rigging.blendshape_exporter import BlendshapeExporter
+from services.avatar_pipeline.rigging.clip_baker import ClipBaker
 from services.avatar_pipeline.rigging.rigging_engine import RiggingEngine
 
 
 class RiggingOrchestrator(PipelineStage):
     name = "rigging"
 
-    def __init__(self, engine: RiggingEngine, exporter: BlendshapeExporter) -> None:
+    def __init__(
+        self,
+        engine: RiggingEngine,
+        exporter: BlendshapeExporter,
+        clip_baker: Optional[ClipBaker] = None,
+    ) -> None:
         self._engine = engine
         self._exporter = exporter
+        self._clip_baker = clip_baker
 
     def run(self, context: PipelineContext) -> PipelineContext:
         try:
             context.rigging_result = self._engine.rig_mesh(
                 context.mesh_result,
-                context.texture_path,
-                context.temp_dir,
+                context.texture_key,
+                context.artifacts,
             )
-            self._exporter.export(context.rigging_result, context.temp_dir)
+            self._exporter.export(context.rigging_result, context.artifacts)
+            if self._clip_baker is not None:
+                self._clip_baker.bake(context.rigging_result, context.artifacts)
             return context
         except Exception as exc:
             raise StageExecutionError(f"Rigging failed: {exc}") from exc
@@ -0,0 +1,76 @@
+"""Upload orchestrator pushing packaged job outputs to the configured bucket."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, List
+
+from services.avatar_pipeline.artifacts.content_store import METADATA_SUFFIX, file_digest
+from services.avatar_pipeline.exceptions import StageExecutionError
+from services.avatar_pipeline.models.pipeline import PipelineContext
+from services.avatar_pipeline.orchestrators.base import PipelineStage
+from services.avatar_pipeline.upload.multipart_uploader import MultipartUploader
+
+
+class UploadOrchestrator(PipelineStage):
+    """Upload the job's packaged assets and point their URIs at the bucket.
+
+    Only files the assets reference are sent: each asset file, its writer
+    metadata sidecar, and the compressed textures and LOD blendshapes its
+    metadata names, as long as they live in the output directory. Packaging
+    state and other worker-local files stay on the worker.
+
+    Content-addressed assets keep their blob layout (``blobs/<xx>/<sha256><suffix>``)
+    so identical outputs of different jobs are stored, and skipped, once;
+    everything else goes under ``<job_id>/``.
+    """
+
+    name = "upload"
+
+    def __init__(self, uploader: MultipartUploader) -> None:
+        self._uploader = uploader
+
+    def run(self, context: PipelineContext) -> PipelineContext:
+        output_dir = context.output_dir or context.temp_dir
+        if output_dir is None or not output_dir.exists():
+            raise StageExecutionError("Upload requires a packaged output directory.")
+        try:
+            keys: Dict[str, str] = {}
+            digests: Dict[str, str] = {}
+            for asset in context.assets.values():
+                path = Path(asset["file_path"])
+                digest = asset["metadata"].get("content_digest")
+                if digest is not None:
+                    keys[path.name] = f"blobs/{digest[:2]}/{digest}{''.join(path.suffixes)}"
+                sha256 = asset["metadata"].get("checksums", {}).get("sha256")
+                if sha256 is not None:
+                    digests[path.name] = sha256
+            files = {}
+            metadata = {}
+            for path in self._referenced_files(context, output_dir):
+                key = keys.get(path.name, f"{context.job_id}/{path.name}")
+                files[key] = path
+                metadata[key] = {"sha256": digests.get(path.name) or file_digest(path)}
+            results = self._uploader.upload(files, metadata)
+            by_name = {files[key].name: result for key, result in results.items()}
+            for asset in context.assets.values():
+                result = by_name.get(Path(asset["file_path"]).name)
+                if result is not None:
+                    asset["uri"] = result.uri
+                    asset["metadata"]["object_key"] = result.key
+            return context
+        except Exception as exc:
+            raise StageExecutionError(f"Upload failed: {exc}") from exc
+
+    @staticmethod
+    def _referenced_files(context: PipelineContext, output_dir: Path) -> List[Path]:
+        paths = set()
+        for asset in context.assets.values():
+            path = Path(asset["file_path"])
+            asset_metadata = asset["metadata"]
+            paths.update([path, path.with_name(f"{path.name}{METADATA_SUFFIX}")])
+            paths.update(Path(texture) for texture in asset_metadata.get("compressed_textures", {}).values())
+            if asset_metadata.get("blendshapes"):
+                paths.add(Path(asset_metadata["blendshapes"]))
+        root = output_dir.resolve()
+        return sorted(path for path in paths if path.resolve().parent == root and path.is_file())
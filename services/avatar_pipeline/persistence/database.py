@@ -2,14 +2,16 @@
 
 from __future__ import annotations
 
+import time
 from contextlib import contextmanager
 from typing import Iterator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from services.avatar_pipeline.config.settings import Settings
+from services.avatar_pipeline.observability.tracing import tracer
 
 
 def create_engine_from_settings(settings: Settings) -> Engine:
@@ -18,7 +20,32 @@ def create_engine_from_settings(settings: Settings) -> Engine:
     connect_args = {}
     if settings.database_url.startswith("sqlite"):
         connect_args["check_same_thread"] = False
-    return create_engine(settings.database_url, future=True, echo=False, connect_args=connect_args)
+    engine = create_engine(settings.database_url, future=True, echo=False, connect_args=connect_args)
+    trace_statements(engine)
+    return engine
+
+
+def trace_statements(engine: Engine) -> None:
+    """Record a ``db.statement`` span for every statement the engine sends.
+
+    Spans cover the cursor call only, so a session held open across a whole
+    job does not show the job's compute as database time.
+    """
+
+    system = engine.dialect.name
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _started(conn, cursor, statement, parameters, context, executemany) -> None:
+        if context is not None and tracer.recording:
+            context._trace_start_ns = time.time_ns()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finished(conn, cursor, statement, parameters, context, executemany) -> None:
+        started = getattr(context, "_trace_start_ns", None)
+        if started is not None:
+            operation = statement.split(None, 1)[0].upper() if statement.strip() else ""
+            attributes = {"db.system": system, "db.operation": operation, "db.executemany": executemany}
+            tracer.record_span("db.statement", started, time.time_ns(), attributes=attributes)
 
 
 def create_session_factory(settings: Settings) -> sessionmaker:
@@ -44,7 +71,8 @@ class Database:
         session: Session = self.SessionLocal()
         try:
             yield session
-            session.commit()
+            with tracer.start_span("db.commit", {"db.system": self.engine.dialect.name}):
+                session.commit()
         except Exception:
             session.rollback()
             raise
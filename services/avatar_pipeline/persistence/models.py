@@ -34,6 +34,7 @@ class AvatarGenerationJob(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     assets = relationship("GeneratedAsset", back_populates="job", cascade="all, delete-orphan")
+    stage_runs = relationship("StageRun", back_populates="job", cascade="all, delete-orphan")
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -70,3 +71,28 @@ class GeneratedAsset(Base):
             "metadata": self.metadata_json or {},
             "created_at": self.created_at.isoformat() if self.created_at else None,
         }
+
+
+class StageRun(Base):
+    """Duration of one stage (or writer, named ``<stage>.<asset type>``) in one run of a job."""
+
+    __tablename__ = "stage_runs"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    job_id = Column(String, ForeignKey("avatar_generation_jobs.id"), nullable=False, index=True)
+    stage = Column(String, nullable=False)
+    outcome = Column(String, nullable=False)
+    started_at = Column(DateTime, nullable=False)
+    duration_seconds = Column(Float, nullable=False)
+
+    job = relationship("AvatarGenerationJob", back_populates="stage_runs")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "job_id": self.job_id,
+            "stage": self.stage,
+            "outcome": self.outcome,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "duration_seconds": self.duration_seconds,
+        }
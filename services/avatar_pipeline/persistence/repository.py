@@ -5,12 +5,16 @@ from __future__ import annotations
 from contextlib import contextmanager
 from typing import Dict, Iterable, List, Optional
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session, sessionmaker
 
+from services.avatar_pipeline.observability.metrics import Timing
+from services.avatar_pipeline.observability.tracing import tracer
 from services.avatar_pipeline.persistence.models import (
     AvatarGenerationJob,
     GeneratedAsset,
     JobStatus,
+    StageRun,
 )
 
 
@@ -25,7 +29,10 @@ class AvatarJobRepository:
         session: Session = self._session_factory()
         try:
             yield session
-            session.commit()
+            # Spans cover the commit (and the flush it runs), not the whole session: the
+            # pipeline keeps one session open for an entire job.
+            with tracer.start_span("db.commit"):
+                session.commit()
         except Exception:
             session.rollback()
             raise
@@ -65,6 +72,10 @@ class AvatarJobRepository:
             job.output_payload = output_payload
         session.add(job)
 
+    def update_output_payload(self, session: Session, job: AvatarGenerationJob, output_payload: Dict) -> None:
+        job.output_payload = output_payload
+        session.add(job)
+
     def add_asset(
         self,
         session: Session,
@@ -79,6 +90,10 @@ class AvatarJobRepository:
         session.refresh(asset)
         return asset
 
+    def clear_assets(self, session: Session, job: AvatarGenerationJob) -> None:
+        job.assets.clear()
+        session.flush()
+
     def list_assets(self, job_id: str) -> List[GeneratedAsset]:
         with self.session_scope() as session:
             job = session.get(AvatarGenerationJob, job_id)
@@ -86,6 +101,26 @@ class AvatarJobRepository:
                 return []
             return [asset for asset in job.assets]
 
+    def add_stage_runs(self, session: Session, job: AvatarGenerationJob, timings: Iterable[Timing]) -> None:
+        for timing in timings:
+            session.add(
+                StageRun(
+                    job_id=job.id,
+                    stage=timing.name,
+                    outcome=timing.outcome,
+                    started_at=timing.started_at,
+                    duration_seconds=timing.duration,
+                )
+            )
+
+    def list_stage_runs(self, job_id: str) -> List[StageRun]:
+        with self.session_scope() as session:
+            return list(
+                session.scalars(
+                    select(StageRun).where(StageRun.job_id == job_id).order_by(StageRun.started_at, StageRun.stage)
+                )
+            )
+
     def mark_failure(self, session: Session, job: AvatarGenerationJob, message: str) -> None:
         self.update_job_status(session, job, JobStatus.FAILED, error_message=message)
 
@@ -1,37 +1,287 @@
-"""Simple face alignment preprocessor used for tests and orchestration wiring."""
+"""Batched face alignment: decode, place the face with a heuristic locator, and warp to a canonical crop."""
 
 from __future__ import annotations
 
-import json
-import uuid
-from pathlib import Path
-from typing import Iterable, List, Optional
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Protocol, Sequence, Tuple
 
+import numpy as np
+from PIL import Image
+
+from services.avatar_pipeline.artifacts.store import ArtifactStore
 from services.avatar_pipeline.models.pipeline import AlignedImage, Photo
 
+# Canonical five-point layout (left eye, right eye, nose tip, mouth left, mouth right)
+# expressed in face units, x to the right and y downwards from the face centre.
+CANONICAL_LANDMARKS = np.array(
+    [[-0.35, -0.25], [0.35, -0.25], [0.0, 0.05], [-0.28, 0.4], [0.28, 0.4]],
+    dtype=np.float32,
+)
+
+
+def synthesize_face(photo: Photo, max_size: int) -> np.ndarray:
+    """Deterministic stand-in image for photos whose bytes are not available locally."""
+
+    seed = int.from_bytes(hashlib.sha256(photo.url.encode("utf-8")).digest()[:8], "little")
+    rng = np.random.default_rng(seed)
+    scale = min(1.0, max_size / max(photo.width, photo.height, 1))
+    height = max(1, int(round(photo.height * scale)))
+    width = max(1, int(round(photo.width * scale)))
+
+    ys, xs = np.mgrid[0:height, 0:width].astype(np.float32)
+    cx = width * rng.uniform(0.4, 0.6)
+    cy = height * rng.uniform(0.4, 0.6)
+    radius = min(width, height) * rng.uniform(0.25, 0.35)
+    face = ((xs - cx) / (radius * 0.8)) ** 2 + ((ys - cy) / radius) ** 2 <= 1.0
+
+    background = rng.integers(20, 80, size=3)
+    skin = rng.integers(150, 230, size=3)
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:] = background
+    image[face] = skin
+    for ex, ey in CANONICAL_LANDMARKS[:2]:
+        eye = (xs - (cx + ex * radius)) ** 2 + (ys - (cy + ey * radius)) ** 2 <= (radius * 0.08) ** 2
+        image[eye] = background
+    return image
+
+
+def decode_photo(photo: Photo, max_size: int) -> np.ndarray:
+    """Decode a downloaded photo into an RGB ``uint8`` array no larger than ``max_size``."""
+
+    if photo.local_path is None:
+        return synthesize_face(photo, max_size)
+    with Image.open(photo.local_path) as image:
+        # draft() lets the JPEG decoder skip DCT scales we would discard anyway.
+        image.draft("RGB", (max_size, max_size))
+        image = image.convert("RGB")
+        image.thumbnail((max_size, max_size))
+        return np.asarray(image, dtype=np.uint8)
+
+
+def stack_images(images: Sequence[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pad images into one ``(N, H, W, 4)`` RGBX array and return it with their ``(h, w)`` sizes.
+
+    The fourth byte keeps every pixel 32-bit aligned so warps can gather whole
+    pixels as ``uint32`` values.
+    """
+
+    sizes = np.array([image.shape[:2] for image in images], dtype=np.int32)
+    height, width = sizes.max(axis=0)
+    batch = np.zeros((len(images), height, width, 4), dtype=np.uint8)
+    for index, image in enumerate(images):
+        batch[index, : image.shape[0], : image.shape[1], :3] = image
+    return batch, sizes
+
+
+class LandmarkDetector(Protocol):
+    """Anything that returns ``(N, 5, 2)`` points in ``CANONICAL_LANDMARKS`` order for a stacked batch."""
+
+    def detect_batch(self, images: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+        ...
+
+
+class MomentFaceLocator:
+    """Heuristic face locator; it does not detect landmarks.
+
+    Pixels are weighted by how far they differ from the background colour
+    sampled at the image corner; the weighted centroid and spread give the
+    face centre and scale, and the canonical five-point layout is placed
+    there unrotated. Eyes, nose and mouth are never measured, so it only
+    centres and scales upright faces on a plain background (such as the
+    ``synthesize_face`` placeholders). Pass a real landmark model as the
+    preprocessor's ``detector`` for photos. All images in a batch are
+    processed together.
+    """
+
+    def __init__(self, stride: int = 4) -> None:
+        self.stride = stride
+
+    def detect_batch(self, images: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+        stride = self.stride
+        small = images[:, ::stride, ::stride, :3].astype(np.float32)
+        gray = small @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+        ys = np.arange(gray.shape[1], dtype=np.float32) * stride
+        xs = np.arange(gray.shape[2], dtype=np.float32) * stride
+        heights = sizes[:, 0].astype(np.float32)
+        widths = sizes[:, 1].astype(np.float32)
+        valid = (ys[None, :, None] < heights[:, None, None]) & (xs[None, None, :] < widths[:, None, None])
+
+        weight = np.abs(gray - gray[:, :1, :1]) * valid
+        total = weight.sum(axis=(1, 2))
+        row_mass = weight.sum(axis=2)
+        col_mass = weight.sum(axis=1)
+        safe_total = np.maximum(total, 1e-6)
+        cy = (row_mass * ys).sum(axis=1) / safe_total
+        cx = (col_mass * xs).sum(axis=1) / safe_total
+        var_y = (row_mass * (ys[None] - cy[:, None]) ** 2).sum(axis=1) / safe_total
+        var_x = (col_mass * (xs[None] - cx[:, None]) ** 2).sum(axis=1) / safe_total
+        # For a uniform ellipse the radius along an axis is twice its standard deviation.
+        scale = 2.0 * np.sqrt(var_y)
+
+        blank = total < 1e-3
+        cx = np.where(blank, widths / 2, cx)
+        cy = np.where(blank, heights / 2, cy)
+        scale = np.where(blank | (scale < 1.0), np.minimum(widths, heights) / 4, scale)
+
+        centres = np.stack([cx, cy], axis=1)
+        return centres[:, None, :] + CANONICAL_LANDMARKS[None] * scale[:, None, None]
+
+
+def estimate_similarity(source: np.ndarray, target: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Least-squares similarity transforms mapping ``source`` to ``target`` for a batch.
+
+    Points are treated as complex numbers so rotation and scale collapse into a
+    single complex factor ``a``; returns ``(a, source_mean, target_mean)``.
+    """
+
+    src = source[..., 0] + 1j * source[..., 1]
+    dst = target[..., 0] + 1j * target[..., 1]
+    src_mean = src.mean(axis=-1)
+    dst_mean = dst.mean(axis=-1)
+    src_c = src - src_mean[..., None]
+    dst_c = dst - dst_mean[..., None]
+    a = (np.conj(src_c) * dst_c).sum(axis=-1) / np.maximum((np.abs(src_c) ** 2).sum(axis=-1), 1e-12)
+    return a, src_mean, dst_mean
+
+
+def warp_batch(
+    images: np.ndarray,
+    sizes: np.ndarray,
+    a: np.ndarray,
+    src_mean: np.ndarray,
+    dst_mean: np.ndarray,
+    output_size: int,
+) -> np.ndarray:
+    """Bilinearly resample every RGBX image of the batch into an RGB ``output_size`` crop."""
+
+    count, height, width = images.shape[:3]
+    coords = np.arange(output_size, dtype=np.float32)
+    inv_a = (1.0 / a).astype(np.complex64)
+    offset = (src_mean - dst_mean * inv_a).astype(np.complex64)
+    # src = grid / a + (src_mean - dst_mean / a), split into real and imaginary parts.
+    x = (
+        coords[None, None, :] * inv_a.real[:, None, None]
+        - coords[None, :, None] * inv_a.imag[:, None, None]
+        + offset.real[:, None, None]
+    )
+    y = (
+        coords[None, None, :] * inv_a.imag[:, None, None]
+        + coords[None, :, None] * inv_a.real[:, None, None]
+        + offset.imag[:, None, None]
+    )
+    max_x = (sizes[:, 1] - 1)[:, None, None]
+    max_y = (sizes[:, 0] - 1)[:, None, None]
+    np.clip(x, 0, max_x, out=x)
+    np.clip(y, 0, max_y, out=y)
+
+    x0 = x.astype(np.int32)
+    y0 = y.astype(np.int32)
+    wx = np.rint((x - x0) * 256).astype(np.uint32)
+    wy = np.rint((y - y0) * 256).astype(np.uint32)
+    step_x = (x0 < max_x).astype(np.int32)
+    step_y = (y0 < max_y).astype(np.int32) * width
+
+    # Gather whole pixels from the flattened batch with one linear index per tap.
+    flat = np.ascontiguousarray(images).view(np.uint32).reshape(-1)
+    i00 = (np.arange(count, dtype=np.int32) * (height * width))[:, None, None] + y0 * width + x0
+    i10 = i00 + step_y
+    top = lerp_packed(np.take(flat, i00), np.take(flat, i00 + step_x), wx)
+    bottom = lerp_packed(np.take(flat, i10), np.take(flat, i10 + step_x), wx)
+    packed = lerp_packed(top, bottom, wy)
+    return np.ascontiguousarray(packed.view(np.uint8).reshape(packed.shape + (4,))[..., :3])
+
+
+_LANE_MASK = np.uint32(0x00FF00FF)
+
+
+def lerp_packed(first: np.ndarray, second: np.ndarray, weight: np.ndarray) -> np.ndarray:
+    """Blend packed 8-bit RGBX pixels with 8.8 fixed-point weights, two channels per op."""
+
+    inverse = np.uint32(256) - weight
+    even = (((first & _LANE_MASK) * inverse + (second & _LANE_MASK) * weight) >> 8) & _LANE_MASK
+    odd = ((((first >> 8) & _LANE_MASK) * inverse + ((second >> 8) & _LANE_MASK) * weight) >> 8) & _LANE_MASK
+    return even | (odd << 8)
+
 
 class FaceAlignmentPreprocessor:
-    """Align faces and produce landmark files for downstream stages."""
+    """Align faces and publish aligned crops and landmarks for downstream stages.
 
-    def align(self, photos: Iterable[Photo], working_dir: Optional[Path]) -> List[AlignedImage]:
+    Photos without downloaded bytes (``local_path`` unset, which is every
+    photo unless photo fetching is enabled) are replaced by
+    ``synthesize_face`` placeholders. The default ``MomentFaceLocator`` is a
+    heuristic, so the published "landmarks" are the canonical template at
+    the located face, not measured features.
+    """
+
+    def __init__(
+        self,
+        output_size: int = 256,
+        max_decode_size: int = 512,
+        workers: int = 4,
+        chunk_size: int = 32,
+        detector: Optional[LandmarkDetector] = None,
+    ) -> None:
+        self.output_size = output_size
+        self.max_decode_size = max_decode_size
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.detector = detector if detector is not None else MomentFaceLocator()
+        self.target_landmarks = output_size / 2 + CANONICAL_LANDMARKS * (output_size * 0.45)
+
+    def align(self, photos: Iterable[Photo], store: Optional[ArtifactStore]) -> List[AlignedImage]:
         photos = list(photos)
-        if working_dir is None:
-            raise ValueError("working_dir must be provided for face alignment output.")
-        alignment_dir = working_dir / "alignment"
-        alignment_dir.mkdir(parents=True, exist_ok=True)
+        if store is None:
+            raise ValueError("an artifact store must be provided for face alignment output.")
+        if not photos:
+            return []
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            decoded = list(pool.map(lambda photo: decode_photo(photo, self.max_decode_size), photos))
+
+        aligned: List[AlignedImage] = []
+        for start in range(0, len(photos), self.chunk_size):
+            chunk = photos[start : start + self.chunk_size]
+            aligned.extend(self._align_chunk(chunk, decoded[start : start + self.chunk_size], start, store))
+        return aligned
+
+    def _align_chunk(
+        self,
+        photos: List[Photo],
+        images: List[np.ndarray],
+        offset: int,
+        store: ArtifactStore,
+    ) -> List[AlignedImage]:
+        batch, sizes = stack_images(images)
+        landmarks = self.detector.detect_batch(batch, sizes)
+        target = np.broadcast_to(self.target_landmarks, landmarks.shape)
+        a, src_mean, dst_mean = estimate_similarity(landmarks, target)
+        warped = warp_batch(batch, sizes, a, src_mean, dst_mean, self.output_size)
+
+        src = landmarks[..., 0] + 1j * landmarks[..., 1]
+        mapped = a[:, None] * (src - src_mean[:, None]) + dst_mean[:, None]
+        aligned_landmarks = np.stack([mapped.real, mapped.imag], axis=-1).astype(np.float32)
+        translation = dst_mean - a * src_mean
+        transforms = np.stack(
+            [
+                np.stack([a.real, -a.imag, translation.real], axis=-1),
+                np.stack([a.imag, a.real, translation.imag], axis=-1),
+            ],
+            axis=1,
+        ).astype(np.float32)
 
         aligned: List[AlignedImage] = []
         for index, photo in enumerate(photos):
-            aligned_path = alignment_dir / f"aligned_{index}.png"
-            aligned_path.write_text(f"aligned image placeholder for {photo.url}\n")
-            landmarks_path = alignment_dir / f"aligned_{index}_landmarks.json"
-            landmarks = {"photo_url": photo.url, "landmarks": [0, 0, 1, 1], "id": uuid.uuid4().hex}
-            landmarks_path.write_text(json.dumps(landmarks))
+            key = f"alignment/aligned_{offset + index}"
+            landmarks_key = f"{key}_landmarks"
             aligned.append(
                 AlignedImage(
                     source_photo=photo,
-                    aligned_path=aligned_path,
-                    landmarks_path=landmarks_path,
+                    pixels=store.put(key, warped[index]),
+                    landmarks=store.put(landmarks_key, aligned_landmarks[index]),
+                    transform=transforms[index],
+                    artifact_key=key,
+                    landmarks_key=landmarks_key,
                 )
             )
         return aligned
@@ -1,44 +1,141 @@
-"""Stub implementation of a DECA-based mesh reconstruction runner."""
+"""DECA-style mesh reconstruction running as batched NumPy operations."""
 
 from __future__ import annotations
 
-import json
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable, Optional
 
+import numpy as np
+
+from services.avatar_pipeline.artifacts.store import ArtifactStore
+from services.avatar_pipeline.models.mesh import Mesh
 from services.avatar_pipeline.models.pipeline import AlignedImage, MeshResult
+from services.avatar_pipeline.reconstruction.model_registry import (
+    LoadedModel,
+    ModelRegistry,
+    get_model_registry,
+)
+
+
+@dataclass
+class BatchReconstruction:
+    """Per-image codes and the mesh fused from them."""
+
+    shape_codes: np.ndarray
+    expression_codes: np.ndarray
+    vertices: np.ndarray
+    neutral_vertices: np.ndarray
+    faces: np.ndarray
+    uvs: np.ndarray
+
+    @property
+    def expression_code(self) -> np.ndarray:
+        return self.expression_codes.mean(axis=0)
+
+
+def pool_features(images: np.ndarray, feature_size: int) -> np.ndarray:
+    """Average-pool a ``(N, H, W, 3)`` uint8 batch to ``feature_size`` squares and flatten it."""
+
+    count, height, width = images.shape[:3]
+    block_h = max(1, height // feature_size)
+    block_w = max(1, width // feature_size)
+    cropped = images[:, : block_h * feature_size, : block_w * feature_size]
+    # Integer sums over contiguous axes are far cheaper than a strided float mean.
+    blocks = cropped.reshape(count * feature_size, block_h, feature_size, block_w, -1)
+    sums = blocks.sum(axis=1, dtype=np.uint32).sum(axis=2, dtype=np.uint32)
+    scale = np.float32(1.0 / (255.0 * block_h * block_w))
+    return sums.reshape(count, -1).astype(np.float32) * scale - np.float32(0.5)
 
 
 class DecaRunner:
     """Wraps DECA (or a compatible) model execution."""
 
-    def __init__(self, model_path: Path, gpu_enabled: bool = False) -> None:
+    def __init__(
+        self,
+        model_path: Path,
+        gpu_enabled: bool = False,
+        model_version: str = "deca-v2",
+        registry: Optional[ModelRegistry] = None,
+        batch_size: int = 16,
+    ) -> None:
         self.model_path = model_path
         self.gpu_enabled = gpu_enabled
+        self.model_version = model_version
+        self.registry = registry or get_model_registry()
+        self.batch_size = batch_size
+
+    def load_model(self) -> LoadedModel:
+        """Fetch the resident weights for this runner's model version."""
+
+        return self.registry.get(self.model_path, self.model_version)
 
-    def reconstruct(self, images: Iterable[AlignedImage], working_dir: Optional[Path]) -> MeshResult:
+    def reconstruct_batch(self, images: np.ndarray, batch_size: Optional[int] = None) -> BatchReconstruction:
+        """Encode a ``(N, H, W, 3)`` stack of aligned crops and fuse the codes into one mesh.
+
+        Encoding runs as one matrix product per ``batch_size`` images; shape codes
+        are averaged across views (identity is shared) and the fused codes are
+        applied to the model bases with a single product each.
+        """
+
+        if images.ndim != 4 or images.shape[0] == 0:
+            raise ValueError("reconstruct_batch expects a non-empty (N, H, W, 3) array.")
+        model = self.load_model()
+        encoder = model["encoder"]
+        bias = model["encoder_bias"]
+        feature_size = int(round(np.sqrt(encoder.shape[0] / 3)))
+        n_shape = model["shape_basis"].shape[0]
+        batch_size = batch_size or self.batch_size
+
+        codes = np.empty((images.shape[0], encoder.shape[1]), dtype=np.float32)
+        for start in range(0, images.shape[0], batch_size):
+            chunk = images[start : start + batch_size]
+            np.matmul(pool_features(chunk, feature_size), encoder, out=codes[start : start + len(chunk)])
+        codes += bias
+        # Regressors emit bounded coefficients, as DECA's tanh-activated heads do.
+        np.tanh(codes, out=codes)
+
+        shape_codes = codes[:, :n_shape]
+        expression_codes = codes[:, n_shape:]
+        template = model["template_vertices"]
+        neutral = template + (shape_codes.mean(axis=0) @ model["shape_basis"]).reshape(template.shape)
+        vertices = neutral + (expression_codes.mean(axis=0) @ model["expression_basis"]).reshape(template.shape)
+        return BatchReconstruction(
+            shape_codes=shape_codes,
+            expression_codes=expression_codes,
+            vertices=vertices.astype(np.float32, copy=False),
+            neutral_vertices=neutral.astype(np.float32, copy=False),
+            faces=np.asarray(model["faces"]),
+            uvs=np.asarray(model["uvs"]),
+        )
+
+    def reconstruct(self, images: Iterable[AlignedImage], store: Optional[ArtifactStore]) -> MeshResult:
         images = list(images)
         if not images:
             raise ValueError("Aligned images are required for reconstruction.")
-        if working_dir is None:
-            raise ValueError("working_dir must be provided for reconstruction output.")
-
-        recon_dir = working_dir / "reconstruction"
-        recon_dir.mkdir(parents=True, exist_ok=True)
-
-        mesh_path = recon_dir / "avatar_mesh.obj"
-        neutral_mesh_path = recon_dir / "avatar_mesh_neutral.obj"
-        coefficients = {f"exp_{index}": round(index * 0.1, 3) for index, _ in enumerate(images)}
+        if store is None:
+            raise ValueError("an artifact store must be provided for reconstruction output.")
 
-        mesh_content = {
-            "model_path": str(self.model_path),
-            "gpu_enabled": self.gpu_enabled,
-            "images": [str(img.aligned_path) for img in images],
+        result = self.reconstruct_batch(np.stack([image.pixels for image in images]))
+        coefficients = {
+            f"exp_{index}": round(float(value), 4) for index, value in enumerate(result.expression_code)
         }
-        mesh_path.write_text(json.dumps(mesh_content))
-        neutral_mesh_path.write_text("neutral mesh placeholder")
+
+        mesh_key = "reconstruction/avatar_mesh"
+        neutral_mesh_key = "reconstruction/avatar_mesh_neutral"
+        neutral = Mesh(
+            result.neutral_vertices,
+            result.faces,
+            uvs=result.uvs,
+            name="avatar_mesh_neutral",
+            model_version=self.model_version,
+            source_keys=[image.artifact_key for image in images],
+        )
+        mesh = neutral.with_vertices(result.vertices, name="avatar_mesh")
         return MeshResult(
-            mesh_path=mesh_path,
-            neutral_mesh_path=neutral_mesh_path,
+            mesh=store.put(mesh_key, mesh),
+            neutral_mesh=store.put(neutral_mesh_key, neutral),
             expression_coefficients=coefficients,
+            mesh_key=mesh_key,
+            neutral_mesh_key=neutral_mesh_key,
         )
@@ -0,0 +1,284 @@
+"""Process-wide registry keeping reconstruction model weights resident between jobs."""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WEIGHT_SUFFIX = ".npy"
+
+
+@dataclass
+class LoadedModel:
+    """Weights for one model version plus bookkeeping about how they were loaded."""
+
+    version: str
+    arrays: Dict[str, np.ndarray]
+    load_seconds: float
+    memory_mapped: bool
+    nbytes: int = 0
+
+    def __post_init__(self) -> None:
+        if not self.nbytes:
+            self.nbytes = sum(array.nbytes for array in self.arrays.values())
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+
+@dataclass
+class RegistryStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    load_seconds: Dict[str, float] = field(default_factory=dict)
+    resident_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def synthesize_deca_weights(
+    version: str,
+    grid: Tuple[int, int] = (96, 96),
+    n_shape: int = 100,
+    n_expression: int = 50,
+    feature_size: int = 32,
+) -> Dict[str, np.ndarray]:
+    """Deterministic stand-in weights with the layout of a DECA-style face model.
+
+    The template is an open face mask laid out on a ``rows x cols`` vertex grid;
+    shape and expression bases are smooth displacements along the template
+    normals, and the encoder is a random projection of pooled image features.
+    """
+
+    seed = int.from_bytes(hashlib.sha256(version.encode("utf-8")).digest()[:8], "little")
+    rng = np.random.default_rng(seed)
+    rows, cols = grid
+
+    v, u = np.meshgrid(np.linspace(0.0, 1.0, rows), np.linspace(0.0, 1.0, cols), indexing="ij")
+    azimuth = (u - 0.5) * np.deg2rad(200.0)
+    polar = np.deg2rad(20.0) + v * np.deg2rad(140.0)
+    normals = np.stack(
+        [np.sin(polar) * np.sin(azimuth), np.cos(polar), np.sin(polar) * np.cos(azimuth)],
+        axis=-1,
+    ).reshape(-1, 3)
+    template = normals * np.array([0.075, 0.11, 0.095])
+    uvs = np.stack([u, 1.0 - v], axis=-1).reshape(-1, 2)
+
+    cell = (np.arange(rows - 1)[:, None] * cols + np.arange(cols - 1)[None, :]).reshape(-1)
+    faces = np.concatenate(
+        [
+            np.stack([cell, cell + cols, cell + 1], axis=-1),
+            np.stack([cell + 1, cell + cols, cell + cols + 1], axis=-1),
+        ]
+    )
+
+    def smooth_basis(count: int, amplitude: float) -> np.ndarray:
+        frequencies = rng.integers(1, 5, size=(count, 2))
+        phases = rng.uniform(0, 2 * np.pi, size=(count, 2))
+        flat_u = u.reshape(-1)[None, :]
+        flat_v = v.reshape(-1)[None, :]
+        pattern = np.sin(frequencies[:, :1] * np.pi * flat_u + phases[:, :1]) * np.sin(
+            frequencies[:, 1:] * np.pi * flat_v + phases[:, 1:]
+        )
+        displacement = pattern[:, :, None] * normals[None] * amplitude
+        return displacement.reshape(count, -1)
+
+    feature_dim = feature_size * feature_size * 3
+    code_dim = n_shape + n_expression
+    return {
+        "template_vertices": template.astype(np.float32),
+        "faces": faces.astype(np.int32),
+        "uvs": uvs.astype(np.float32),
+        "grid": np.array(grid, dtype=np.int32),
+        "shape_basis": smooth_basis(n_shape, 0.004).astype(np.float32),
+        "expression_basis": smooth_basis(n_expression, 0.003).astype(np.float32),
+        "encoder": (rng.standard_normal((feature_dim, code_dim)) / np.sqrt(feature_dim)).astype(np.float32),
+        "encoder_bias": np.zeros(code_dim, dtype=np.float32),
+    }
+
+
+def save_model_weights(directory: Path, arrays: Dict[str, np.ndarray]) -> None:
+    """Write weights as one ``.npy`` file per array so they can be memory-mapped."""
+
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(directory / f"{name}{WEIGHT_SUFFIX}", array, allow_pickle=False)
+
+
+def load_model_weights(
+    directory: Path, version: str, mmap: bool, allow_synthetic: bool = False
+) -> Tuple[Dict[str, np.ndarray], bool]:
+    """Load weights for ``version`` from ``directory/version``.
+
+    Missing weights raise ``FileNotFoundError`` unless ``allow_synthetic`` is
+    set (tests, benchmarks, local runs), in which case stand-in weights from
+    ``synthesize_deca_weights`` are used.
+    """
+
+    version_dir = directory / version
+    files = sorted(version_dir.glob(f"*{WEIGHT_SUFFIX}")) if version_dir.is_dir() else []
+    if not files:
+        if not allow_synthetic:
+            raise FileNotFoundError(f"No {WEIGHT_SUFFIX} weight files found under {version_dir}.")
+        logger.warning("No weights found under %s; using synthetic %s weights.", version_dir, version)
+        return synthesize_deca_weights(version), False
+    arrays = {
+        path.stem: np.load(path, mmap_mode="r" if mmap else None, allow_pickle=False)
+        for path in files
+    }
+    return arrays, mmap
+
+
+class ModelRegistry:
+    """LRU cache of loaded model versions bounded by a resident-memory cap.
+
+    Concurrent requests for a version that is still loading wait for the
+    in-flight load instead of starting another one. Without a custom
+    ``loader``, missing weight files are an error unless ``allow_synthetic``
+    is set.
+    """
+
+    def __init__(
+        self,
+        memory_cap_bytes: int = 2 * 1024**3,
+        mmap: bool = True,
+        loader: Optional[Callable[[Path, str, bool], Tuple[Dict[str, np.ndarray], bool]]] = None,
+        allow_synthetic: bool = False,
+    ) -> None:
+        self.memory_cap_bytes = memory_cap_bytes
+        self.mmap = mmap
+        self.allow_synthetic = allow_synthetic
+        self._loader = loader or functools.partial(load_model_weights, allow_synthetic=allow_synthetic)
+        self._models: "OrderedDict[Tuple[str, str], LoadedModel]" = OrderedDict()
+        self._loading: Dict[Tuple[str, str], threading.Event] = {}
+        self._lock = threading.Lock()
+        self._stats = RegistryStats()
+
+    def get(self, model_path: Path, version: str) -> LoadedModel:
+        key = (str(model_path), version)
+        while True:
+            with self._lock:
+                model = self._models.get(key)
+                if model is not None:
+                    self._models.move_to_end(key)
+                    self._stats.hits += 1
+                    return model
+                pending = self._loading.get(key)
+                if pending is None:
+                    self._loading[key] = threading.Event()
+                    self._stats.misses += 1
+                    break
+            pending.wait()
+
+        try:
+            model = self._load(Path(model_path), version)
+        except BaseException:
+            with self._lock:
+                self._loading.pop(key).set()
+            raise
+        with self._lock:
+            self._models[key] = model
+            self._stats.load_seconds[version] = model.load_seconds
+            self._evict(keep=key)
+            self._loading.pop(key).set()
+        return model
+
+    def preload(self, model_path: Path, versions: Iterable[str]) -> None:
+        for version in versions:
+            self.get(model_path, version)
+
+    def stats(self) -> RegistryStats:
+        with self._lock:
+            return RegistryStats(
+                hits=self._stats.hits,
+                misses=self._stats.misses,
+                evictions=self._stats.evictions,
+                load_seconds=dict(self._stats.load_seconds),
+                resident_bytes=self._resident_bytes(),
+            )
+
+    def loaded_versions(self) -> Tuple[str, ...]:
+        with self._lock:
+            return tuple(version for _, version in self._models)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._models.clear()
+
+    def _load(self, model_path: Path, version: str) -> LoadedModel:
+        started = time.perf_counter()
+        arrays, memory_mapped = self._loader(model_path, version, self.mmap)
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "Loaded model %s from %s in %.3fs (memory-mapped=%s)",
+            version,
+            model_path,
+            elapsed,
+            memory_mapped,
+        )
+        return LoadedModel(version=version, arrays=arrays, load_seconds=elapsed, memory_mapped=memory_mapped)
+
+    def _resident_bytes(self) -> int:
+        return sum(model.nbytes for model in self._models.values())
+
+    def _evict(self, keep: Tuple[str, str]) -> None:
+        while self._resident_bytes() > self.memory_cap_bytes and len(self._models) > 1:
+            oldest = next(iter(self._models))
+            if oldest == keep:
+                self._models.move_to_end(oldest)
+                continue
+            evicted = self._models.pop(oldest)
+            self._stats.evictions += 1
+            logger.info("Evicted model %s to stay under %d bytes", evicted.version, self.memory_cap_bytes)
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry(
+    memory_cap_bytes: Optional[int] = None,
+    mmap: Optional[bool] = None,
+    allow_synthetic: Optional[bool] = None,
+) -> ModelRegistry:
+    """Return the process-wide registry, creating it with the given options on first use.
+
+    Options left as ``None`` accept whatever the registry was created with.
+    Later calls that ask for different options raise ``ValueError`` rather
+    than silently running with the first caller's.
+    """
+
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry(
+                memory_cap_bytes=memory_cap_bytes if memory_cap_bytes is not None else 2 * 1024**3,
+                mmap=True if mmap is None else mmap,
+                allow_synthetic=bool(allow_synthetic),
+            )
+            return _registry
+        requested = {"memory_cap_bytes": memory_cap_bytes, "mmap": mmap, "allow_synthetic": allow_synthetic}
+        conflicts = {
+            name: (getattr(_registry, name), value)
+            for name, value in requested.items()
+            if value is not None and getattr(_registry, name) != value
+        }
+        if conflicts:
+            details = ", ".join(f"{name}={old!r} (requested {new!r})" for name, (old, new) in conflicts.items())
+            raise ValueError(f"The model registry was already created with {details}.")
+        return _registry
@@ -0,0 +1,95 @@
+"""ARKit-style facial blendshapes generated from regions of the reconstructed mesh."""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from services.avatar_pipeline.models.mesh import Mesh
+
+# name: (centre x, centre y as fractions of the mesh bounds, radius, direction, amplitude).
+# Radius and amplitude are fractions of the mesh height; "Left" shapes are mirrored to "Right".
+Region = Tuple[float, float, float, Tuple[float, float, float], float]
+
+_SIDED: Dict[str, Region] = {
+    "eyeBlinkLeft": (0.33, 0.64, 0.08, (0.0, -1.0, 0.0), 0.020),
+    "eyeLookDownLeft": (0.33, 0.62, 0.05, (0.0, -1.0, 0.0), 0.008),
+    "eyeLookInLeft": (0.33, 0.62, 0.05, (1.0, 0.0, 0.0), 0.008),
+    "eyeLookOutLeft": (0.33, 0.62, 0.05, (-1.0, 0.0, 0.0), 0.008),
+    "eyeLookUpLeft": (0.33, 0.62, 0.05, (0.0, 1.0, 0.0), 0.008),
+    "eyeSquintLeft": (0.33, 0.58, 0.07, (0.0, 1.0, 0.0), 0.010),
+    "eyeWideLeft": (0.33, 0.66, 0.07, (0.0, 1.0, 0.0), 0.012),
+    "jawLeft": (0.5, 0.18, 0.22, (-1.0, 0.0, 0.0), 0.020),
+    "mouthLeft": (0.5, 0.3, 0.1, (-1.0, 0.0, 0.0), 0.015),
+    "mouthSmileLeft": (0.4, 0.3, 0.08, (-0.6, 0.8, 0.0), 0.020),
+    "mouthFrownLeft": (0.4, 0.28, 0.08, (0.0, -1.0, 0.0), 0.015),
+    "mouthDimpleLeft": (0.38, 0.3, 0.06, (-0.9, 0.0, -0.45), 0.010),
+    "mouthStretchLeft": (0.4, 0.29, 0.08, (-0.95, -0.3, 0.0), 0.015),
+    "mouthPressLeft": (0.44, 0.3, 0.06, (0.0, 0.0, -1.0), 0.008),
+    "mouthLowerDownLeft": (0.45, 0.26, 0.06, (0.0, -1.0, 0.0), 0.012),
+    "mouthUpperUpLeft": (0.45, 0.34, 0.06, (0.0, 1.0, 0.0), 0.012),
+    "browDownLeft": (0.33, 0.74, 0.09, (0.0, -1.0, 0.0), 0.015),
+    "browOuterUpLeft": (0.26, 0.75, 0.07, (0.0, 1.0, 0.0), 0.018),
+    "cheekSquintLeft": (0.3, 0.5, 0.09, (0.0, 1.0, 0.0), 0.010),
+    "noseSneerLeft": (0.45, 0.5, 0.05, (0.0, 0.95, 0.3), 0.010),
+}
+
+_CENTRED: Dict[str, Region] = {
+    "jawForward": (0.5, 0.18, 0.22, (0.0, 0.0, 1.0), 0.020),
+    "jawOpen": (0.5, 0.18, 0.25, (0.0, -1.0, 0.0), 0.060),
+    "mouthClose": (0.5, 0.3, 0.08, (0.0, 1.0, 0.0), 0.010),
+    "mouthFunnel": (0.5, 0.3, 0.09, (0.0, 0.0, 1.0), 0.015),
+    "mouthPucker": (0.5, 0.3, 0.08, (0.0, 0.0, 1.0), 0.020),
+    "mouthRollLower": (0.5, 0.26, 0.07, (0.0, 0.3, -0.95), 0.010),
+    "mouthRollUpper": (0.5, 0.34, 0.07, (0.0, -0.3, -0.95), 0.010),
+    "mouthShrugLower": (0.5, 0.24, 0.08, (0.0, 1.0, 0.0), 0.010),
+    "mouthShrugUpper": (0.5, 0.35, 0.07, (0.0, 1.0, 0.0), 0.008),
+    "browInnerUp": (0.5, 0.76, 0.1, (0.0, 1.0, 0.0), 0.015),
+    "cheekPuff": (0.5, 0.38, 0.3, (0.0, 0.0, 1.0), 0.015),
+    "tongueOut": (0.5, 0.27, 0.05, (0.0, 0.0, 1.0), 0.025),
+}
+
+
+def _mirror(regions: Dict[str, Region]) -> Dict[str, Region]:
+    mirrored = {}
+    for name, (x, y, radius, (dx, dy, dz), amplitude) in regions.items():
+        mirrored[name[: -len("Left")] + "Right"] = (1.0 - x, y, radius, (-dx, dy, dz), amplitude)
+    return mirrored
+
+
+ARKIT_REGIONS: Dict[str, Region] = {**_SIDED, **_mirror(_SIDED), **_CENTRED}
+ARKIT_BLENDSHAPES: List[str] = list(ARKIT_REGIONS)
+
+
+def control_name(shape: str) -> str:
+    """Rig control for an ARKit shape name, e.g. ``jawOpen`` -> ``jaw_open``."""
+
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", shape).lower()
+
+
+def arkit_deltas(mesh: Mesh) -> np.ndarray:
+    """Dense ``(52, V, 3)`` deltas for :data:`ARKIT_BLENDSHAPES` on ``mesh``.
+
+    Each shape moves the front-facing vertices within its region, with a
+    smooth falloff to zero at the region edge, so most vertices are untouched.
+    """
+
+    lower, upper = mesh.bounds()
+    extent = np.maximum(upper - lower, 1e-9)
+    fractions = (mesh.vertices - lower) / extent
+    height = float(extent[1])
+    front = fractions[:, 2] > 0.5
+
+    table = np.array(
+        [[x, y, radius, *direction, amplitude] for x, y, radius, direction, amplitude in ARKIT_REGIONS.values()],
+        dtype=np.float32,
+    )
+    centres, radii, directions, amplitudes = table[:, :2], table[:, 2], table[:, 3:6], table[:, 6]
+    # Distances measured in units of the mesh height so regions stay round on non-square faces.
+    offsets = (fractions[None, :, :2] - centres[:, None, :]) * (extent[:2] / height)
+    ratio = np.einsum("svk,svk->sv", offsets, offsets) / (radii[:, None] ** 2)
+    falloff = np.where((ratio < 1.0) & front[None, :], (1.0 - ratio) ** 2, 0.0).astype(np.float32)
+    scale = (amplitudes * height)[:, None, None] * directions[:, None, :]
+    return falloff[:, :, None] * scale
@@ -2,25 +2,40 @@
 
 from __future__ import annotations
 
-import json
-from pathlib import Path
 from typing import Optional
 
+from services.avatar_pipeline.artifacts.store import ArtifactStore
+from services.avatar_pipeline.models.blendshapes import BlendshapeSet
 from services.avatar_pipeline.models.pipeline import RiggingResult
 
 
 class BlendshapeExporter:
-    """Serialize blendshape data to disk for game engine consumption."""
+    """Serialize blendshape data for game engine consumption."""
 
-    def export(self, result: RiggingResult, working_dir: Optional[Path]) -> Path:
-        if working_dir is None:
-            raise ValueError("working_dir must be provided for blendshape export.")
-        manifest_dir = working_dir / "rig"
-        manifest_dir.mkdir(parents=True, exist_ok=True)
-        manifest_path = manifest_dir / "blendshape_manifest.json"
+    def __init__(self, tolerance: float = 1e-6) -> None:
+        self.tolerance = tolerance
+
+    def export(self, result: RiggingResult, store: Optional[ArtifactStore]) -> str:
+        if store is None:
+            raise ValueError("an artifact store must be provided for blendshape export.")
+        if result.shape_deltas is None:
+            raise ValueError("blendshape export requires the rig's shape deltas.")
+        blendshape_key = "rig/blendshapes"
+        manifest_key = "rig/blendshape_manifest"
+        shapes = BlendshapeSet.from_dense(result.shape_names, result.shape_deltas, self.tolerance)
+        result.blendshapes = store.put(blendshape_key, shapes)
+        result.blendshape_key = blendshape_key
+        # The sparse set replaces the dense deltas for every later stage.
+        result.shape_deltas = None
         payload = {
-            "blendshape_path": str(result.blendshape_path),
+            "blendshapes": blendshape_key,
+            "format": "ablend",
+            "shapes": list(shapes.names),
+            "entry_count": shapes.entry_count,
+            "bytes": shapes.nbytes,
+            "dense_bytes": shapes.dense_nbytes,
             "controls": result.controls,
         }
-        manifest_path.write_text(json.dumps(payload))
-        return manifest_path
+        store.put(manifest_key, payload)
+        result.manifest_key = manifest_key
+        return manifest_key
@@ -0,0 +1,138 @@
+"""Stream-time blendshape evaluation for packaged avatar rigs."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Mapping, Optional, Sequence
+
+import numpy as np
+
+from services.avatar_pipeline.models.blendshapes import BlendshapeSet, read_blendshapes
+from services.avatar_pipeline.models.mesh import read_mesh
+from services.avatar_pipeline.rigging.arkit import control_name
+
+
+class BlendshapeRuntime:
+    """Evaluate deformed vertex positions from blendshape weights.
+
+    Batches of weight frames are evaluated as one ``(frames, shapes) @
+    (shapes, 3 * active vertices)`` product, where active vertices are the
+    ones any shape moves; every other vertex keeps its base position, which
+    is written into the preallocated frame buffers once. :meth:`update` is
+    the incremental mode for one live frame: it applies only the shapes
+    whose weights changed, using their sparse deltas.
+    """
+
+    def __init__(
+        self,
+        base_vertices: np.ndarray,
+        shapes: BlendshapeSet,
+        max_frames: int = 64,
+        resync_interval: int = 256,
+    ) -> None:
+        self.base = np.ascontiguousarray(base_vertices, dtype=np.float32).reshape(-1, 3)
+        if len(self.base) != shapes.vertex_count:
+            raise ValueError("Blendshapes were built for a different vertex count.")
+        self.shapes = shapes
+        self.controls = [control_name(name) for name in shapes.names]
+        self._control_index = {name: index for index, name in enumerate(self.controls)}
+        self.resync_interval = resync_interval
+
+        shape_ids = np.repeat(np.arange(shapes.shape_count), np.diff(shapes.offsets))
+        self._entries = (shapes.deltas * shapes.scales[shape_ids, None]).astype(np.float32)
+        self._offsets = shapes.offsets.astype(np.intp)
+        self._indices = shapes.indices.astype(np.intp)
+        self.active = np.unique(self._indices)
+        basis = np.zeros((shapes.shape_count, len(self.active), 3), dtype=np.float32)
+        basis[shape_ids, np.searchsorted(self.active, self._indices)] = self._entries
+        self._basis = basis.reshape(shapes.shape_count, -1)
+        self._base_active = self.base[self.active].reshape(-1)
+
+        self._frames = np.empty((0, len(self.base), 3), dtype=np.float32)
+        self._scratch = np.empty((0, self._basis.shape[1]), dtype=np.float32)
+        self._reserve(max_frames)
+        self.positions = self.base.copy()
+        self.weights = np.zeros(shapes.shape_count, dtype=np.float32)
+        self._updates_since_resync = 0
+
+    @classmethod
+    def load(cls, metadata_path: Path, **kwargs: int) -> "BlendshapeRuntime":
+        """Load a packaged rig from a writer's ``*.metadata.json``."""
+
+        metadata = json.loads(Path(metadata_path).read_text())
+        mesh = read_mesh(Path(metadata.get("neutral_mesh") or metadata["mesh"]))
+        return cls(mesh.vertices, read_blendshapes(Path(metadata["blendshapes"])), **kwargs)
+
+    @property
+    def shape_count(self) -> int:
+        return self.shapes.shape_count
+
+    def weights_from_controls(self, controls: Mapping[str, float], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Map rig control values (``jaw_open`` ...) to a weight vector; unknown controls raise ``KeyError``."""
+
+        weights = np.zeros(self.shape_count, dtype=np.float32) if out is None else out
+        if out is not None:
+            weights.fill(0.0)
+        for name, value in controls.items():
+            weights[self._control_index[name]] = value
+        return weights
+
+    def evaluate(self, weights: np.ndarray) -> np.ndarray:
+        """Deform the base mesh for ``(frames, shapes)`` weights, or one ``(shapes,)`` frame.
+
+        Returns a view into the runtime's frame buffer, valid until the next call.
+        """
+
+        weights = np.asarray(weights, dtype=np.float32)
+        single = weights.ndim == 1
+        weights = weights.reshape(-1, self.shape_count)
+        count = len(weights)
+        self._reserve(count)
+        scratch = self._scratch[:count]
+        np.matmul(weights, self._basis, out=scratch)
+        scratch += self._base_active
+        frames = self._frames[:count]
+        frames[:, self.active] = scratch.reshape(count, -1, 3)
+        return frames[0] if single else frames
+
+    def update(self, weights: np.ndarray | Mapping[str, float]) -> np.ndarray:
+        """Incrementally move :attr:`positions` to ``weights`` and return it.
+
+        Only shapes whose weight changed are applied. When many changed, or
+        every ``resync_interval`` updates to bound float drift, the frame is
+        recomputed in full instead.
+        """
+
+        if isinstance(weights, Mapping):
+            weights = self.weights_from_controls(weights)
+        weights = np.asarray(weights, dtype=np.float32)
+        changed = np.flatnonzero(weights != self.weights)
+        self._updates_since_resync += 1
+        if len(changed) * 4 > self.shape_count or self._updates_since_resync >= self.resync_interval:
+            self.positions[...] = self.evaluate(weights)
+            self._updates_since_resync = 0
+        else:
+            step = weights - self.weights
+            for shape in changed:
+                start, stop = self._offsets[shape], self._offsets[shape + 1]
+                # Vertex ids are unique within a shape, so fancy-index accumulation is exact.
+                self.positions[self._indices[start:stop]] += step[shape] * self._entries[start:stop]
+        self.weights[...] = weights
+        return self.positions
+
+    def reset(self, weights: Optional[Sequence[float]] = None) -> np.ndarray:
+        """Recompute :attr:`positions` in full for ``weights`` (zeros by default)."""
+
+        self.weights[...] = 0.0 if weights is None else np.asarray(weights, dtype=np.float32)
+        self.positions[...] = self.evaluate(self.weights)
+        self._updates_since_resync = 0
+        return self.positions
+
+    def _reserve(self, frames: int) -> None:
+        if frames <= len(self._frames):
+            return
+        self._frames = np.empty((frames, len(self.base), 3), dtype=np.float32)
+        # Vertices outside the active set never move, so they are written once here.
+        self._frames[...] = self.base
+        self._scratch = np.empty((frames, self._basis.shape[1]), dtype=np.float32)
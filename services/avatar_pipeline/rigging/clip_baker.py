@@ -0,0 +1,182 @@
+"""Bake per-frame rig control weights into compressed keyframe animation clips."""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.avatar_pipeline.artifacts.store import ArtifactStore
+from services.avatar_pipeline.models.animation import AnimationClip
+from services.avatar_pipeline.models.pipeline import RiggingResult
+
+_CODE_MAX = 65535
+
+
+def fit_keyframes(samples: np.ndarray, tolerance: float) -> np.ndarray:
+    """Choose linear keyframes for every channel of ``(frames, channels)`` samples.
+
+    Starts from the first and last frame and, for all channels at once,
+    repeatedly adds a key at the worst frame of every segment whose linear
+    reconstruction is off by more than ``tolerance``. Returns a boolean
+    ``(frames, channels)`` key mask.
+    """
+
+    samples = np.asarray(samples, dtype=np.float64)
+    frame_count, channel_count = samples.shape
+    keys = np.zeros(samples.shape, dtype=bool)
+    keys[[0, -1]] = True
+    frames = np.arange(frame_count)[:, None]
+    channel_base = np.arange(channel_count)[None, :] * frame_count
+    while True:
+        previous = np.maximum.accumulate(np.where(keys, frames, 0), axis=0)
+        following = np.minimum.accumulate(np.where(keys, frames, frame_count - 1)[::-1], axis=0)[::-1]
+        start = np.take_along_axis(samples, previous, axis=0)
+        stop = np.take_along_axis(samples, following, axis=0)
+        span = np.maximum(following - previous, 1)
+        error = np.abs(start + (stop - start) * (frames - previous) / span - samples)
+        bad = error > tolerance
+        if not bad.any():
+            return keys
+        # Worst frame per (channel, segment): segments are identified by their opening key.
+        segment = (channel_base + previous)[bad]
+        order = np.lexsort((-error[bad], segment))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = segment[order][1:] != segment[order][:-1]
+        rows, cols = np.nonzero(bad)
+        keys[rows[order[first]], cols[order[first]]] = True
+
+
+def bake_clip(
+    name: str,
+    channels: Sequence[str],
+    samples: np.ndarray,
+    fps: float,
+    tolerance: float = 0.005,
+    loop: bool = False,
+) -> AnimationClip:
+    """Quantize and keyframe ``(frames, channels)`` weights into an :class:`AnimationClip`.
+
+    Values are quantized to 16 bits per channel range first and keys are fit
+    to the quantized curve, so the decoded clip stays within ``tolerance``
+    of ``samples`` (plus half a quantization step).
+    """
+
+    samples = np.asarray(samples, dtype=np.float32)
+    if samples.ndim != 2 or samples.shape[1] != len(channels):
+        raise ValueError("Clip samples must be shaped (frames, channels).")
+    if not 2 <= len(samples) <= _CODE_MAX + 1:
+        raise ValueError(f"Clips need between 2 and {_CODE_MAX + 1} frames.")
+    minimums = samples.min(axis=0)
+    ranges = samples.max(axis=0) - minimums
+    scales = np.where(ranges > 0, ranges / _CODE_MAX, 1.0).astype(np.float32)
+    codes = np.rint((samples - minimums) / scales).astype(np.uint16)
+    decoded = codes * scales + minimums
+    keys = fit_keyframes(decoded, tolerance)
+
+    channel_keys, frame_keys = np.nonzero(keys.T)
+    offsets = np.zeros(len(channels) + 1, dtype=np.uint32)
+    np.cumsum(keys.sum(axis=0), out=offsets[1:])
+    return AnimationClip(
+        name,
+        channels,
+        fps,
+        len(samples),
+        offsets,
+        frame_keys,
+        codes[frame_keys, channel_keys],
+        minimums,
+        scales,
+        loop=loop,
+    )
+
+
+def _envelope(frames: np.ndarray, centre: float, width: float) -> np.ndarray:
+    return np.exp(-(((frames - centre) / width) ** 2))
+
+
+def idle_loop(channels: Sequence[str], fps: float, seconds: float = 8.0) -> np.ndarray:
+    """Breathing, slow gaze drift and a blink every few seconds."""
+
+    frames = np.arange(int(round(seconds * fps)) + 1, dtype=np.float64)
+    phase = 2 * np.pi * frames / (len(frames) - 1)
+    weights = np.zeros((len(frames), len(channels)), dtype=np.float32)
+    index = {name: position for position, name in enumerate(channels)}
+    blink = sum(_envelope(frames, centre * fps, 0.06 * fps) for centre in (1.5, 4.6, 6.9))
+
+    curves = {
+        "jaw_open": 0.03 + 0.02 * np.sin(phase * 2),
+        "eye_blink_left": blink,
+        "eye_blink_right": blink,
+        "eye_look_out_left": 0.2 * np.clip(np.sin(phase), 0, None),
+        "eye_look_in_right": 0.2 * np.clip(np.sin(phase), 0, None),
+        "eye_look_in_left": 0.2 * np.clip(-np.sin(phase), 0, None),
+        "eye_look_out_right": 0.2 * np.clip(-np.sin(phase), 0, None),
+        "brow_inner_up": 0.1 + 0.05 * np.sin(phase * 3),
+    }
+    for name, curve in curves.items():
+        if name in index:
+            weights[:, index[name]] = curve
+    return weights
+
+
+def smile_emote(channels: Sequence[str], fps: float, seconds: float = 2.0) -> np.ndarray:
+    """Ease into a smile with squinting eyes, hold it, and relax."""
+
+    frames = np.arange(int(round(seconds * fps)) + 1, dtype=np.float64)
+    t = frames / frames[-1]
+    envelope = np.clip(np.minimum(t / 0.25, (1 - t) / 0.3), 0, 1)
+    envelope = envelope * envelope * (3 - 2 * envelope)
+    weights = np.zeros((len(frames), len(channels)), dtype=np.float32)
+    index = {name: position for position, name in enumerate(channels)}
+    targets = {
+        "mouth_smile_left": 0.9,
+        "mouth_smile_right": 0.85,
+        "cheek_squint_left": 0.5,
+        "cheek_squint_right": 0.5,
+        "eye_squint_left": 0.3,
+        "eye_squint_right": 0.3,
+        "jaw_open": 0.12,
+    }
+    for name, target in targets.items():
+        if name in index:
+            weights[:, index[name]] = target * envelope
+    return weights
+
+
+ClipGenerator = Callable[[Sequence[str], float], np.ndarray]
+CLIP_GENERATORS: Dict[str, Tuple[ClipGenerator, bool]] = {
+    "idle": (idle_loop, True),
+    "smile": (smile_emote, False),
+}
+
+
+class ClipBaker:
+    """Bake the configured idle/emote clips over a rig's controls."""
+
+    def __init__(
+        self,
+        clips: Iterable[str] = ("idle", "smile"),
+        fps: float = 30.0,
+        tolerance: float = 0.005,
+        generators: Optional[Dict[str, Tuple[ClipGenerator, bool]]] = None,
+    ) -> None:
+        self.generators = generators or CLIP_GENERATORS
+        self.clips = tuple(clips)
+        unknown = [name for name in self.clips if name not in self.generators]
+        if unknown:
+            raise ValueError(f"Unknown animation clips: {', '.join(unknown)}.")
+        self.fps = fps
+        self.tolerance = tolerance
+
+    def bake(self, result: RiggingResult, store: Optional[ArtifactStore]) -> Dict[str, str]:
+        if store is None:
+            raise ValueError("an artifact store must be provided for clip baking.")
+        channels = list(result.controls)
+        for name in self.clips:
+            generator, loop = self.generators[name]
+            clip = bake_clip(name, channels, generator(channels, self.fps), self.fps, self.tolerance, loop)
+            key = f"rig/clips/{name}"
+            result.clips[name] = store.put(key, clip)
+            result.clip_keys[name] = key
+        return dict(result.clip_keys)
@@ -2,11 +2,34 @@
 
 from __future__ import annotations
 
-import json
-from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
+import numpy as np
+
+from services.avatar_pipeline.artifacts.store import ArtifactStore
+from services.avatar_pipeline.models.mesh import Mesh
 from services.avatar_pipeline.models.pipeline import MeshResult, RiggingResult
+from services.avatar_pipeline.rigging.arkit import ARKIT_BLENDSHAPES, arkit_deltas, control_name
+
+# Joint positions as fractions of the mesh bounding box (x, y, z from the minimum corner).
+JOINT_LAYOUT = {
+    "root": (0.5, 0.0, 0.5),
+    "neck": (0.5, 0.1, 0.4),
+    "head": (0.5, 0.5, 0.5),
+    "jaw": (0.5, 0.3, 0.6),
+    "eye_left": (0.33, 0.62, 0.9),
+    "eye_right": (0.67, 0.62, 0.9),
+}
+
+
+def place_joints(mesh: Mesh) -> Dict[str, List[float]]:
+    """Place the skeleton joints relative to the mesh bounds, reading vertices in place."""
+
+    lower, upper = mesh.bounds()
+    names = list(JOINT_LAYOUT)
+    fractions = np.array([JOINT_LAYOUT[name] for name in names], dtype=np.float32)
+    positions = lower + fractions * (upper - lower)
+    return {name: [round(float(value), 5) for value in position] for name, position in zip(names, positions)}
 
 
 class RiggingEngine:
@@ -15,27 +38,30 @@ class RiggingEngine:
     def rig_mesh(
         self,
         mesh: MeshResult,
-        texture_path: Optional[Path],
-        working_dir: Optional[Path],
+        texture_key: Optional[str],
+        store: Optional[ArtifactStore],
     ) -> RiggingResult:
-        if working_dir is None:
-            raise ValueError("working_dir must be provided for rigging output.")
-        rig_dir = working_dir / "rig"
-        rig_dir.mkdir(parents=True, exist_ok=True)
-
-        skeleton_path = rig_dir / "skeleton.json"
-        blendshape_path = rig_dir / "blendshapes.json"
+        if store is None:
+            raise ValueError("an artifact store must be provided for rigging output.")
+        if mesh.mesh is None:
+            raise ValueError("rigging requires a reconstructed mesh.")
 
-        controls = {"jaw_open": 0.0, "eye_blink_left": 0.0, "eye_blink_right": 0.0}
+        skeleton_key = "rig/skeleton"
+        neutral = mesh.neutral_mesh or mesh.mesh
+        controls = {control_name(shape): 0.0 for shape in ARKIT_BLENDSHAPES}
         skeleton_payload = {
-            "mesh": str(mesh.mesh_path),
-            "neutral_mesh": str(mesh.neutral_mesh_path) if mesh.neutral_mesh_path else None,
-            "texture": str(texture_path) if texture_path else None,
+            "mesh": mesh.mesh_key,
+            "neutral_mesh": mesh.neutral_mesh_key,
+            "texture": texture_key,
+            "vertex_count": mesh.mesh.vertex_count,
+            "joints": place_joints(neutral),
+            "expression_coefficients": dict(mesh.expression_coefficients),
         }
-        skeleton_path.write_text(json.dumps(skeleton_payload))
-        blendshape_path.write_text(json.dumps(mesh.expression_coefficients))
+        store.put(skeleton_key, skeleton_payload)
+        # Dense deltas are handed to the exporter, which stores them sparse and quantized.
         return RiggingResult(
-            skeleton_path=skeleton_path,
-            blendshape_path=blendshape_path,
+            shape_names=list(ARKIT_BLENDSHAPES),
+            shape_deltas=arkit_deltas(neutral),
             controls=controls,
+            skeleton_key=skeleton_key,
         )
@@ -4,12 +4,20 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, List, Optional, Sequence
 
+from sqlalchemy.orm import Session
+
+from services.avatar_pipeline.artifacts.retention import RetainedInputs
+from services.avatar_pipeline.artifacts.store import create_artifact_store
 from services.avatar_pipeline.config.settings import Settings
 from services.avatar_pipeline.models.pipeline import PipelineContext
+from services.avatar_pipeline.observability.metrics import STAGE_SECONDS, Timing, timed
+from services.avatar_pipeline.observability.profiling import JobProfiler, profile_dir, should_profile
+from services.avatar_pipeline.observability.tracing import tracer
 from services.avatar_pipeline.orchestrators.base import PipelineStage
-from services.avatar_pipeline.persistence.models import JobStatus
+from services.avatar_pipeline.orchestrators.packaging_orchestrator import PackagingOrchestrator
+from services.avatar_pipeline.persistence.models import AvatarGenerationJob, JobStatus
 from services.avatar_pipeline.persistence.repository import AvatarJobRepository
 
 
@@ -33,6 +41,10 @@ class AvatarPipelineService:
         self.settings = settings
 
     def run(self, job_id: str) -> PipelineContext:
+        with tracer.start_span("pipeline.run", {"job_id": job_id}):
+            return self._run(job_id)
+
+    def _run(self, job_id: str) -> PipelineContext:
         self.settings.ensure_directories()
         failure: Exception | None = None
         with self.repository.session_scope() as session:
@@ -51,35 +63,166 @@ class AvatarPipelineService:
             context.temp_dir.mkdir(parents=True, exist_ok=True)
             context.output_dir.mkdir(parents=True, exist_ok=True)
 
+            context.artifacts = create_artifact_store(self.settings.artifact_backend, context.temp_dir)
+            profiler = None
+            if should_profile(
+                job.id,
+                input_payload.get("options"),
+                self.settings.profile_sample_every,
+                self.settings.profile_debug_enabled,
+            ):
+                profiler = JobProfiler(job.id, profile_dir(context.temp_dir), self.settings.profile_top_entries)
+
             self.repository.update_job_status(session, job, JobStatus.RUNNING, progress=0.01)
 
-            total_stages = len(self.stages)
-            for index, stage in enumerate(self.stages, start=1):
+            try:
+                total_stages = len(self.stages)
+                for index, stage in enumerate(self.stages, start=1):
+                    runs: List[Timing] = []
+                    try:
+                        context = self._run_stage(stage, context, runs, profiler)
+                    except Exception as exc:  # store failure and exit loop gracefully
+                        self.repository.add_stage_runs(session, job, runs)
+                        self.repository.mark_failure(session, job, str(exc))
+                        failure = exc
+                        break
+                    self.repository.add_stage_runs(session, job, runs)
+                    progress = round(index / total_stages, 4)
+                    self.repository.update_job_status(session, job, JobStatus.RUNNING, progress=progress)
+
+                if failure is None:
+                    self._record_assets(session, job, context)
+                    output_payload = {"assets": context.assets}
+                    if RetainedInputs.available(context):
+                        output_payload["retained_inputs"] = RetainedInputs.from_context(context).to_dict()
+                    self.repository.mark_success(session, job, output_payload=output_payload)
+            finally:
+                context.artifacts.close()
+                if profiler is not None:
+                    profiler.close()
+
+        if failure is not None:
+            raise failure
+
+        self._remove_superseded(context)
+        return context
+
+    def repackage(
+        self,
+        job_id: str,
+        unity_version: Optional[str] = None,
+        scale: Optional[float] = None,
+        formats: Optional[Sequence[str]] = None,
+    ) -> PipelineContext:
+        """Re-run packaging (and the stages after it) for a finished job with new writer options.
+
+        The job's retained mesh, texture and rig files are packaged again;
+        reconstruction and rigging do not run, and outputs whose inputs and
+        options are unchanged are kept as they are.
+
+        The job keeps its status and assets while this runs. If a stage
+        fails, they stay as they were and the error is recorded as
+        ``repackage_error`` in the job's output payload; no session is held
+        open while the stages run.
+        """
+
+        with tracer.start_span("pipeline.repackage", {"job_id": job_id}):
+            return self._repackage(job_id, unity_version, scale, formats)
+
+    def _repackage(
+        self,
+        job_id: str,
+        unity_version: Optional[str],
+        scale: Optional[float],
+        formats: Optional[Sequence[str]],
+    ) -> PipelineContext:
+        index = next((i for i, stage in enumerate(self.stages) if isinstance(stage, PackagingOrchestrator)), None)
+        if index is None:
+            raise ValueError("The pipeline has no packaging stage.")
+        stages = [self.stages[index].with_writer_options(unity_version, scale, formats), *self.stages[index + 1 :]]
+        with self.repository.session_scope() as session:
+            job = self.repository.get_job_for_update(session, job_id)
+            if job is None:
+                raise ValueError(f"Job {job_id} not found")
+            retained = (job.output_payload or {}).get("retained_inputs")
+            if retained is None:
+                raise ValueError(f"Job {job_id} has no retained intermediates to repackage.")
+            inputs = RetainedInputs.from_dict(retained)
+            context = inputs.restore(
+                job.id,
+                job.user_id,
+                Path(self.settings.temp_storage_path) / job.id,
+                Path(self.settings.output_path) / job.id,
+            )
+
+        failure: Exception | None = None
+        runs: List[Timing] = []
+        try:
+            for stage in stages:
                 try:
-                    context = stage.run(context)
-                except Exception as exc:  # store failure and exit loop gracefully
-                    self.repository.mark_failure(session, job, str(exc))
+                    context = self._run_stage(stage, context, runs)
+                except Exception as exc:
                     failure = exc
                     break
-                progress = round(index / total_stages, 4)
-                self.repository.update_job_status(session, job, JobStatus.RUNNING, progress=progress)
-
-            if failure is None:
-                for asset_type, asset_payload in context.assets.items():
-                    metadata = dict(asset_payload.get("metadata", {}))
-                    if "file_path" in asset_payload:
-                        metadata.setdefault("file_path", asset_payload["file_path"])
-                    self.repository.add_asset(
-                        session,
-                        job,
-                        asset_type=asset_type,
-                        uri=asset_payload.get("uri", ""),
-                        metadata=metadata,
-                    )
-
-                self.repository.mark_success(session, job, output_payload={"assets": context.assets})
+        finally:
+            context.artifacts.close()
+
+        with self.repository.session_scope() as session:
+            job = self.repository.get_job_for_update(session, job_id)
+            self.repository.add_stage_runs(session, job, runs)
+            if failure is not None:
+                output_payload = {**(job.output_payload or {}), "repackage_error": str(failure)}
+                self.repository.update_output_payload(session, job, output_payload)
+            else:
+                self.repository.clear_assets(session, job)
+                self._record_assets(session, job, context)
+                output_payload = {"assets": context.assets, "retained_inputs": inputs.to_dict()}
+                self.repository.mark_success(session, job, output_payload=output_payload)
 
         if failure is not None:
             raise failure
 
+        self._remove_superseded(context)
         return context
+
+    def _run_stage(
+        self,
+        stage: PipelineStage,
+        context: PipelineContext,
+        runs: List[Timing],
+        profiler: Optional[JobProfiler] = None,
+    ) -> PipelineContext:
+        """Run ``stage``, timing it, and append its duration plus the sub-timings it left on the context to ``runs``."""
+
+        try:
+            with timed(STAGE_SECONDS, stage.name, stage=stage.name) as timing, tracer.start_span(
+                f"stage {stage.name}", {"stage": stage.name, "job_id": context.job_id}
+            ):
+                if profiler is None:
+                    return stage.run(context)
+                with profiler.stage(stage.name):
+                    return stage.run(context)
+        finally:
+            runs.extend([timing, *context.timings])
+            context.timings.clear()
+
+    @staticmethod
+    def _remove_superseded(context: PipelineContext) -> None:
+        """Delete outputs of formats this run dropped, once the assets replacing them are committed."""
+
+        for path in context.superseded_files:
+            path.unlink(missing_ok=True)
+        context.superseded_files.clear()
+
+    def _record_assets(self, session: Session, job: AvatarGenerationJob, context: PipelineContext) -> None:
+        for asset_type, asset_payload in context.assets.items():
+            metadata = dict(asset_payload.get("metadata", {}))
+            if "file_path" in asset_payload:
+                metadata.setdefault("file_path", asset_payload["file_path"])
+            self.repository.add_asset(
+                session,
+                job,
+                asset_type=asset_type,
+                uri=asset_payload.get("uri", ""),
+                metadata=metadata,
+            )
@@ -0,0 +1,297 @@
+"""Vectorized CPU encoders for BC1, BC3 and BC7 (mode 6) GPU texture blocks.
+
+Every encoder works on all 4x4 blocks of an image at once: endpoints come
+from each block's principal colour axis and texels are assigned palette
+indices by projecting onto the endpoint segment, so the cost is a handful
+of array passes regardless of image size. Decoders are provided as
+references for tests and tooling; GPUs consume the blocks directly.
+"""
+
+from __future__ import annotations
+
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+
+BLOCK_BYTES = {"bc1": 8, "bc3": 16, "bc7": 16}
+
+_BC7_WEIGHTS = np.array([0, 4, 9, 13, 17, 21, 26, 30, 34, 38, 43, 47, 51, 55, 60, 64], dtype=np.float32)
+# Nearest BC7 weight index for a position along the endpoint segment sampled in 1/256 steps.
+_BC7_LOOKUP = np.searchsorted((_BC7_WEIGHTS[1:] + _BC7_WEIGHTS[:-1]) / 2, np.arange(257) / 4).astype(np.uint64)
+# BC1 stores the palette as c0, c1, 2/3 c0 + 1/3 c1, 1/3 c0 + 2/3 c1.
+_BC1_ORDER = np.array([0, 2, 3, 1], dtype=np.uint32)
+# BC3 alpha palette order for the eight-value mode: a0, a1, then six interpolants from a0 to a1.
+_ALPHA_ORDER = np.array([0, 2, 3, 4, 5, 6, 7, 1], dtype=np.uint64)
+
+
+def to_blocks(image: np.ndarray) -> np.ndarray:
+    """Split an ``(H, W, C)`` image into ``(H/4 * W/4, 16, C)`` blocks, padding by edge replication."""
+
+    height, width, channels = image.shape
+    pad_h, pad_w = -height % 4, -width % 4
+    if pad_h or pad_w:
+        image = np.pad(image, ((0, pad_h), (0, pad_w), (0, 0)), mode="edge")
+    rows, cols = image.shape[0] // 4, image.shape[1] // 4
+    blocks = image.reshape(rows, 4, cols, 4, channels).swapaxes(1, 2)
+    return blocks.reshape(rows * cols, 16, channels)
+
+
+def from_blocks(blocks: np.ndarray, height: int, width: int) -> np.ndarray:
+    rows, cols = -(-height // 4), -(-width // 4)
+    channels = blocks.shape[-1]
+    image = blocks.reshape(rows, cols, 4, 4, channels).swapaxes(1, 2).reshape(rows * 4, cols * 4, channels)
+    return image[:height, :width]
+
+
+def _fold(op: np.ufunc, blocks: np.ndarray) -> np.ndarray:
+    """Reduce the texel axis of ``(N, 16, C)`` blocks by halving; much faster than ``axis=1`` reductions."""
+
+    while blocks.shape[1] > 1:
+        half = blocks.shape[1] // 2
+        blocks = op(blocks[:, :half], blocks[:, half:])
+    return blocks[:, 0]
+
+
+def _principal_endpoints(blocks: np.ndarray, iterations: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+    """Endpoints spanning each block's texels along its principal axis (power iteration)."""
+
+    mean = _fold(np.add, blocks) / blocks.shape[1]
+    centred = blocks - mean[:, None]
+    covariance = centred.transpose(0, 2, 1) @ centred
+    axis = _fold(np.maximum, blocks) - _fold(np.minimum, blocks) + 1e-3
+    for _ in range(iterations):
+        axis = (covariance @ axis[:, :, None])[:, :, 0]
+        axis /= np.maximum(np.linalg.norm(axis, axis=1, keepdims=True), 1e-12)
+    projection = (centred @ axis[:, :, None])[:, :, 0]
+    low = mean + projection.min(axis=1)[:, None] * axis
+    high = mean + projection.max(axis=1)[:, None] * axis
+    return np.clip(low, 0, 255), np.clip(high, 0, 255)
+
+
+def _project(blocks: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """Position of every texel along ``start -> end`` in ``[0, 1]``."""
+
+    direction = end - start
+    length = np.einsum("ni,ni->n", direction, direction)
+    t = ((blocks - start[:, None]) @ direction[:, :, None])[:, :, 0] / np.maximum(length, 1e-12)[:, None]
+    return np.clip(t, 0.0, 1.0)
+
+
+def _pack_indices(indices: np.ndarray, bits: int, dtype: type) -> np.ndarray:
+    shifts = (np.arange(indices.shape[1], dtype=np.uint64) * bits).astype(dtype)
+    return np.bitwise_or.reduce(indices.astype(dtype) << shifts, axis=1)
+
+
+def _to_565(colour: np.ndarray) -> np.ndarray:
+    scale = np.array([31, 63, 31], dtype=np.float32) / 255.0
+    q = np.rint(colour * scale).astype(np.uint16)
+    return (q[:, 0] << 11) | (q[:, 1] << 5) | q[:, 2]
+
+
+def _from_565(packed: np.ndarray) -> np.ndarray:
+    r = (packed >> 11) & 0x1F
+    g = (packed >> 5) & 0x3F
+    b = packed & 0x1F
+    return np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)], axis=-1).astype(np.float32)
+
+
+def _encode_colour_blocks(blocks: np.ndarray) -> np.ndarray:
+    """BC1 colour blocks in four-colour mode as ``(N, 8)`` bytes."""
+
+    low, high = _principal_endpoints(blocks)
+    c0, c1 = _to_565(high), _to_565(low)
+    swap = c0 < c1
+    c0, c1 = np.where(swap, c1, c0), np.where(swap, c0, c1)
+    t = _project(blocks, _from_565(c0), _from_565(c1))
+    indices = _BC1_ORDER[np.rint(t * 3).astype(np.int64)]
+    indices[c0 == c1] = 0
+    out = np.empty(len(blocks), dtype=[("c0", "<u2"), ("c1", "<u2"), ("indices", "<u4")])
+    out["c0"], out["c1"] = c0, c1
+    out["indices"] = _pack_indices(indices, 2, np.uint32)
+    return out.view(np.uint8).reshape(-1, 8)
+
+
+def _encode_alpha_blocks(alpha: np.ndarray) -> np.ndarray:
+    """BC3/BC4 alpha blocks (eight-value mode) as ``(N, 8)`` bytes."""
+
+    a0 = alpha.max(axis=1)
+    a1 = alpha.min(axis=1)
+    span = (a0 - a1).astype(np.float32)
+    t = (a0[:, None] - alpha) / np.maximum(span, 1.0)[:, None]
+    indices = _ALPHA_ORDER[np.rint(t * 7).astype(np.int64)]
+    indices[span == 0] = 0
+    packed = _pack_indices(indices, 3, np.uint64)
+    out = np.empty((len(alpha), 8), dtype=np.uint8)
+    out[:, 0] = a0
+    out[:, 1] = a1
+    out[:, 2:] = packed.astype("<u8").view(np.uint8).reshape(-1, 8)[:, :6]
+    return out
+
+
+def encode_bc1(image: np.ndarray) -> np.ndarray:
+    """Encode an RGB(A) ``uint8`` image as BC1 blocks (alpha ignored)."""
+
+    return _encode_colour_blocks(to_blocks(image[..., :3]).astype(np.float32))
+
+
+def encode_bc3(image: np.ndarray) -> np.ndarray:
+    """Encode an RGB(A) ``uint8`` image as BC3 blocks; RGB input is treated as opaque."""
+
+    blocks = to_blocks(image)
+    alpha = blocks[..., 3] if blocks.shape[-1] == 4 else np.full(blocks.shape[:2], 255, dtype=np.uint8)
+    out = np.empty((len(blocks), 16), dtype=np.uint8)
+    out[:, :8] = _encode_alpha_blocks(alpha.astype(np.int16))
+    out[:, 8:] = _encode_colour_blocks(blocks[..., :3].astype(np.float32))
+    return out
+
+
+def _quantize_with_pbit(endpoint: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Split 8-bit RGBA endpoints into 7-bit values plus the shared p-bit with least error."""
+
+    best_q = best_p = best_error = None
+    for p in (0, 1):
+        q = np.clip(np.rint((endpoint - p) / 2), 0, 127)
+        error = ((q * 2 + p - endpoint) ** 2).sum(axis=1)
+        if best_error is None:
+            best_q, best_p, best_error = q, np.zeros(len(endpoint), dtype=np.uint64), error
+        else:
+            better = error < best_error
+            best_q = np.where(better[:, None], q, best_q)
+            best_p = np.where(better, np.uint64(1), best_p)
+            best_error = np.minimum(error, best_error)
+    return best_q.astype(np.uint64), best_p
+
+
+def encode_bc7(image: np.ndarray) -> np.ndarray:
+    """Encode an RGB(A) ``uint8`` image as BC7 mode 6 blocks (RGBA endpoints, 4-bit indices)."""
+
+    blocks = to_blocks(image).astype(np.float32)
+    if blocks.shape[-1] == 3:
+        blocks = np.concatenate([blocks, np.full(blocks.shape[:2] + (1,), 255.0, dtype=np.float32)], axis=-1)
+    low, high = _principal_endpoints(blocks)
+    q0, p0 = _quantize_with_pbit(low)
+    q1, p1 = _quantize_with_pbit(high)
+    e0 = (q0 * 2 + p0[:, None]).astype(np.float32)
+    e1 = (q1 * 2 + p1[:, None]).astype(np.float32)
+
+    indices = _BC7_LOOKUP[np.rint(_project(blocks, e0, e1) * 256).astype(np.intp)]
+    # The first texel's index drops its top bit, so it must be below 8: flip the block if not.
+    flip = indices[:, 0] >= 8
+    indices[flip] = 15 - indices[flip]
+    q0[flip], q1[flip] = q1[flip].copy(), q0[flip].copy()
+    p0[flip], p1[flip] = p1[flip].copy(), p0[flip].copy()
+
+    lo = np.full(len(blocks), 1 << 6, dtype=np.uint64)
+    hi = np.zeros(len(blocks), dtype=np.uint64)
+    offset = 7
+
+    def put(value: np.ndarray, width: int) -> None:
+        nonlocal lo, hi, offset
+        value = value.astype(np.uint64) & np.uint64((1 << width) - 1)
+        if offset >= 64:
+            hi |= value << np.uint64(offset - 64)
+        else:
+            lo |= value << np.uint64(offset)
+            if offset + width > 64:
+                hi |= value >> np.uint64(64 - offset)
+        offset += width
+
+    for channel in range(4):
+        put(q0[:, channel], 7)
+        put(q1[:, channel], 7)
+    put(p0, 1)
+    put(p1, 1)
+    put(indices[:, 0], 3)
+    for texel in range(1, 16):
+        put(indices[:, texel], 4)
+    out = np.empty((len(blocks), 2), dtype="<u8")
+    out[:, 0], out[:, 1] = lo, hi
+    return out.view(np.uint8).reshape(-1, 16)
+
+
+def decode_bc1(data: np.ndarray, height: int, width: int) -> np.ndarray:
+    blocks = np.ascontiguousarray(data).reshape(-1, 8)
+    return from_blocks(_decode_colour_blocks(blocks), height, width)
+
+
+def _decode_colour_blocks(blocks: np.ndarray) -> np.ndarray:
+    fields = blocks.view([("c0", "<u2"), ("c1", "<u2"), ("indices", "<u4")]).reshape(-1)
+    c0, c1 = _from_565(fields["c0"]), _from_565(fields["c1"])
+    palette = np.stack([c0, c1, (2 * c0 + c1) / 3, (c0 + 2 * c1) / 3], axis=1)
+    three_colour = fields["c0"] <= fields["c1"]
+    palette[three_colour, 2] = (c0[three_colour] + c1[three_colour]) / 2
+    palette[three_colour, 3] = 0
+    shifts = np.arange(16, dtype=np.uint32) * 2
+    indices = (fields["indices"][:, None] >> shifts) & 3
+    colours = np.take_along_axis(palette, indices[..., None].astype(np.int64), axis=1)
+    return np.rint(colours).astype(np.uint8)
+
+
+def decode_bc3(data: np.ndarray, height: int, width: int) -> np.ndarray:
+    blocks = np.ascontiguousarray(data).reshape(-1, 16)
+    a0 = blocks[:, 0].astype(np.float32)
+    a1 = blocks[:, 1].astype(np.float32)
+    eight = a0 > a1
+    steps = np.arange(1, 7, dtype=np.float32)
+    palette = np.empty((len(blocks), 8), dtype=np.float32)
+    palette[:, 0], palette[:, 1] = a0, a1
+    palette[:, 2:] = ((7 - steps) * a0[:, None] + steps * a1[:, None]) / 7
+    four = ~eight
+    palette[four, 2:6] = ((5 - steps[:4]) * a0[four, None] + steps[:4] * a1[four, None]) / 5
+    palette[four, 6], palette[four, 7] = 0, 255
+    bits = np.pad(blocks[:, 2:8], ((0, 0), (0, 2))).view("<u8").reshape(-1)
+    indices = (bits[:, None] >> (np.arange(16, dtype=np.uint64) * np.uint64(3))) & np.uint64(7)
+    alpha = np.rint(np.take_along_axis(palette, indices.astype(np.int64), axis=1)).astype(np.uint8)
+    colours = _decode_colour_blocks(np.ascontiguousarray(blocks[:, 8:]))
+    return from_blocks(np.concatenate([colours, alpha[..., None]], axis=-1), height, width)
+
+
+def decode_bc7(data: np.ndarray, height: int, width: int) -> np.ndarray:
+    """Decode BC7 mode 6 blocks (other modes are not produced by :func:`encode_bc7`)."""
+
+    words = np.ascontiguousarray(data).reshape(-1, 16).view("<u8")
+    lo, hi = words[:, 0], words[:, 1]
+    if np.any((lo & np.uint64(0x7F)) != np.uint64(1 << 6)):
+        raise ValueError("only BC7 mode 6 blocks can be decoded.")
+    offset = 7
+
+    def take(width: int) -> np.ndarray:
+        nonlocal offset
+        mask = np.uint64((1 << width) - 1)
+        if offset >= 64:
+            value = (hi >> np.uint64(offset - 64)) & mask
+        else:
+            value = lo >> np.uint64(offset)
+            if offset + width > 64:
+                value |= hi << np.uint64(64 - offset)
+            value &= mask
+        offset += width
+        return value
+
+    q = np.stack([np.stack([take(7), take(7)], axis=-1) for _ in range(4)], axis=-1)  # (N, 2, 4)
+    p = np.stack([take(1), take(1)], axis=-1)
+    endpoints = (q * np.uint64(2) + p[..., None]).astype(np.float32)
+    indices = np.stack([take(3)] + [take(4) for _ in range(15)], axis=-1).astype(np.int64)
+    weights = _BC7_WEIGHTS[indices][..., None]
+    colours = ((64 - weights) * endpoints[:, None, 0] + weights * endpoints[:, None, 1] + 32) // 64
+    return from_blocks(colours.astype(np.uint8), height, width)
+
+
+ENCODERS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {"bc1": encode_bc1, "bc3": encode_bc3, "bc7": encode_bc7}
+DECODERS: Dict[str, Callable[[np.ndarray, int, int], np.ndarray]] = {
+    "bc1": decode_bc1,
+    "bc3": decode_bc3,
+    "bc7": decode_bc7,
+}
+
+
+def encode_image(image: np.ndarray, fmt: str, band_rows: int = 256) -> np.ndarray:
+    """Encode ``image`` in ``fmt`` a band of texel rows at a time; returns the blocks in row order."""
+
+    if fmt not in ENCODERS:
+        raise ValueError(f"Unknown block format {fmt!r}; expected one of {', '.join(ENCODERS)}.")
+    band_rows = max(4, band_rows - band_rows % 4)
+    encoder = ENCODERS[fmt]
+    return np.concatenate(
+        [encoder(np.asarray(image[start : start + band_rows])) for start in range(0, image.shape[0], band_rows)]
+    )
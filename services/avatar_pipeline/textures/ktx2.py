@@ -0,0 +1,163 @@
+"""Minimal KTX2 container for block-compressed textures with a full mip chain."""
+
+from __future__ import annotations
+
+import struct
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from services.avatar_pipeline.textures.block_compression import BLOCK_BYTES
+
+KTX2_IDENTIFIER = b"\xabKTX 20\xbb\r\n\x1a\n"
+SUPERCOMPRESSION_NONE = 0
+SUPERCOMPRESSION_ZLIB = 3
+
+# Vulkan sRGB block formats; albedo maps carry sRGB-encoded colour.
+VK_FORMATS = {"bc1": 132, "bc3": 138, "bc7": 146}
+_FORMAT_NAMES = {value: name for name, value in VK_FORMATS.items()}
+# Khronos data format colour models and (bit offset, bit length, channel id) samples per format.
+_DF_MODELS = {"bc1": 128, "bc3": 130, "bc7": 133}
+_DF_SAMPLES = {"bc1": [(0, 64, 0)], "bc3": [(0, 64, 15), (64, 64, 0)], "bc7": [(0, 128, 0)]}
+
+_HEADER = struct.Struct("<9I")
+_INDEX = struct.Struct("<4I2Q")
+_LEVEL = struct.Struct("<3Q")
+
+
+@dataclass
+class Ktx2Texture:
+    """Parsed KTX2 file: per-level block data with level 0 as the largest."""
+
+    fmt: str
+    width: int
+    height: int
+    levels: List[bytes]
+    supercompression: int = SUPERCOMPRESSION_NONE
+    key_values: Dict[str, str] = field(default_factory=dict)
+
+    def level_blocks(self, index: int) -> np.ndarray:
+        data = self.levels[index]
+        if self.supercompression == SUPERCOMPRESSION_ZLIB:
+            data = zlib.decompress(data)
+        return np.frombuffer(data, dtype=np.uint8).reshape(-1, BLOCK_BYTES[self.fmt])
+
+
+def _data_format_descriptor(fmt: str) -> bytes:
+    samples = _DF_SAMPLES[fmt]
+    block_size = 24 + 16 * len(samples)
+    body = struct.pack(
+        "<IIBBBB4B8B",
+        0,
+        2 | (block_size << 16),
+        _DF_MODELS[fmt],
+        1,  # BT.709 primaries
+        2,  # sRGB transfer
+        0,
+        3,
+        3,
+        0,
+        0,
+        BLOCK_BYTES[fmt],
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+        0,
+    )
+    for offset, length, channel in samples:
+        body += struct.pack("<HBB4BII", offset, length - 1, channel, 0, 0, 0, 0, 0, 0xFFFFFFFF)
+    return struct.pack("<I", 4 + len(body)) + body
+
+
+def _key_value_data(values: Dict[str, str]) -> bytes:
+    data = b""
+    for key, value in sorted(values.items()):
+        pair = key.encode("utf-8") + b"\x00" + value.encode("utf-8") + b"\x00"
+        data += struct.pack("<I", len(pair)) + pair + bytes(-len(pair) % 4)
+    return data
+
+
+def write_ktx2(
+    path: Path,
+    levels: Sequence[np.ndarray],
+    fmt: str,
+    width: int,
+    height: int,
+    supercompression: int = SUPERCOMPRESSION_NONE,
+    key_values: Dict[str, str] | None = None,
+) -> int:
+    """Write encoded mip levels (level 0 first) to ``path`` and return the file size."""
+
+    if fmt not in VK_FORMATS:
+        raise ValueError(f"Unsupported KTX2 block format {fmt!r}.")
+    payloads: List[bytes | memoryview] = []
+    uncompressed: List[int] = []
+    for level in levels:
+        raw = memoryview(np.ascontiguousarray(level)).cast("B")
+        uncompressed.append(raw.nbytes)
+        payloads.append(zlib.compress(raw, 6) if supercompression == SUPERCOMPRESSION_ZLIB else raw)
+
+    dfd = _data_format_descriptor(fmt)
+    kvd = _key_value_data({"KTXorientation": "rd", "KTXwriter": "avatar-pipeline", **(key_values or {})})
+    level_index_end = len(KTX2_IDENTIFIER) + _HEADER.size + _INDEX.size + _LEVEL.size * len(levels)
+    dfd_offset = level_index_end
+    kvd_offset = dfd_offset + len(dfd)
+    offset = kvd_offset + len(kvd)
+    alignment = 1 if supercompression else max(BLOCK_BYTES[fmt], 4)
+
+    # Mip data is stored smallest level first; the level index is ordered from level 0.
+    placements: Dict[int, int] = {}
+    chunks: List[bytes | memoryview] = []
+    for index in reversed(range(len(levels))):
+        pad = -offset % alignment
+        if pad:
+            chunks.append(bytes(pad))
+            offset += pad
+        placements[index] = offset
+        chunks.append(payloads[index])
+        offset += len(payloads[index])
+
+    header = KTX2_IDENTIFIER + _HEADER.pack(
+        VK_FORMATS[fmt], 1, width, height, 0, 0, 1, len(levels), supercompression
+    )
+    header += _INDEX.pack(dfd_offset, len(dfd), kvd_offset, len(kvd), 0, 0)
+    for index, payload in enumerate(payloads):
+        header += _LEVEL.pack(placements[index], len(payload), uncompressed[index])
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as handle:
+        handle.writelines([header, dfd, kvd, *chunks])
+    return path.stat().st_size
+
+
+def read_ktx2(path: Path) -> Ktx2Texture:
+    data = Path(path).read_bytes()
+    if not data.startswith(KTX2_IDENTIFIER):
+        raise ValueError(f"{path} is not a KTX2 file.")
+    offset = len(KTX2_IDENTIFIER)
+    vk_format, _, width, height, _, _, _, level_count, scheme = _HEADER.unpack_from(data, offset)
+    offset += _HEADER.size
+    _, _, kvd_offset, kvd_length, _, _ = _INDEX.unpack_from(data, offset)
+    offset += _INDEX.size
+    levels = []
+    for index in range(level_count):
+        start, length, _ = _LEVEL.unpack_from(data, offset + index * _LEVEL.size)
+        levels.append(data[start : start + length])
+
+    key_values: Dict[str, str] = {}
+    cursor, end = kvd_offset, kvd_offset + kvd_length
+    while cursor < end:
+        (length,) = struct.unpack_from("<I", data, cursor)
+        key, value = data[cursor + 4 : cursor + 4 + length].split(b"\x00")[:2]
+        key_values[key.decode("utf-8")] = value.decode("utf-8")
+        cursor += 4 + length + (-length % 4)
+    if vk_format not in _FORMAT_NAMES:
+        raise ValueError(f"Unsupported vkFormat {vk_format} in {path}.")
+    return Ktx2Texture(_FORMAT_NAMES[vk_format], width, height, levels, scheme, key_values)
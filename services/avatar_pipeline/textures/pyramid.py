@@ -0,0 +1,136 @@
+"""Mip pyramids for baked textures, built and encoded a band of rows at a time."""
+
+from __future__ import annotations
+
+import io
+import struct
+import uuid
+import zlib
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def allocate_level(
+    shape: Tuple[int, ...],
+    spill_dir: Optional[Path] = None,
+    spill_bytes: int = 32 * 1024 * 1024,
+) -> np.ndarray:
+    """Allocate a ``uint8`` level, backed by a file under ``spill_dir`` once it exceeds ``spill_bytes``."""
+
+    nbytes = int(np.prod(shape))
+    if spill_dir is None or nbytes <= spill_bytes:
+        return np.empty(shape, dtype=np.uint8)
+    spill_dir.mkdir(parents=True, exist_ok=True)
+    path = spill_dir / f"level-{shape[0]}x{shape[1]}-{uuid.uuid4().hex[:8]}.u8"
+    return np.memmap(path, dtype=np.uint8, mode="w+", shape=shape)
+
+
+def downsample_into(source: np.ndarray, target: np.ndarray, band_rows: int = 256) -> None:
+    """2x2 box-filter ``source`` into ``target`` one band of output rows at a time."""
+
+    height, width = target.shape[:2]
+    for start in range(0, height, band_rows):
+        stop = min(height, start + band_rows)
+        rows = source[2 * start : 2 * stop]
+        # Pairwise adds over strided views beat a generic reduction over the 2x2 axes.
+        pairs = rows[0::2].astype(np.uint16)
+        pairs += rows[1::2]
+        sums = pairs[:, 0 : 2 * width : 2] + pairs[:, 1 : 2 * width : 2] + 2
+        target[start:stop] = sums >> 2
+
+
+class TexturePyramid:
+    """A square RGB texture and its full mip chain down to 1x1.
+
+    Levels are plain ``uint8`` arrays; large ones may be file-backed
+    memory maps so the pyramid never has to sit in RAM as a whole.
+    """
+
+    file_suffix = ".png"
+
+    def __init__(self, levels: Sequence[np.ndarray]) -> None:
+        if not levels:
+            raise ValueError("a texture pyramid needs at least one level.")
+        self.levels: List[np.ndarray] = list(levels)
+
+    @classmethod
+    def build(
+        cls,
+        base: np.ndarray,
+        spill_dir: Optional[Path] = None,
+        spill_bytes: int = 32 * 1024 * 1024,
+        band_rows: int = 256,
+    ) -> "TexturePyramid":
+        levels = [base]
+        while max(levels[-1].shape[:2]) > 1:
+            previous = levels[-1]
+            shape = (max(1, previous.shape[0] // 2), max(1, previous.shape[1] // 2), previous.shape[2])
+            level = allocate_level(shape, spill_dir, spill_bytes)
+            downsample_into(previous[: shape[0] * 2, : shape[1] * 2], level, band_rows)
+            levels.append(level)
+        return cls(levels)
+
+    @classmethod
+    def from_value(cls, value: Union["TexturePyramid", bytes, bytearray, memoryview]) -> "TexturePyramid":
+        """Accept a pyramid or encoded image bytes (as the disk artifact store returns them)."""
+
+        if isinstance(value, TexturePyramid):
+            return value
+        with Image.open(io.BytesIO(bytes(value))) as image:
+            return cls.build(np.asarray(image.convert("RGB"), dtype=np.uint8))
+
+    @property
+    def resolution(self) -> int:
+        return self.levels[0].shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(level.nbytes for level in self.levels)
+
+    def save(self, path: Path) -> int:
+        return write_png(path, self.levels[0])
+
+    def release(self) -> None:
+        """Delete the files behind spilled (memory-mapped) levels; open maps stay readable until dropped."""
+
+        for level in self.levels:
+            if isinstance(level, np.memmap) and level.filename:
+                Path(level.filename).unlink(missing_ok=True)
+
+
+def _png_chunk(tag: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", len(payload)) + tag + payload + struct.pack(">I", zlib.crc32(tag + payload))
+
+
+def write_png(path: Path, image: np.ndarray, level: int = 6, band_rows: int = 256) -> int:
+    """Stream an RGB/RGBA ``uint8`` image to ``path`` as PNG without holding it encoded in memory.
+
+    Rows use the PNG ``Sub`` filter, computed for a band at a time with one
+    vectorized subtraction.
+    """
+
+    height, width, channels = image.shape
+    colour_type = {3: 2, 4: 6}[channels]
+    compressor = zlib.compressobj(level)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as handle:
+        handle.write(_PNG_SIGNATURE)
+        handle.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, colour_type, 0, 0, 0)))
+        for start in range(0, height, band_rows):
+            band = np.asarray(image[start : start + band_rows]).reshape(-1, width * channels)
+            rows = np.empty((len(band), width * channels + 1), dtype=np.uint8)
+            rows[:, 0] = 1
+            rows[:, 1 : channels + 1] = band[:, :channels]
+            np.subtract(band[:, channels:], band[:, :-channels], out=rows[:, channels + 1 :])
+            data = compressor.compress(rows)
+            if data:
+                handle.write(_png_chunk(b"IDAT", data))
+        handle.write(_png_chunk(b"IDAT", compressor.flush()))
+        handle.write(_png_chunk(b"IEND", b""))
+    return path.stat().st_size
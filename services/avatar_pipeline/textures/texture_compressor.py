@@ -0,0 +1,40 @@
+"""Block-compress baked texture pyramids into KTX2 files for packaging."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, Iterable
+
+from services.avatar_pipeline.textures.block_compression import ENCODERS, encode_image
+from services.avatar_pipeline.textures.ktx2 import SUPERCOMPRESSION_NONE, SUPERCOMPRESSION_ZLIB, write_ktx2
+from services.avatar_pipeline.textures.pyramid import TexturePyramid
+
+
+class TextureCompressor:
+    """Encode every mip level of a texture in each configured GPU block format."""
+
+    def __init__(
+        self,
+        formats: Iterable[str] = ("bc7", "bc1"),
+        supercompression: bool = True,
+        band_rows: int = 256,
+    ) -> None:
+        self.formats = tuple(formats)
+        unknown = [fmt for fmt in self.formats if fmt not in ENCODERS]
+        if unknown:
+            raise ValueError(f"Unknown texture compression formats: {', '.join(unknown)}.")
+        self.supercompression = SUPERCOMPRESSION_ZLIB if supercompression else SUPERCOMPRESSION_NONE
+        self.band_rows = band_rows
+
+    def compress(self, pyramid: TexturePyramid, output_dir: Path, stem: str) -> Dict[str, Path]:
+        """Write ``{stem}.{fmt}.ktx2`` per format and return the paths keyed by format."""
+
+        output_dir.mkdir(parents=True, exist_ok=True)
+        base = pyramid.levels[0]
+        paths: Dict[str, Path] = {}
+        for fmt in self.formats:
+            levels = [encode_image(level, fmt, self.band_rows) for level in pyramid.levels]
+            path = output_dir / f"{stem}.{fmt}.ktx2"
+            write_ktx2(path, levels, fmt, base.shape[1], base.shape[0], self.supercompression)
+            paths[fmt] = path
+        return paths
@@ -0,0 +1,350 @@
+"""Bake albedo textures by projecting aligned photos onto the mesh UV layout."""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.avatar_pipeline.models.mesh import Mesh
+from services.avatar_pipeline.preprocess.face_alignment import lerp_packed
+from services.avatar_pipeline.textures.pyramid import TexturePyramid, allocate_level
+
+
+@dataclass
+class UVRaster:
+    """Which face, and where inside it, each texel of a UV layout falls on."""
+
+    face_ids: np.ndarray
+    barycentrics: np.ndarray
+
+    @property
+    def coverage(self) -> np.ndarray:
+        return self.face_ids >= 0
+
+
+@dataclass
+class GeometryImage:
+    """Surface position and normal sampled on a regular grid over UV space."""
+
+    positions: np.ndarray
+    normals: np.ndarray
+    coverage: np.ndarray
+
+    @property
+    def resolution(self) -> int:
+        return self.positions.shape[0]
+
+
+def rasterize_uv_layout(
+    uvs: np.ndarray,
+    indices: np.ndarray,
+    resolution: int,
+    candidate_budget: int = 1 << 21,
+) -> UVRaster:
+    """Rasterize the triangles of a UV layout onto a ``resolution`` square grid.
+
+    Every face tests the texels of a fixed window around its UV bounding box
+    with barycentric coordinates; faces are processed in chunks so at most
+    ``candidate_budget`` texel tests are in flight at once.
+    """
+
+    coords = np.empty((len(uvs), 2), dtype=np.float32)
+    coords[:, 0] = uvs[:, 0] * resolution - 0.5
+    coords[:, 1] = (1.0 - uvs[:, 1]) * resolution - 0.5
+    corners = coords[indices]
+    lower = np.clip(np.floor(corners.min(axis=1)), 0, resolution - 1).astype(np.int32)
+    upper = np.clip(np.ceil(corners.max(axis=1)), 0, resolution - 1).astype(np.int32)
+    origin = corners[:, 0]
+    edge1 = corners[:, 1] - origin
+    edge2 = corners[:, 2] - origin
+    denominator = edge1[:, 0] * edge2[:, 1] - edge1[:, 1] * edge2[:, 0]
+    drawable = np.flatnonzero(np.abs(denominator) > 1e-12)
+
+    extent = int((upper - lower).max()) + 1 if len(drawable) else 1
+    offset_y, offset_x = np.divmod(np.arange(extent * extent, dtype=np.int32), extent)
+    face_ids = np.full((resolution, resolution), -1, dtype=np.int32)
+    barycentrics = np.zeros((resolution, resolution, 2), dtype=np.float32)
+    chunk = max(1, candidate_budget // (extent * extent))
+    eps = 1e-5
+    for start in range(0, len(drawable), chunk):
+        faces = drawable[start : start + chunk]
+        px = lower[faces, 0, None] + offset_x
+        py = lower[faces, 1, None] + offset_y
+        dx = px - origin[faces, 0, None]
+        dy = py - origin[faces, 1, None]
+        inverse = 1.0 / denominator[faces, None]
+        b1 = (dx * edge2[faces, 1, None] - dy * edge2[faces, 0, None]) * inverse
+        b2 = (edge1[faces, 0, None] * dy - edge1[faces, 1, None] * dx) * inverse
+        inside = (
+            (b1 >= -eps)
+            & (b2 >= -eps)
+            & (b1 + b2 <= 1 + eps)
+            & (px <= upper[faces, 0, None])
+            & (py <= upper[faces, 1, None])
+        )
+        rows = np.nonzero(inside)[0]
+        face_ids[py[inside], px[inside]] = faces[rows]
+        barycentrics[py[inside], px[inside]] = np.stack([b1[inside], b2[inside]], axis=-1)
+    return UVRaster(face_ids=face_ids, barycentrics=barycentrics)
+
+
+def geometry_image(mesh: Mesh, raster: UVRaster) -> GeometryImage:
+    """Interpolate ``mesh`` positions and normals at every covered texel of ``raster``."""
+
+    coverage = raster.coverage
+    resolution = coverage.shape[0]
+    triangles = mesh.indices[raster.face_ids[coverage]]
+    b = raster.barycentrics[coverage]
+    w0 = (1.0 - b[:, 0] - b[:, 1])[:, None]
+    positions = np.zeros((resolution, resolution, 3), dtype=np.float32)
+    normals = np.zeros((resolution, resolution, 3), dtype=np.float32)
+    for target, source in ((positions, mesh.vertices), (normals, mesh.normals)):
+        target[coverage] = (
+            w0 * source[triangles[:, 0]] + b[:, :1] * source[triangles[:, 1]] + b[:, 1:] * source[triangles[:, 2]]
+        )
+    length = np.linalg.norm(normals, axis=-1, keepdims=True)
+    np.divide(normals, length, out=normals, where=length > 0)
+    _dilate((positions, normals), coverage.copy(), passes=2)
+    return GeometryImage(positions=positions, normals=normals, coverage=coverage)
+
+
+def _dilate(arrays: Sequence[np.ndarray], filled: np.ndarray, passes: int) -> None:
+    """Grow filled texels into empty 4-neighbours so bilinear lookups at seams stay on the surface."""
+
+    for _ in range(passes):
+        for axis, shift in ((0, 1), (0, -1), (1, 1), (1, -1)):
+            source = np.roll(filled, shift, axis=axis)
+            edge = [slice(None), slice(None)]
+            edge[axis] = 0 if shift == 1 else -1
+            source[tuple(edge)] = False
+            grow = source & ~filled
+            if grow.any():
+                for array in arrays:
+                    array[grow] = np.roll(array, shift, axis=axis)[grow]
+                filled |= grow
+
+
+def _resample_rows(grid: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Linearly interpolate whole rows of ``grid`` at fractional row coordinates."""
+
+    y0 = np.clip(np.floor(rows).astype(np.int32), 0, grid.shape[0] - 1)
+    y1 = np.minimum(y0 + 1, grid.shape[0] - 1)
+    fy = np.clip(rows - y0, 0.0, 1.0).astype(np.float32)[:, None, None]
+    top = grid[y0]
+    return top + (grid[y1] - top) * fy
+
+
+def _resample_cols(band: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """Linearly interpolate a band from :func:`_resample_rows` at fractional column coordinates."""
+
+    x0 = np.clip(np.floor(cols).astype(np.int32), 0, band.shape[1] - 1)
+    x1 = np.minimum(x0 + 1, band.shape[1] - 1)
+    fx = np.clip(cols - x0, 0.0, 1.0).astype(np.float32)[None, :, None]
+    left = band[:, x0]
+    return left + (band[:, x1] - left) * fx
+
+
+def pack_rgbx(image: np.ndarray) -> np.ndarray:
+    """Pack an ``(H, W, 3)`` ``uint8`` image into ``(H, W)`` ``uint32`` RGBX pixels."""
+
+    packed = np.zeros(image.shape[:2] + (4,), dtype=np.uint8)
+    packed[..., :3] = image
+    return packed.view(np.uint32)[..., 0]
+
+
+def _sample_view(packed: np.ndarray, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Bilinear sample of packed RGBX pixels at float coordinates; the result stays packed."""
+
+    height, width = packed.shape
+    np.clip(x, 0, width - 1, out=x)
+    np.clip(y, 0, height - 1, out=y)
+    x0 = x.astype(np.int32)
+    y0 = y.astype(np.int32)
+    wx = ((x - x0) * 256).astype(np.uint32)
+    wy = ((y - y0) * 256).astype(np.uint32)
+    step_x = (x0 < width - 1).astype(np.int32)
+    step_y = (y0 < height - 1).astype(np.int32) * width
+    flat = packed.reshape(-1)
+    i00 = y0 * width + x0
+    i10 = i00 + step_y
+    top = lerp_packed(np.take(flat, i00), np.take(flat, i00 + step_x), wx)
+    bottom = lerp_packed(np.take(flat, i10), np.take(flat, i10 + step_x), wx)
+    return lerp_packed(top, bottom, wy)
+
+
+def estimate_yaw(landmarks: Optional[np.ndarray]) -> float:
+    """Head yaw in radians from how far the nose sits from the midpoint between the eyes."""
+
+    if landmarks is None or len(landmarks) < 3:
+        return 0.0
+    left_eye, right_eye, nose = landmarks[0], landmarks[1], landmarks[2]
+    eye_distance = float(np.linalg.norm(right_eye - left_eye))
+    if eye_distance < 1e-6:
+        return 0.0
+    offset = float(nose[0] - (left_eye[0] + right_eye[0]) / 2) / eye_distance
+    return float(np.arcsin(np.clip(2.0 * offset, -1.0, 1.0)))
+
+
+@dataclass
+class ViewProjection:
+    """Orthographic camera placing the mesh in one aligned crop (held as packed RGBX)."""
+
+    pixels: np.ndarray
+    yaw: float
+    centre: np.ndarray
+    scale: float
+
+    def project(
+        self, positions: np.ndarray, normals: np.ndarray, sharpness: float
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Return crop pixel coordinates and the blend weight of every texel."""
+
+        cos, sin = np.float32(np.cos(self.yaw)), np.float32(np.sin(self.yaw))
+        relative_x = positions[..., 0] - self.centre[0]
+        relative_y = positions[..., 1] - self.centre[1]
+        relative_z = positions[..., 2] - self.centre[2]
+        half = (self.pixels.shape[1] - 1) / 2.0
+        x = half + (cos * relative_x + sin * relative_z) * self.scale
+        y = half - relative_y * self.scale
+        facing = np.clip(cos * normals[..., 2] - sin * normals[..., 0], 0.0, None)
+        inside = (x >= 0) & (x <= self.pixels.shape[1] - 1) & (y >= 0) & (y <= self.pixels.shape[0] - 1)
+        return x, y, facing**sharpness * inside
+
+
+class TextureEngine:
+    """Bake a texture pyramid tile by tile from aligned views.
+
+    Surface positions and normals come from a geometry image at
+    ``geometry_resolution`` that is resampled per tile, so the cost of a tile
+    is independent of the mesh size. The UV rasterization behind it depends
+    only on the topology and is cached across jobs. Each view contributes its bilinear
+    sample weighted by how directly it faces the surface; texels no view
+    sees fall back to the mean skin colour.
+    """
+
+    def __init__(
+        self,
+        resolution: int = 1024,
+        tile_size: int = 256,
+        geometry_resolution: int = 512,
+        sharpness: float = 2.0,
+        face_fill: float = 0.45,
+        spill_bytes: int = 32 * 1024 * 1024,
+        raster_cache_size: int = 4,
+    ) -> None:
+        if resolution < 1 or resolution & (resolution - 1):
+            raise ValueError("texture resolution must be a power of two.")
+        self.resolution = resolution
+        self.tile_size = min(tile_size, resolution)
+        self.geometry_resolution = min(geometry_resolution, resolution)
+        self.sharpness = sharpness
+        self.face_fill = face_fill
+        self.spill_bytes = spill_bytes
+        self._rasters: "OrderedDict[str, UVRaster]" = OrderedDict()
+        self._raster_cache_size = raster_cache_size
+        self._lock = threading.Lock()
+
+    def uv_raster(self, mesh: Mesh) -> UVRaster:
+        """Return the cached UV rasterization for the mesh topology, computing it on first use."""
+
+        digest = hashlib.sha1(mesh.uvs.tobytes())
+        digest.update(mesh.indices.tobytes())
+        key = f"{self.geometry_resolution}:{digest.hexdigest()}"
+        with self._lock:
+            raster = self._rasters.get(key)
+            if raster is not None:
+                self._rasters.move_to_end(key)
+                return raster
+        raster = rasterize_uv_layout(mesh.uvs, mesh.indices, self.geometry_resolution)
+        with self._lock:
+            self._rasters[key] = raster
+            while len(self._rasters) > self._raster_cache_size:
+                self._rasters.popitem(last=False)
+        return raster
+
+    def views(
+        self,
+        images: Sequence[np.ndarray],
+        landmarks: Sequence[Optional[np.ndarray]],
+        mesh: Mesh,
+    ) -> List[ViewProjection]:
+        lower, upper = mesh.bounds()
+        centre = ((lower + upper) / 2).astype(np.float32)
+        half_height = max(float(upper[1] - lower[1]) / 2, 1e-6)
+        return [
+            ViewProjection(
+                pixels=pack_rgbx(image),
+                yaw=estimate_yaw(points),
+                centre=centre,
+                scale=image.shape[0] * self.face_fill / half_height,
+            )
+            for image, points in zip(images, landmarks)
+        ]
+
+    def bake(
+        self,
+        images: Sequence[np.ndarray],
+        landmarks: Sequence[Optional[np.ndarray]],
+        mesh: Mesh,
+        spill_dir: Optional[Path] = None,
+    ) -> TexturePyramid:
+        if not images:
+            raise ValueError("at least one view is required to bake a texture.")
+        geometry = geometry_image(mesh, self.uv_raster(mesh))
+        views = self.views(images, landmarks, mesh)
+        fallback = np.mean([image.reshape(-1, image.shape[-1]).mean(axis=0) for image in images], axis=0)
+
+        size = self.resolution
+        base = allocate_level((size, size, 3), spill_dir, self.spill_bytes)
+        coverage = geometry.coverage.astype(np.float32)[..., None]
+        ratio = geometry.resolution / size
+        for top in range(0, size, self.tile_size):
+            rows = (np.arange(top, min(size, top + self.tile_size), dtype=np.float32) + 0.5) * ratio - 0.5
+            # Row interpolation is shared by every tile in the band.
+            band_positions = _resample_rows(geometry.positions, rows)
+            band_normals = _resample_rows(geometry.normals, rows)
+            band_coverage = _resample_rows(coverage, rows)
+            for left in range(0, size, self.tile_size):
+                cols = (np.arange(left, min(size, left + self.tile_size), dtype=np.float32) + 0.5) * ratio - 0.5
+                base[top : top + len(rows), left : left + len(cols)] = self._shade(
+                    views,
+                    _resample_cols(band_positions, cols),
+                    _resample_cols(band_normals, cols),
+                    _resample_cols(band_coverage, cols)[..., 0] > 0.5,
+                    fallback,
+                )
+        return TexturePyramid.build(base, spill_dir, self.spill_bytes, band_rows=self.tile_size)
+
+    def _shade(
+        self,
+        views: Sequence[ViewProjection],
+        positions: np.ndarray,
+        normals: np.ndarray,
+        covered: np.ndarray,
+        fallback: np.ndarray,
+    ) -> np.ndarray:
+        # Accumulate all four packed lanes: contiguous RGBX is cheaper than strided RGB.
+        shape = positions.shape[:2]
+        accumulated = np.zeros(shape + (4,), dtype=np.float32)
+        lanes = np.empty(shape + (4,), dtype=np.float32)
+        total = np.zeros(shape, dtype=np.float32)
+        for view in views:
+            x, y, weight = view.project(positions, normals, self.sharpness)
+            weight *= covered
+            if not weight.any():
+                continue
+            lanes[...] = weight[..., None]
+            samples = _sample_view(view.pixels, x, y)
+            accumulated += np.multiply(samples.view(np.uint8).reshape(shape + (4,)), lanes, out=lanes)
+            total += weight
+        seen = total > 1e-6
+        result = np.empty(shape + (3,), dtype=np.float32)
+        result[:] = fallback
+        result[seen] = accumulated[seen, :3] / total[seen, None]
+        return np.clip(result + 0.5, 0, 255).astype(np.uint8)
@@ -2,38 +2,50 @@
 
 from __future__ import annotations
 
-import json
-from pathlib import Path
 from typing import Iterable, Optional
 
+from services.avatar_pipeline.artifacts.store import ArtifactStore
 from services.avatar_pipeline.models.pipeline import AlignedImage, MeshResult
+from services.avatar_pipeline.textures.texture_engine import TextureEngine
 
 
 class TextureGenerator:
     """Produce texture maps compatible with downstream asset packaging."""
 
+    def __init__(self, resolution: int = 1024, tile_size: int = 256, engine: Optional[TextureEngine] = None) -> None:
+        self.engine = engine or TextureEngine(resolution=resolution, tile_size=tile_size)
+
     def generate(
         self,
         images: Iterable[AlignedImage],
         mesh: MeshResult,
-        working_dir: Optional[Path],
-    ) -> Path:
-        if working_dir is None:
-            raise ValueError("working_dir must be provided for texture generation output.")
-        texture_dir = working_dir / "textures"
-        texture_dir.mkdir(parents=True, exist_ok=True)
-
-        texture_path = texture_dir / "albedo.png"
-        manifest_path = texture_dir / "albedo.json"
-
-        image_paths = [str(image.aligned_path) for image in images]
-        texture_path.write_text("texture placeholder")
-        manifest_path.write_text(
-            json.dumps(
-                {
-                    "mesh": str(mesh.mesh_path),
-                    "aligned_images": image_paths,
-                }
-            )
+        store: Optional[ArtifactStore],
+    ) -> str:
+        if store is None:
+            raise ValueError("an artifact store must be provided for texture generation output.")
+        if mesh.mesh is None:
+            raise ValueError("texture generation requires a reconstructed mesh.")
+        views = [image for image in images if image.pixels is not None]
+        if not views:
+            raise ValueError("texture generation requires aligned image pixels.")
+
+        texture_key = "textures/albedo.png"
+        pyramid = self.engine.bake(
+            [image.pixels for image in views],
+            [image.landmarks for image in views],
+            mesh.mesh,
+            spill_dir=store.root / "textures" / "mips",
+        )
+        store.put(texture_key, pyramid)
+        # Spilled levels are only needed until packaging has written the PNG and KTX2 outputs.
+        store.on_close(pyramid.release)
+        store.put(
+            "textures/albedo_manifest",
+            {
+                "mesh": mesh.mesh_key,
+                "aligned_images": [image.artifact_key for image in views],
+                "resolution": pyramid.resolution,
+                "mip_levels": len(pyramid.levels),
+            },
         )
-        return texture_path
+        return texture_key
@@ -0,0 +1,282 @@
+"""Parallel, resumable multipart uploads of packaged files to an object store."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional
+
+from services.avatar_pipeline.upload.object_store import (
+    ObjectStoreClient,
+    composite_checksum,
+    part_checksum,
+    part_etag,
+)
+
+
+@dataclass
+class UploadResult:
+    """Where one file ended up and how much of it this call had to send."""
+
+    key: str
+    uri: str
+    size: int
+    parts: int
+    uploaded_parts: int
+    skipped: bool = False
+
+
+class UploadJournal:
+    """Local record of the parts of one multipart upload the store has acknowledged.
+
+    The journal is rewritten atomically after every part, so an upload that
+    is interrupted (crash, timeout, failed part) resumes from the parts that
+    were confirmed instead of starting over.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.state: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def load(self) -> Optional[Dict[str, object]]:
+        if not self.path.exists():
+            return None
+        try:
+            return json.loads(self.path.read_text())
+        except ValueError:
+            return None
+
+    def start(self, state: Dict[str, object]) -> None:
+        self.state = state
+        with self._lock:
+            self._save()
+
+    def record(self, part_number: int, etag: str, checksum: str) -> None:
+        with self._lock:
+            self.state["parts"][str(part_number)] = etag
+            self.state["checksums"][str(part_number)] = checksum
+            self._save()
+
+    def remove(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_name(f"{self.path.name}.tmp")
+        temporary.write_text(json.dumps(self.state))
+        os.replace(temporary, self.path)
+
+
+@dataclass
+class _Upload:
+    key: str
+    path: Path
+    size: int
+    fd: Optional[int] = None
+    futures: List[Future] = field(default_factory=list)
+    finish: Optional[Callable[[], UploadResult]] = None
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+class MultipartUploader:
+    """Upload files through one thread pool shared by all their parts.
+
+    Files up to ``part_size`` bytes go up in a single request; larger files
+    are split into ``part_size`` parts read with ``os.pread`` from one
+    descriptor, so every part of every file competes for the same
+    ``max_workers`` connections.
+
+    Every request carries the SHA-256 of its body (S3 ``ChecksumSHA256``),
+    which the store verifies before accepting it, and each returned ETag is
+    checked against the MD5 of the bytes sent. Once an object is complete
+    its size and the checksum the store reports are read back and compared
+    with what was sent. The file's SHA-256 ``metadata`` is plain user
+    metadata that stores do not check; it only lets objects that already
+    hold the same SHA-256 be skipped.
+    """
+
+    def __init__(
+        self,
+        client: ObjectStoreClient,
+        journal_dir: Path,
+        part_size: int = 8 * 1024 * 1024,
+        max_workers: int = 8,
+        retries: int = 2,
+        retry_backoff: float = 0.2,
+    ) -> None:
+        if part_size <= 0:
+            raise ValueError("Upload part size must be positive.")
+        self.client = client
+        self.journal_dir = Path(journal_dir)
+        self.part_size = part_size
+        self.max_workers = max(1, max_workers)
+        self.retries = max(0, retries)
+        self.retry_backoff = retry_backoff
+
+    def upload(
+        self,
+        files: Mapping[str, Path],
+        metadata: Optional[Mapping[str, Mapping[str, str]]] = None,
+    ) -> Dict[str, UploadResult]:
+        """Upload ``files`` (object key -> local path); ``metadata`` maps keys to user metadata."""
+
+        metadata = metadata or {}
+        uploads: List[_Upload] = []
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                for key, path in files.items():
+                    uploads.append(self._start(pool, key, Path(path), dict(metadata.get(key, {}))))
+                return {upload.key: upload.finish() for upload in uploads}
+        finally:
+            for upload in uploads:
+                upload.close()
+
+    def journal_path(self, key: str) -> Path:
+        return self.journal_dir / f"{hashlib.sha256(key.encode()).hexdigest()[:32]}.json"
+
+    def _start(self, pool: Executor, key: str, path: Path, metadata: Dict[str, str]) -> _Upload:
+        upload = _Upload(key, path, path.stat().st_size)
+        existing = self.client.head(key)
+        if (
+            existing is not None
+            and existing.size == upload.size
+            and "sha256" in metadata
+            and existing.metadata.get("sha256") == metadata["sha256"]
+        ):
+            result = UploadResult(key, self.client.url(key), upload.size, 0, 0, skipped=True)
+            upload.finish = lambda: result
+            return upload
+        upload.fd = os.open(path, os.O_RDONLY)
+        if upload.size <= self.part_size:
+            upload.futures.append(pool.submit(self._put, upload, metadata))
+            upload.finish = lambda: self._finish_single(upload)
+            return upload
+
+        journal = UploadJournal(self.journal_path(key))
+        state = self._resume(journal, upload, metadata)
+        total = -(-upload.size // self.part_size)
+        done = {int(number) for number in state["parts"]}
+        for number in range(1, total + 1):
+            if number not in done:
+                upload.futures.append(pool.submit(self._upload_part, upload, journal, number))
+        upload.finish = lambda: self._finish_multipart(upload, journal, total)
+        return upload
+
+    def _resume(self, journal: UploadJournal, upload: _Upload, metadata: Dict[str, str]) -> Dict[str, object]:
+        """Continue the journaled upload of this exact file, or start a new one."""
+
+        stat = upload.path.stat()
+        identity = {
+            "key": upload.key,
+            "size": upload.size,
+            "mtime_ns": stat.st_mtime_ns,
+            "part_size": self.part_size,
+            "checksum_algorithm": "SHA256",
+            "metadata": metadata,
+        }
+        previous = journal.load()
+        if previous is not None:
+            if all(previous.get(name) == value for name, value in identity.items()):
+                try:
+                    stored = self.client.list_parts(upload.key, previous["upload_id"])
+                except KeyError:
+                    stored = None
+                if stored is not None:
+                    confirmed = {
+                        number: etag for number, etag in previous["parts"].items() if stored.get(int(number)) == etag
+                    }
+                    checksums = {number: previous["checksums"][number] for number in confirmed}
+                    journal.start({**previous, "parts": confirmed, "checksums": checksums})
+                    return journal.state
+            else:
+                try:
+                    self.client.abort_multipart_upload(upload.key, previous["upload_id"])
+                except KeyError:
+                    pass
+        upload_id = self.client.create_multipart_upload(upload.key, metadata)
+        journal.start({**identity, "upload_id": upload_id, "parts": {}, "checksums": {}})
+        return journal.state
+
+    def _read(self, upload: _Upload, offset: int, length: int) -> bytes:
+        data = os.pread(upload.fd, length, offset)
+        if len(data) != length:
+            raise ValueError(f"{upload.path} changed while it was being uploaded.")
+        return data
+
+    def _put(self, upload: _Upload, metadata: Dict[str, str]) -> str:
+        data = self._read(upload, 0, upload.size)
+        expected = part_etag(data)
+        checksum = part_checksum(data)
+        self._with_retries(
+            lambda: self._checked(self.client.put_object(upload.key, data, metadata, checksum), expected, upload.key)
+        )
+        return checksum
+
+    def _upload_part(self, upload: _Upload, journal: UploadJournal, number: int) -> None:
+        offset = (number - 1) * self.part_size
+        data = self._read(upload, offset, min(self.part_size, upload.size - offset))
+        expected = part_etag(data)
+        checksum = part_checksum(data)
+        upload_id = journal.state["upload_id"]
+        etag = self._with_retries(
+            lambda: self._checked(
+                self.client.upload_part(upload.key, upload_id, number, data, checksum),
+                expected,
+                f"{upload.key} part {number}",
+            )
+        )
+        journal.record(number, etag, checksum)
+
+    def _finish_single(self, upload: _Upload) -> UploadResult:
+        checksum = upload.futures[0].result()
+        self._verify(upload, checksum)
+        return UploadResult(upload.key, self.client.url(upload.key), upload.size, 1, 1)
+
+    def _finish_multipart(self, upload: _Upload, journal: UploadJournal, total: int) -> UploadResult:
+        for future in upload.futures:
+            future.result()
+        checksums = journal.state["checksums"]
+        parts = sorted((int(number), etag, checksums[number]) for number, etag in journal.state["parts"].items())
+        if [number for number, _, _ in parts] != list(range(1, total + 1)):
+            raise ValueError(f"Multipart upload of {upload.key} is missing parts.")
+        self.client.complete_multipart_upload(upload.key, journal.state["upload_id"], parts)
+        self._verify(upload, composite_checksum([checksum for _, _, checksum in parts]))
+        journal.remove()
+        return UploadResult(upload.key, self.client.url(upload.key), upload.size, total, len(upload.futures))
+
+    def _verify(self, upload: _Upload, checksum: str) -> None:
+        """Read the finished object back and compare its size and, when the store reports one, its checksum."""
+
+        info = self.client.head(upload.key)
+        if info is None or info.size != upload.size:
+            raise ValueError(f"Uploaded {upload.key} does not match the size of {upload.path}.")
+        if info.checksum is not None and info.checksum != checksum:
+            raise ValueError(f"Uploaded {upload.key} reports checksum {info.checksum}, expected {checksum}.")
+
+    def _with_retries(self, call: Callable[[], str]) -> str:
+        attempt = 0
+        while True:
+            try:
+                return call()
+            except Exception:
+                if attempt >= self.retries:
+                    raise
+                time.sleep(self.retry_backoff * 2**attempt)
+                attempt += 1
+
+    @staticmethod
+    def _checked(etag: str, expected: str, label: str) -> str:
+        if etag != expected:
+            raise ValueError(f"Checksum mismatch uploading {label}: store returned ETag {etag}, expected {expected}.")
+        return etag
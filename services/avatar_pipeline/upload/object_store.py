@@ -0,0 +1,324 @@
+"""Object store clients the upload stage pushes packaged assets to."""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+try:  # boto3 is optional; without it only file:// buckets are available.
+    import boto3
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # pragma: no cover - depends on the environment
+    boto3 = None
+
+_CHUNK_BYTES = 1 << 20
+
+
+def part_etag(data: bytes) -> str:
+    """The ETag object stores return for a part: the hex MD5 of its bytes."""
+
+    return hashlib.md5(data).hexdigest()
+
+
+def part_checksum(data: bytes) -> str:
+    """The S3 ``ChecksumSHA256`` of one request body: its base64 SHA-256."""
+
+    return base64.b64encode(hashlib.sha256(data).digest()).decode("ascii")
+
+
+def composite_checksum(checksums: Sequence[str]) -> str:
+    """The ``ChecksumSHA256`` S3 reports for a multipart object assembled from parts with ``checksums``."""
+
+    digest = hashlib.sha256(b"".join(base64.b64decode(checksum) for checksum in checksums)).digest()
+    return f"{base64.b64encode(digest).decode('ascii')}-{len(checksums)}"
+
+
+@dataclass
+class ObjectInfo:
+    """Size, user metadata and (when the store keeps one) SHA-256 checksum of a stored object."""
+
+    key: str
+    size: int
+    metadata: Dict[str, str] = field(default_factory=dict)
+    checksum: Optional[str] = None
+
+
+class ObjectStoreClient(ABC):
+    """The subset of the S3 multipart API the uploader relies on.
+
+    Every request body comes with its ``part_checksum``, which the store
+    must verify (S3 ``ChecksumAlgorithm="SHA256"``) and reject on mismatch.
+    User metadata is stored as given and never checked.
+    Implementations must be safe to call from several threads at once.
+    """
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """Public URI of ``key`` in this bucket."""
+
+    @abstractmethod
+    def head(self, key: str) -> Optional[ObjectInfo]:
+        """Describe ``key``, or return ``None`` when it does not exist."""
+
+    @abstractmethod
+    def put_object(self, key: str, data: bytes, metadata: Mapping[str, str], checksum: str) -> str:
+        """Store a whole object in one request and return its ETag."""
+
+    @abstractmethod
+    def create_multipart_upload(self, key: str, metadata: Mapping[str, str]) -> str:
+        """Start a multipart upload and return its upload id."""
+
+    @abstractmethod
+    def upload_part(self, key: str, upload_id: str, part_number: int, data: bytes, checksum: str) -> str:
+        """Store one part (numbered from 1) and return its ETag."""
+
+    @abstractmethod
+    def list_parts(self, key: str, upload_id: str) -> Dict[int, str]:
+        """ETags of the parts already stored; raises ``KeyError`` for unknown uploads."""
+
+    @abstractmethod
+    def complete_multipart_upload(
+        self, key: str, upload_id: str, parts: Sequence[Tuple[int, str, str]]
+    ) -> ObjectInfo:
+        """Assemble the listed ``(number, etag, checksum)`` parts, in order, into the final object."""
+
+    @abstractmethod
+    def abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        """Discard an upload and its stored parts."""
+
+    def close(self) -> None:
+        """Release pooled connections."""
+
+
+class FileObjectStore(ObjectStoreClient):
+    """Bucket backed by a local directory, used for ``file://`` URLs and in tests.
+
+    Objects live at ``root/<key>`` with their metadata and checksum in
+    ``root/.metadata/<key>.json``; in-flight multipart uploads keep their
+    parts under ``root/.multipart/<upload_id>/``. Like S3 with SHA-256
+    checksums, a request whose body does not match its checksum fails and
+    stores nothing, and multipart objects report the composite checksum.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self._uploads = self.root / ".multipart"
+        self._metadata = self.root / ".metadata"
+
+    def url(self, key: str) -> str:
+        return self._object_path(key).resolve().as_uri()
+
+    def head(self, key: str) -> Optional[ObjectInfo]:
+        path = self._object_path(key)
+        if not path.is_file():
+            return None
+        meta_path = self._metadata_path(key)
+        stored = json.loads(meta_path.read_text()) if meta_path.exists() else {}
+        return ObjectInfo(key, path.stat().st_size, stored.get("metadata", {}), stored.get("checksum"))
+
+    def put_object(self, key: str, data: bytes, metadata: Mapping[str, str], checksum: str) -> str:
+        self._check(data, checksum, key)
+        staging = self._uploads / f"{uuid.uuid4().hex}.object"
+        staging.parent.mkdir(parents=True, exist_ok=True)
+        staging.write_bytes(data)
+        self._publish(key, staging, dict(metadata), checksum)
+        return part_etag(data)
+
+    def create_multipart_upload(self, key: str, metadata: Mapping[str, str]) -> str:
+        upload_id = uuid.uuid4().hex
+        directory = self._uploads / upload_id
+        directory.mkdir(parents=True)
+        (directory / "upload.json").write_text(json.dumps({"key": key, "metadata": dict(metadata)}))
+        return upload_id
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, data: bytes, checksum: str) -> str:
+        directory = self._upload_dir(key, upload_id)
+        self._check(data, checksum, f"{key} part {part_number}")
+        path = directory / f"{part_number:05d}.part"
+        temporary = path.with_name(f"{path.name}.tmp")
+        temporary.write_bytes(data)
+        os.replace(temporary, path)
+        return part_etag(data)
+
+    def list_parts(self, key: str, upload_id: str) -> Dict[int, str]:
+        directory = self._upload_dir(key, upload_id)
+        parts = {}
+        for path in directory.glob("*.part"):
+            digest = hashlib.md5()
+            with path.open("rb") as handle:
+                while chunk := handle.read(_CHUNK_BYTES):
+                    digest.update(chunk)
+            parts[int(path.stem)] = digest.hexdigest()
+        return parts
+
+    def complete_multipart_upload(
+        self, key: str, upload_id: str, parts: Sequence[Tuple[int, str, str]]
+    ) -> ObjectInfo:
+        directory = self._upload_dir(key, upload_id)
+        metadata = json.loads((directory / "upload.json").read_text())["metadata"]
+        stored = self.list_parts(key, upload_id)
+        numbers = [number for number, _, _ in parts]
+        if numbers != sorted(set(numbers)):
+            raise ValueError("Multipart parts must be listed once each, in ascending order.")
+        staging = directory / "object"
+        with staging.open("wb") as target:
+            for number, etag, checksum in parts:
+                if stored.get(number) != etag:
+                    raise ValueError(f"Part {number} of {key} does not match ETag {etag}.")
+                sha256 = hashlib.sha256()
+                with (directory / f"{number:05d}.part").open("rb") as source:
+                    while chunk := source.read(_CHUNK_BYTES):
+                        sha256.update(chunk)
+                        target.write(chunk)
+                if base64.b64encode(sha256.digest()).decode("ascii") != checksum:
+                    raise ValueError(f"Part {number} of {key} does not match its SHA-256 checksum.")
+        self._publish(key, staging, metadata, composite_checksum([checksum for _, _, checksum in parts]))
+        shutil.rmtree(directory, ignore_errors=True)
+        return self.head(key)
+
+    def abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        shutil.rmtree(self._uploads / upload_id, ignore_errors=True)
+
+    def _object_path(self, key: str) -> Path:
+        if key.startswith("/") or ".." in Path(key).parts or key.startswith("."):
+            raise ValueError(f"Invalid object key: {key}.")
+        return self.root / key
+
+    def _metadata_path(self, key: str) -> Path:
+        return self._metadata / f"{key}.json"
+
+    def _upload_dir(self, key: str, upload_id: str) -> Path:
+        directory = self._uploads / upload_id
+        manifest = directory / "upload.json"
+        if not manifest.exists() or json.loads(manifest.read_text())["key"] != key:
+            raise KeyError(f"No multipart upload {upload_id} for {key}.")
+        return directory
+
+    def _publish(self, key: str, staging: Path, metadata: Dict[str, str], checksum: str) -> None:
+        path = self._object_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta_path = self._metadata_path(key)
+        meta_path.parent.mkdir(parents=True, exist_ok=True)
+        meta_path.write_text(json.dumps({"metadata": metadata, "checksum": checksum}))
+        os.replace(staging, path)
+
+    @staticmethod
+    def _check(data: bytes, checksum: str, label: str) -> None:
+        if part_checksum(data) != checksum:
+            raise ValueError(f"Uploaded {label} does not match its SHA-256 checksum.")
+
+
+class S3ObjectStore(ObjectStoreClient):
+    """S3 (or S3-compatible) bucket over one boto3 client with a shared connection pool."""
+
+    def __init__(self, bucket: str, prefix: str = "", max_connections: int = 10, client: object = None) -> None:
+        if client is None:
+            if boto3 is None:
+                raise ValueError("s3:// buckets require the boto3 package.")
+            client = boto3.client("s3", config=BotoConfig(max_pool_connections=max_connections))
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self._client = client
+
+    def url(self, key: str) -> str:
+        return f"s3://{self.bucket}/{self._key(key)}"
+
+    def head(self, key: str) -> Optional[ObjectInfo]:
+        try:
+            response = self._client.head_object(Bucket=self.bucket, Key=self._key(key), ChecksumMode="ENABLED")
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in {"404", "NoSuchKey", "NotFound"}:
+                return None
+            raise
+        return ObjectInfo(
+            key, response["ContentLength"], response.get("Metadata", {}), response.get("ChecksumSHA256")
+        )
+
+    def put_object(self, key: str, data: bytes, metadata: Mapping[str, str], checksum: str) -> str:
+        response = self._client.put_object(
+            Bucket=self.bucket,
+            Key=self._key(key),
+            Body=data,
+            Metadata=dict(metadata),
+            ChecksumAlgorithm="SHA256",
+            ChecksumSHA256=checksum,
+        )
+        return response["ETag"].strip('"')
+
+    def create_multipart_upload(self, key: str, metadata: Mapping[str, str]) -> str:
+        response = self._client.create_multipart_upload(
+            Bucket=self.bucket, Key=self._key(key), Metadata=dict(metadata), ChecksumAlgorithm="SHA256"
+        )
+        return response["UploadId"]
+
+    def upload_part(self, key: str, upload_id: str, part_number: int, data: bytes, checksum: str) -> str:
+        response = self._client.upload_part(
+            Bucket=self.bucket,
+            Key=self._key(key),
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=data,
+            ChecksumAlgorithm="SHA256",
+            ChecksumSHA256=checksum,
+        )
+        return response["ETag"].strip('"')
+
+    def list_parts(self, key: str, upload_id: str) -> Dict[int, str]:
+        parts: Dict[int, str] = {}
+        paginator = self._client.get_paginator("list_parts")
+        try:
+            for page in paginator.paginate(Bucket=self.bucket, Key=self._key(key), UploadId=upload_id):
+                for part in page.get("Parts", []):
+                    parts[part["PartNumber"]] = part["ETag"].strip('"')
+        except ClientError as exc:
+            raise KeyError(f"No multipart upload {upload_id} for {key}.") from exc
+        return parts
+
+    def complete_multipart_upload(
+        self, key: str, upload_id: str, parts: Sequence[Tuple[int, str, str]]
+    ) -> ObjectInfo:
+        self._client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self._key(key),
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": number, "ETag": f'"{etag}"', "ChecksumSHA256": checksum}
+                    for number, etag, checksum in parts
+                ]
+            },
+        )
+        return self.head(key)
+
+    def abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        self._client.abort_multipart_upload(Bucket=self.bucket, Key=self._key(key), UploadId=upload_id)
+
+    def close(self) -> None:
+        close = getattr(self._client, "close", None)
+        if close is not None:
+            close()
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+
+def create_object_store(bucket_url: str, max_connections: int = 10) -> ObjectStoreClient:
+    """Client for ``file://<path>`` or ``s3://<bucket>/<prefix>`` bucket URLs."""
+
+    parsed = urlparse(bucket_url)
+    if parsed.scheme == "file":
+        return FileObjectStore(Path(parsed.netloc + parsed.path))
+    if parsed.scheme == "s3":
+        return S3ObjectStore(parsed.netloc, parsed.path, max_connections=max_connections)
+    raise ValueError(f"Unsupported bucket URL: {bucket_url}.")
+
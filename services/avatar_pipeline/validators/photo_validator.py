@@ -3,8 +3,9 @@
 from __future__ import annotations
 
 import mimetypes
+from functools import lru_cache
 from pathlib import Path
-from typing import Iterable, List, Mapping
+from typing import Any, FrozenSet, Iterable, List, Mapping, Union
 from urllib.parse import urlparse
 
 from services.avatar_pipeline.exceptions import ValidationError
@@ -12,37 +13,57 @@ from services.avatar_pipeline.models.pipeline import Photo
 
 
 class PhotoValidator:
-    """Ensures inbound photos satisfy minimum quality thresholds."""
+    """Ensures inbound photos satisfy minimum quality thresholds.
+
+    Per-URL format checks (``urlparse`` and ``mimetypes``) go through one
+    process-wide cache, so when the API and the in-process workers see the
+    same photos only the first validator pays for them. ``Photo`` inputs
+    were produced by a validator already and are returned as they are.
+    """
 
     allowed_extensions = {".jpg", ".jpeg", ".png"}
     min_resolution = 256
 
-    def validate(self, photos: Iterable[Mapping]) -> List[Photo]:
+    def validate(self, photos: Iterable[Union[Photo, Mapping[str, Any]]]) -> List[Photo]:
         photos = list(photos)
         if not photos:
             raise ValidationError("At least one photo is required to generate an avatar.")
+        extensions = frozenset(self.allowed_extensions)
+        return [
+            payload if isinstance(payload, Photo) else self._validate_photo(index, payload, extensions)
+            for index, payload in enumerate(photos)
+        ]
+
+    @staticmethod
+    def cache_info():
+        return _format_supported.cache_info()
+
+    def _validate_photo(self, index: int, payload: Mapping[str, Any], extensions: FrozenSet[str]) -> Photo:
+        url = str(payload.get("url", "")).strip()
+        if not url:
+            raise ValidationError(f"Photo #{index + 1} is missing a URL.")
+
+        if not _format_supported(url, extensions):
+            raise ValidationError(f"Unsupported image format for {url}.")
+
+        width = int(payload.get("width", 0))
+        height = int(payload.get("height", 0))
+        if width < self.min_resolution or height < self.min_resolution:
+            raise ValidationError(
+                f"Photo {url} is below the minimum resolution of {self.min_resolution}px."
+            )
+
+        metadata = {
+            key: str(value)
+            for key, value in payload.get("metadata", {}).items()
+        }
+        return Photo(url=url, width=width, height=height, metadata=metadata)
+
 
-        validated: List[Photo] = []
-        for index, payload in enumerate(photos):
-            url = str(payload.get("url", "")).strip()
-            if not url:
-                raise ValidationError(f"Photo #{index + 1} is missing a URL.")
-
-            extension = Path(urlparse(url).path).suffix.lower()
-            guessed_type = mimetypes.guess_type(url)[0]
-            if extension not in self.allowed_extensions and (guessed_type or "").split("/")[0] != "image":
-                raise ValidationError(f"Unsupported image format for {url}.")
-
-            width = int(payload.get("width", 0))
-            height = int(payload.get("height", 0))
-            if width < self.min_resolution or height < self.min_resolution:
-                raise ValidationError(
-                    f"Photo {url} is below the minimum resolution of {self.min_resolution}px."
-                )
-
-            metadata = {
-                key: str(value)
-                for key, value in payload.get("metadata", {}).items()
-            }
-            validated.append(Photo(url=url, width=width, height=height, metadata=metadata))
-        return validated
+@lru_cache(maxsize=4096)
+def _format_supported(url: str, extensions: FrozenSet[str]) -> bool:
+    extension = Path(urlparse(url).path).suffix.lower()
+    if extension in extensions:
+        return True
+    guessed_type = mimetypes.guess_type(url)[0]
+    return (guessed_type or "").split("/")[0] == "image"
@@ -3,11 +3,16 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Iterable, List, Optional, Sequence
 
+from services.avatar_pipeline.lod.lod_generator import LodLevel
+from services.avatar_pipeline.models.mesh import Buffer
 from services.avatar_pipeline.models.pipeline import MeshResult, RiggingResult
+from services.avatar_pipeline.observability.tracing import tracer
+from services.avatar_pipeline.writers.checksums import StreamingChecksum, validate_algorithms
+from services.avatar_pipeline.writers.gltf_binary import write_buffers
 
 
 @dataclass
@@ -19,14 +24,29 @@ class AssetWriteResult:
     metadata: Dict[str, str]
 
 
+@dataclass
+class PackageResources:
+    """Extra files produced during packaging that written assets should reference."""
+
+    compressed_textures: Dict[str, Path] = field(default_factory=dict)
+    lods: List[LodLevel] = field(default_factory=list)
+
+
 class AssetWriter(ABC):
     """Abstract writer that serializes pipeline output to a specific format."""
 
     asset_type: str
 
-    def __init__(self, unity_version: str = "2022.3", scale: float = 1.0) -> None:
+    def __init__(
+        self,
+        unity_version: str = "2022.3",
+        scale: float = 1.0,
+        checksums: Iterable[str] = ("sha256",),
+    ) -> None:
         self.unity_version = unity_version
         self.scale = scale
+        self.checksums = tuple(checksums)
+        validate_algorithms(self.checksums)
 
     @abstractmethod
     def write(
@@ -36,12 +56,73 @@ class AssetWriter(ABC):
         texture_path: Path,
         rigging: RiggingResult,
         output_dir: Path,
+        resources: Optional[PackageResources] = None,
     ) -> AssetWriteResult:
         """Persist pipeline results to disk and return metadata about the asset."""
 
-    def _unity_metadata(self, rigging: RiggingResult) -> Dict[str, str]:
-        return {
+    def options(self) -> Dict[str, object]:
+        """Settings that change the written bytes; packaging hashes them to skip unchanged outputs."""
+
+        return {"unity_version": self.unity_version, "scale": self.scale, "checksums": list(self.checksums)}
+
+    def _write_asset(self, path: Path, buffers: Sequence[Buffer]) -> Dict[str, object]:
+        """Write ``buffers`` to ``path`` and return its size and checksums, hashed while writing."""
+
+        with tracer.start_span("file.write", {"file.path": str(path)}) as span:
+            checksum = StreamingChecksum(self.checksums)
+            write_buffers(path, buffers, checksum)
+            metadata = checksum.metadata()
+            span.set_attribute("file.size", metadata["size_bytes"])
+        return metadata
+
+    @staticmethod
+    def _mesh_metadata(mesh: MeshResult) -> Dict[str, object]:
+        metadata: Dict[str, object] = {"mesh": str(mesh.mesh_path)}
+        if mesh.neutral_mesh_path is not None:
+            metadata["neutral_mesh"] = str(mesh.neutral_mesh_path)
+        if mesh.mesh is not None:
+            metadata["mesh_format"] = "amesh"
+            metadata["vertex_count"] = mesh.mesh.vertex_count
+            metadata["face_count"] = mesh.mesh.face_count
+        return metadata
+
+    @staticmethod
+    def _blendshape_metadata(rigging: RiggingResult) -> Dict[str, object]:
+        metadata: Dict[str, object] = {"blendshapes": str(rigging.blendshape_path)}
+        if rigging.blendshapes is not None:
+            metadata["blendshape_format"] = "ablend"
+            metadata["blendshape_names"] = list(rigging.blendshapes.names)
+        return metadata
+
+    @staticmethod
+    def _texture_metadata(texture_path: Path, resources: Optional[PackageResources]) -> Dict[str, object]:
+        metadata: Dict[str, object] = {"texture": str(texture_path)}
+        if resources is not None and resources.compressed_textures:
+            metadata["compressed_textures"] = {
+                fmt: str(path) for fmt, path in resources.compressed_textures.items()
+            }
+        return metadata
+
+    def _unity_metadata(self, rigging: RiggingResult, resources: Optional[PackageResources] = None) -> Dict[str, str]:
+        metadata = {
             "unity_version": self.unity_version,
             "scale": self.scale,
             "default_controls": {key: str(value) for key, value in rigging.controls.items()},
         }
+        if rigging.clips:
+            metadata["animation_clips"] = {
+                name: {
+                    "path": str(rigging.clip_paths.get(name)),
+                    "format": "aclip",
+                    "fps": clip.fps,
+                    "frame_count": clip.frame_count,
+                    "loop": clip.loop,
+                }
+                for name, clip in rigging.clips.items()
+            }
+        if resources is not None and resources.lods:
+            metadata["lod_group"] = {
+                "fade_mode": "cross_fade",
+                "levels": [level.metadata() for level in resources.lods],
+            }
+        return metadata
@@ -0,0 +1,57 @@
+"""Incremental content checksums computed from asset buffers as they are written."""
+
+from __future__ import annotations
+
+import hashlib
+from typing import Callable, Dict, Iterable
+
+from services.avatar_pipeline.models.mesh import Buffer
+
+try:  # xxhash is optional; without it only hashlib algorithms are available.
+    import xxhash
+except ImportError:  # pragma: no cover - depends on the environment
+    xxhash = None
+
+XXHASH_ALGORITHMS = ("xxh64", "xxh3_64", "xxh3_128")
+
+
+def _factory(name: str) -> Callable[[], object]:
+    if name in XXHASH_ALGORITHMS:
+        if xxhash is None:
+            raise ValueError(f"Checksum algorithm {name} requires the xxhash package.")
+        return getattr(xxhash, name)
+    if name not in hashlib.algorithms_available:
+        raise ValueError(f"Unknown checksum algorithm: {name}.")
+    return lambda: hashlib.new(name)
+
+
+class StreamingChecksum:
+    """Feed every written buffer to one hasher per algorithm and count the bytes.
+
+    Buffers are hashed from memory right before they are written, so the
+    checksums cost no second read of the file.
+    """
+
+    def __init__(self, algorithms: Iterable[str] = ("sha256",)) -> None:
+        self.algorithms = tuple(algorithms)
+        self._hashers = {name: _factory(name)() for name in self.algorithms}
+        self.size = 0
+
+    def update(self, buffer: Buffer) -> None:
+        view = memoryview(buffer).cast("B")
+        for hasher in self._hashers.values():
+            hasher.update(view)
+        self.size += len(view)
+
+    def hexdigests(self) -> Dict[str, str]:
+        return {name: hasher.hexdigest() for name, hasher in self._hashers.items()}
+
+    def metadata(self) -> Dict[str, object]:
+        return {"size_bytes": self.size, "checksums": self.hexdigests()}
+
+
+def validate_algorithms(algorithms: Iterable[str]) -> None:
+    """Raise ``ValueError`` early for checksum algorithms this process cannot compute."""
+
+    for name in algorithms:
+        _factory(name)
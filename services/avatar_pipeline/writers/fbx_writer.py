@@ -4,9 +4,10 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
+from typing import Optional
 
 from services.avatar_pipeline.models.pipeline import MeshResult, RiggingResult
-from services.avatar_pipeline.writers.base_writer import AssetWriteResult, AssetWriter
+from services.avatar_pipeline.writers.base_writer import AssetWriteResult, AssetWriter, PackageResources
 
 
 class FBXWriter(AssetWriter):
@@ -19,18 +20,21 @@ class FBXWriter(AssetWriter):
         texture_path: Path,
         rigging: RiggingResult,
         output_dir: Path,
+        resources: Optional[PackageResources] = None,
     ) -> AssetWriteResult:
         output_dir.mkdir(parents=True, exist_ok=True)
         asset_path = output_dir / f"{job_id}.fbx"
-        asset_path.write_text(
-            "FBX placeholder generated for job {job_id}\n".format(job_id=job_id)
+        written = self._write_asset(
+            asset_path, ["FBX placeholder generated for job {job_id}\n".format(job_id=job_id).encode("utf-8")]
         )
         metadata = {
             "asset_type": self.asset_type,
-            "mesh": str(mesh.mesh_path),
-            "texture": str(texture_path),
+            **written,
+            **self._mesh_metadata(mesh),
+            **self._texture_metadata(texture_path, resources),
+            **self._blendshape_metadata(rigging),
         }
-        metadata.update(self._unity_metadata(rigging))
+        metadata.update(self._unity_metadata(rigging, resources))
         metadata_path = asset_path.with_suffix(".fbx.metadata.json")
         metadata_path.write_text(json.dumps(metadata, indent=2))
         metadata["metadata_path"] = str(metadata_path)
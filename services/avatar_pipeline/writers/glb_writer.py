@@ -4,14 +4,51 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
+from typing import Dict, Iterable, Optional
 
+import numpy as np
+
+from services.avatar_pipeline.models.blendshapes import BLENDSHAPE_SUFFIX, BlendshapeSet, read_blendshapes
+from services.avatar_pipeline.models.mesh import MESH_SUFFIX, Mesh, read_mesh
 from services.avatar_pipeline.models.pipeline import MeshResult, RiggingResult
-from services.avatar_pipeline.writers.base_writer import AssetWriteResult, AssetWriter
+from services.avatar_pipeline.writers.base_writer import AssetWriteResult, AssetWriter, PackageResources
+from services.avatar_pipeline.writers.gltf_binary import encode_glb
+
+
+def _mapped(path: Optional[Path]) -> Optional[np.ndarray]:
+    if path is None or not Path(path).is_file() or Path(path).stat().st_size == 0:
+        return None
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+def _morph_target_count(geometry: Optional[Mesh], shapes: Optional[BlendshapeSet]) -> int:
+    if geometry is None or shapes is None or shapes.vertex_count != geometry.vertex_count:
+        return 0
+    return shapes.shape_count
 
 
 class GLBWriter(AssetWriter):
+    """Write a binary glTF with the mesh, embedded albedo and blendshapes as sparse morph targets.
+
+    Packaged LODs are embedded as ``MSFT_lod`` levels of the avatar node, so
+    glTF viewers and Unity importers get the whole LOD group from one file.
+    """
+
     asset_type = "GLB"
 
+    def __init__(
+        self,
+        unity_version: str = "2022.3",
+        scale: float = 1.0,
+        checksums: Iterable[str] = ("sha256",),
+        quantize: bool = False,
+    ) -> None:
+        super().__init__(unity_version, scale, checksums)
+        self.quantize = quantize
+
+    def options(self) -> Dict[str, object]:
+        return {**super().options(), "quantize": self.quantize}
+
     def write(
         self,
         job_id: str,
@@ -19,17 +56,45 @@ class GLBWriter(AssetWriter):
         texture_path: Path,
         rigging: RiggingResult,
         output_dir: Path,
+        resources: Optional[PackageResources] = None,
     ) -> AssetWriteResult:
         output_dir.mkdir(parents=True, exist_ok=True)
         asset_path = output_dir / f"{job_id}.glb"
-        asset_path.write_bytes(b"glTF-binary placeholder")
+        geometry = mesh.mesh
+        if geometry is None and mesh.mesh_path is not None and Path(mesh.mesh_path).suffix == MESH_SUFFIX:
+            geometry = read_mesh(mesh.mesh_path)
+        shapes = rigging.blendshapes
+        shapes_path = rigging.blendshape_path
+        if shapes is None and shapes_path is not None and Path(shapes_path).suffix == BLENDSHAPE_SUFFIX:
+            shapes = read_blendshapes(shapes_path)
+        lods = resources.lods if resources is not None and geometry is not None else []
+        embedded = [
+            (read_mesh(level.mesh_path), read_blendshapes(level.blendshape_path) if level.blendshape_path else None)
+            for level in lods[1:]
+        ]
+        # Mesh arrays, blendshapes and the PNG are all referenced in place (memory-mapped when on disk).
+        buffers = encode_glb(
+            geometry,
+            _mapped(texture_path),
+            shapes,
+            self.quantize,
+            name=job_id,
+            lods=embedded,
+            screen_coverage=[level.screen_relative_height for level in lods] if embedded else None,
+        )
+        written = self._write_asset(asset_path, buffers)
         metadata = {
             "asset_type": self.asset_type,
-            "mesh": str(mesh.mesh_path),
-            "texture": str(texture_path),
+            **self._mesh_metadata(mesh),
+            **self._texture_metadata(texture_path, resources),
+            **self._blendshape_metadata(rigging),
             "skeleton": str(rigging.skeleton_path),
+            **written,
+            "glb_quantized": self.quantize,
+            "morph_targets": _morph_target_count(geometry, shapes),
+            "embedded_lods": len(embedded),
         }
-        metadata.update(self._unity_metadata(rigging))
+        metadata.update(self._unity_metadata(rigging, resources))
         metadata_path = asset_path.with_suffix(".glb.metadata.json")
         metadata_path.write_text(json.dumps(metadata, indent=2))
         metadata["metadata_path"] = str(metadata_path)
@@ -0,0 +1,387 @@
+"""Progressive, quantized mesh stream: a coarse base mesh followed by refinement chunks.
+
+The stream is a 64-byte header and then one chunk per level, coarsest
+first. Vertices are ordered so that each chunk only appends new ones:
+the base chunk carries the vertices of the coarsest decimation level and
+every refinement chunk the vertices the next finer level adds, each group
+sorted along a Morton curve. A chunk also lists which faces of the
+current index buffer to drop and which faces to append, so a viewer can
+render as soon as the base chunk arrives and sharpen the mesh as the rest
+of the stream comes in.
+
+Positions are quantized to 16 bits over the mesh bounds, normals to
+8-bit octahedral coordinates and UVs to 16 bits over their bounds.
+Attribute and index streams are delta coded and zigzagged into
+``uint32``, then the bytes of the chunk are regrouped into planes (all
+low bytes, then the next byte, ...) before zlib, which leaves long runs
+of zeros for the compressor.
+"""
+
+from __future__ import annotations
+
+import struct
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.avatar_pipeline.lod.decimation import decimate
+from services.avatar_pipeline.models.mesh import Buffer, Mesh
+
+MESH_STREAM_MAGIC = b"APMS"
+MESH_STREAM_VERSION = 1
+MESH_STREAM_SUFFIX = ".pmesh"
+
+FLAG_NORMALS = 1
+FLAG_UVS = 2
+CHUNK_BASE = 0
+CHUNK_REFINE = 1
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+
+# magic, version, flags, chunk count, reserved, vertex count, face count, position min/max, uv min/max
+_HEADER = struct.Struct("<4sHHHHII3f3f2f2f")
+# kind, compression, level, new vertices, removed faces, added faces, payload bytes, raw bytes
+_CHUNK = struct.Struct("<BBHIIIII")
+_POSITION_STEPS = 65535
+_NORMAL_STEPS = 127
+
+
+@dataclass
+class MeshStream:
+    """Encoded stream buffers plus a description of what each chunk delivers."""
+
+    buffers: List[bytes]
+    levels: List[Dict[str, int]] = field(default_factory=list)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(buffer) for buffer in self.buffers)
+
+    @property
+    def first_render_bytes(self) -> int:
+        """Bytes a viewer needs before it can draw the base mesh."""
+
+        return self.levels[0]["stream_bytes"]
+
+
+def _zigzag(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.int64)
+    return ((values << 1) ^ (values >> 63)).astype(np.uint32)
+
+
+def _unzigzag(values: np.ndarray) -> np.ndarray:
+    values = values.astype(np.int64)
+    return (values >> 1) ^ -(values & 1)
+
+
+def _delta(values: np.ndarray) -> np.ndarray:
+    return np.diff(values.astype(np.int64), axis=0, prepend=np.zeros((1,) + values.shape[1:], dtype=np.int64))
+
+
+def _shuffle(words: np.ndarray) -> bytes:
+    return np.ascontiguousarray(words.astype("<u4").view(np.uint8).reshape(-1, 4).T).tobytes()
+
+
+def _unshuffle(data: bytes) -> np.ndarray:
+    planes = np.frombuffer(data, dtype=np.uint8).reshape(4, -1)
+    return np.ascontiguousarray(planes.T).view("<u4").reshape(-1)
+
+
+def _morton(quantized: np.ndarray) -> np.ndarray:
+    """30-bit Morton codes from the top 10 bits of each 16-bit coordinate."""
+
+    code = np.zeros(len(quantized), dtype=np.uint64)
+    coarse = (quantized >> 6).astype(np.uint64)
+    for bit in range(10):
+        for axis in range(3):
+            code |= ((coarse[:, axis] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(3 * bit + axis)
+    return code
+
+
+def _oct_encode(normals: np.ndarray) -> np.ndarray:
+    normals = normals.astype(np.float64)
+    length = np.abs(normals).sum(axis=1, keepdims=True)
+    projected = normals[:, :2] / np.where(length > 0, length, 1.0)
+    lower = normals[:, 2] < 0
+    signs = np.where(projected[lower] >= 0, 1.0, -1.0)
+    projected[lower] = (1.0 - np.abs(projected[lower][:, ::-1])) * signs
+    return np.rint(projected * _NORMAL_STEPS).astype(np.int64)
+
+
+def _oct_decode(encoded: np.ndarray) -> np.ndarray:
+    xy = encoded.astype(np.float32) / _NORMAL_STEPS
+    z = 1.0 - np.abs(xy).sum(axis=1)
+    lower = z < 0
+    signs = np.where(xy[lower] >= 0, 1.0, -1.0)
+    xy[lower] = (1.0 - np.abs(xy[lower][:, ::-1])) * signs
+    normals = np.column_stack([xy, z]).astype(np.float32)
+    length = np.linalg.norm(normals, axis=1, keepdims=True)
+    np.divide(normals, length, out=normals, where=length > 0)
+    return normals
+
+
+def _canonical(faces: np.ndarray) -> np.ndarray:
+    """Rotate each triangle to start at its smallest index (keeping the winding) and sort the rows."""
+
+    faces = faces.astype(np.int64)
+    start = faces.argmin(axis=1)
+    rotated = np.take_along_axis(faces, (start[:, None] + np.arange(3)) % 3, axis=1)
+    return rotated[np.lexsort((rotated[:, 2], rotated[:, 1], rotated[:, 0]))]
+
+
+def _face_keys(faces: np.ndarray, vertex_count: int) -> np.ndarray:
+    base = np.int64(vertex_count)
+    return (faces[:, 0] * base + faces[:, 1]) * base + faces[:, 2]
+
+
+def _encode_faces(faces: np.ndarray) -> np.ndarray:
+    first = _delta(faces[:, 0])
+    return np.column_stack([first, _zigzag(faces[:, 1] - faces[:, 0]), _zigzag(faces[:, 2] - faces[:, 0])])
+
+
+def _decode_faces(words: np.ndarray) -> np.ndarray:
+    words = words.reshape(-1, 3)
+    first = np.cumsum(words[:, 0].astype(np.int64))
+    return np.column_stack([first, first + _unzigzag(words[:, 1]), first + _unzigzag(words[:, 2])])
+
+
+def _quantize(values: np.ndarray, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+    extent = np.where(high > low, high - low, 1.0)
+    return np.rint((values - low) / extent * _POSITION_STEPS).astype(np.int64)
+
+
+def _dequantize(quantized: np.ndarray, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+    extent = np.where(high > low, high - low, 1.0).astype(np.float32)
+    return (low.astype(np.float32) + quantized.astype(np.float32) * (extent / _POSITION_STEPS)).astype(np.float32)
+
+
+def _decimation_chain(
+    mesh: Mesh,
+    ratios: Sequence[float],
+    lods: Sequence[Tuple[Mesh, np.ndarray]] = (),
+) -> List[Tuple[np.ndarray, np.ndarray]]:
+    """(source vertex ids, faces in source ids) for the full mesh and every coarser level that made progress.
+
+    ``lods`` are already decimated levels, coarser each, paired with their
+    vertices' indices in ``mesh``; decimation only continues past the last.
+    """
+
+    chain = [(np.arange(mesh.vertex_count), mesh.indices.astype(np.int64))]
+    current = mesh
+    kept_source = chain[0][0]
+    for lod, source in lods:
+        source = np.asarray(source, dtype=np.int64)
+        if len(source) != lod.vertex_count:
+            raise ValueError("Every known LOD needs the source index of each of its vertices.")
+        if lod.face_count >= current.face_count:
+            continue
+        chain.append((source, source[lod.indices]))
+        current, kept_source = lod, source
+    for ratio in ratios:
+        target = max(1, int(mesh.face_count * ratio))
+        if target >= current.face_count:
+            continue
+        lod, kept = decimate(current, target)
+        if lod.face_count >= current.face_count:
+            break
+        kept_source = kept_source[kept]
+        chain.append((kept_source, kept_source[lod.indices]))
+        current = lod
+    return chain
+
+
+def encode_mesh_stream(
+    mesh: Mesh,
+    ratios: Sequence[float] = (0.5, 0.25, 0.125, 0.0625),
+    compression_level: int = 6,
+    normals: bool = True,
+    uvs: bool = True,
+    lods: Sequence[Tuple[Mesh, np.ndarray]] = (),
+) -> MeshStream:
+    """Encode ``mesh`` as a base level (the last ratio that decimation reaches) plus refinements.
+
+    Pass the packaged LODs as ``lods`` (see :func:`_decimation_chain`) to
+    reuse them as levels instead of decimating again.
+    """
+
+    chain = _decimation_chain(mesh, ratios, lods)
+    vertex_count = mesh.vertex_count
+    position_low = mesh.vertices.min(axis=0).astype(np.float64)
+    position_high = mesh.vertices.max(axis=0).astype(np.float64)
+    uv_low = mesh.uvs.min(axis=0).astype(np.float64) if vertex_count else np.zeros(2)
+    uv_high = mesh.uvs.max(axis=0).astype(np.float64) if vertex_count else np.zeros(2)
+    positions = _quantize(mesh.vertices, position_low, position_high)
+
+    # Depth = coarsest level a vertex survives to; coarse vertices come first, Morton order within a level.
+    depth = np.zeros(vertex_count, dtype=np.int64)
+    for level, (kept, _) in enumerate(chain):
+        depth[kept] = level
+    order = np.lexsort((_morton(positions), -depth))
+    new_index = np.empty(vertex_count, dtype=np.int64)
+    new_index[order] = np.arange(vertex_count)
+    group_sizes = np.bincount(depth, minlength=len(chain))
+
+    flags = (FLAG_NORMALS if normals else 0) | (FLAG_UVS if uvs else 0)
+    header = _HEADER.pack(
+        MESH_STREAM_MAGIC,
+        MESH_STREAM_VERSION,
+        flags,
+        len(chain),
+        0,
+        vertex_count,
+        mesh.face_count,
+        *position_low.astype(np.float32),
+        *position_high.astype(np.float32),
+        *uv_low.astype(np.float32),
+        *uv_high.astype(np.float32),
+    )
+    stream = MeshStream([header])
+    total = len(header)
+    octahedral = _oct_encode(mesh.normals) if normals else None
+    uv_quantized = _quantize(mesh.uvs, uv_low, uv_high) if uvs else None
+    current = np.zeros((0, 3), dtype=np.int64)
+    first_vertex = 0
+    for step, level in enumerate(range(len(chain) - 1, -1, -1)):
+        target = _canonical(new_index[chain[level][1]])
+        current_keys = _face_keys(current, vertex_count)
+        target_keys = _face_keys(target, vertex_count)
+        removed = np.flatnonzero(~np.isin(current_keys, target_keys))
+        added = target[~np.isin(target_keys, current_keys)]
+        vertices = order[first_vertex : first_vertex + group_sizes[level]]
+        words = [_zigzag(_delta(positions[vertices])).reshape(-1)]
+        if octahedral is not None:
+            words.append(_zigzag(_delta(octahedral[vertices])).reshape(-1))
+        if uv_quantized is not None:
+            words.append(_zigzag(_delta(uv_quantized[vertices])).reshape(-1))
+        words.append(_delta(removed).astype(np.uint32))
+        words.append(_encode_faces(added).astype(np.uint32).reshape(-1))
+        raw = _shuffle(np.concatenate(words))
+        compression = COMPRESSION_ZLIB if compression_level > 0 else COMPRESSION_NONE
+        payload = zlib.compress(raw, compression_level) if compression == COMPRESSION_ZLIB else raw
+        chunk = _CHUNK.pack(
+            CHUNK_BASE if step == 0 else CHUNK_REFINE,
+            compression,
+            level,
+            len(vertices),
+            len(removed),
+            len(added),
+            len(payload),
+            len(raw),
+        )
+        stream.buffers.append(chunk + payload)
+        total += _CHUNK.size + len(payload)
+        current = np.concatenate([np.delete(current, removed, axis=0), added])
+        first_vertex += len(vertices)
+        stream.levels.append(
+            {
+                "level": level,
+                "vertex_count": first_vertex,
+                "face_count": len(current),
+                "chunk_bytes": _CHUNK.size + len(payload),
+                "stream_bytes": total,
+            }
+        )
+    return stream
+
+
+class MeshStreamDecoder:
+    """Reference decoder: feed stream bytes as they arrive and draw ``mesh()`` after every chunk."""
+
+    def __init__(self) -> None:
+        self._pending = bytearray()
+        self.flags = 0
+        self.chunk_count: Optional[int] = None
+        self.chunks_decoded = 0
+        self.level: Optional[int] = None
+        self._positions: List[np.ndarray] = []
+        self._normals: List[np.ndarray] = []
+        self._uvs: List[np.ndarray] = []
+        self._faces = np.zeros((0, 3), dtype=np.int64)
+
+    @property
+    def done(self) -> bool:
+        return self.chunk_count is not None and self.chunks_decoded == self.chunk_count
+
+    def feed(self, data: Buffer) -> int:
+        """Buffer ``data`` and decode every chunk it completes; returns how many were decoded."""
+
+        self._pending += memoryview(data).cast("B")
+        if self.chunk_count is None:
+            if len(self._pending) < _HEADER.size:
+                return 0
+            self._read_header(bytes(self._pending[: _HEADER.size]))
+            del self._pending[: _HEADER.size]
+        decoded = 0
+        while not self.done and len(self._pending) >= _CHUNK.size:
+            kind, compression, level, new_vertices, removed, added, payload_bytes, raw_bytes = _CHUNK.unpack_from(
+                self._pending
+            )
+            if len(self._pending) < _CHUNK.size + payload_bytes:
+                break
+            if (kind == CHUNK_BASE) != (self.chunks_decoded == 0):
+                raise ValueError("Mesh stream chunks are out of order.")
+            payload = bytes(self._pending[_CHUNK.size : _CHUNK.size + payload_bytes])
+            del self._pending[: _CHUNK.size + payload_bytes]
+            raw = zlib.decompress(payload) if compression == COMPRESSION_ZLIB else payload
+            if len(raw) != raw_bytes:
+                raise ValueError("Mesh stream chunk has the wrong decoded size.")
+            self._apply(_unshuffle(raw), new_vertices, removed, added)
+            self.level = level
+            self.chunks_decoded += 1
+            decoded += 1
+        return decoded
+
+    def mesh(self, name: str = "mesh_stream") -> Mesh:
+        if not self.chunks_decoded:
+            raise ValueError("No mesh stream chunk has been decoded yet.")
+        vertices = np.concatenate(self._positions)
+        normals = np.concatenate(self._normals) if self._normals else None
+        uvs = np.concatenate(self._uvs) if self._uvs else None
+        return Mesh(vertices, self._faces, uvs=uvs, normals=normals, name=name)
+
+    def _read_header(self, data: bytes) -> None:
+        fields = _HEADER.unpack(data)
+        magic, version, flags, chunk_count = fields[:4]
+        if magic != MESH_STREAM_MAGIC:
+            raise ValueError("Not a progressive mesh stream.")
+        if version != MESH_STREAM_VERSION:
+            raise ValueError(f"Unsupported mesh stream version {version}.")
+        self.flags = flags
+        self.chunk_count = chunk_count
+        self.vertex_count, self.face_count = fields[5:7]
+        self._position_low = np.array(fields[7:10])
+        self._position_high = np.array(fields[10:13])
+        self._uv_low = np.array(fields[13:15])
+        self._uv_high = np.array(fields[15:17])
+
+    def _apply(self, words: np.ndarray, new_vertices: int, removed: int, added: int) -> None:
+        offset = 0
+
+        def take(count: int) -> np.ndarray:
+            nonlocal offset
+            section = words[offset : offset + count]
+            offset += count
+            return section
+
+        positions = np.cumsum(_unzigzag(take(3 * new_vertices)).reshape(-1, 3), axis=0)
+        self._positions.append(_dequantize(positions, self._position_low, self._position_high))
+        if self.flags & FLAG_NORMALS:
+            self._normals.append(_oct_decode(np.cumsum(_unzigzag(take(2 * new_vertices)).reshape(-1, 2), axis=0)))
+        if self.flags & FLAG_UVS:
+            uvs = np.cumsum(_unzigzag(take(2 * new_vertices)).reshape(-1, 2), axis=0)
+            self._uvs.append(_dequantize(uvs, self._uv_low, self._uv_high))
+        dropped = np.cumsum(take(removed).astype(np.int64))
+        faces = _decode_faces(take(3 * added))
+        self._faces = np.concatenate([np.delete(self._faces, dropped, axis=0), faces])
+
+
+def decode_mesh_stream(data: Buffer) -> Mesh:
+    """Decode a complete stream to its finest mesh."""
+
+    decoder = MeshStreamDecoder()
+    decoder.feed(data)
+    if not decoder.done:
+        raise ValueError("Mesh stream is truncated.")
+    return decoder.mesh()
@@ -0,0 +1,73 @@
+"""Progressive mesh stream writer letting live viewers draw the avatar before the full download."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence
+
+from services.avatar_pipeline.models.mesh import MESH_SUFFIX, read_mesh
+from services.avatar_pipeline.models.pipeline import MeshResult, RiggingResult
+from services.avatar_pipeline.writers.base_writer import AssetWriteResult, AssetWriter, PackageResources
+from services.avatar_pipeline.writers.mesh_stream import MESH_STREAM_SUFFIX, encode_mesh_stream
+
+
+class ProgressiveMeshWriter(AssetWriter):
+    """Write ``<job>.pmesh``: a quantized base mesh followed by refinement chunks (see ``mesh_stream``)."""
+
+    asset_type = "PMESH"
+
+    def __init__(
+        self,
+        unity_version: str = "2022.3",
+        scale: float = 1.0,
+        checksums: Iterable[str] = ("sha256",),
+        ratios: Sequence[float] = (0.5, 0.25, 0.125, 0.0625),
+        compression_level: int = 6,
+    ) -> None:
+        super().__init__(unity_version, scale, checksums)
+        self.ratios = tuple(float(ratio) for ratio in ratios)
+        self.compression_level = compression_level
+
+    def options(self) -> Dict[str, object]:
+        return {**super().options(), "ratios": list(self.ratios), "compression_level": self.compression_level}
+
+    def write(
+        self,
+        job_id: str,
+        mesh: MeshResult,
+        texture_path: Path,
+        rigging: RiggingResult,
+        output_dir: Path,
+        resources: Optional[PackageResources] = None,
+    ) -> AssetWriteResult:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        geometry = mesh.mesh
+        if geometry is None and mesh.mesh_path is not None and Path(mesh.mesh_path).suffix == MESH_SUFFIX:
+            geometry = read_mesh(mesh.mesh_path)
+        if geometry is None:
+            raise ValueError("Progressive mesh streams need the packaged mesh.")
+        asset_path = output_dir / f"{job_id}{MESH_STREAM_SUFFIX}"
+        lods = []
+        if resources is not None:
+            # LODs built during this packaging run know their source vertices; restored ones do not.
+            lods = [
+                (read_mesh(level.mesh_path), level.source_vertices)
+                for level in resources.lods[1:]
+                if level.source_vertices is not None
+            ]
+        stream = encode_mesh_stream(geometry, self.ratios, self.compression_level, lods=lods)
+        written = self._write_asset(asset_path, stream.buffers)
+        metadata = {
+            "asset_type": self.asset_type,
+            **written,
+            **self._mesh_metadata(mesh),
+            **self._texture_metadata(texture_path, resources),
+            "first_render_bytes": stream.first_render_bytes,
+            "stream_levels": stream.levels,
+        }
+        metadata.update(self._unity_metadata(rigging, resources))
+        metadata_path = asset_path.with_suffix(f"{MESH_STREAM_SUFFIX}.metadata.json")
+        metadata_path.write_text(json.dumps(metadata, indent=2))
+        metadata["metadata_path"] = str(metadata_path)
+        return AssetWriteResult(asset_type=self.asset_type, file_path=asset_path, metadata=metadata)
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services.avatar_pipeline.artifacts.store import create_artifact_store
+from services.avatar_pipeline.models.animation import decode_clip, encode_clip, read_clip
+from services.avatar_pipeline.models.pipeline import MeshResult, RiggingResult
+from services.avatar_pipeline.rigging.clip_baker import ClipBaker, bake_clip, fit_keyframes
+from services.avatar_pipeline.writers.fbx_writer import FBXWriter
+
+
+def test_fit_keyframes_keeps_only_corners_of_piecewise_linear_curves() -> None:
+    frames = np.arange(21, dtype=np.float64)
+    ramp = np.minimum(frames / 10, 1.0)
+    keys = fit_keyframes(np.stack([ramp, np.zeros_like(frames)], axis=1), tolerance=1e-6)
+
+    assert np.flatnonzero(keys[:, 0]).tolist() == [0, 10, 20]
+    assert np.flatnonzero(keys[:, 1]).tolist() == [0, 20]
+
+
+def test_baked_clip_stays_within_tolerance_and_round_trips(tmp_path: Path) -> None:
+    frames = np.arange(241, dtype=np.float32)
+    samples = np.stack([np.sin(frames / 12) * 0.5 + 0.5, np.exp(-(((frames - 90) / 4) ** 2))], axis=1)
+    clip = bake_clip("wave", ["a", "b"], samples, fps=30, tolerance=0.01, loop=True)
+
+    assert clip.key_count < len(samples) // 2
+    assert np.abs(clip.sample() - samples).max() <= 0.01 + 1e-4
+    np.testing.assert_allclose(clip.sample([45.5])[0], (clip.sample([45])[0] + clip.sample([46])[0]) / 2, atol=1e-6)
+
+    clip.save(tmp_path / "wave.aclip")
+    loaded = read_clip(tmp_path / "wave.aclip")
+    assert (loaded.channels, loaded.loop, loaded.fps) == (("a", "b"), True, 30.0)
+    assert not loaded.times.flags.owndata
+    np.testing.assert_array_equal(loaded.sample(), clip.sample())
+    # Looping clips wrap around after their last frame.
+    np.testing.assert_allclose(loaded.sample_time(8.0 + 1.0), loaded.sample_time(1.0), atol=1e-6)
+    with pytest.raises(ValueError):
+        decode_clip(b"".join(bytes(buffer) for buffer in encode_clip(clip))[:-2])
+
+
+def test_baker_clips_are_referenced_from_unity_metadata(tmp_path: Path) -> None:
+    store = create_artifact_store("memory", tmp_path / "job")
+    rigging = RiggingResult(controls={"jaw_open": 0.0, "eye_blink_left": 0.0, "eye_blink_right": 0.0})
+    assert ClipBaker(["idle", "smile"]).bake(rigging, store) == {"idle": "rig/clips/idle", "smile": "rig/clips/smile"}
+    rigging.clip_paths = {name: store.materialize(key) for name, key in rigging.clip_keys.items()}
+
+    result = FBXWriter().write("job", MeshResult(), tmp_path / "albedo.png", rigging, tmp_path / "out")
+    clips = result.metadata["animation_clips"]
+    assert clips["idle"]["loop"] is True and clips["smile"]["loop"] is False
+    assert read_clip(Path(clips["idle"]["path"])).channels == tuple(rigging.controls)
+    with pytest.raises(ValueError):
+        ClipBaker(["backflip"])
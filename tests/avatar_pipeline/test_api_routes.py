@@ -1,3 +1,5 @@
+import pstats
+from pathlib import Path
 from typing import Optional
 
 from fastapi import FastAPI
@@ -8,19 +10,24 @@ from services.avatar_pipeline.api.routes import avatar_generation
 from services.avatar_pipeline.config.settings import Settings
 from services.avatar_pipeline.persistence.database import Database
 from services.avatar_pipeline.persistence.models import Base, JobStatus
+from services.avatar_pipeline.reconstruction.deca_runner import DecaRunner
+from services.avatar_pipeline.writers.glb_writer import GLBWriter
 
 
-def configure_test_environment(tmp_path):
+def configure_test_environment(tmp_path, **overrides):
     settings = Settings(
         database_url=f"sqlite:///{tmp_path}/avatar.db",
         temp_storage_path=tmp_path / "tmp",
         output_path=tmp_path / "output",
         asset_base_url="http://assets.test",
+        model_allow_synthetic=True,
+        **overrides,
     )
     avatar_generation.settings = settings
     avatar_generation.database = Database(settings)
     avatar_generation.database.create_schema(Base.metadata)
     avatar_generation.photo_validator = avatar_generation.PhotoValidator()
+    avatar_generation.rate_limiter = avatar_generation.TokenBucketLimiter.from_settings(settings)
 
     class ImmediateQueue:
         def __init__(self) -> None:
@@ -35,13 +42,22 @@ def configure_test_environment(tmp_path):
         def status(self, job_id: str) -> str:
             return self._statuses.get(job_id, "IDLE")
 
+        def repackage(self, job_id: str, **options) -> None:
+            self._statuses[job_id] = "RUNNING"
+            build_default_service(settings=settings).repackage(job_id, **options)
+            self._statuses[job_id] = "SUCCESS"
+
     queue = ImmediateQueue()
 
     def immediate_submit(job_id: str, settings: Optional[Settings] = None):
         queue.run(job_id)
 
+    def immediate_repackage(job_id: str, settings: Optional[Settings] = None, **options):
+        queue.repackage(job_id, **options)
+
     avatar_generation.task_queue = queue
     avatar_generation.submit_avatar_job = immediate_submit
+    avatar_generation.submit_repackage_job = immediate_repackage
 
     return settings
 
@@ -75,8 +91,8 @@ def test_create_and_query_avatar_job(tmp_path):
     assets_response = client.get(f"/avatar/jobs/{job_id}/assets")
     assert assets_response.status_code == 200
     assets = assets_response.json()
-    assert len(assets) == 2
-    assert {asset["asset_type"] for asset in assets} == {"FBX", "GLB"}
+    assert len(assets) == 7
+    assert {asset["asset_type"] for asset in assets} == {"FBX", "GLB", "PMESH", "LOD0", "LOD1", "LOD2", "LOD3"}
 
 
 def test_create_job_validation_error(tmp_path):
@@ -94,3 +110,120 @@ def test_create_job_validation_error(tmp_path):
 
     response = client.post("/avatar/jobs", json=payload)
     assert response.status_code == 400
+
+
+def test_create_job_is_rate_limited_per_user(tmp_path):
+    configure_test_environment(
+        tmp_path, rate_limit_enabled=True, rate_limit_burst=2, rate_limit_refill_per_second=0.1
+    )
+    app = FastAPI()
+    app.include_router(avatar_generation.router)
+    client = TestClient(app)
+
+    def submit(user_id, url="https://example.com/photo.jpg"):
+        payload = {
+            "user_id": user_id,
+            "photos": [{"url": url, "width": 512, "height": 512}],
+        }
+        return client.post("/avatar/jobs", json=payload)
+
+    # Rejected payloads do not take tokens.
+    assert [submit("user-a", url="").status_code for _ in range(3)] == [400, 400, 400]
+    first = submit("user-a")
+    assert first.status_code == 201
+    assert first.headers["X-RateLimit-Limit"] == "2"
+    assert first.headers["X-RateLimit-Remaining"] == "1"
+    assert submit("user-a").status_code == 201
+
+    limited = submit("user-a")
+    assert limited.status_code == 429
+    assert limited.headers["X-RateLimit-Remaining"] == "0"
+    assert 1 <= int(limited.headers["Retry-After"]) <= 10
+    assert 10 <= int(limited.headers["X-RateLimit-Reset"]) <= 20
+
+    assert submit("user-b").status_code == 201
+
+
+def test_repackage_reuses_retained_intermediates(tmp_path, monkeypatch):
+    configure_test_environment(tmp_path)
+    app = FastAPI()
+    app.include_router(avatar_generation.router)
+    client = TestClient(app)
+
+    payload = {
+        "user_id": "user-123",
+        "photos": [{"url": "https://example.com/photo.jpg", "width": 512, "height": 512}],
+    }
+    job_id = client.post("/avatar/jobs", json=payload).json()["id"]
+    before = {asset["asset_type"]: asset for asset in client.get(f"/avatar/jobs/{job_id}/assets").json()}
+
+    def not_expected(*args, **kwargs):
+        raise AssertionError("repackaging must only redo changed outputs")
+
+    monkeypatch.setattr(DecaRunner, "reconstruct", not_expected)
+    response = client.post(f"/avatar/jobs/{job_id}/repackage", json={"unity_version": "2023.2", "formats": ["glb"]})
+    assert response.status_code == 202, response.text
+    assert response.json()["status"] == JobStatus.SUCCESS.value
+
+    after = {asset["asset_type"]: asset for asset in client.get(f"/avatar/jobs/{job_id}/assets").json()}
+    assert set(after) == {"GLB", "LOD0", "LOD1", "LOD2", "LOD3"}
+    assert after["GLB"]["metadata"]["unity_version"] == "2023.2"
+    assert after["GLB"]["metadata"]["input_hash"] != before["GLB"]["metadata"]["input_hash"]
+    assert after["LOD1"]["uri"] == before["LOD1"]["uri"]
+    assert not Path(before["FBX"]["metadata"]["file_path"]).exists()
+
+    monkeypatch.setattr(GLBWriter, "write", not_expected)
+    again = client.post(f"/avatar/jobs/{job_id}/repackage", json={"unity_version": "2023.2", "formats": ["GLB"]})
+    assert again.status_code == 202
+    final = {asset["asset_type"]: asset for asset in client.get(f"/avatar/jobs/{job_id}/assets").json()}
+    assert final["GLB"]["metadata"]["input_hash"] == after["GLB"]["metadata"]["input_hash"]
+
+    assert client.post("/avatar/jobs/missing/repackage", json={}).status_code == 404
+    assert client.post(f"/avatar/jobs/{job_id}/repackage", json={"formats": ["OBJ"]}).status_code == 422
+
+
+def test_profile_flag_and_debug_endpoints_are_off_by_default(tmp_path):
+    configure_test_environment(tmp_path)
+    app = FastAPI()
+    app.include_router(avatar_generation.router)
+    client = TestClient(app)
+
+    photos = [{"url": "https://example.com/photo.jpg", "width": 512, "height": 512}]
+    job_id = client.post(
+        "/avatar/jobs", json={"user_id": "user-1", "photos": photos, "options": {"profile": True}}
+    ).json()["id"]
+
+    assert not (tmp_path / "tmp" / job_id / "profile").exists()
+    assert client.get(f"/avatar/jobs/{job_id}/debug/profile").status_code == 404
+    assert client.get(f"/avatar/jobs/{job_id}/debug/profile/profile.json").status_code == 404
+
+
+def test_profiled_job_exposes_stage_profiles_through_debug_endpoint(tmp_path):
+    configure_test_environment(tmp_path, profile_debug_enabled=True)
+    app = FastAPI()
+    app.include_router(avatar_generation.router)
+    client = TestClient(app)
+
+    photos = [{"url": "https://example.com/photo.jpg", "width": 512, "height": 512}]
+    profiled = client.post("/avatar/jobs", json={"user_id": "user-1", "photos": photos, "options": {"profile": True}})
+    plain = client.post("/avatar/jobs", json={"user_id": "user-2", "photos": photos})
+    job_id = profiled.json()["id"]
+
+    summary = client.get(f"/avatar/jobs/{job_id}/debug/profile")
+    assert summary.status_code == 200, summary.text
+    body = summary.json()
+    assert [stage["stage"] for stage in body["stages"]] == [
+        "ingestion", "preprocessing", "reconstruction", "rigging", "packaging"
+    ]
+    reconstruction = body["stages"][2]
+    assert reconstruction["top_functions"] and reconstruction["peak_traced_bytes"] > 0
+    assert "reconstruction.prof" in body["files"]
+
+    download = client.get(f"/avatar/jobs/{job_id}/debug/profile/reconstruction.prof")
+    assert download.status_code == 200
+    (tmp_path / "downloaded.prof").write_bytes(download.content)
+    assert pstats.Stats(str(tmp_path / "downloaded.prof")).total_calls > 0
+
+    assert client.get(f"/avatar/jobs/{job_id}/debug/profile/..%2Favatar.db").status_code == 404
+    assert client.get(f"/avatar/jobs/{plain.json()['id']}/debug/profile").status_code == 404
+    assert client.get("/avatar/jobs/missing/debug/profile").status_code == 404
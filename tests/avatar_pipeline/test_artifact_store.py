@@ -0,0 +1,67 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services.avatar_pipeline.artifacts.store import (
+    DiskArtifactStore,
+    InMemoryArtifactStore,
+    SharedMemoryArtifactStore,
+    create_artifact_store,
+)
+
+
+@pytest.mark.parametrize("backend", ["memory", "shared_memory", "disk"])
+def test_artifact_store_round_trips_values(tmp_path: Path, backend: str) -> None:
+    store = create_artifact_store(backend, tmp_path / "job")
+    array = np.arange(12, dtype=np.float32).reshape(3, 4)
+    store.put("mesh/vertices", array)
+    store.put("rig/skeleton", {"bones": ["root", "head"]})
+    store.put("textures/albedo.png", b"\x89PNG")
+
+    np.testing.assert_array_equal(store.get("mesh/vertices"), array)
+    assert store.get("rig/skeleton") == {"bones": ["root", "head"]}
+    assert bytes(store.get("textures/albedo.png")) == b"\x89PNG"
+    assert set(store.keys()) == {"mesh/vertices", "rig/skeleton", "textures/albedo.png"}
+
+    paths = store.checkpoint()
+    assert paths["mesh/vertices"].name == "vertices.npy"
+    np.testing.assert_array_equal(np.load(paths["mesh/vertices"]), array)
+    assert paths["textures/albedo.png"].read_bytes() == b"\x89PNG"
+    store.close()
+
+
+def test_in_memory_store_only_writes_materialized_artifacts(tmp_path: Path) -> None:
+    store = InMemoryArtifactStore(tmp_path / "job")
+    payload = np.zeros((256, 256, 3), dtype=np.uint8)
+    assert store.put("alignment/aligned_0", payload) is payload
+    store.put("rig/skeleton", {"mesh": "reconstruction/avatar_mesh.obj"})
+    assert store.bytes_written == 0
+    assert not (tmp_path / "job").exists()
+
+    path = store.materialize("rig/skeleton")
+    assert path == tmp_path / "job" / "rig" / "skeleton.json"
+    assert store.materialize("rig/skeleton") == path
+    assert store.bytes_written == path.stat().st_size
+
+
+def test_shared_memory_store_exposes_handles_and_cleans_up(tmp_path: Path) -> None:
+    store = SharedMemoryArtifactStore(tmp_path / "job", shared_dir=tmp_path / "shm")
+    (tmp_path / "shm").mkdir()
+    stored = store.put("alignment/aligned_0", np.full((4, 4), 7, dtype=np.uint8))
+
+    attached = store.handle("alignment/aligned_0").attach()
+    attached[0, 0] = 9
+    assert stored[0, 0] == 9
+
+    store.close()
+    assert os.listdir(tmp_path / "shm") == []
+    assert stored[1, 1] == 7  # views handed out earlier remain readable
+
+
+def test_disk_store_persists_on_put(tmp_path: Path) -> None:
+    store = DiskArtifactStore(tmp_path / "job")
+    store.put("reconstruction/coefficients", {"exp_0": 0.1})
+    assert (tmp_path / "job" / "reconstruction" / "coefficients.json").exists()
+    assert store.bytes_written > 0
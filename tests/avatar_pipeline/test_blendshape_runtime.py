@@ -0,0 +1,63 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services.avatar_pipeline.models.blendshapes import BlendshapeSet
+from services.avatar_pipeline.models.mesh import Mesh
+from services.avatar_pipeline.reconstruction.model_registry import synthesize_deca_weights
+from services.avatar_pipeline.rigging.arkit import ARKIT_BLENDSHAPES, arkit_deltas
+from services.avatar_pipeline.rigging.blendshape_runtime import BlendshapeRuntime
+
+
+@pytest.fixture
+def rig() -> tuple:
+    weights = synthesize_deca_weights("test-runtime", grid=(32, 32))
+    mesh = Mesh(weights["template_vertices"], weights["faces"], uvs=weights["uvs"])
+    return mesh, BlendshapeSet.from_dense(ARKIT_BLENDSHAPES, arkit_deltas(mesh))
+
+
+def test_evaluate_matches_dense_blend(rig: tuple) -> None:
+    mesh, shapes = rig
+    runtime = BlendshapeRuntime(mesh.vertices, shapes, max_frames=4)
+    frames = np.random.default_rng(0).random((6, shapes.shape_count), dtype=np.float32)
+
+    expected = mesh.vertices + np.einsum("fs,svk->fvk", frames, shapes.to_dense())
+    np.testing.assert_allclose(runtime.evaluate(frames), expected, atol=1e-6)
+    np.testing.assert_allclose(runtime.evaluate(frames[2]), expected[2], atol=1e-6)
+    # Frame buffers are reused across calls.
+    assert np.shares_memory(runtime.evaluate(frames[:2]), runtime.evaluate(frames[:1]))
+
+
+def test_incremental_update_tracks_full_evaluation(rig: tuple) -> None:
+    mesh, shapes = rig
+    runtime = BlendshapeRuntime(mesh.vertices, shapes)
+    rng = np.random.default_rng(1)
+    weights = np.zeros(shapes.shape_count, dtype=np.float32)
+    for _ in range(20):
+        weights[rng.integers(0, shapes.shape_count, 3)] = rng.random(3)
+        runtime.update(weights.copy())
+    np.testing.assert_allclose(runtime.positions, runtime.evaluate(weights), atol=1e-6)
+
+    runtime.update({"jaw_open": 1.0})
+    assert runtime.weights[ARKIT_BLENDSHAPES.index("jawOpen")] == 1.0
+    assert runtime.weights.sum() == 1.0
+    with pytest.raises(KeyError):
+        runtime.update({"not_a_control": 1.0})
+
+
+def test_load_from_writer_metadata(rig: tuple, tmp_path: Path) -> None:
+    mesh, shapes = rig
+    mesh.save(tmp_path / "neutral.amesh")
+    shapes.save(tmp_path / "shapes.ablend")
+    metadata = {
+        "mesh": "unused",
+        "neutral_mesh": str(tmp_path / "neutral.amesh"),
+        "blendshapes": str(tmp_path / "shapes.ablend"),
+    }
+    (tmp_path / "job.glb.metadata.json").write_text(json.dumps(metadata))
+
+    runtime = BlendshapeRuntime.load(tmp_path / "job.glb.metadata.json", max_frames=2)
+    np.testing.assert_array_equal(runtime.evaluate(np.zeros(52)), mesh.vertices)
+    assert runtime.controls[ARKIT_BLENDSHAPES.index("eyeBlinkLeft")] == "eye_blink_left"
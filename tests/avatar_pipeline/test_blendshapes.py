@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services.avatar_pipeline.artifacts.store import InMemoryArtifactStore, create_artifact_store
+from services.avatar_pipeline.models.blendshapes import (
+    BlendshapeSet,
+    decode_blendshapes,
+    encode_blendshapes,
+    read_blendshapes,
+)
+from services.avatar_pipeline.models.mesh import Mesh
+from services.avatar_pipeline.models.pipeline import MeshResult, RiggingResult
+from services.avatar_pipeline.reconstruction.model_registry import synthesize_deca_weights
+from services.avatar_pipeline.rigging.arkit import ARKIT_BLENDSHAPES, arkit_deltas
+from services.avatar_pipeline.rigging.blendshape_exporter import BlendshapeExporter
+from services.avatar_pipeline.rigging.rigging_engine import RiggingEngine
+
+
+def _sample_set() -> BlendshapeSet:
+    deltas = np.zeros((3, 10, 3), dtype=np.float32)
+    deltas[0, [1, 4]] = [[0.01, 0.0, -0.02], [0.0, 0.005, 0.0]]
+    deltas[2, 9] = [0.0, 0.0, 0.5]
+    return BlendshapeSet.from_dense(["a", "b", "c"], deltas, name="sample")
+
+
+def _face_mesh() -> Mesh:
+    weights = synthesize_deca_weights("test-blendshapes", grid=(48, 48))
+    return Mesh(weights["template_vertices"], weights["faces"], uvs=weights["uvs"])
+
+
+def test_from_dense_keeps_only_moved_vertices() -> None:
+    shapes = _sample_set()
+
+    assert shapes.offsets.tolist() == [0, 2, 2, 3]
+    indices, deltas, scale = shapes.shape(0)
+    assert indices.tolist() == [1, 4] and deltas.dtype == np.int16
+    assert np.abs(deltas).max() == 32767
+    np.testing.assert_allclose(shapes.dense(0)[1], [0.01, 0.0, -0.02], atol=scale)
+    assert not shapes.dense(1).any()
+
+
+def test_binary_round_trip_is_zero_copy(tmp_path: Path) -> None:
+    shapes = _sample_set()
+    path = tmp_path / "shapes.ablend"
+    shapes.save(path)
+
+    loaded = read_blendshapes(path)
+    assert loaded.names == ("a", "b", "c") and loaded.name == "sample"
+    assert not loaded.deltas.flags.owndata and not loaded.deltas.flags.writeable
+    np.testing.assert_array_equal(loaded.to_dense(), shapes.to_dense())
+    with pytest.raises(ValueError):
+        decode_blendshapes(b"".join(bytes(buffer) for buffer in encode_blendshapes(shapes))[:-4])
+
+
+def test_arkit_shapes_shrink_by_an_order_of_magnitude() -> None:
+    deltas = arkit_deltas(_face_mesh())
+    shapes = BlendshapeSet.from_dense(ARKIT_BLENDSHAPES, deltas)
+
+    assert shapes.shape_count == 52
+    assert np.diff(shapes.offsets).min() > 0
+    assert shapes.dense_nbytes / shapes.nbytes > 10
+    # Error is bounded by the dropped-vertex tolerance plus one quantization step.
+    np.testing.assert_allclose(shapes.to_dense(), deltas, atol=1e-6 + float(shapes.scales.max()))
+
+
+@pytest.mark.parametrize("backend", ["memory", "shared_memory", "disk"])
+def test_exporter_stores_sparse_set(tmp_path: Path, backend: str) -> None:
+    store = create_artifact_store(backend, tmp_path / "job")
+    mesh = _face_mesh()
+    result = RiggingEngine().rig_mesh(MeshResult(mesh=mesh, mesh_key="reconstruction/avatar_mesh"), None, store)
+
+    manifest_key = BlendshapeExporter().export(result, store)
+    assert result.shape_deltas is None
+    assert store.get(manifest_key)["shapes"] == ARKIT_BLENDSHAPES
+    assert store.materialize(result.blendshape_key).suffix == ".ablend"
+    assert isinstance(store.get(result.blendshape_key), BlendshapeSet)
+    assert "jaw_open" in result.controls and len(result.controls) == 52
+
+
+def test_exporter_requires_deltas(tmp_path: Path) -> None:
+    with pytest.raises(ValueError):
+        BlendshapeExporter().export(RiggingResult(), InMemoryArtifactStore(tmp_path))
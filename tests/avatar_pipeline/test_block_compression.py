@@ -0,0 +1,69 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services.avatar_pipeline.models.pipeline import MeshResult, RiggingResult
+from services.avatar_pipeline.textures.block_compression import DECODERS, encode_image
+from services.avatar_pipeline.textures.ktx2 import SUPERCOMPRESSION_ZLIB, read_ktx2
+from services.avatar_pipeline.textures.pyramid import TexturePyramid
+from services.avatar_pipeline.textures.texture_compressor import TextureCompressor
+from services.avatar_pipeline.writers.base_writer import PackageResources
+from services.avatar_pipeline.writers.glb_writer import GLBWriter
+
+
+def _psnr(reference: np.ndarray, decoded: np.ndarray) -> float:
+    error = np.mean((reference.astype(np.float64) - decoded.astype(np.float64)) ** 2)
+    return 10 * np.log10(255.0**2 / max(error, 1e-12))
+
+
+def _gradient(size: int) -> np.ndarray:
+    ramp = np.linspace(0, 255, size)
+    image = np.empty((size, size, 3), dtype=np.uint8)
+    image[..., 0] = ramp[None, :]
+    image[..., 1] = ramp[:, None]
+    image[..., 2] = 255 - (ramp[None, :] + ramp[:, None]) / 2
+    return image
+
+
+@pytest.mark.parametrize("fmt, min_psnr", [("bc1", 42.0), ("bc3", 42.0), ("bc7", 47.0)])
+def test_block_formats_round_trip_within_quality(fmt: str, min_psnr: float) -> None:
+    image = _gradient(256)
+    blocks = encode_image(image, fmt, band_rows=64)
+    decoded = DECODERS[fmt](blocks, 256, 256)
+
+    assert blocks.nbytes == 64 * 64 * {"bc1": 8, "bc3": 16, "bc7": 16}[fmt]
+    assert _psnr(image, decoded[..., :3]) > min_psnr
+
+
+def test_bc3_preserves_alpha_exactly_for_two_level_blocks() -> None:
+    image = np.full((8, 8, 4), 128, dtype=np.uint8)
+    image[..., 3] = np.where(np.arange(8)[None, :] < 4, 0, 255)
+    decoded = DECODERS["bc3"](encode_image(image, "bc3"), 8, 8)
+    np.testing.assert_array_equal(decoded[..., 3], image[..., 3])
+
+
+def test_compressor_writes_full_mip_chain_to_ktx2(tmp_path: Path) -> None:
+    pyramid = TexturePyramid.build(_gradient(32))
+    paths = TextureCompressor(["bc7", "bc1"]).compress(pyramid, tmp_path, "job_albedo")
+
+    texture = read_ktx2(paths["bc1"])
+    assert paths["bc1"].name == "job_albedo.bc1.ktx2"
+    assert (texture.fmt, texture.width, texture.height) == ("bc1", 32, 32)
+    assert texture.supercompression == SUPERCOMPRESSION_ZLIB
+    # 32x32 down to 1x1; levels below 4x4 still occupy one block.
+    assert [texture.level_blocks(index).shape[0] for index in range(len(texture.levels))] == [64, 16, 4, 1, 1, 1]
+    np.testing.assert_array_equal(texture.level_blocks(0), encode_image(pyramid.levels[0], "bc1"))
+    assert texture.key_values["KTXwriter"] == "avatar-pipeline"
+
+
+def test_writer_metadata_references_compressed_textures(tmp_path: Path) -> None:
+    resources = PackageResources(compressed_textures={"bc7": tmp_path / "job_albedo.bc7.ktx2"})
+    result = GLBWriter().write(
+        "job", MeshResult(), tmp_path / "albedo.png", RiggingResult(), tmp_path, resources
+    )
+
+    assert result.metadata["compressed_textures"] == {"bc7": str(tmp_path / "job_albedo.bc7.ktx2")}
+    written = json.loads(Path(result.metadata["metadata_path"]).read_text())
+    assert written["compressed_textures"]["bc7"].endswith(".bc7.ktx2")
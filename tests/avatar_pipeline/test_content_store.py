@@ -0,0 +1,56 @@
+import hashlib
+import os
+from pathlib import Path
+
+from services.avatar_pipeline.artifacts.content_store import ContentStore
+
+
+def _job(root: Path, job_id: str, unique: bytes) -> Path:
+    job_dir = root / job_id
+    job_dir.mkdir(parents=True)
+    (job_dir / f"{job_id}_albedo.bc7.ktx2").write_bytes(b"shared texture" * 1000)
+    (job_dir / f"{job_id}.glb").write_bytes(unique)
+    (job_dir / f"{job_id}.glb.metadata.json").write_text("{}")
+    return job_dir
+
+
+def test_identical_files_are_stored_once_and_hardlinked_into_jobs(tmp_path: Path) -> None:
+    store = ContentStore(tmp_path)
+    first = store.ingest("a", _job(tmp_path, "a", b"glb a"))
+    known = {"b.glb": hashlib.sha256(b"glb b").hexdigest()}
+    second = store.ingest("b", _job(tmp_path, "b", b"glb b"), known)
+
+    assert set(first) == {"a.glb", "a_albedo.bc7.ktx2"}
+    assert second["b_albedo.bc7.ktx2"].reused and not second["b.glb"].reused
+    assert first["a_albedo.bc7.ktx2"].blob_path == second["b_albedo.bc7.ktx2"].blob_path
+    assert os.path.samefile(tmp_path / "a" / "a_albedo.bc7.ktx2", tmp_path / "b" / "b_albedo.bc7.ktx2")
+    assert (tmp_path / "b" / "b.glb").read_bytes() == b"glb b"
+    assert store.reference_counts()[first["a_albedo.bc7.ktx2"].digest] == 2
+    usage = store.disk_usage()
+    assert usage["stored_bytes"] == usage["logical_bytes"] - len(b"shared texture" * 1000)
+
+
+def test_garbage_collection_frees_blobs_once_no_job_refers_to_them(tmp_path: Path) -> None:
+    store = ContentStore(tmp_path)
+    store.ingest("a", _job(tmp_path, "a", b"glb a"))
+    store.ingest("b", _job(tmp_path, "b", b"glb b"))
+
+    store.release("a", tmp_path / "a")
+    assert store.collect_garbage(grace_seconds=3600) == 0
+    assert store.collect_garbage(grace_seconds=0) == len(b"glb a")
+    assert (tmp_path / "b" / "b_albedo.bc7.ktx2").exists()
+
+    store.release("b", tmp_path / "b")
+    store.collect_garbage(grace_seconds=0)
+    assert list(store.blob_root.glob("*/*")) == []
+
+
+def test_detached_job_files_can_be_rewritten_without_touching_blobs(tmp_path: Path) -> None:
+    store = ContentStore(tmp_path)
+    job_dir = _job(tmp_path, "a", b"glb a")
+    stored = store.ingest("a", job_dir)
+
+    store.detach("a", job_dir)
+    (job_dir / "a.glb").write_bytes(b"rewritten")
+    assert stored["a.glb"].blob_path.read_bytes() == b"glb a"
+    assert store.ingest("a", job_dir)["a.glb"].digest == hashlib.sha256(b"rewritten").hexdigest()
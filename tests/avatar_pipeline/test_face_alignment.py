@@ -0,0 +1,69 @@
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from services.avatar_pipeline.artifacts.store import InMemoryArtifactStore
+from services.avatar_pipeline.models.pipeline import Photo
+from services.avatar_pipeline.preprocess.face_alignment import (
+    CANONICAL_LANDMARKS,
+    FaceAlignmentPreprocessor,
+    MomentFaceLocator,
+    estimate_similarity,
+    stack_images,
+    synthesize_face,
+)
+
+
+def test_estimate_similarity_recovers_batch_transforms():
+    angles = np.array([0.0, 0.3, -0.7])
+    scales = np.array([1.0, 2.5, 0.5])
+    shifts = np.array([[0.0, 0.0], [10.0, -4.0], [3.0, 7.0]])
+    source = np.broadcast_to(CANONICAL_LANDMARKS * 100, (3, 5, 2)).astype(np.float64)
+    rotation = np.stack(
+        [np.stack([np.cos(angles), -np.sin(angles)], -1), np.stack([np.sin(angles), np.cos(angles)], -1)],
+        axis=1,
+    )
+    target = np.einsum("nij,nkj->nki", rotation, source) * scales[:, None, None] + shifts[:, None, :]
+
+    a, src_mean, dst_mean = estimate_similarity(source, target)
+    np.testing.assert_allclose(np.abs(a), scales, rtol=1e-6)
+    np.testing.assert_allclose(np.angle(a), angles, atol=1e-6)
+
+
+def test_face_locator_finds_synthetic_face_centre():
+    photos = [Photo(url=f"https://example.com/{index}.jpg", width=400, height=300) for index in range(3)]
+    images = [synthesize_face(photo, 512) for photo in photos]
+    batch, sizes = stack_images(images)
+    landmarks = MomentFaceLocator(stride=2).detect_batch(batch, sizes)
+
+    for image, points in zip(images, landmarks):
+        ys, xs = np.nonzero(image[..., 0] > 120)
+        radius = (ys.max() - ys.min()) / 2
+        nose, eyes = points[2], points[:2].mean(axis=0)
+        assert abs(nose[0] - xs.mean()) < 5
+        assert abs(eyes[1] - (ys.mean() - 0.25 * radius)) < 10
+
+
+def test_align_decodes_local_files_into_artifact_store(tmp_path: Path):
+    local = tmp_path / "face.png"
+    source_photo = Photo(url="https://example.com/a.png", width=640, height=480)
+    Image.fromarray(synthesize_face(source_photo, 640)).save(local)
+    photos = [
+        Photo(url=source_photo.url, width=640, height=480, local_path=local),
+        Photo(url="https://example.com/b.jpg", width=300, height=900),
+    ]
+
+    store = InMemoryArtifactStore(tmp_path / "work")
+    preprocessor = FaceAlignmentPreprocessor(output_size=128, chunk_size=1)
+    aligned = preprocessor.align(photos, store)
+
+    assert len(aligned) == 2
+    assert not (tmp_path / "work").exists()
+    for index, image in enumerate(aligned):
+        assert image.pixels.shape == (128, 128, 3)
+        assert image.artifact_key == f"alignment/aligned_{index}"
+        assert store.get(image.artifact_key) is image.pixels
+        np.testing.assert_allclose(image.landmarks, preprocessor.target_landmarks, atol=1e-2)
+        # The warped crop is centred on the face, so the centre pixel is skin, not background.
+        assert image.pixels[64, 64].mean() > image.pixels[0, 0].mean()
@@ -0,0 +1,74 @@
+import io
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services.avatar_pipeline.models.blendshapes import BlendshapeSet
+from services.avatar_pipeline.models.mesh import Mesh
+from services.avatar_pipeline.models.pipeline import MeshResult, RiggingResult
+from services.avatar_pipeline.reconstruction.model_registry import synthesize_deca_weights
+from services.avatar_pipeline.rigging.arkit import ARKIT_BLENDSHAPES, arkit_deltas
+from services.avatar_pipeline.writers.glb_writer import GLBWriter
+from services.avatar_pipeline.writers.gltf_binary import encode_glb, read_accessor, read_glb, write_buffers
+
+
+def _avatar(tmp_path: Path):
+    weights = synthesize_deca_weights("glb", grid=(24, 24), n_shape=1, n_expression=1, feature_size=1)
+    mesh = Mesh(weights["template_vertices"], weights["faces"], uvs=weights["uvs"])
+    shapes = BlendshapeSet.from_dense(ARKIT_BLENDSHAPES, arkit_deltas(mesh))
+    mesh.save(tmp_path / "mesh.amesh")
+    shapes.save(tmp_path / "rig.ablend")
+    (tmp_path / "albedo.png").write_bytes(b"\x89PNG\r\n\x1a\n" + bytes(range(37)))
+    return mesh, shapes
+
+
+@pytest.mark.parametrize("quantize", [False, True])
+def test_glb_writer_round_trips_mesh_texture_and_morph_targets(tmp_path: Path, quantize: bool) -> None:
+    mesh, shapes = _avatar(tmp_path)
+    result = GLBWriter(quantize=quantize).write(
+        "job",
+        MeshResult(mesh_path=tmp_path / "mesh.amesh"),
+        tmp_path / "albedo.png",
+        RiggingResult(blendshape_path=tmp_path / "rig.ablend", controls={"jaw_open": 0.0}),
+        tmp_path / "out",
+    )
+    data = result.file_path.read_bytes()
+    assert data[:4] == b"glTF" and result.metadata["size_bytes"] == len(data)
+    assert result.metadata["morph_targets"] == shapes.shape_count
+
+    gltf, binary = read_glb(data)
+    assert all(view["byteOffset"] % 4 == 0 for view in gltf["bufferViews"])
+    primitive = gltf["meshes"][0]["primitives"][0]
+    node = gltf["nodes"][0]
+    scale = node.get("scale", [1.0])[0]
+    positions = read_accessor(gltf, binary, primitive["attributes"]["POSITION"]) * scale + node.get("translation", 0)
+    tolerance = 2 * scale / 32767 if quantize else 0
+    np.testing.assert_allclose(positions, mesh.vertices, atol=tolerance + 1e-6)
+    np.testing.assert_array_equal(read_accessor(gltf, binary, primitive["indices"]), mesh.indices.reshape(-1))
+    # Both variants store glTF's top-left UV origin and rely on no extension to get there.
+    uvs = read_accessor(gltf, binary, primitive["attributes"]["TEXCOORD_0"])
+    np.testing.assert_allclose(uvs[:, 0], mesh.uvs[:, 0], atol=1e-4)
+    np.testing.assert_allclose(uvs[:, 1], 1 - mesh.uvs[:, 1], atol=1e-4)
+    assert gltf["materials"][0]["pbrMetallicRoughness"]["baseColorTexture"] == {"index": 0}
+    assert "KHR_texture_transform" not in gltf.get("extensionsUsed", [])
+    jaw = ARKIT_BLENDSHAPES.index("jawOpen")
+    deltas = read_accessor(gltf, binary, primitive["targets"][jaw]["POSITION"]) * scale
+    np.testing.assert_allclose(deltas, shapes.dense(jaw), atol=1e-6)
+    assert gltf["meshes"][0]["extras"]["targetNames"] == list(shapes.names)
+    image = gltf["bufferViews"][gltf["images"][0]["bufferView"]]
+    assert bytes(binary[image["byteOffset"] : image["byteOffset"] + image["byteLength"]]) == (
+        tmp_path / "albedo.png"
+    ).read_bytes()
+    assert ("KHR_mesh_quantization" in gltf.get("extensionsRequired", [])) is quantize
+
+
+def test_write_buffers_streams_the_same_bytes_to_file_objects(tmp_path: Path) -> None:
+    mesh, shapes = _avatar(tmp_path)
+    buffers = encode_glb(mesh, blendshapes=shapes)
+    size = write_buffers(tmp_path / "direct.glb", buffers)
+    stream = io.BytesIO()
+    assert write_buffers(stream, buffers) == size
+    assert stream.getvalue() == (tmp_path / "direct.glb").read_bytes()
+    with pytest.raises(ValueError):
+        read_glb(stream.getvalue()[:-8])
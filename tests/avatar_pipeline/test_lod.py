@@ -0,0 +1,84 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services.avatar_pipeline.lod.decimation import boundary_vertices, decimate
+from services.avatar_pipeline.lod.lod_generator import LodGenerator
+from services.avatar_pipeline.models.blendshapes import BlendshapeSet, read_blendshapes
+from services.avatar_pipeline.models.mesh import Mesh, read_mesh
+from services.avatar_pipeline.models.pipeline import MeshResult, RiggingResult
+from services.avatar_pipeline.reconstruction.model_registry import synthesize_deca_weights
+from services.avatar_pipeline.rigging.arkit import ARKIT_BLENDSHAPES, arkit_deltas
+from services.avatar_pipeline.writers.base_writer import PackageResources
+from services.avatar_pipeline.writers.glb_writer import GLBWriter
+from services.avatar_pipeline.writers.gltf_binary import read_glb
+
+
+def _mesh(side: int = 48) -> Mesh:
+    weights = synthesize_deca_weights("lod", grid=(side, side), n_shape=1, n_expression=1, feature_size=1)
+    return Mesh(weights["template_vertices"], weights["faces"], uvs=weights["uvs"])
+
+
+def test_decimation_reaches_target_on_a_subset_of_source_vertices() -> None:
+    mesh = _mesh()
+    lod, vertex_map = decimate(mesh, mesh.face_count // 4)
+
+    assert mesh.face_count // 5 < lod.face_count <= mesh.face_count // 4
+    np.testing.assert_array_equal(lod.vertices, mesh.vertices[vertex_map])
+    np.testing.assert_array_equal(lod.uvs, mesh.uvs[vertex_map])
+    # Seam and boundary vertices are never collapsed away.
+    assert np.isin(np.flatnonzero(boundary_vertices(mesh.indices, mesh.vertex_count)), vertex_map).all()
+    # No surviving face is folded against the vertex normals it came from.
+    corners = lod.vertices[lod.indices]
+    face_normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    source_normals = mesh.normals[vertex_map][lod.indices].sum(axis=1)
+    assert (np.einsum("fk,fk->f", face_normals, source_normals) > 0).all()
+
+
+def test_blendshape_subset_matches_dense_columns() -> None:
+    mesh = _mesh(24)
+    shapes = BlendshapeSet.from_dense(ARKIT_BLENDSHAPES, arkit_deltas(mesh))
+    vertex_map = np.sort(np.random.default_rng(3).choice(mesh.vertex_count, 200, replace=False))
+
+    subset = shapes.subset(vertex_map)
+    assert subset.vertex_count == 200 and subset.names == shapes.names
+    np.testing.assert_array_equal(subset.to_dense(), shapes.to_dense()[:, vertex_map])
+
+
+def test_lod_group_is_written_and_described_in_unity_metadata(tmp_path: Path) -> None:
+    mesh = _mesh(32)
+    shapes = BlendshapeSet.from_dense(ARKIT_BLENDSHAPES, arkit_deltas(mesh))
+    levels = LodGenerator().generate("job", mesh, tmp_path, shapes)
+
+    assert [level.level for level in levels] == [0, 1, 2, 3]
+    # LOD0 is a packaged copy, not the job's temporary mesh.
+    assert levels[0].mesh_path == tmp_path / "job_lod0.amesh"
+    assert read_mesh(levels[0].mesh_path).face_count == mesh.face_count
+    assert [level.face_count for level in levels] == sorted((level.face_count for level in levels), reverse=True)
+    lod3 = read_mesh(levels[3].mesh_path)
+    lod3_shapes = read_blendshapes(levels[3].blendshape_path)
+    assert lod3.face_count <= mesh.face_count // 8
+    assert lod3_shapes.vertex_count == lod3.vertex_count
+
+    rigging = RiggingResult(controls={"jaw_open": 0.0})
+    result = GLBWriter().write(
+        "job", MeshResult(mesh=mesh), tmp_path / "albedo.png", rigging, tmp_path / "out", PackageResources(lods=levels)
+    )
+    group = result.metadata["lod_group"]["levels"]
+    assert [entry["mesh"] for entry in group] == [str(level.mesh_path) for level in levels]
+    heights = [entry["screen_relative_height"] for entry in group]
+    assert heights == sorted(heights, reverse=True)
+
+    # The GLB carries LOD1..3 as standard glTF meshes behind MSFT_lod.
+    gltf, _ = read_glb(result.file_path.read_bytes())
+    assert "MSFT_lod" in gltf["extensionsUsed"] and "MSFT_lod" not in gltf.get("extensionsRequired", [])
+    node = gltf["nodes"][0]
+    ids = node["extensions"]["MSFT_lod"]["ids"]
+    assert len(ids) == 3 and node["extras"]["MSFT_screencoverage"] == heights
+    for node_id, level in zip(ids, levels[1:]):
+        primitive = gltf["meshes"][gltf["nodes"][node_id]["mesh"]]["primitives"][0]
+        assert gltf["accessors"][primitive["attributes"]["POSITION"]]["count"] == level.vertex_count
+        assert len(primitive["targets"]) == shapes.shape_count
+    with pytest.raises(ValueError):
+        LodGenerator(ratios=(0.25, 0.5))
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services.avatar_pipeline.artifacts.store import create_artifact_store
+from services.avatar_pipeline.models.mesh import Mesh, decode_mesh, encode_mesh, read_mesh, write_mesh
+
+
+def _grid_mesh(rows: int = 4, cols: int = 5) -> Mesh:
+    v, u = np.meshgrid(np.linspace(0, 1, rows), np.linspace(0, 1, cols), indexing="ij")
+    vertices = np.stack([u, v, np.zeros_like(u)], axis=-1).reshape(-1, 3)
+    cell = (np.arange(rows - 1)[:, None] * cols + np.arange(cols - 1)[None, :]).reshape(-1)
+    faces = np.concatenate(
+        [np.stack([cell, cell + 1, cell + cols], axis=-1), np.stack([cell + 1, cell + cols + 1, cell + cols], axis=-1)]
+    )
+    uvs = np.stack([u, v], axis=-1).reshape(-1, 2)
+    return Mesh(vertices, faces, uvs=uvs, name="grid", model_version="test", source_keys=["a"])
+
+
+def test_mesh_normalizes_dtypes_and_computes_normals() -> None:
+    mesh = _grid_mesh()
+    assert mesh.vertices.dtype == np.float32 and mesh.indices.dtype == np.int32
+    np.testing.assert_allclose(mesh.normals, np.tile([0.0, 0.0, 1.0], (mesh.vertex_count, 1)), atol=1e-6)
+    with pytest.raises(AttributeError):
+        mesh.extra = 1
+
+
+def test_binary_round_trip_is_memory_mapped(tmp_path: Path) -> None:
+    mesh = _grid_mesh()
+    path = tmp_path / "grid.amesh"
+    size = write_mesh(path, mesh)
+    assert size == path.stat().st_size
+
+    loaded = read_mesh(path)
+    assert not loaded.vertices.flags.owndata and not loaded.vertices.flags.writeable
+    for name in ("vertices", "indices", "normals", "uvs"):
+        np.testing.assert_array_equal(getattr(loaded, name), getattr(mesh, name))
+    assert (loaded.name, loaded.model_version, loaded.source_keys) == ("grid", "test", ("a",))
+
+
+def test_decode_rejects_foreign_data() -> None:
+    with pytest.raises(ValueError):
+        decode_mesh(b"not a mesh at all, just bytes")
+    encoded = b"".join(encode_mesh(_grid_mesh()))
+    with pytest.raises(ValueError):
+        decode_mesh(encoded[:-8])
+
+
+@pytest.mark.parametrize("backend", ["memory", "shared_memory", "disk"])
+def test_artifact_stores_hold_meshes(tmp_path: Path, backend: str) -> None:
+    store = create_artifact_store(backend, tmp_path / "job")
+    mesh = _grid_mesh()
+    store.put("reconstruction/avatar_mesh", mesh)
+
+    restored = store.get("reconstruction/avatar_mesh")
+    np.testing.assert_array_equal(restored.vertices, mesh.vertices)
+    path = store.materialize("reconstruction/avatar_mesh")
+    assert path.suffix == ".amesh"
+    np.testing.assert_array_equal(Mesh.load(path).indices, mesh.indices)
+    store.close()
@@ -0,0 +1,81 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services.avatar_pipeline.lod.lod_generator import LodGenerator
+from services.avatar_pipeline.models.mesh import Mesh
+from services.avatar_pipeline.models.pipeline import MeshResult, RiggingResult
+from services.avatar_pipeline.reconstruction.model_registry import synthesize_deca_weights
+from services.avatar_pipeline.writers.base_writer import PackageResources
+from services.avatar_pipeline.writers.mesh_stream import MeshStreamDecoder, decode_mesh_stream, encode_mesh_stream
+from services.avatar_pipeline.writers.progressive_mesh_writer import ProgressiveMeshWriter
+
+
+def _mesh(side: int = 30) -> Mesh:
+    weights = synthesize_deca_weights("stream", grid=(side, side), n_shape=1, n_expression=1, feature_size=1)
+    return Mesh(weights["template_vertices"], weights["faces"], uvs=weights["uvs"])
+
+
+def _face_set(faces: np.ndarray) -> set:
+    # Triangles as rotation-independent tuples, keeping the winding.
+    return {tuple(np.roll(face, -int(np.argmin(face)))) for face in faces.tolist()}
+
+
+def test_stream_round_trips_the_finest_mesh_within_quantization() -> None:
+    mesh = _mesh()
+    stream = encode_mesh_stream(mesh)
+    decoded = decode_mesh_stream(b"".join(stream.buffers))
+
+    assert decoded.vertex_count == mesh.vertex_count and decoded.face_count == mesh.face_count
+    distances = np.linalg.norm(decoded.vertices[:, None, :] - mesh.vertices[None, :, :], axis=2)
+    source = distances.argmin(axis=1)
+    assert len(np.unique(source)) == mesh.vertex_count
+    extent = np.ptp(mesh.vertices, axis=0).max()
+    assert distances.min(axis=1).max() < extent / 65535
+    np.testing.assert_allclose(decoded.uvs, mesh.uvs[source], atol=1e-4)
+    assert np.einsum("vk,vk->v", decoded.normals, mesh.normals[source]).min() > 0.99
+    assert _face_set(source[decoded.indices]) == _face_set(mesh.indices)
+
+
+def test_decoder_renders_every_level_as_chunks_arrive() -> None:
+    mesh = _mesh()
+    stream = encode_mesh_stream(mesh)
+    data = b"".join(stream.buffers)
+    assert len(stream.levels) > 1 and stream.first_render_bytes < len(data) // 4
+
+    decoder = MeshStreamDecoder()
+    assert decoder.feed(data[: stream.first_render_bytes - 1]) == 0
+    starts = [stream.first_render_bytes - 1] + [level["stream_bytes"] for level in stream.levels]
+    for start, level in zip(starts, stream.levels):
+        assert decoder.feed(data[start : level["stream_bytes"]]) == 1
+        partial = decoder.mesh()
+        assert (partial.vertex_count, partial.face_count) == (level["vertex_count"], level["face_count"])
+    assert decoder.done and stream.levels[-1]["face_count"] == mesh.face_count
+
+    with pytest.raises(ValueError):
+        MeshStreamDecoder().feed(b"GLTF" + data[4:])
+
+
+def test_writer_reuses_packaged_lods_and_describes_the_stream(tmp_path: Path) -> None:
+    mesh = _mesh(40)
+    mesh.save(tmp_path / "job.amesh")
+    levels = LodGenerator().generate("job", mesh, tmp_path)
+    (tmp_path / "albedo.png").write_bytes(b"\x89PNG\r\n\x1a\n")
+
+    result = ProgressiveMeshWriter().write(
+        "job",
+        MeshResult(mesh_path=tmp_path / "job.amesh"),
+        tmp_path / "albedo.png",
+        RiggingResult(controls={}),
+        tmp_path / "out",
+        PackageResources(lods=levels),
+    )
+    data = result.file_path.read_bytes()
+    metadata = result.metadata
+    assert data[:4] == b"APMS" and metadata["size_bytes"] == len(data)
+    stream_faces = [level["face_count"] for level in metadata["stream_levels"]]
+    assert {level.face_count for level in levels} <= set(stream_faces)
+    assert stream_faces == sorted(stream_faces) and metadata["first_render_bytes"] < len(data)
+    assert json.loads(Path(metadata["metadata_path"]).read_text())["stream_levels"] == metadata["stream_levels"]
@@ -0,0 +1,112 @@
+import time
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.avatar_pipeline import build_default_service
+from services.avatar_pipeline.api.routes import metrics as metrics_route
+from services.avatar_pipeline.config.settings import Settings
+from services.avatar_pipeline.jobs.avatar_pipeline_tasks import TaskQueue
+from services.avatar_pipeline.observability.metrics import (
+    QUEUE_WAIT_SECONDS,
+    STAGE_SECONDS,
+    TASK_SECONDS,
+    WRITER_SECONDS,
+    Histogram,
+    registry,
+)
+from services.avatar_pipeline.persistence.database import Database
+from services.avatar_pipeline.persistence.models import Base
+
+PHOTO = {"url": "https://example.com/photo.jpg", "width": 512, "height": 512}
+
+
+def test_histogram_renders_cumulative_buckets_per_label_set() -> None:
+    histogram = Histogram("demo_seconds", "Demo.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 2.0):
+        histogram.observe(value, stage='a"b')
+    histogram.observe(0.2, stage="c")
+
+    lines = histogram.render()
+    assert lines[:2] == ["# HELP demo_seconds Demo.", "# TYPE demo_seconds histogram"]
+    assert 'demo_seconds_bucket{stage="a\\"b",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="a\\"b",le="1.0"} 2' in lines
+    assert 'demo_seconds_bucket{stage="a\\"b",le="+Inf"} 3' in lines
+    assert 'demo_seconds_sum{stage="a\\"b"} 2.55' in lines
+    assert 'demo_seconds_count{stage="c"} 1' in lines
+    assert histogram.count() == 4 and histogram.count(stage="c") == 1
+    with pytest.raises(ValueError):
+        histogram.observe(1.0)
+
+
+def test_pipeline_run_times_stages_writers_and_queue_wait(tmp_path: Path) -> None:
+    registry.reset()
+    settings = Settings(
+        database_url=f"sqlite:///{tmp_path}/avatar.db",
+        temp_storage_path=tmp_path / "tmp",
+        output_path=tmp_path / "output",
+        asset_base_url="http://assets.test",
+        model_allow_synthetic=True,
+    )
+    Database(settings).create_schema(Base.metadata)
+    service = build_default_service(settings)
+    job = service.repository.create_job("user-1", {"photos": [PHOTO]})
+
+    queue = TaskQueue(max_workers=1)
+
+    @queue.task("test.run")
+    def run(job_id: str) -> None:
+        service.run(job_id)
+
+    run.delay(job_id=job.id).result(timeout=30)
+
+    runs = service.repository.list_stage_runs(job.id)
+    names = [run.stage for run in runs]
+    assert [stage.name for stage in service.stages] == [name for name in names if "." not in name]
+    assert {"packaging.FBX", "packaging.GLB"} <= set(names)
+    assert all(run.outcome == "success" and run.duration_seconds >= 0 for run in runs)
+    packaging = next(run for run in runs if run.stage == "packaging")
+    assert max(run.duration_seconds for run in runs if run.stage.startswith("packaging.")) <= packaging.duration_seconds
+
+    assert STAGE_SECONDS.count(stage="reconstruction", outcome="success") == 1
+    assert WRITER_SECONDS.count(writer="GLB", outcome="success") == 1
+    assert QUEUE_WAIT_SECONDS.count(task="test.run") == 1
+    assert TASK_SECONDS.count(task="test.run", outcome="success") == 1
+
+    app = FastAPI()
+    app.include_router(metrics_route.router)
+    response = TestClient(app).get("/metrics")
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'avatar_pipeline_stage_duration_seconds_count{stage="packaging",outcome="success"} 1' in response.text
+    assert 'avatar_pipeline_queue_wait_seconds_bucket{task="test.run",le="+Inf"} 1' in response.text
+
+
+def test_failed_stage_is_recorded_with_its_outcome(tmp_path: Path) -> None:
+    registry.reset()
+    settings = Settings(
+        database_url=f"sqlite:///{tmp_path}/avatar.db",
+        temp_storage_path=tmp_path / "tmp",
+        output_path=tmp_path / "output",
+        model_allow_synthetic=True,
+    )
+    Database(settings).create_schema(Base.metadata)
+    service = build_default_service(settings)
+
+    class SlowFailingStage:
+        name = "failing"
+
+        def run(self, _context):
+            time.sleep(0.01)
+            raise RuntimeError("boom")
+
+    service.stages.insert(1, SlowFailingStage())
+    job = service.repository.create_job("user-1", {"photos": [PHOTO]})
+    with pytest.raises(RuntimeError):
+        service.run(job.id)
+
+    runs = service.repository.list_stage_runs(job.id)
+    assert [(run.stage, run.outcome) for run in runs] == [("ingestion", "success"), ("failing", "failure")]
+    assert runs[1].duration_seconds >= 0.01
+    assert STAGE_SECONDS.count(stage="failing", outcome="failure") == 1
@@ -0,0 +1,83 @@
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services.avatar_pipeline.reconstruction.deca_runner import DecaRunner
+from services.avatar_pipeline.reconstruction import model_registry
+from services.avatar_pipeline.reconstruction.model_registry import (
+    ModelRegistry,
+    get_model_registry,
+    load_model_weights,
+    save_model_weights,
+)
+
+
+def _weights(size: int):
+    return {"encoder": np.ones(size // 4, dtype=np.float32)}
+
+
+def test_registry_loads_once_and_reports_hit_rate(tmp_path: Path) -> None:
+    calls = []
+
+    def loader(path, version, mmap):
+        calls.append(version)
+        return _weights(1024), False
+
+    registry = ModelRegistry(loader=loader)
+    threads = [threading.Thread(target=registry.get, args=(tmp_path, "v1")) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = registry.stats()
+    assert calls == ["v1"]
+    assert stats.misses == 1 and stats.hits == 7
+    assert stats.hit_rate == 7 / 8
+    assert "v1" in stats.load_seconds
+
+
+def test_registry_evicts_least_recently_used_under_memory_cap(tmp_path: Path) -> None:
+    registry = ModelRegistry(memory_cap_bytes=2048, loader=lambda path, version, mmap: (_weights(1024), False))
+    registry.get(tmp_path, "v1")
+    registry.get(tmp_path, "v2")
+    registry.get(tmp_path, "v1")
+    registry.get(tmp_path, "v3")
+
+    assert registry.loaded_versions() == ("v1", "v3")
+    assert registry.stats().evictions == 1
+    assert registry.stats().resident_bytes == 2048
+
+
+def test_weights_on_disk_are_memory_mapped(tmp_path: Path) -> None:
+    save_model_weights(tmp_path / "v1", {"encoder": np.arange(6, dtype=np.float32).reshape(2, 3)})
+    arrays, memory_mapped = load_model_weights(tmp_path, "v1", mmap=True)
+    assert memory_mapped
+    assert isinstance(arrays["encoder"], np.memmap)
+
+    with pytest.raises(FileNotFoundError):
+        load_model_weights(tmp_path, "missing", mmap=True)
+    synthetic, memory_mapped = load_model_weights(tmp_path, "missing", mmap=True, allow_synthetic=True)
+    assert not memory_mapped
+    assert synthetic["shape_basis"].shape[1] == synthetic["template_vertices"].size
+
+
+def test_deca_runner_reuses_resident_model(tmp_path: Path) -> None:
+    registry = ModelRegistry(allow_synthetic=True)
+    first = DecaRunner(tmp_path, model_version="deca-test", registry=registry)
+    second = DecaRunner(tmp_path, model_version="deca-test", registry=registry)
+    assert first.load_model() is second.load_model()
+    assert registry.stats().misses == 1
+
+
+def test_process_registry_rejects_conflicting_options(monkeypatch) -> None:
+    monkeypatch.setattr(model_registry, "_registry", None)
+    registry = get_model_registry(memory_cap_bytes=4096, mmap=False)
+    assert get_model_registry() is registry
+    assert get_model_registry(memory_cap_bytes=4096, allow_synthetic=False) is registry
+    with pytest.raises(ValueError, match="memory_cap_bytes=4096"):
+        get_model_registry(memory_cap_bytes=8192)
+    with pytest.raises(ValueError, match="allow_synthetic"):
+        get_model_registry(allow_synthetic=True)
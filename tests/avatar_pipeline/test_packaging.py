@@ -0,0 +1,92 @@
+import hashlib
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services.avatar_pipeline.artifacts.content_store import ContentStore
+from services.avatar_pipeline.artifacts.store import create_artifact_store
+from services.avatar_pipeline.models.mesh import Mesh
+from services.avatar_pipeline.models.pipeline import MeshResult, PipelineContext, RiggingResult
+from services.avatar_pipeline.orchestrators.packaging_orchestrator import PackagingOrchestrator
+from services.avatar_pipeline.writers.checksums import StreamingChecksum
+from services.avatar_pipeline.writers.fbx_writer import FBXWriter
+from services.avatar_pipeline.writers.glb_writer import GLBWriter
+
+
+def _context(tmp_path: Path) -> PipelineContext:
+    store = create_artifact_store("memory", tmp_path / "artifacts")
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0]], dtype=np.float32)
+    store.put("mesh/avatar", Mesh(vertices, [[0, 1, 2]]))
+    store.put("textures/albedo.png", b"\x89PNG\r\n\x1a\n")
+    store.put("rig/skeleton", {"bones": []})
+    store.put("rig/blendshapes", {"shapes": []})
+    return PipelineContext(
+        job_id="job",
+        user_id="user",
+        mesh_result=MeshResult(mesh_key="mesh/avatar"),
+        texture_key="textures/albedo.png",
+        rigging_result=RiggingResult(skeleton_key="rig/skeleton", blendshape_key="rig/blendshapes"),
+        output_dir=tmp_path / "out",
+        artifacts=store,
+    )
+
+
+class SlowWriter(FBXWriter):
+    def __init__(self, asset_type: str, delay: float) -> None:
+        super().__init__()
+        self.asset_type = asset_type
+        self.delay = delay
+        self.threads = set()
+
+    def write(self, job_id, mesh, texture_path, rigging, output_dir, resources=None):
+        self.threads.add(threading.get_ident())
+        time.sleep(self.delay)
+        return super().write(f"{job_id}-{self.asset_type}", mesh, texture_path, rigging, output_dir, resources)
+
+
+def test_writers_run_concurrently_and_record_streamed_checksums(tmp_path: Path) -> None:
+    writers = [SlowWriter(name, 0.3) for name in ("A", "B", "C")]
+    started = time.perf_counter()
+    context = PackagingOrchestrator(writers, "http://assets.test", max_workers=3).run(_context(tmp_path))
+
+    assert time.perf_counter() - started < 0.75
+    assert len(set().union(*(writer.threads for writer in writers))) == 3
+    assert list(context.assets) == ["A", "B", "C"]
+    for asset in context.assets.values():
+        data = Path(asset["file_path"]).read_bytes()
+        assert asset["metadata"]["size_bytes"] == len(data)
+        assert asset["metadata"]["checksums"] == {"sha256": hashlib.sha256(data).hexdigest()}
+
+
+def test_glb_checksum_covers_every_streamed_buffer(tmp_path: Path) -> None:
+    context = PackagingOrchestrator([GLBWriter(checksums=["sha256", "md5"])], "http://assets.test").run(
+        _context(tmp_path)
+    )
+    asset = context.assets["GLB"]
+    data = Path(asset["file_path"]).read_bytes()
+    assert asset["metadata"]["checksums"]["md5"] == hashlib.md5(data).hexdigest()
+
+    checksum = StreamingChecksum(["sha256"])
+    for piece in (data[:5], memoryview(data)[5:]):
+        checksum.update(piece)
+    assert checksum.metadata() == {"size_bytes": len(data), "checksums": {"sha256": hashlib.sha256(data).hexdigest()}}
+    with pytest.raises(ValueError):
+        FBXWriter(checksums=["crc-1000"])
+
+
+def test_identical_outputs_share_a_content_addressed_uri(tmp_path: Path) -> None:
+    store = ContentStore(tmp_path / "out")
+    orchestrator = PackagingOrchestrator([SlowWriter("A", 0)], "http://assets.test", content_store=store)
+    contexts = [_context(tmp_path), _context(tmp_path)]
+    contexts[0].output_dir = tmp_path / "out" / "first"
+    contexts[1].output_dir = tmp_path / "out" / "second"
+    first, second = (orchestrator.run(context) for context in contexts)
+
+    uri = first.assets["A"]["uri"]
+    assert uri == second.assets["A"]["uri"]
+    assert uri.startswith("http://assets.test/blobs/")
+    assert first.assets["A"]["metadata"]["content_digest"] == first.assets["A"]["metadata"]["checksums"]["sha256"]
+    assert Path(second.assets["A"]["file_path"]).read_bytes().startswith(b"FBX placeholder")
@@ -0,0 +1,135 @@
+import asyncio
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from services.avatar_pipeline.exceptions import ValidationError
+from services.avatar_pipeline.fetch.content_cache import ContentCache
+from services.avatar_pipeline.fetch.photo_fetcher import PhotoFetcher, probe_image
+from services.avatar_pipeline.models.pipeline import Photo
+
+
+def make_png(width: int, height: int) -> bytes:
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    raw = b"".join(b"\x00" + b"\x80" * (width * 3) for _ in range(height))
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(raw))
+        + chunk(b"IEND", b"")
+    )
+
+
+class PhotoServer:
+    """Local stand-in for the photo CDN with per-request latency and ETags."""
+
+    def __init__(self, files, delay: float = 0.0) -> None:
+        self.files = files
+        self.delay = delay
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server.requests.append((self.path, self.headers.get("If-None-Match")))
+                time.sleep(server.delay)
+                body = server.files.get(self.path)
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                etag = f'"{zlib.crc32(body)}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+def _photos(server, names):
+    return [Photo(url=f"{server.base_url}/{name}", width=512, height=512) for name in names]
+
+
+def test_probe_image_reads_png_dimensions():
+    assert probe_image(make_png(300, 280)) == ("image/png", 300, 280)
+    with pytest.raises(ValidationError):
+        probe_image(b"GIF89a....")
+
+
+def test_fetcher_downloads_concurrently_and_caches(tmp_path: Path):
+    names = [f"photo_{index}.png" for index in range(5)]
+    files = {f"/{name}": make_png(256 + index, 256) for index, name in enumerate(names)}
+    with PhotoServer(files, delay=0.3) as server:
+        fetcher = PhotoFetcher(ContentCache(tmp_path / "cache"), max_concurrency=8)
+
+        started = time.perf_counter()
+        photos = fetcher.fetch_all(_photos(server, names))
+        elapsed = time.perf_counter() - started
+
+        # Five 300ms downloads overlap instead of taking 1.5s back to back.
+        assert elapsed < 1.0
+        for photo, name in zip(photos, names):
+            assert photo.local_path.read_bytes() == files[f"/{name}"]
+            assert photo.metadata["content_type"] == "image/png"
+
+        server.requests.clear()
+        refetched = fetcher.fetch_all(_photos(server, names[:1]))
+        assert refetched[0].content_hash == photos[0].content_hash
+        assert server.requests[0][1] is not None  # revalidated with If-None-Match
+
+
+def test_fetch_all_works_inside_a_running_event_loop(tmp_path: Path):
+    files = {"/photo.png": make_png(300, 300)}
+    with PhotoServer(files) as server:
+        fetcher = PhotoFetcher(ContentCache(tmp_path / "cache"))
+
+        async def called_from_coroutine():
+            return fetcher.fetch_all(_photos(server, ["photo.png"]))
+
+        photos = asyncio.run(called_from_coroutine())
+        assert photos[0].local_path.read_bytes() == files["/photo.png"]
+
+
+def test_fetcher_rejects_oversized_and_non_image_content(tmp_path: Path):
+    files = {"/big.png": make_png(512, 512), "/fake.png": b"not an image", "/tiny.png": make_png(32, 32)}
+    with PhotoServer(files) as server:
+        small_limit = PhotoFetcher(ContentCache(tmp_path / "cache"), max_bytes=64)
+        with pytest.raises(ValidationError, match="exceeds"):
+            small_limit.fetch_all(_photos(server, ["big.png"]))
+
+        fetcher = PhotoFetcher(ContentCache(tmp_path / "cache"))
+        with pytest.raises(ValidationError, match="not a supported image"):
+            fetcher.fetch_all(_photos(server, ["fake.png"]))
+        with pytest.raises(ValidationError, match="minimum resolution"):
+            fetcher.fetch_all(_photos(server, ["tiny.png"]))
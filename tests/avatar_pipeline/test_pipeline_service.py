@@ -13,6 +13,7 @@ from services.avatar_pipeline.persistence.models import Base, JobStatus
 from services.avatar_pipeline.persistence.repository import AvatarJobRepository
 from services.avatar_pipeline.preprocess.face_alignment import FaceAlignmentPreprocessor
 from services.avatar_pipeline.reconstruction.deca_runner import DecaRunner
+from services.avatar_pipeline.reconstruction.model_registry import get_model_registry
 from services.avatar_pipeline.rigging.blendshape_exporter import BlendshapeExporter
 from services.avatar_pipeline.rigging.rigging_engine import RiggingEngine
 from services.avatar_pipeline.service import AvatarPipelineService
@@ -29,6 +30,7 @@ def temp_settings(tmp_path: Path) -> Settings:
         temp_storage_path=tmp_path / "tmp",
         output_path=tmp_path / "output",
         asset_base_url="http://assets.test",
+        model_allow_synthetic=True,
     )
     return settings
 
@@ -40,7 +42,11 @@ def _build_service(settings: Settings) -> AvatarPipelineService:
     ingestion = IngestionOrchestrator(PhotoValidator())
     preprocessing = PreprocessingOrchestrator(FaceAlignmentPreprocessor())
     reconstruction = ReconstructionOrchestrator(
-        DecaRunner(settings.deca_model_path, settings.gpu_enabled),
+        DecaRunner(
+            settings.deca_model_path,
+            settings.gpu_enabled,
+            registry=get_model_registry(allow_synthetic=settings.model_allow_synthetic),
+        ),
         TextureGenerator(),
     )
     rigging = RiggingOrchestrator(RiggingEngine(), BlendshapeExporter())
@@ -116,3 +122,37 @@ def test_pipeline_service_failure_marks_job(temp_settings: Settings) -> None:
     assert stored_job is not None
     assert stored_job.status is JobStatus.FAILED
     assert stored_job.progress < 1.0
+
+
+def test_failed_repackage_keeps_job_status_and_assets(temp_settings: Settings) -> None:
+    service = _build_service(temp_settings)
+    repository = service.repository
+    job = repository.create_job(
+        user_id="user-123",
+        payload={"photos": [{"url": "https://example.com/photo.jpg", "width": 512, "height": 512}]},
+    )
+    context = service.run(job.id)
+    fbx_path = Path(context.assets["FBX"]["file_path"])
+
+    class FailingStage:
+        name = "failing"
+
+        def run(self, _context):
+            raise RuntimeError("boom")
+
+    service.stages.append(FailingStage())
+    with pytest.raises(RuntimeError):
+        service.repackage(job.id, formats=["GLB"])
+
+    stored_job = repository.get_job(job.id)
+    assert stored_job.status is JobStatus.SUCCESS
+    assert stored_job.output_payload["repackage_error"] == "boom"
+    assert {asset.asset_type for asset in repository.list_assets(job.id)} == {"FBX", "GLB"}
+    assert fbx_path.exists()
+
+    service.stages.pop()
+    service.repackage(job.id, formats=["GLB"])
+    stored_job = repository.get_job(job.id)
+    assert "repackage_error" not in stored_job.output_payload
+    assert {asset.asset_type for asset in repository.list_assets(job.id)} == {"GLB"}
+    assert not fbx_path.exists()
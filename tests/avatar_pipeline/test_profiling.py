@@ -0,0 +1,73 @@
+import cProfile
+import tracemalloc
+from pathlib import Path
+
+from services.avatar_pipeline import build_default_service
+from services.avatar_pipeline.config.settings import Settings
+from services.avatar_pipeline.observability.profiling import JobProfiler, profile_dir, should_profile
+from services.avatar_pipeline.persistence.database import Database
+from services.avatar_pipeline.persistence.models import Base
+
+
+def test_sampling_is_stable_and_honours_the_options_flag() -> None:
+    job_ids = [f"job-{index}" for index in range(2000)]
+    sampled = [job_id for job_id in job_ids if should_profile(job_id, {}, 10)]
+
+    assert 150 < len(sampled) < 250
+    assert sampled == [job_id for job_id in job_ids if should_profile(job_id, None, 10)]
+    assert not any(should_profile(job_id, {"profile": False}, 0, True) for job_id in job_ids)
+    assert should_profile("job-1", {"profile": True}, 0, allow_requested=True)
+    # Clients cannot switch profiling on unless the debug setting allows it.
+    assert not should_profile("job-1", {"profile": True}, 0)
+
+
+def test_profiler_leaves_foreign_tracing_and_shared_peaks_alone(tmp_path: Path) -> None:
+    tracemalloc.start()
+    try:
+        profiler = JobProfiler("job", tmp_path / "foreign")
+        with profiler.stage("work"):
+            pass
+        profiler.close()
+        assert tracemalloc.is_tracing()
+        assert profiler.stages[0]["peak_traced_bytes"] is None
+    finally:
+        tracemalloc.stop()
+
+    first = JobProfiler("first", tmp_path / "first")
+    second = JobProfiler("second", tmp_path / "second")
+    with first.stage("overlapped"):
+        pass
+    second.close()
+    with first.stage("alone"):
+        buffer = bytearray(1 << 20)
+    first.close()
+    del buffer
+
+    assert first.stages[0]["peak_traced_bytes"] is None
+    assert first.stages[1]["peak_traced_bytes"] >= 1 << 20
+    assert not tracemalloc.is_tracing()
+
+
+def test_unsampled_jobs_never_start_a_profiler(tmp_path: Path, monkeypatch) -> None:
+    settings = Settings(
+        database_url=f"sqlite:///{tmp_path}/avatar.db",
+        temp_storage_path=tmp_path / "tmp",
+        output_path=tmp_path / "output",
+        model_allow_synthetic=True,
+        profile_sample_every=0,
+    )
+    Database(settings).create_schema(Base.metadata)
+    service = build_default_service(settings)
+    job = service.repository.create_job(
+        "user-1", {"photos": [{"url": "https://example.com/photo.jpg", "width": 512, "height": 512}]}
+    )
+
+    def not_expected(*args, **kwargs):
+        raise AssertionError("profiling must stay off")
+
+    monkeypatch.setattr(cProfile, "Profile", not_expected)
+    monkeypatch.setattr(tracemalloc, "start", not_expected)
+    service.run(job.id)
+
+    assert not profile_dir(settings.temp_storage_path / job.id).exists()
+    assert not tracemalloc.is_tracing()
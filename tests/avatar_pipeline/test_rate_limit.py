@@ -0,0 +1,69 @@
+from services.avatar_pipeline.api.rate_limit import (
+    InMemoryRateLimitBackend,
+    InMemorySharedStore,
+    SharedRateLimitBackend,
+    TokenBucketLimiter,
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_refills_over_time():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(burst=3, refill_per_second=1.0, backend=InMemoryRateLimitBackend(clock))
+
+    assert [limiter.check("user").allowed for _ in range(4)] == [True, True, True, False]
+    denied = limiter.check("user")
+    assert denied.retry_after == 1.0
+    assert denied.reset_after == 3.0
+
+    clock.now += 1.5
+    decision = limiter.check("user")
+    assert decision.allowed
+    assert decision.remaining == 0
+    assert decision.reset_after == 2.5
+
+
+def test_shared_backend_is_consistent_across_limiters():
+    clock = FakeClock()
+    store = InMemorySharedStore(clock=clock)
+    pod_a = TokenBucketLimiter(2, 0.5, SharedRateLimitBackend(store, clock=clock))
+    pod_b = TokenBucketLimiter(2, 0.5, SharedRateLimitBackend(store, clock=clock))
+
+    assert pod_a.check("user").allowed
+    assert pod_b.check("user").allowed
+    assert not pod_a.check("user").allowed
+    assert not pod_b.check("user").allowed
+
+    clock.now += 2.0
+    assert pod_b.check("user").allowed
+
+
+def test_shared_store_expires_idle_buckets():
+    clock = FakeClock()
+    store = InMemorySharedStore(clock=clock)
+    limiter = TokenBucketLimiter(1, 1.0, SharedRateLimitBackend(store, clock=clock))
+    limiter.check("user")
+    assert store.get("avatar:ratelimit:user") is not None
+    clock.now += 5
+    assert store.get("avatar:ratelimit:user") is None
+
+
+def test_in_memory_backend_caps_buckets_by_evicting_least_recently_used():
+    clock = FakeClock()
+    backend = InMemoryRateLimitBackend(clock, max_keys=3)
+    limiter = TokenBucketLimiter(burst=1, refill_per_second=0.01, backend=backend)
+    for user in ("a", "b", "c"):
+        assert limiter.check(user).allowed
+    assert not limiter.check("a").allowed  # "a" is now the most recently used
+    for index in range(100):
+        limiter.check(f"once-{index}")
+    assert len(backend) == 3
+
+    assert limiter.check("b").allowed  # evicted, so it starts from a full bucket again
@@ -0,0 +1,58 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services.avatar_pipeline.artifacts.store import InMemoryArtifactStore
+from services.avatar_pipeline.models.pipeline import AlignedImage, Photo
+from services.avatar_pipeline.reconstruction.deca_runner import DecaRunner, pool_features
+from services.avatar_pipeline.reconstruction.model_registry import ModelRegistry
+
+
+@pytest.fixture(scope="module")
+def runner() -> DecaRunner:
+    return DecaRunner(Path("./missing-models"), model_version="deca-test", registry=ModelRegistry(allow_synthetic=True))
+
+
+def _images(count: int) -> np.ndarray:
+    rng = np.random.default_rng(7)
+    return rng.integers(0, 256, size=(count, 128, 128, 3), dtype=np.uint8)
+
+
+def test_batched_codes_match_per_image_encoding(runner: DecaRunner) -> None:
+    images = _images(5)
+    batched = runner.reconstruct_batch(images, batch_size=2)
+    model = runner.load_model()
+
+    for index, image in enumerate(images):
+        features = pool_features(image[None], 32)
+        expected = np.tanh(features @ model["encoder"] + model["encoder_bias"])[0]
+        n_shape = model["shape_basis"].shape[0]
+        np.testing.assert_allclose(batched.shape_codes[index], expected[:n_shape], rtol=1e-4, atol=1e-5)
+        np.testing.assert_allclose(batched.expression_codes[index], expected[n_shape:], rtol=1e-4, atol=1e-5)
+
+
+def test_fused_mesh_is_independent_of_batch_size(runner: DecaRunner) -> None:
+    images = _images(7)
+    one = runner.reconstruct_batch(images, batch_size=1)
+    many = runner.reconstruct_batch(images, batch_size=16)
+    np.testing.assert_allclose(one.vertices, many.vertices, atol=1e-6)
+    assert one.vertices.dtype == np.float32
+    assert one.vertices.shape == runner.load_model()["template_vertices"].shape
+    assert not np.allclose(one.vertices, one.neutral_vertices)
+
+
+def test_reconstruct_publishes_mesh_artifacts(runner: DecaRunner, tmp_path: Path) -> None:
+    photo = Photo(url="https://example.com/a.jpg", width=512, height=512)
+    aligned = [
+        AlignedImage(source_photo=photo, pixels=pixels, artifact_key=f"alignment/aligned_{index}")
+        for index, pixels in enumerate(_images(2))
+    ]
+    store = InMemoryArtifactStore(tmp_path)
+    result = runner.reconstruct(aligned, store)
+
+    mesh = store.get(result.mesh_key)
+    assert mesh is result.mesh
+    assert mesh.source_keys == ("alignment/aligned_0", "alignment/aligned_1")
+    assert np.shares_memory(mesh.indices, result.neutral_mesh.indices)
+    assert len(result.expression_coefficients) == runner.load_model()["expression_basis"].shape[0]
@@ -8,6 +8,7 @@ from services.avatar_pipeline.jobs import avatar_pipeline_tasks as tasks
 from services.avatar_pipeline.persistence.database import Database
 from services.avatar_pipeline.persistence.models import Base, JobStatus
 from services.avatar_pipeline.persistence.repository import AvatarJobRepository
+from services.avatar_pipeline.reconstruction import model_registry
 
 
 def test_submit_avatar_job_runs_pipeline(tmp_path: Path) -> None:
@@ -16,6 +17,7 @@ def test_submit_avatar_job_runs_pipeline(tmp_path: Path) -> None:
         temp_storage_path=tmp_path / "tmp",
         output_path=tmp_path / "output",
         asset_base_url="http://assets.test",
+        model_allow_synthetic=True,
     )
     database = Database(settings)
     database.create_schema(Base.metadata)
@@ -45,3 +47,23 @@ def test_submit_avatar_job_runs_pipeline(tmp_path: Path) -> None:
     assert stored_job is not None
     assert stored_job.status is JobStatus.SUCCESS
     assert stored_job.progress == pytest.approx(1.0, 0.01)
+
+
+def test_worker_preloads_with_start_worker_settings(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(tasks, "_worker_settings", None)
+    monkeypatch.setattr(tasks.task_queue, "start", lambda: None)
+
+    # Pool threads spawned by a plain submit must not create the registry with env settings.
+    tasks._preload_worker_models()
+    assert model_registry._registry is None
+
+    settings = Settings(
+        temp_storage_path=tmp_path / "tmp",
+        output_path=tmp_path / "output",
+        deca_model_path=tmp_path / "models",
+        model_allow_synthetic=True,
+    )
+    tasks.start_worker(settings)
+    tasks._preload_worker_models()
+    registry = model_registry.get_model_registry(allow_synthetic=True)
+    assert registry.loaded_versions() == (settings.deca_model_version,)
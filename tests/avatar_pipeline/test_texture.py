@@ -0,0 +1,91 @@
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from services.avatar_pipeline.artifacts.store import InMemoryArtifactStore
+from services.avatar_pipeline.models.mesh import Mesh
+from services.avatar_pipeline.models.pipeline import AlignedImage, MeshResult, Photo
+from services.avatar_pipeline.textures.pyramid import TexturePyramid, write_png
+from services.avatar_pipeline.textures.texture_engine import TextureEngine, geometry_image, rasterize_uv_layout
+from services.avatar_pipeline.textures.texture_generator import TextureGenerator
+
+
+def _quad() -> Mesh:
+    vertices = np.array([[-1, -1, 0], [1, -1, 0], [1, 1, 0], [-1, 1, 0]], dtype=np.float32)
+    uvs = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=np.float32)
+    return Mesh(vertices, [[0, 1, 2], [0, 2, 3]], uvs=uvs)
+
+
+def test_write_png_round_trips_through_pillow(tmp_path: Path) -> None:
+    image = np.random.default_rng(3).integers(0, 256, size=(37, 53, 3), dtype=np.uint8)
+    write_png(tmp_path / "image.png", image, band_rows=8)
+    with Image.open(tmp_path / "image.png") as decoded:
+        np.testing.assert_array_equal(np.asarray(decoded), image)
+
+
+def test_pyramid_box_filters_down_to_one_texel(tmp_path: Path) -> None:
+    base = np.random.default_rng(4).integers(0, 256, size=(64, 64, 3), dtype=np.uint8)
+    pyramid = TexturePyramid.build(base, spill_dir=tmp_path, spill_bytes=1024, band_rows=4)
+
+    assert [level.shape[0] for level in pyramid.levels] == [64, 32, 16, 8, 4, 2, 1]
+    assert isinstance(pyramid.levels[1], np.memmap)
+    expected = (base.reshape(32, 2, 32, 2, 3).astype(np.uint16).sum(axis=(1, 3)) + 2) // 4
+    np.testing.assert_array_equal(pyramid.levels[1], expected)
+
+
+def test_geometry_image_interpolates_surface_positions() -> None:
+    mesh = _quad()
+    geometry = geometry_image(mesh, rasterize_uv_layout(mesh.uvs, mesh.indices, 8))
+
+    assert geometry.coverage.all()
+    # Texel centres map linearly onto the quad; row 0 is the top (v = 1).
+    centres = (np.arange(8) + 0.5) / 8 * 2 - 1
+    np.testing.assert_allclose(geometry.positions[0, :, 0], centres, atol=1e-5)
+    np.testing.assert_allclose(geometry.positions[:, 0, 1], centres[::-1], atol=1e-5)
+
+
+def test_bake_blends_views_into_texture() -> None:
+    mesh = _quad()
+    red = np.zeros((64, 64, 3), dtype=np.uint8)
+    red[..., 0] = 200
+    blue = np.zeros((64, 64, 3), dtype=np.uint8)
+    blue[..., 2] = 100
+    engine = TextureEngine(resolution=32, tile_size=8, geometry_resolution=16)
+
+    pyramid = engine.bake([red, blue], [None, None], mesh)
+    assert pyramid.resolution == 32
+    np.testing.assert_allclose(pyramid.levels[0][16, 16], [100, 0, 50], atol=1)
+    np.testing.assert_allclose(pyramid.levels[-1][0, 0], [100, 0, 50], atol=1)
+
+
+def test_generator_stores_pyramid_and_materializes_png(tmp_path: Path) -> None:
+    store = InMemoryArtifactStore(tmp_path)
+    mesh = _quad()
+    photo = Photo(url="https://example.com/a.jpg", width=512, height=512)
+    pixels = np.full((64, 64, 3), 120, dtype=np.uint8)
+    images = [AlignedImage(source_photo=photo, pixels=pixels, artifact_key="alignment/aligned_0")]
+
+    key = TextureGenerator(resolution=64, tile_size=32).generate(
+        images, MeshResult(mesh=mesh, mesh_key="reconstruction/avatar_mesh"), store
+    )
+    assert store.get("textures/albedo_manifest")["mip_levels"] == 7
+    with Image.open(store.materialize(key)) as texture:
+        assert texture.size == (64, 64)
+        assert np.asarray(texture)[32, 32].tolist() == [120, 120, 120]
+
+
+def test_spilled_mip_levels_are_removed_when_the_store_closes(tmp_path: Path) -> None:
+    store = InMemoryArtifactStore(tmp_path)
+    photo = Photo(url="https://example.com/a.jpg", width=512, height=512)
+    images = [AlignedImage(source_photo=photo, pixels=np.full((64, 64, 3), 90, dtype=np.uint8))]
+    generator = TextureGenerator(engine=TextureEngine(resolution=64, tile_size=32, spill_bytes=1024))
+
+    key = generator.generate(images, MeshResult(mesh=_quad(), mesh_key="reconstruction/avatar_mesh"), store)
+    spilled = list((tmp_path / "textures" / "mips").iterdir())
+    assert spilled
+    png = store.materialize(key)
+
+    store.close()
+    assert not any(path.exists() for path in spilled)
+    assert png.exists()
@@ -0,0 +1,116 @@
+import json
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.avatar_pipeline.api.routes import avatar_generation
+from services.avatar_pipeline.config.settings import Settings
+from services.avatar_pipeline.jobs import avatar_pipeline_tasks as tasks
+from services.avatar_pipeline.observability.tracing import (
+    NON_RECORDING_SPAN,
+    OTLPJsonFileExporter,
+    SpanContext,
+    Tracer,
+    configure_tracing,
+)
+from services.avatar_pipeline.persistence.database import Database
+from services.avatar_pipeline.persistence.models import Base, JobStatus
+
+CLIENT_CONTEXT = SpanContext("4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7")
+
+
+def test_traceparent_round_trip_and_no_op_tracer() -> None:
+    assert SpanContext.from_traceparent(CLIENT_CONTEXT.traceparent()) == CLIENT_CONTEXT
+    assert SpanContext.from_traceparent("00-00000000000000000000000000000000-00f067aa0ba902b7-01") is None
+    assert SpanContext.from_traceparent("garbage") is None
+
+    tracer = Tracer()
+    with tracer.start_span("ignored") as span:
+        assert span is NON_RECORDING_SPAN and tracer.inject() == {}
+
+
+def test_otlp_json_exporter_writes_resource_spans(tmp_path: Path) -> None:
+    tracer = Tracer(OTLPJsonFileExporter(tmp_path / "traces.jsonl"))
+    with tracer.start_span("outer", parent=CLIENT_CONTEXT):
+        with tracer.start_span("inner", {"file.size": 3}):
+            pass
+
+    lines = [json.loads(line) for line in (tmp_path / "traces.jsonl").read_text().splitlines()]
+    spans = [line["resourceSpans"][0]["scopeSpans"][0]["spans"][0] for line in lines]
+    inner, outer = spans
+    assert outer["traceId"] == inner["traceId"] == CLIENT_CONTEXT.trace_id
+    assert outer["parentSpanId"] == CLIENT_CONTEXT.span_id and inner["parentSpanId"] == outer["spanId"]
+    assert inner["attributes"] == [{"key": "file.size", "value": {"intValue": "3"}}]
+    assert int(outer["endTimeUnixNano"]) >= int(inner["endTimeUnixNano"]) and outer["status"] == {"code": 1}
+
+
+def test_job_trace_connects_api_queue_stages_writers_and_io(tmp_path: Path, monkeypatch) -> None:
+    settings = Settings(
+        database_url=f"sqlite:///{tmp_path}/avatar.db",
+        temp_storage_path=tmp_path / "tmp",
+        output_path=tmp_path / "output",
+        asset_base_url="http://assets.test",
+        model_allow_synthetic=True,
+        tracing_exporter="memory",
+        trace_export_path=tmp_path / "unused.jsonl",
+    )
+    exporter = configure_tracing(settings.tracing_exporter, settings.trace_export_path).exporter
+    exporter.clear()
+    database = Database(settings)
+    database.create_schema(Base.metadata)
+    monkeypatch.setattr(avatar_generation, "settings", settings)
+    monkeypatch.setattr(avatar_generation, "database", database)
+    monkeypatch.setattr(avatar_generation, "rate_limiter", avatar_generation.TokenBucketLimiter.from_settings(settings))
+    # Jobs go through the real in-process queue so the trace crosses apply_async.
+    monkeypatch.setattr(avatar_generation, "submit_avatar_job", tasks.submit_avatar_job)
+    monkeypatch.setattr(avatar_generation, "task_queue", tasks.task_queue)
+    app = FastAPI()
+    app.include_router(avatar_generation.router)
+    client = TestClient(app)
+
+    payload = {"user_id": "user-1", "photos": [{"url": "https://example.com/photo.jpg", "width": 512, "height": 512}]}
+    response = client.post("/avatar/jobs", json=payload, headers={"traceparent": CLIENT_CONTEXT.traceparent()})
+    assert response.status_code == 201, response.text
+    assert SpanContext.from_traceparent(response.headers["traceparent"]).trace_id == CLIENT_CONTEXT.trace_id
+    job_id = response.json()["id"]
+    deadline = time.monotonic() + 60
+    while avatar_generation.get_repository().get_job(job_id).status is not JobStatus.SUCCESS:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    while not any(span.name == "task avatar_pipeline.run" for span in exporter.trace(CLIENT_CONTEXT.trace_id)):
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    spans = exporter.trace(CLIENT_CONTEXT.trace_id)
+    by_id = {span.context.span_id: span for span in spans}
+    named = {span.name: span for span in spans}
+
+    def ancestors(span):
+        while span.parent_span_id in by_id:
+            span = by_id[span.parent_span_id]
+            yield span.name
+
+    server = named["POST /avatar/jobs"]
+    assert server.parent_span_id == CLIENT_CONTEXT.span_id
+    wait, task = named["queue.wait avatar_pipeline.run"], named["task avatar_pipeline.run"]
+    assert wait.parent_span_id == task.parent_span_id == server.context.span_id
+    assert wait.end_ns <= task.start_ns
+    run = named["pipeline.run"]
+    for stage in ("ingestion", "preprocessing", "reconstruction", "rigging", "packaging"):
+        # Stages hang directly off the job, not off a DB span held open across it.
+        assert named[f"stage {stage}"].parent_span_id == run.context.span_id
+    assert "stage packaging" in ancestors(named["writer GLB"])
+    writes = [span for span in spans if span.name == "file.write"]
+    assert any("writer GLB" in ancestors(span) for span in writes)
+    assert all(span.attributes["file.size"] > 0 for span in writes)
+    statements = [span for span in spans if span.name == "db.statement"]
+    assert any("pipeline.run" in ancestors(span) for span in statements)
+    assert sum(span.name == "db.commit" for span in spans) >= 2
+    db_ids = {span.context.span_id for span in spans if span.name.startswith("db.")}
+    assert not any(span.parent_span_id in db_ids for span in spans if not span.name.startswith("db."))
+    assert all(span.parent_span_id in by_id for span in spans if span is not server)
+    assert all(span.status == "OK" for span in spans)
+
+    configure_tracing("none")
@@ -0,0 +1,153 @@
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services.avatar_pipeline.artifacts.content_store import ContentStore
+from services.avatar_pipeline.artifacts.store import create_artifact_store
+from services.avatar_pipeline.exceptions import StageExecutionError
+from services.avatar_pipeline.models.mesh import Mesh
+from services.avatar_pipeline.models.pipeline import MeshResult, PipelineContext, RiggingResult
+from services.avatar_pipeline.orchestrators.packaging_orchestrator import PackagingOrchestrator
+from services.avatar_pipeline.orchestrators.upload_orchestrator import UploadOrchestrator
+from services.avatar_pipeline.upload.multipart_uploader import MultipartUploader
+from services.avatar_pipeline.upload.object_store import (
+    FileObjectStore,
+    composite_checksum,
+    create_object_store,
+    part_checksum,
+)
+from services.avatar_pipeline.writers.fbx_writer import FBXWriter
+from services.avatar_pipeline.writers.glb_writer import GLBWriter
+
+
+class FlakyStore(FileObjectStore):
+    """Fails chosen part numbers once, corrupts the ETag it returns for them, or receives them damaged."""
+
+    def __init__(self, root: Path, fail_parts=(), corrupt_parts=(), damaged_parts=()) -> None:
+        super().__init__(root)
+        self.fail_parts = set(fail_parts)
+        self.corrupt_parts = set(corrupt_parts)
+        self.damaged_parts = set(damaged_parts)
+        self.uploaded = []
+
+    def upload_part(self, key, upload_id, part_number, data, checksum):
+        if part_number in self.fail_parts:
+            self.fail_parts.discard(part_number)
+            raise ConnectionError("connection reset")
+        if part_number in self.damaged_parts:
+            data = bytes([data[0] ^ 1]) + data[1:]
+        etag = super().upload_part(key, upload_id, part_number, data, checksum)
+        self.uploaded.append(part_number)
+        return "0" * 32 if part_number in self.corrupt_parts else etag
+
+
+def _context(tmp_path: Path) -> PipelineContext:
+    store = create_artifact_store("memory", tmp_path / "artifacts")
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0]], dtype=np.float32)
+    store.put("mesh/avatar", Mesh(vertices, [[0, 1, 2]]))
+    store.put("textures/albedo.png", b"\x89PNG\r\n\x1a\n")
+    store.put("rig/skeleton", {"bones": []})
+    store.put("rig/blendshapes", {"shapes": []})
+    return PipelineContext(
+        job_id="job",
+        user_id="user",
+        mesh_result=MeshResult(mesh_key="mesh/avatar"),
+        texture_key="textures/albedo.png",
+        rigging_result=RiggingResult(skeleton_key="rig/skeleton", blendshape_key="rig/blendshapes"),
+        output_dir=tmp_path / "out",
+        artifacts=store,
+    )
+
+
+def _payload(tmp_path: Path, size: int) -> Path:
+    path = tmp_path / "avatar.glb"
+    path.write_bytes(os.urandom(size))
+    return path
+
+
+def test_large_files_upload_in_verified_parts(tmp_path: Path) -> None:
+    source = _payload(tmp_path, 10_000)
+    small = tmp_path / "avatar.metadata.json"
+    small.write_text("{}")
+    store = FileObjectStore(tmp_path / "bucket")
+    uploader = MultipartUploader(store, tmp_path / "journal", part_size=1024, max_workers=4)
+    sha256 = hashlib.sha256(source.read_bytes()).hexdigest()
+
+    results = uploader.upload({"job/avatar.glb": source, "job/meta.json": small}, {"job/avatar.glb": {"sha256": sha256}})
+
+    assert (results["job/avatar.glb"].parts, results["job/meta.json"].parts) == (10, 1)
+    assert (tmp_path / "bucket/job/avatar.glb").read_bytes() == source.read_bytes()
+    info = store.head("job/avatar.glb")
+    assert info.metadata == {"sha256": sha256}
+    assert info.checksum == composite_checksum(
+        [part_checksum(source.read_bytes()[offset : offset + 1024]) for offset in range(0, 10_000, 1024)]
+    )
+    assert results["job/avatar.glb"].uri == (tmp_path / "bucket/job/avatar.glb").resolve().as_uri()
+    assert not list((tmp_path / "journal").glob("*.json"))
+
+    again = uploader.upload({"job/avatar.glb": source}, {"job/avatar.glb": {"sha256": sha256}})
+    assert again["job/avatar.glb"].skipped
+
+
+def test_interrupted_upload_resumes_from_the_journal(tmp_path: Path) -> None:
+    source = _payload(tmp_path, 8 * 1024)
+    store = FlakyStore(tmp_path / "bucket", fail_parts={5})
+    uploader = MultipartUploader(store, tmp_path / "journal", part_size=1024, max_workers=1, retries=0)
+
+    with pytest.raises(ConnectionError):
+        uploader.upload({"avatar.glb": source})
+    assert uploader.journal_path("avatar.glb").exists()
+    assert store.head("avatar.glb") is None
+    first_attempt = sorted(store.uploaded)
+
+    store.uploaded.clear()
+    result = uploader.upload({"avatar.glb": source})["avatar.glb"]
+
+    assert sorted(store.uploaded) == sorted(set(range(1, 9)) - set(first_attempt))
+    assert result.uploaded_parts == len(store.uploaded) < result.parts == 8
+    assert (tmp_path / "bucket/avatar.glb").read_bytes() == source.read_bytes()
+    assert not uploader.journal_path("avatar.glb").exists()
+
+
+def test_checksum_mismatches_fail_the_upload(tmp_path: Path) -> None:
+    source = _payload(tmp_path, 4096)
+    store = FlakyStore(tmp_path / "bucket", corrupt_parts={2})
+    uploader = MultipartUploader(store, tmp_path / "journal", part_size=1024, retries=1, retry_backoff=0)
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        uploader.upload({"avatar.glb": source})
+
+    # Bytes damaged on the way fail the store's SHA-256 check, so nothing is published.
+    store = FlakyStore(tmp_path / "other", damaged_parts={3})
+    uploader = MultipartUploader(store, tmp_path / "journal2", part_size=1024, retries=0)
+    with pytest.raises(ValueError, match="SHA-256"):
+        uploader.upload({"avatar.glb": source})
+    assert not (tmp_path / "other/avatar.glb").exists()
+
+
+def test_upload_stage_rewrites_asset_uris_to_the_bucket(tmp_path: Path) -> None:
+    context = _context(tmp_path)
+    packaging = PackagingOrchestrator(
+        [FBXWriter(), GLBWriter()], "http://assets.test", content_store=ContentStore(tmp_path)
+    )
+    context = packaging.run(context)
+    store = create_object_store(f"file://{tmp_path / 'bucket'}")
+    stage = UploadOrchestrator(MultipartUploader(store, tmp_path / "journal", part_size=256))
+    context = stage.run(context)
+
+    for asset in context.assets.values():
+        key = asset["metadata"]["object_key"]
+        assert key.startswith("blobs/")
+        assert asset["uri"] == store.url(key)
+        assert (tmp_path / "bucket" / key).read_bytes() == Path(asset["file_path"]).read_bytes()
+    metadata = (tmp_path / "out/job.glb.metadata.json").read_bytes()
+    assert (tmp_path / "bucket/job/job.glb.metadata.json").read_bytes() == metadata
+    # The packaging state records worker paths and stays on the worker.
+    assert (tmp_path / "out/job_packaging.metadata.json").exists()
+    assert not (tmp_path / "bucket/job/job_packaging.metadata.json").exists()
+
+    failing = FlakyStore(tmp_path / "failing", fail_parts={1})
+    with pytest.raises(StageExecutionError, match="Upload failed"):
+        UploadOrchestrator(MultipartUploader(failing, tmp_path / "journal", part_size=256, retries=0)).run(context)
@@ -36,3 +36,32 @@ def test_photo_validator_rejects_low_resolution():
                 }
             ]
         )
+
+
+def test_photo_validator_caches_url_checks():
+    validator = PhotoValidator()
+    photo = {"url": "https://example.com/cached-photo.png", "width": 512, "height": 512}
+    before = validator.cache_info()
+    validator.validate([photo, photo, photo])
+    info = validator.cache_info()
+    assert info.misses - before.misses == 1
+    assert info.hits - before.hits == 2
+
+
+def test_photo_validator_shares_format_cache_across_instances():
+    photo = {"url": "https://example.com/shared-photo.jpg", "width": 512, "height": 512}
+    # The API and each job's service build their own validator; the second one reuses the first's checks.
+    validated = PhotoValidator().validate([photo])
+    before = PhotoValidator.cache_info()
+    assert PhotoValidator().validate([photo]) == validated
+    assert PhotoValidator.cache_info().hits - before.hits == 1
+
+
+def test_photo_validator_returns_validated_photos_unchanged():
+    validator = PhotoValidator()
+    validated = validator.validate([{"url": "https://example.com/photo.jpg", "width": 512, "height": 512}])
+    assert validator.validate(validated)[0] is validated[0]
+
+    tampered = [dict(url="https://example.com/photo.jpg", width=64, height=512)]
+    with pytest.raises(ValidationError):
+        validator.validate(tampered)
@@ -4,3 +4,15 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parent.parent
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+import pytest
+
+from services.avatar_pipeline.reconstruction import model_registry
+
+
+@pytest.fixture(autouse=True)
+def reset_model_registry():
+    """Give every test a fresh process-wide registry so its options are never pinned by an earlier test."""
+    model_registry._registry = None
+    yield
+    model_registry._registry = None